@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -9,12 +10,71 @@ import os
 # os.path.dirname(os.path.dirname(os.path.abspath(__file__))) -> backend/
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'test_management.db')}"
+# Same database through the aiosqlite driver, used by the async FastAPI routes
+ASYNC_SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{os.path.join(BASE_DIR, 'test_management.db')}"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+# Pragmas applied to every new SQLite connection.
+# WAL lets readers run while a write is in progress; synchronous=NORMAL is durable in WAL mode
+# except for the last transactions on power loss; busy_timeout makes writers wait for the lock
+# instead of failing with "database is locked".
+SQLITE_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("busy_timeout", "5000"),
+    ("mmap_size", str(256 * 1024 * 1024)),
+    ("cache_size", "-65536"),  # negative = KiB, i.e. 64 MB page cache per connection
+    ("temp_store", "MEMORY"),
 )
+
+# Connection pool: SQLite connections are cheap to open but lose their page cache and mmap when closed
+DB_POOL_SIZE = int(os.environ.get("PM_DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("PM_DB_MAX_OVERFLOW", 20))
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def create_db_engine(database_url=SQLALCHEMY_DATABASE_URL, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW):
+    """
+    Create an engine configured for concurrent use of a SQLite database file.
+    """
+    db_engine = create_engine(
+        database_url,
+        connect_args={"check_same_thread": False, "timeout": 30},
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+    )
+    event.listen(db_engine, "connect", _apply_sqlite_pragmas)
+    return db_engine
+
+
+def create_async_db_engine(database_url=ASYNC_SQLALCHEMY_DATABASE_URL, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW):
+    """
+    Async counterpart of create_db_engine(): aiosqlite runs each connection in its own thread,
+    so queries never block the event loop.
+    """
+    db_engine = create_async_engine(
+        database_url,
+        connect_args={"timeout": 30},
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+    )
+    # Pool events are registered on the sync facade of the async engine
+    event.listen(db_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return db_engine
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_db_engine()
+# expire_on_commit=False: returned objects stay readable after commit without another (awaited) load
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency to get DB session
@@ -24,3 +84,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
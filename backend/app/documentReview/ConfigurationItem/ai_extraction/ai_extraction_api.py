@@ -2,23 +2,58 @@
 AI需求提取相关API路由
 """
 from flask import Blueprint, request, jsonify
+import hashlib
+import json
 import logging
 import os
 import uuid
-from datetime import datetime
-from werkzeug.utils import secure_filename
-from .extractor import ai_extract_requirements
+from .extractor import ai_extract_requirements, DEFAULT_EXTRACTION_PARAMS
 from .utils import get_config
+from app.documentReview.common.results_catalog import get_results_catalog
+from app.documentReview.common.review_cache import model_id_from_config
+from app.documentReview.common.blob_store import upload_content_hash
+from app.documentReview.common.file_registry import resolve_upload
+from app.documentReview.common.job_queue import get_job_queue, job_accepted_response
+from app.projectManagement.requirement_store import record_requirements
+from app.projectManagement.document_status import on_job_status
 
 ai_extraction_bp = Blueprint('ai_extraction', __name__)
 
+# 后台任务类型
+JOB_AI_EXTRACT = "ci_ai_extract"
+
+def _base_upload_folder():
+    """上传根目录，与upload_api.py保持一致"""
+    default_base_uploads = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'uploads')
+    return get_config().get('UPLOAD_FOLDER', default_base_uploads)
+
+def extraction_reuse_key(model):
+    """
+    提取结果的复用条件：实际使用的模型标识和影响提取结果的参数摘要
+    请求未指定模型时按配置解析，配置的默认模型或提取参数变化后不再复用旧结果
+    返回: (模型标识, 参数摘要)
+    """
+    config = get_config()
+    model_id = f"{config.get('provider', 'openai')}:{model}" if model else model_id_from_config(config)
+    extract_params = config.get("extraction_params", {})
+    params = {key: extract_params.get(key, default) for key, default in DEFAULT_EXTRACTION_PARAMS.items()}
+    params_hash = hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return model_id, params_hash
+
+def _results_catalog():
+    """获取提取结果目录，首次使用时导入旧版本results目录中的JSON结果"""
+    catalog = get_results_catalog()
+    catalog.import_json_results(os.path.join(_base_upload_folder(), 'results'))
+    return catalog
+
 @ai_extraction_bp.route('/ai_extract', methods=['POST'])
 def ai_extract_requirements_api():
     """
     AI需求提取接口
     使用AI技术提取需求详情
-    接收：file_id, file_name, [model]
-    返回：提取的需求详情
+    接收：file_id, file_name, [model], [reuse]
+    返回：内容未变化时直接返回复用的提取结果；否则提交后台提取任务，返回任务ID和会话ID（202），
+    通过 /jobs/<job_id> 查询进度，任务结果为提取的需求详情
     """
     try:
         data = request.json
@@ -30,98 +65,155 @@ def ai_extract_requirements_api():
             logging.error(f"AI Extraction: 'file_name' is missing in the request. file_id='{file_id}'")
             return jsonify({'success': False, 'error': "'file_name' is required."}), 400
 
-        # Apply secure_filename to the received filename to match the on-disk version
-        secured_request_filename = secure_filename(original_file_name_from_request)
-        if not secured_request_filename:
-            # This might happen if secure_filename removes all characters (e.g. if filename was just '..')
-            logging.error(f"AI Extraction: secure_filename resulted in empty string for '{original_file_name_from_request}'. file_id='{file_id}'")
-            return jsonify({'success': False, 'error': 'Invalid file_name resulting in empty secure name.'}), 400
+        # 按file_id从上传文件登记表中查找，任一应用上传的文件都可以使用
+        file_path = resolve_upload(file_id)
+        logging.info(f"AI Extraction: Resolved file_id='{file_id}' to: {file_path}")
 
-        # Determine the base upload folder, consistent with upload_api.py's potential default
-        default_base_uploads = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'uploads')
-        base_upload_folder = get_config().get('UPLOAD_FOLDER', default_base_uploads)
-        
-        # Target the 'configuration_item' subfolder
-        config_item_upload_folder = os.path.join(base_upload_folder, 'configuration_item')
-        
-        # Construct the expected filename as saved by upload_api.py
-        expected_filename_on_disk = f"{file_id}_{secured_request_filename}"
-        file_path = os.path.join(config_item_upload_folder, expected_filename_on_disk)
-        
-        logging.info(f"AI Extraction: Attempting to access file at: {file_path}")
+        if not file_path:
+            logging.error(f"AI Extraction: File not found. Original request filename='{original_file_name_from_request}', file_id='{file_id}'")
+            return jsonify({'success': False, 'error': f'File not found on server. file_id: {file_id}'}), 404
 
-        if not os.path.exists(file_path):
-            logging.error(f"AI Extraction: File not found at {file_path}. Original request filename='{original_file_name_from_request}', secured='{secured_request_filename}', file_id='{file_id}'")
-            return jsonify({'success': False, 'error': f'File not found on server. Path: {file_path}'}), 404
+        # 文档内容与最近一次提取相同时直接复用结果，请求中reuse为false时强制重新提取
+        catalog = _results_catalog()
+        content_hash = upload_content_hash(file_id, file_path)
+        if data.get('reuse', True):
+            model_id, params_hash = extraction_reuse_key(model)
+            reusable = catalog.find_reusable(content_hash, model_id, params_hash)
+            if reusable:
+                logging.info(f"文档 {original_file_name_from_request} 内容未变化，复用会话 {reusable['session_id']} 的提取结果")
+                return jsonify({
+                    'success': True,
+                    'session_id': reusable['session_id'],
+                    'requirements': reusable['requirements'],
+                    'reused': True,
+                    'extracted_at': reusable['timestamp']
+                })
 
-        logging.info(f"正在使用AI提取文档需求: {original_file_name_from_request} ({file_id}) from path {file_path}")
         session_id = str(uuid.uuid4())
-        requirements_data = ai_extract_requirements(file_path, model)
-        requirements = []
-        if isinstance(requirements_data, list):
-            for req in requirements_data:
-                if isinstance(req, dict):
-                    name = req.get("name", req.get("title", ""))
-                    chapter = req.get("chapter", req.get("chapter_number", ""))
-                    content = req.get("content", "")
-                    if isinstance(content, dict):
-                        content_str = ""
-                        if 'b' in content:
-                            content_str += content['b'] + "\n\n"
-                        if 'c' in content:
-                            content_str += f"进入条件: {content['c']}\n\n"
-                        if 'd' in content:
-                            content_str += f"输入: {content['d']}\n\n"
-                        if 'e' in content:
-                            content_str += f"输出: {content['e']}\n\n"
-                        if 'f' in content:
-                            content_str += f"处理: {content['f']}\n\n"
-                        if 'g' in content:
-                            content_str += f"性能: {content['g']}\n\n"
-                        if 'h' in content:
-                            content_str += f"约束与限制: {content['h']}"
-                    elif isinstance(content, str):
-                        content_str = content
-                    else:
-                        content_str = str(content)
-                    if not content_str.strip():
-                        content_str = f"需求: {name}" if name else "未提取到需求内容"
-                    requirements.append({
-                        "name": name,
-                        "chapter": chapter,
-                        "content": content_str
-                    })
-                elif isinstance(req, str):
-                    requirements.append({
-                        "name": f"需求_{len(requirements)+1}",
-                        "chapter": "",
-                        "content": req
-                    })
-        if not requirements:
-            logging.warning(f"没有从文件 {original_file_name_from_request} 中提取到需求")
-            return jsonify({
-                'success': False, 
-                'error': '未提取到需求，请检查文档格式或内容'
-            }), 400
-        # 记录处理结果
-        result_folder = os.path.join(base_upload_folder, 'results')
-        os.makedirs(result_folder, exist_ok=True)
-        result_path = os.path.join(result_folder, f"{session_id}.json")
-        with open(result_path, 'w', encoding='utf-8') as f:
-            import json
-            json.dump({
-                'session_id': session_id,
-                'file_id': file_id,
-                'file_name': original_file_name_from_request,
-                'requirements': requirements,
-                'timestamp': datetime.now().isoformat()
-            }, f, ensure_ascii=False, indent=2)
-        logging.info(f"配置项测试需求提取完成，共找到 {len(requirements)} 个需求")
-        return jsonify({
-            'success': True,
-            'session_id': session_id,
-            'requirements': requirements
-        })
+        job = get_job_queue().submit(JOB_AI_EXTRACT, {
+            'file_id': file_id,
+            'file_name': original_file_name_from_request,
+            'model': model,
+            'content_hash': content_hash
+        }, stage="extract", file_id=file_id, session_id=session_id)
+        return job_accepted_response(job, 'jobs', session_id=session_id)
     except Exception as e:
         logging.exception(f"配置项测试提取需求出错: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
+
+def run_ai_extract_job(job):
+    """
+    后台执行AI需求提取任务，结果与原同步接口的响应相同；未提取到需求时任务失败
+    """
+    payload = job.payload
+    file_id = payload['file_id']
+    original_file_name_from_request = payload['file_name']
+    model = payload.get('model')
+    session_id = job.session_id
+    model_id, params_hash = extraction_reuse_key(model)
+
+    file_path = resolve_upload(file_id)
+    if not file_path:
+        raise FileNotFoundError(f'File not found on server. file_id: {file_id}')
+
+    logging.info(f"正在使用AI提取文档需求: {original_file_name_from_request} ({file_id}) from path {file_path}")
+    job.progress(message="正在使用AI提取需求")
+    requirements_data = ai_extract_requirements(file_path, model)
+    job.check_cancelled()
+    requirements = []
+    if isinstance(requirements_data, list):
+        for req in requirements_data:
+            if isinstance(req, dict):
+                name = req.get("name", req.get("title", ""))
+                chapter = req.get("chapter", req.get("chapter_number", ""))
+                content = req.get("content", "")
+                if isinstance(content, dict):
+                    content_str = ""
+                    if 'b' in content:
+                        content_str += content['b'] + "\n\n"
+                    if 'c' in content:
+                        content_str += f"进入条件: {content['c']}\n\n"
+                    if 'd' in content:
+                        content_str += f"输入: {content['d']}\n\n"
+                    if 'e' in content:
+                        content_str += f"输出: {content['e']}\n\n"
+                    if 'f' in content:
+                        content_str += f"处理: {content['f']}\n\n"
+                    if 'g' in content:
+                        content_str += f"性能: {content['g']}\n\n"
+                    if 'h' in content:
+                        content_str += f"约束与限制: {content['h']}"
+                elif isinstance(content, str):
+                    content_str = content
+                else:
+                    content_str = str(content)
+                if not content_str.strip():
+                    content_str = f"需求: {name}" if name else "未提取到需求内容"
+                requirements.append({
+                    "name": name,
+                    "chapter": chapter,
+                    "content": content_str
+                })
+            elif isinstance(req, str):
+                requirements.append({
+                    "name": f"需求_{len(requirements)+1}",
+                    "chapter": "",
+                    "content": req
+                })
+    if not requirements:
+        logging.warning(f"没有从文件 {original_file_name_from_request} 中提取到需求")
+        raise ValueError('未提取到需求，请检查文档格式或内容')
+    # 记录处理结果，复用条件取开始提取时的模型和参数
+    _results_catalog().record(session_id, file_id, original_file_name_from_request, payload.get('content_hash'),
+                              model_id, requirements, params_hash=params_hash)
+    record_requirements(session_id, file_id, requirements)
+    job.progress(len(requirements), len(requirements), "需求提取完成")
+    logging.info(f"配置项测试需求提取完成，共找到 {len(requirements)} 个需求")
+    return {
+        'success': True,
+        'session_id': session_id,
+        'requirements': requirements,
+        'reused': False
+    }
+
+@ai_extraction_bp.route('/ai_extract/results', methods=['GET'])
+def list_extraction_results_api():
+    """
+    按时间倒序列出提取结果（不含需求内容）
+    接收：[file_id], [limit], [offset]
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit和offset必须为整数'}), 400
+    results = _results_catalog().list_results(request.args.get('file_id'), limit, offset)
+    return jsonify({'success': True, 'results': results})
+
+@ai_extraction_bp.route('/ai_extract/results/latest', methods=['GET'])
+def latest_extraction_result_api():
+    """
+    获取某个文件最近一次的提取结果
+    接收：file_id
+    """
+    file_id = request.args.get('file_id')
+    if not file_id:
+        return jsonify({'success': False, 'error': "'file_id' is required."}), 400
+    result = _results_catalog().latest_for_file(file_id)
+    if not result:
+        return jsonify({'success': False, 'error': '未找到该文件的提取结果'}), 404
+    return jsonify(dict(result, success=True))
+
+@ai_extraction_bp.route('/ai_extract/results/<session_id>', methods=['GET'])
+def get_extraction_result_api(session_id):
+    """
+    按会话ID获取提取结果
+    """
+    result = _results_catalog().get(session_id)
+    if not result:
+        return jsonify({'success': False, 'error': '未找到提取结果'}), 404
+    return jsonify(dict(result, success=True))
+
+# 登记后台任务处理函数，工作线程由提供服务的进程启动
+get_job_queue().add_listener(on_job_status)
+get_job_queue().register(JOB_AI_EXTRACT, run_ai_extract_job)
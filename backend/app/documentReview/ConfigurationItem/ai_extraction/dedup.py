@@ -0,0 +1,275 @@
+"""
+需求去重模块
+对滑动窗口重叠区域重复提取出的需求进行近似去重与合并
+"""
+import re
+import hashlib
+import logging
+
+from .utils import merge_requirement_contents
+
+# 章节号前缀，如 "3.2.1 "、"3.2.1." 、"3.2.1、"
+CHAPTER_PREFIX_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)*)\.?[\s、．.]*')
+# 去掉空白和常见中英文标点，只保留文字用于指纹计算
+NOISE_PATTERN = re.compile(r'[\s\u3000-\u303f\uff00-\uff0f\uff1a-\uff20\uff3b-\uff40\uff5b-\uff65!-/:-@\[-`{-~]+')
+
+
+def normalize_chapter(chapter):
+    """
+    标准化章节号，去除空格和末尾的点号
+
+    Args:
+        chapter: 章节号文本
+
+    Returns:
+        标准化后的章节号，无法识别时返回空字符串
+    """
+    if not chapter:
+        return ""
+    match = CHAPTER_PREFIX_PATTERN.match(str(chapter).replace(" ", ""))
+    return match.group(1) if match else ""
+
+
+def normalize_title(title):
+    """
+    标准化需求标题：去掉章节号前缀、空白和标点
+
+    例如 "3.2.1 用户身份验证功能" 与 "用户身份验证功能" 标准化后相同
+
+    Args:
+        title: 需求标题
+
+    Returns:
+        (标准化标题, 标题中的章节号)
+    """
+    if not title:
+        return "", ""
+    title = str(title).strip()
+    chapter = ""
+    match = CHAPTER_PREFIX_PATTERN.match(title)
+    if match and match.end() < len(title):
+        chapter = match.group(1)
+        title = title[match.end():]
+    return NOISE_PATTERN.sub("", title).lower(), chapter
+
+
+def char_shingles(text, n=3):
+    """
+    生成字符n-gram集合，中文文本没有分词边界，直接按字符切分
+
+    Args:
+        text: 文本
+        n: n-gram长度
+
+    Returns:
+        n-gram字符串集合
+    """
+    text = NOISE_PATTERN.sub("", text or "").lower()
+    if not text:
+        return set()
+    if len(text) <= n:
+        return {text}
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class MinHasher:
+    """
+    MinHash签名生成器，采用单哈希分桶(One Permutation Hashing)方案
+
+    每个shingle只计算一次64位哈希，高位决定所属分桶，桶内保留最小值，
+    避免对每个shingle做num_perm次哈希。空桶按轮转方式从右侧非空桶借值填充。
+    使用blake2b而非内置hash，保证跨进程结果一致。
+    """
+
+    _HASH_BITS = 64
+
+    def __init__(self, num_perm=64):
+        self.num_perm = num_perm
+        self._bin_width = ((1 << self._HASH_BITS) + num_perm - 1) // num_perm
+
+    def signature(self, shingles):
+        """
+        计算shingle集合的MinHash签名
+
+        Args:
+            shingles: 由char_shingles生成的集合
+
+        Returns:
+            长度为num_perm的整数元组，空集合返回None
+        """
+        if not shingles:
+            return None
+        bins = [None] * self.num_perm
+        bin_width = self._bin_width
+        for shingle in shingles:
+            value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+            index, offset = divmod(value, bin_width)
+            current = bins[index]
+            if current is None or offset < current:
+                bins[index] = offset
+
+        # 轮转填充空桶，保证短文本的签名之间不会因为空桶而被误判为相似
+        if None in bins:
+            size = self.num_perm
+            for i in range(size):
+                if bins[i] is not None:
+                    continue
+                for step in range(1, size):
+                    borrowed = bins[(i + step) % size]
+                    if borrowed is not None and not isinstance(borrowed, tuple):
+                        bins[i] = (step, borrowed)
+                        break
+        return tuple(bins)
+
+    @staticmethod
+    def similarity(sig1, sig2):
+        """根据两个签名估算Jaccard相似度"""
+        if not sig1 or not sig2:
+            return 0.0
+        return sum(1 for x, y in zip(sig1, sig2) if x == y) / len(sig1)
+
+
+class _UnionFind:
+    """
+    并查集，每个簇记录一个章节号（簇内首个非空章节号）
+
+    两个簇的章节号都非空且不同时拒绝合并，无章节号的需求不会把不同章节的需求串联到一起
+    """
+
+    def __init__(self, chapters):
+        self.parent = list(range(len(chapters)))
+        self.chapter = list(chapters)
+
+    def find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def conflicts(self, x, y):
+        """两条需求所在的簇章节号不同"""
+        chapter_x, chapter_y = self.chapter[self.find(x)], self.chapter[self.find(y)]
+        return bool(chapter_x and chapter_y and chapter_x != chapter_y)
+
+    def union(self, x, y):
+        """合并两条需求所在的簇，章节号冲突时不合并；返回两者是否已在同一簇中"""
+        root_x, root_y = self.find(x), self.find(y)
+        if root_x == root_y:
+            return True
+        if self.conflicts(root_x, root_y):
+            return False
+        # 始终以较早出现的需求作为根，保证合并后顺序稳定
+        if root_y < root_x:
+            root_x, root_y = root_y, root_x
+        self.parent[root_y] = root_x
+        self.chapter[root_x] = self.chapter[root_x] or self.chapter[root_y]
+        return True
+
+
+def _titles_compatible(title1, title2, threshold=0.5):
+    """判断两个标准化标题是否可能指向同一需求"""
+    if not title1 or not title2:
+        return True
+    if title1 in title2 or title2 in title1:
+        return True
+    bigrams1 = {title1[i:i + 2] for i in range(len(title1) - 1)} or {title1}
+    bigrams2 = {title2[i:i + 2] for i in range(len(title2) - 1)} or {title2}
+    return len(bigrams1 & bigrams2) / len(bigrams1 | bigrams2) >= threshold
+
+
+def consolidate_requirements(requirements, threshold=0.8, num_perm=64, bands=16):
+    """
+    合并近似重复的需求
+
+    两条需求满足以下任一条件时视为重复：
+    1. 去掉章节号和标点后标题完全相同
+    2. 内容MinHash估算的Jaccard相似度不低于threshold，且标题相容
+
+    候选对通过LSH分桶产生，整体耗时与需求数量近似线性。
+    合并后的每条需求最多对应一个章节号：章节号不同的需求不会合并，
+    也不会经由无章节号的需求间接合并到一起。
+
+    Args:
+        requirements: 需求列表 [{name, chapter, identifier, content}, ...]
+        threshold: 内容相似度阈值
+        num_perm: MinHash签名长度
+        bands: LSH分段数，必须能整除num_perm
+
+    Returns:
+        合并后的需求列表，保持首次出现的顺序
+    """
+    if not requirements or len(requirements) < 2:
+        return list(requirements or [])
+
+    rows = num_perm // bands
+    hasher = MinHasher(num_perm=num_perm)
+
+    titles = []
+    chapters = []
+    signatures = []
+    for req in requirements:
+        title, title_chapter = normalize_title(req.get("name", ""))
+        titles.append(title)
+        chapters.append(normalize_chapter(req.get("chapter", "")) or title_chapter)
+        signatures.append(hasher.signature(char_shingles(req.get("content", ""))))
+
+    union_find = _UnionFind(chapters)
+
+    # 条件1：标准化标题相同。同名需求可能分属多个章节，逐对尝试，由并查集按簇的章节号决定能否合并
+    title_buckets = {}
+    for i, title in enumerate(titles):
+        if title:
+            title_buckets.setdefault(title, []).append(i)
+    for indices in title_buckets.values():
+        for pos, i in enumerate(indices):
+            for j in indices[pos + 1:]:
+                union_find.union(i, j)
+
+    # 条件2：LSH分桶寻找内容相似的候选对
+    lsh_buckets = {}
+    for i, sig in enumerate(signatures):
+        if sig is None:
+            continue
+        for band in range(bands):
+            key = (band, sig[band * rows:(band + 1) * rows])
+            lsh_buckets.setdefault(key, []).append(i)
+
+    checked = set()
+    for indices in lsh_buckets.values():
+        if len(indices) < 2:
+            continue
+        for pos, i in enumerate(indices):
+            for j in indices[pos + 1:]:
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                if union_find.find(i) == union_find.find(j) or union_find.conflicts(i, j):
+                    continue
+                if not _titles_compatible(titles[i], titles[j]):
+                    continue
+                if MinHasher.similarity(signatures[i], signatures[j]) >= threshold:
+                    union_find.union(i, j)
+
+    # 按簇合并
+    clusters = {}
+    for i in range(len(requirements)):
+        clusters.setdefault(union_find.find(i), []).append(i)
+
+    consolidated = []
+    for root in sorted(clusters):
+        members = clusters[root]
+        base = dict(requirements[members[0]])
+        if len(members) > 1:
+            contents = [requirements[i].get("content", "") for i in members if requirements[i].get("content")]
+            base["content"] = merge_requirement_contents(contents)
+            for i in members[1:]:
+                other = requirements[i]
+                if not base.get("chapter") and other.get("chapter"):
+                    base["chapter"] = other["chapter"]
+                if not base.get("identifier") and other.get("identifier"):
+                    base["identifier"] = other["identifier"]
+            logging.info(f"合并近似重复需求: {[requirements[i].get('name', '') for i in members]} -> {base.get('name', '')}")
+        consolidated.append(base)
+
+    logging.info(f"需求去重完成: {len(requirements)} -> {len(consolidated)}")
+    return consolidated
@@ -18,6 +18,15 @@ from .prompts import (
 )
 from .chunking import chunk_document, chunk_document_with_overlap
 from .utils import extract_json_from_text, merge_requirement_contents, extract_req_identifier
+from .dedup import consolidate_requirements
+
+# 滑动窗口和去重参数的默认值，可通过配置文件的extraction_params覆盖
+DEFAULT_EXTRACTION_PARAMS = {
+    "window_size": 3500,
+    "overlap": 500,
+    "enable_context": True,
+    "dedup_threshold": 0.8
+}
 
 def ai_extract_requirements(file_path, model=None):
     """
@@ -44,18 +53,20 @@ def ai_extract_requirements(file_path, model=None):
     
     # 从配置文件获取滑动窗口参数
     config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../..', 'config.json')
-    window_size = 3500  # 默认值
-    overlap = 500  # 默认值
-    enable_context = True  # 默认启用上下文回溯
+    window_size = DEFAULT_EXTRACTION_PARAMS["window_size"]
+    overlap = DEFAULT_EXTRACTION_PARAMS["overlap"]
+    enable_context = DEFAULT_EXTRACTION_PARAMS["enable_context"]  # 默认启用上下文回溯
+    dedup_threshold = DEFAULT_EXTRACTION_PARAMS["dedup_threshold"]  # 近似重复需求的内容相似度阈值
     
     if os.path.exists(config_path):
         try:
             with open(config_path, 'r', encoding='utf-8') as f:
                 config = json.load(f)
                 extract_params = config.get("extraction_params", {})
-                window_size = extract_params.get("window_size", 3500)
-                overlap = extract_params.get("overlap", 500)
-                enable_context = extract_params.get("enable_context", True)
+                window_size = extract_params.get("window_size", window_size)
+                overlap = extract_params.get("overlap", overlap)
+                enable_context = extract_params.get("enable_context", enable_context)
+                dedup_threshold = extract_params.get("dedup_threshold", dedup_threshold)
                 logging.info(f"使用配置的滑动窗口参数: 窗口大小={window_size}, 重叠={overlap}, 启用上下文={enable_context}")
         except Exception as e:
             logging.warning(f"读取滑动窗口配置失败: {str(e)}，使用默认配置")
@@ -148,10 +159,10 @@ def ai_extract_requirements(file_path, model=None):
         except Exception as e:
             logging.error(f"处理块 {i+1} 时出错: {str(e)}")
     
-    logging.info(f"AI需求提取完成，共提取到 {len(all_requirements)} 个需求，总耗时: {time.time() - start_time:.2f}秒")
+    # 将字典转换为列表格式，并合并重叠窗口产生的近似重复需求，避免同一需求被重复审查
+    requirements_list = consolidate_requirements(list(all_requirements.values()), threshold=dedup_threshold)
     
-    # 将字典转换为列表格式，便于前端处理
-    requirements_list = list(all_requirements.values())
+    logging.info(f"AI需求提取完成，共提取到 {len(requirements_list)} 个需求，总耗时: {time.time() - start_time:.2f}秒")
     
     return requirements_list
 
@@ -3,11 +3,12 @@
 只负责创建Flask实例和注册各业务Blueprint
 """
 from flask import Flask
-from app.documentReview.ConfigurationItem.upload.upload_api import upload_bp
+from app.documentReview.ConfigurationItem.upload.upload_api import upload_bp, chunked_upload_bp
 from app.documentReview.ConfigurationItem.ai_extraction.ai_extraction_api import ai_extraction_bp
 from app.documentReview.ConfigurationItem.review.review_api import review_bp
 from app.documentReview.ConfigurationItem.downloadDocument.download_review import download_review_bp
 from app.documentReview.ConfigurationItem.review.validate_api import validate_bp
+from app.documentReview.common.job_queue import create_jobs_blueprint
 
 app = Flask(__name__)
 
@@ -17,7 +18,10 @@ app = Flask(__name__)
 
 # 注册核心API
 app.register_blueprint(upload_bp)
+app.register_blueprint(chunked_upload_bp)
 app.register_blueprint(ai_extraction_bp)
 app.register_blueprint(review_bp)
 app.register_blueprint(download_review_bp)
 app.register_blueprint(validate_bp)
+# 后台提取和审查任务的查询接口：/jobs
+app.register_blueprint(create_jobs_blueprint('jobs'))
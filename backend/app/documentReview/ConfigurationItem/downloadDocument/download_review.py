@@ -2,7 +2,10 @@
 需求审查文档下载接口
 """
 import os
-from flask import Blueprint, send_file, abort
+from flask import Blueprint, request, send_file, abort
+from app.documentReview.ConfigurationItem.config import get_config
+from app.documentReview.ConfigurationItem.review.review_logic import get_review_report_store
+from app.documentReview.common.report_artifacts import get_report_formats, parse_artifact_id, send_report_artifact
 
 download_review_bp = Blueprint('download_review', __name__)
 
@@ -10,7 +13,16 @@ download_review_bp = Blueprint('download_review', __name__)
 def download_review_document(doc_id):
     """
     下载生成的审查文档（Excel或TXT）
+    预渲染报告的文档ID为 会话ID.摘要，可通过format参数选择格式
     """
+    artifact_id = parse_artifact_id(doc_id)
+    if artifact_id:
+        session_id, digest = artifact_id
+        format_type = request.args.get('format') or get_report_formats(get_config())[0]
+        file_path, digest = get_review_report_store().artifact(session_id, format_type, digest)
+        if not file_path:
+            abort(404, description="未找到对应的审查文档")
+        return send_report_artifact(file_path, format_type, digest)
     outputs_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../outputs'))
     # 查找以doc_id为标识的文件
     for ext in ('.xlsx', '.txt', '.json'):
@@ -7,7 +7,9 @@ from app.documentReview.ConfigurationItem.review.review_logic import (
 )
 from app.documentReview.ConfigurationItem.review.review_validate import validate_model
 from app.documentReview.ConfigurationItem.review.review_client import get_client
-from app.documentReview.ConfigurationItem.review.review_ai import call_openai_api, call_ollama_api, call_direct_http_api
+from app.documentReview.ConfigurationItem.review.review_ai import call_openai_api, call_direct_http_api
+from app.documentReview.ConfigurationItem.config import get_config
+from app.documentReview.common.review_executor import ReviewExecutor, get_max_in_flight
 
 def get_client():
     """
@@ -567,16 +569,9 @@ def review_requirements(requirements):
     返回:
         list: 包含所有需求审查结果的列表
     """
-    logging.info(f"开始批量审查 {len(requirements)} 个需求")
-    
-    results = []
-    for requirement in requirements:
-        # 依次审查每个需求
-        review_result = review_requirement(requirement)
-        results.append(review_result)
-    
-    logging.info(f"完成批量审查，共审查 {len(results)} 个需求")
-    return results
+    # 并发审查每个需求，结果保持输入顺序
+    executor = ReviewExecutor(review_requirement, get_max_in_flight(get_config()))
+    return executor.run(requirements)
 
 def generate_review_document(review_results, output_folder):
     """
@@ -634,146 +629,6 @@ def generate_review_document(review_results, output_folder):
         "download_url": f"/api/download_review/{doc_id}"
     }
 
-def generate_review_doc(review_results, output_path, format_type="json"):
-    """
-    生成需求审查文档
-    
-    参数:
-        review_results: list, 需求审查结果列表
-        output_path: str, 输出文件路径
-        format_type: str, 文档格式，支持json、text和excel
-    
-    返回:
-        str: 生成的文件路径
-    """
-    logging.info(f"开始生成需求审查文档: {output_path}，格式: {format_type}")
-    
-    if format_type == "json":
-        # 保存为JSON文件
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(review_results, f, ensure_ascii=False, indent=2)
-    elif format_type == "text":
-        # 生成文本格式报告
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write("需求审查综合报告\n\n")
-            f.write("=========================\n\n")
-            
-            for i, review in enumerate(review_results):
-                f.write(f"需求{i+1}: {review.get('name', '')}\n")
-                f.write(f"章节号: {review.get('chapter', '')}\n")
-                
-                if 'review_result' in review and 'requirements_review' in review['review_result']:
-                    problems = review['review_result']['requirements_review']
-                    f.write(f"发现问题: {len(problems)} 个\n")
-                    
-                    for j, problem in enumerate(problems):
-                        f.write(f"  {j+1}. 问题类型: {problem.get('problem_description', '')}\n")
-                        f.write(f"     位置: {problem.get('problem_location', 'N/A')}\n")
-                        f.write(f"     影响分析: {problem.get('impact_analysis', 'N/A')}\n")
-                    
-                    # 添加得分和总结，如果有的话
-                    if 'score' in review['review_result']:
-                        f.write(f"评分: {review['review_result'].get('score', 0)}\n")
-                    if 'summary' in review['review_result']:
-                        f.write(f"总结: {review['review_result'].get('summary', '')}\n")
-                
-                f.write("\n-------------------------\n\n")
-    elif format_type == "excel":
-        # 生成Excel格式报告
-        try:
-            import pandas as pd
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, Alignment, PatternFill
-            
-            # 创建工作簿
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "需求审查报告"
-            
-            # 设置标题样式
-            title_font = Font(name='宋体', size=14, bold=True)
-            title_alignment = Alignment(horizontal='center', vertical='center')
-            
-            # 添加标题
-            ws.merge_cells('A1:H1')  # 更新合并单元格范围，因为现在有8列
-            ws['A1'] = "需求审查综合报告"
-            ws['A1'].font = title_font
-            ws['A1'].alignment = title_alignment
-            
-            # 设置列标题 - 根据用户需求修改列名
-            headers = ["测试活动", "问题类型", "问题等级", "问题数目", "问题名称", "问题来源", "问题描述", "测评单位意见"]
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=2, column=col, value=header)
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")
-            
-            # 添加数据
-            row = 3
-            for i, review in enumerate(review_results):
-                name = review.get('name', '')
-                chapter = review.get('chapter', '')
-                
-                # 检查是否有问题
-                if 'review_result' in review and 'requirements_review' in review['review_result']:
-                    problems = review['review_result']['requirements_review']
-                    if problems and len(problems) > 0:
-                        # 添加每个问题
-                        for j, problem in enumerate(problems):
-                            # 构建四段式问题描述
-                            problem_description = f"需求描述：{problem.get('requirement_description', 'N/A')}\n\n"
-                            problem_description += f"问题描述：{problem.get('problem_description', 'N/A')}\n\n"
-                            problem_description += f"问题定位：{problem.get('problem_location', 'N/A')}\n\n"
-                            problem_description += f"影响分析：{problem.get('impact_analysis', 'N/A')}"
-                            
-                            # 构建问题来源 - 修复章节号重复问题
-                            # 检查需求名称中是否已包含章节号
-                            if chapter in name:
-                                problem_source = f"需求规格说明 {name}"
-                            else:
-                                problem_source = f"需求规格说明 {chapter} {name}"
-                            
-                            # 按用户要求填写各列内容
-                            ws.cell(row=row, column=1, value="文档审查")
-                            ws.cell(row=row, column=2, value="软件需求问题")
-                            ws.cell(row=row, column=3, value="一般问题")
-                            ws.cell(row=row, column=4, value=1)
-                            ws.cell(row=row, column=5, value=problem.get('problem_title', 'N/A'))
-                            ws.cell(row=row, column=6, value=problem_source)  # 新的问题来源列
-                            ws.cell(row=row, column=7, value=problem_description)  # 原来的问题来源列，现在改名为问题描述
-                            ws.cell(row=row, column=8, value="请开发人员对文档问题进行修改，确保文档描述的正确且测试人员能够理解测试需求")
-                            
-                            # 设置单元格自动换行
-                            for col in range(1, 9):  # 现在是8列
-                                cell = ws.cell(row=row, column=col)
-                                cell.alignment = Alignment(wrap_text=True, vertical='top')
-                            
-                            row += 1
-            
-            # 调整列宽
-            column_widths = [15, 15, 15, 10, 25, 30, 40, 30]  # 更新为8列的宽度
-            for i, width in enumerate(column_widths, 1):
-                ws.column_dimensions[chr(64 + i)].width = width
-                
-            # 设置行高
-            for r in range(3, row):
-                ws.row_dimensions[r].height = 120
-            
-            # 保存Excel文件
-            wb.save(output_path)
-            logging.info(f"Excel审查报告生成成功: {output_path}")
-            
-        except ImportError as e:
-            logging.error(f"生成Excel报告失败，缺少必要的库: {str(e)}")
-            raise
-        except Exception as e:
-            logging.error(f"生成Excel报告时出错: {str(e)}", exc_info=True)
-            raise
-    else:
-        raise ValueError(f"不支持的文档格式: {format_type}")
-    
-    logging.info(f"需求审查文档生成完成: {output_path}")
-    return output_path
-
 # validate_model 业务已迁移到 review/review_validate.py
 # 如需使用请从 app.documentReview.ConfigurationItem.review.review_validate 导入
 
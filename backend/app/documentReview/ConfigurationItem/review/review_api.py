@@ -4,73 +4,146 @@
 from flask import Blueprint, request, jsonify, make_response
 import logging
 import traceback
-from app.documentReview.ConfigurationItem.review.review_logic import review_requirements, generate_review_document
+from app.documentReview.ConfigurationItem.config import get_config
+from app.documentReview.ConfigurationItem.review.review_logic import (
+    review_requirement, valid_review_requirements, get_review_report_store
+)
 from app.documentReview.ConfigurationItem.review.review_validate import validate_model
+from app.documentReview.common.review_executor import ReviewExecutor, get_max_in_flight
+from app.documentReview.common.review_stream import review_stream_response, wants_sse
+from app.documentReview.common.session_store import get_session_data, update_session_data
+from app.documentReview.common.results_catalog import get_results_catalog
+from app.documentReview.common.report_artifacts import get_report_formats
+from app.documentReview.common.report_renderer import REPORT_EXTENSIONS, REPORT_FORMATS, iter_report, report_response
+from app.documentReview.common.job_queue import get_job_queue, job_accepted_response
+from app.projectManagement.requirement_store import record_reviews
+from app.projectManagement.document_status import on_job_status
 
 review_bp = Blueprint('review', __name__)
 
+# 后台任务类型
+JOB_REVIEW = "ci_review"
+
+def schedule_review_reports(session_id, requirements, review_results):
+    """审查完成后在后台按配置一次生成所有格式的审查报告，失败不影响审查结果返回"""
+    try:
+        get_review_report_store().schedule(session_id, requirements, review_results, get_report_formats(get_config()))
+    except Exception as e:
+        logging.error(f"提交审查报告渲染任务失败: {str(e)}", exc_info=True)
+
+def session_file_id(session_id):
+    """会话对应的上传文件ID：先查会话数据，AI提取的会话只记录在提取结果目录中"""
+    file_id = (get_session_data(session_id) or {}).get("file_id")
+    if not file_id and session_id:
+        extraction = get_results_catalog().get(session_id)
+        file_id = extraction["file_id"] if extraction else None
+    return file_id
+
+def record_review_results(session_id, requirements, review_results):
+    """审查结果在后台批量写入项目数据库的需求和审查问题表，供全文检索"""
+    record_reviews(session_id, session_file_id(session_id), requirements, review_results)
+
 @review_bp.route('/api/review_requirements', methods=['POST', 'OPTIONS'])
 def review_requirements_api():
     """
     需求审查API端点
-    对提取的需求进行AI评估和审查
-    返回需求审查结果
+    对提取的需求进行AI评估和审查，提交后台审查任务后立即返回任务ID（202），
+    通过 /jobs/<job_id> 查询进度，任务结果为需求审查结果
     """
     logger = logging.getLogger(__name__)
     if request.method == "OPTIONS":
         return make_response('', 200)
     try:
         data = request.json
-        requirements = data.get('requirements', [])
+        requirements = valid_review_requirements(data.get('requirements', []))
         session_id = data.get('session_id', '')
-        review_results = review_requirements(requirements)
-        session_data = {
-            'requirements': requirements,
-            'review_results': review_results
-        }
-        # 假设 save_session_data 已在主入口注册
-        from app.documentReview.ConfigurationItem.api import save_session_data
-        save_session_data(session_id, session_data)
-        response_data = {
-            "message": "需求审查完成",
-            "review_results": review_results,
-            "session_id": session_id
-        }
-        return jsonify(response_data)
+        job = get_job_queue().submit(
+            JOB_REVIEW, {'requirements': requirements},
+            stage="review", file_id=session_file_id(session_id), session_id=session_id
+        )
+        return job_accepted_response(job, 'jobs', session_id=session_id)
     except Exception as e:
         logger.error(f"需求审查时出错: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({"error": f"需求审查时出错: {str(e)}"}), 500
 
+def run_review_job(job):
+    """后台执行需求审查任务，每条需求审查完成后上报进度，取消后不再审查剩余需求"""
+    requirements = job.payload['requirements']
+    session_id = job.session_id
+    executor = ReviewExecutor(review_requirement, get_max_in_flight(get_config()))
+    job.on_cancel(executor.cancel)
+    job.progress(0, len(requirements), "正在审查需求")
+    review_results = executor.run(requirements, on_progress=lambda completed, total: job.progress(completed, total))
+    job.check_cancelled()
+    session_data = {
+        'requirements': requirements,
+        'review_results': review_results
+    }
+    update_session_data(session_id, session_data)
+    schedule_review_reports(session_id, requirements, review_results)
+    record_review_results(session_id, requirements, review_results)
+    job.progress(message="需求审查完成")
+    return {
+        "message": "需求审查完成",
+        "review_results": review_results,
+        "session_id": session_id
+    }
 
+@review_bp.route('/api/review_requirements/stream', methods=['POST', 'OPTIONS'])
+def review_requirements_stream_api():
     """
-    生成需求审查文档API
-    生成需求审查结果的导出文档
+    流式需求审查API端点
+    每条需求审查完成后立即推送结果（默认NDJSON，Accept为text/event-stream或format=sse时使用SSE），
+    全部完成后将结果保存到会话
     """
     if request.method == "OPTIONS":
         return make_response('', 200)
+    data = request.json or {}
+    session_id = data.get('session_id', '')
     try:
-        data = request.json
-        logging.debug(f"生成审查文档接收到的参数: {data}")
-        review_results = data.get("review_results")
-        session_id = data.get("session_id")
-        output_folder = None
-        if session_id:
-            from app.documentReview.ConfigurationItem.api import get_session_data
-            session_data = get_session_data(session_id)
-            review_results = session_data.get("review_results", [])
-        from app.documentReview.ConfigurationItem.api import app
-        output_folder = app.config['OUTPUT_FOLDER']
-        result = generate_review_document(review_results, output_folder)
-        file_name = result.get("file_name", "")
-        doc_id = file_name.replace("requirement_review_", "").replace(".txt", "")
-        response_data = {
-            "success": True,
-            "file_id": doc_id,
-            "message": result.get("message", "审查文档生成成功")
-        }
-        logging.debug(f"生成审查文档成功: {response_data}")
-        return jsonify(response_data)
-    except Exception as e:
-        logging.error(f"生成审查文档时出错: {str(e)}", exc_info=True)
-        return jsonify({"error": f"生成审查文档时出错: {str(e)}"}), 500
+        valid_requirements = valid_review_requirements(data.get('requirements', []))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not valid_requirements:
+        return jsonify({"error": "未提供需求数据"}), 400
+
+    def persist(reviewed_requirements, review_results):
+        update_session_data(session_id, {
+            'requirements': reviewed_requirements,
+            'review_results': review_results
+        })
+        schedule_review_reports(session_id, reviewed_requirements, review_results)
+        record_review_results(session_id, reviewed_requirements, review_results)
+
+    executor = ReviewExecutor(review_requirement, get_max_in_flight(get_config()))
+    return review_stream_response(executor, valid_requirements, session_id, persist, sse=wants_sse(request))
+
+@review_bp.route('/api/review_report', methods=['POST', 'OPTIONS'])
+def review_report_api():
+    """
+    审查报告流式导出API
+    按format参数（markdown或html）逐段返回审查报告，download为真时作为附件下载；
+    提供session_id时从会话中读取需求和审查结果
+    """
+    if request.method == "OPTIONS":
+        return make_response('', 200)
+    data = request.json or {}
+    format_type = data.get('format', 'markdown')
+    if format_type not in REPORT_FORMATS:
+        return jsonify({"error": "不支持的文档格式，请选择'markdown'或'html'"}), 400
+    requirements = data.get('requirements', [])
+    review_results = data.get('review_results', [])
+    session_id = data.get('session_id')
+    if session_id and not review_results:
+        session_data = get_session_data(session_id) or {}
+        requirements = session_data.get('requirements', [])
+        review_results = session_data.get('review_results', [])
+    if not review_results:
+        return jsonify({"error": "未提供审查结果且无法从会话中获取"}), 400
+    download_name = f"需求审查报告{REPORT_EXTENSIONS[format_type]}" if data.get('download') else None
+    return report_response(iter_report(requirements, review_results, format_type), format_type, download_name)
+
+# 登记后台任务处理函数，工作线程由提供服务的进程启动
+get_job_queue().add_listener(on_job_status)
+get_job_queue().register(JOB_REVIEW, run_review_job)
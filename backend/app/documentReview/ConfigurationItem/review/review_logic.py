@@ -6,12 +6,19 @@ import logging
 from app.documentReview.ConfigurationItem.config import get_config
 from app.documentReview.ConfigurationItem.review.review_client import get_client
 from app.documentReview.ConfigurationItem.review.review_ai import call_openai_api
+from app.documentReview.common.review_executor import ReviewExecutor, get_max_in_flight
+from app.documentReview.common.review_cache import cached_review
+from app.documentReview.common.report_renderer import iter_report, REPORT_FORMATS
+from app.documentReview.common.report_artifacts import get_report_store, make_report_renderers
 
-def review_requirements(requirements):
+# 审查提示词模板版本，修改提示词后需递增，使缓存的旧结果失效
+REVIEW_PROMPT_VERSION = "configuration_item-v1"
+
+def valid_review_requirements(requirements):
     """
-    批量审查需求列表
+    过滤出可以审查的需求：跳过缺少content的需求，缺少name时使用默认值
     参数: requirements: list, 需求对象列表
-    返回: list: 包含审查结果的列表
+    返回: list: 可审查的需求列表
     """
     if not isinstance(requirements, list):
         # 或者可以记录错误并返回空列表或抛出自定义异常
@@ -19,7 +26,7 @@ def review_requirements(requirements):
         # 根据实际需求决定是抛出异常还是返回错误指示
         raise ValueError("参数requirements必须是一个列表")
     
-    results = []
+    valid_requirements = []
     for req in requirements:
         if not isinstance(req, dict) or 'content' not in req:
             logging.warning(f"跳过无效的需求，缺少'content'字段: {req}")
@@ -31,31 +38,18 @@ def review_requirements(requirements):
             req['name'] = req.get('requirement_name', '未命名需求') 
             # 如果需求名称非常重要，可以考虑记录警告或错误
             logging.warning(f"需求缺少'name'字段，已设置为默认值: {req['name']}")
-            
-        # 调用单条需求审查
-        try:
-            result = review_requirement(req)
-            results.append(result)
-        except Exception as e:
-            logging.error(f"审查单个需求 '{req.get('name', '未知需求')}' 时发生错误: {e}")
-            # 可以选择将错误信息添加到结果中，或跳过此需求
-            results.append({
-                "name": req.get('name', '未知需求'),
-                "chapter": req.get("chapter", ""),
-                "review_result": {
-                    "requirements_review": [{
-                        "problem_title": f"{req.get('name', '未知需求')} 审查失败",
-                        "requirement_description": "需求审查过程中发生内部错误",
-                        "problem_description": f"错误详情: {str(e)}",
-                        "problem_location": "系统内部",
-                        "impact_analysis": "无法完成对此需求的审查"
-                    }],
-                    "score": 0,
-                    "summary": "审查失败，发生内部错误"
-                }
-            })
-    
-    return results
+        valid_requirements.append(req)
+    return valid_requirements
+
+def review_requirements(requirements):
+    """
+    批量审查需求列表
+    参数: requirements: list, 需求对象列表
+    返回: list: 包含审查结果的列表
+    """
+    # 并发调用单条需求审查，结果保持输入顺序，单条失败时返回错误结构的结果
+    executor = ReviewExecutor(review_requirement, get_max_in_flight(get_config()))
+    return executor.run(valid_review_requirements(requirements))
 
 def generate_review_document(requirements, review_results, format_type='markdown'):
     """
@@ -69,7 +63,7 @@ def generate_review_document(requirements, review_results, format_type='markdown
     返回:
         str: 生成的文档内容
     """
-    if format_type not in ['markdown', 'html']:
+    if format_type not in REPORT_FORMATS:
         raise ValueError("不支持的文档格式，请选择'markdown'或'html'")
     
     # 确保requirements和review_results长度一致，或者根据实际情况处理
@@ -77,132 +71,32 @@ def generate_review_document(requirements, review_results, format_type='markdown
         logging.warning("需求列表和审查结果列表长度不一致，可能导致文档内容不匹配")
         # 可以选择抛出异常或尝试匹配可用的部分
 
-    if format_type == 'markdown':
-        return _generate_markdown(requirements, review_results)
-    else: # 'html'
-        return _generate_html(requirements, review_results)
-
-def _generate_markdown(requirements, review_results):
-    """生成Markdown格式的审查文档"""
-    content = ["# 需求审查报告\n"]
-    
-    for i, req_data in enumerate(review_results, 1):
-        req_name = req_data.get('name', f'未命名需求 {i}')
-        original_req = next((r for r in requirements if r.get('name') == req_name), {})
-        req_content = original_req.get('content', '无内容')
-        
-        content.append(f"## {i}. {req_name}\n")
-        content.append(f"**需求内容**: {req_content}\n")
-        
-        review = req_data.get('review_result', {})
-        if not review or 'requirements_review' not in review:
-            content.append("*未进行审查或审查失败*\n")
-            content.append("\n---\n")
-            continue
-            
-        issues = review.get('requirements_review', [])
-        score = review.get('score', '未评分')
-        summary = review.get('summary', '无总结')
-
-        if not issues or (len(issues) == 1 and issues[0].get("problem_title", "").endswith("解析失败")) or (len(issues) == 1 and issues[0].get("problem_title", "").endswith("审查系统错误")):
-            content.append("✅ 未发现明显问题或审查处理异常\n")
-            if issues and ("解析失败" in issues[0].get("problem_title", "") or "审查系统错误" in issues[0].get("problem_title", "")):
-                 content.append(f"- **问题描述**: {issues[0].get('problem_description', '')}\n")
-        else:
-            content.append(f"**问题数量**: {len(issues)} 个\n")
-            for j, issue in enumerate(issues, 1):
-                content.append(f"### 问题 {j}: {issue.get('problem_title', '无标题')}\n")
-                content.append(f"- **需求描述**: {issue.get('requirement_description', 'N/A')}\n")
-                content.append(f"- **问题描述**: {issue.get('problem_description', 'N/A')}\n")
-                content.append(f"- **问题位置**: {issue.get('problem_location', 'N/A')}\n")
-                content.append(f"- **影响分析**: {issue.get('impact_analysis', 'N/A')}\n")
-        
-        content.append(f"\n**总结**: {summary}\n")
-        content.append(f"**评分**: {score}/100\n")
-        content.append("\n---\n")
-    
-    return "\n".join(content)
-
-def _generate_html(requirements, review_results):
-    """生成HTML格式的审查文档"""
-    html_parts = ['''<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <title>需求审查报告</title>
-    <style>
-        body { font-family: 'Arial', sans-serif; line-height: 1.6; margin: 0 auto; max-width: 900px; padding: 20px; color: #333; }
-        h1 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; text-align: center; }
-        .requirement-section { margin-bottom: 30px; padding: 20px; border: 1px solid #ddd; border-radius: 8px; background-color: #f9f9f9; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
-        h2 { color: #2980b9; margin-top: 0; border-bottom: 1px solid #eee; padding-bottom: 5px;}
-        h3 { color: #16a085; margin-top: 15px; }
-        .issue { background-color: #fff; border: 1px solid #e8e8e8; padding: 15px; border-radius: 5px; margin: 10px 0; }
-        .issue p { margin: 5px 0; }
-        .issue strong { color: #555; }
-        .score { font-size: 1.2em; font-weight: bold; color: #e74c3c; margin-top: 10px; }
-        .summary { font-style: italic; margin: 15px 0; background-color: #eaf2f8; padding: 10px; border-left: 3px solid #3498db; }
-        .no-issues { color: #27ae60; font-weight: bold; }
-        hr { border: 0; height: 1px; background-color: #ddd; margin-top: 20px; }
-    </style>
-</head>
-<body>
-    <h1>需求审查报告</h1>''']
-
-    for i, req_data in enumerate(review_results, 1):
-        req_name = req_data.get('name', f'未命名需求 {i}')
-        original_req = next((r for r in requirements if r.get('name') == req_name), {})
-        req_content = original_req.get('content', '无内容')
-
-        html_parts.append(f'<div class="requirement-section">')
-        html_parts.append(f'<h2>{i}. {req_name}</h2>')
-        html_parts.append(f'<p><strong>需求内容</strong>: {req_content}</p>')
-
-        review = req_data.get('review_result', {})
-        if not review or 'requirements_review' not in review:
-            html_parts.append('<p><em>未进行审查或审查失败</em></p>')
-            html_parts.append('</div>') # close requirement-section
-            continue
-
-        issues = review.get('requirements_review', [])
-        score = review.get('score', '未评分')
-        summary = review.get('summary', '无总结')
-
-        if not issues or (len(issues) == 1 and issues[0].get("problem_title", "").endswith("解析失败")) or (len(issues) == 1 and issues[0].get("problem_title", "").endswith("审查系统错误")):
-            html_parts.append('<p class="no-issues">✅ 未发现明显问题或审查处理异常</p>')
-            if issues and ("解析失败" in issues[0].get("problem_title", "") or "审查系统错误" in issues[0].get("problem_title", "")):
-                html_parts.append(f'''
-                <div class="issue">
-                    <p><strong>问题描述</strong>: {issues[0].get('problem_description', '')}</p>
-                </div>''')
-        else:
-            html_parts.append(f'<p><strong>问题数量</strong>: {len(issues)} 个</p>')
-            for j, issue in enumerate(issues, 1):
-                html_parts.append(f'''
-                <div class="issue">
-                    <h3>问题 {j}: {issue.get('problem_title', '无标题')}</h3>
-                    <p><strong>需求描述</strong>: {issue.get('requirement_description', 'N/A')}</p>
-                    <p><strong>问题描述</strong>: {issue.get('problem_description', 'N/A')}</p>
-                    <p><strong>问题位置</strong>: {issue.get('problem_location', 'N/A')}</p>
-                    <p><strong>影响分析</strong>: {issue.get('impact_analysis', 'N/A')}</p>
-                </div>''')
-        
-        html_parts.append(f'<div class="summary"><strong>总结</strong>: {summary}</div>')
-        html_parts.append(f'<div class="score">评分: {score}/100</div>')
-        html_parts.append('</div>') # close requirement-section
+    # 按名称索引原始需求后逐段渲染，避免逐条线性查找
+    return "".join(iter_report(requirements, review_results, format_type))
 
-    html_parts.append('''
-</body>
-</html>''')
-    return "\n".join(html_parts)
+def review_requirement(requirement, use_cache=True):
+    """
+    使用AI模型对单个需求进行审查，名称和内容未变化的需求直接复用缓存的审查结果
+    参数:
+        requirement: dict, 包含需求信息的字典，至少有name和content字段
+        use_cache: bool, 是否使用缓存，为False时强制重新审查
+    返回: dict: 包含审查结果的字典，附带reviewed_at和from_cache字段
+    """
+    config = get_config()
+    return cached_review(
+        requirement, REVIEW_PROMPT_VERSION, config,
+        lambda: _review_requirement_with_model(requirement, config),
+        use_cache=use_cache
+    )
 
-def review_requirement(requirement):
+def _review_requirement_with_model(requirement, config):
     """
-    使用AI模型对单个需求进行审查
+    调用AI模型对单个需求进行审查
     参数: requirement: dict, 包含需求信息的字典，至少有name和content字段
-    返回: dict: 包含审查结果的字典
+          config: dict, 模型配置
+    返回: tuple: (包含审查结果的字典, 结果是否来自模型且解析成功，可写入缓存)
     """
     logging.debug(f"开始审查需求《{requirement['name']}》")
-    config = get_config()
     provider = config.get("provider", "openai")
     prompt = f"""
     请作为一名专业的需求审查专家，审查以下软件需求，找出潜在问题，严格按照要求的JSON格式返回结果：\n\n需求名称: {requirement['name']}\n需求内容:\n{requirement['content']}\n\n请仔细审查上述需求，找出所有潜在问题，例如：不明确的描述、不完整的约束条件、性能要求不具体、冲突的需求等。\n\n审查结果必须严格按照以下JSON格式返回（数组中可以包含多个问题）：\n{{\n    \"requirements_review\": [\n        {{\n            \"problem_title\": \"问题的具体名称（包含功能名称和问题类型，不超过20个字）\",\n            \"requirement_description\": \"简要描述需求要点\",\n            \"problem_description\": \"详细描述发现的问题\",\n            \"problem_location\": \"指出问题在需求中的具体位置\",\n            \"impact_analysis\": \"分析此问题可能带来的影响\"\n        }}\n    ],\n    \"score\": 85,\n    \"summary\": \"审查总结\"\n}}\n\n必须为每个发现的问题提供所有五个字段：problem_title、requirement_description、problem_description、problem_location和impact_analysis。\n\n其中problem_title是对问题的具体描述，必须包含需求的功能名称和具体问题类型，格式为\"[功能名称]+[问题类型]\"，如\"用户身份验证功能约束不明确\"、\"用户身份验证功能性能要求不具体\"等，不超过20个字。\n\n如果没有发现问题，请在requirements_review数组中返回一个对象，表明需求质量良好。\n请直接返回JSON对象，不要包含任何额外的文字。\n"""
@@ -237,7 +131,7 @@ def review_requirement(requirement):
                     "summary": "需求总体质量良好，但存在一些可以改进的地方"
                 }
             }
-            return review_item
+            return review_item, False
         if provider == "openai":
             result = call_openai_api(prompt, temperature, max_tokens)
         else:
@@ -256,7 +150,7 @@ def review_requirement(requirement):
                 "review_result": result_json
             }
             logging.info(f"需求《{requirement['name']}》审查完成，发现 {len(result_json.get('requirements_review', []))} 个问题")
-            return review_result
+            return review_result, True
         except json.JSONDecodeError as e:
             logging.error(f"解析AI返回的JSON失败: {e}")
             return {
@@ -273,7 +167,7 @@ def review_requirement(requirement):
                     "score": 0,
                     "summary": "无法完成需求审查"
                 }
-            }
+            }, False
     except Exception as e:
         logging.error(f"调用AI审查需求时出错: {e}")
         return {
@@ -290,4 +184,128 @@ def review_requirement(requirement):
                 "score": 0,
                 "summary": "无法完成需求审查"
             }
-        }
+        }, False
+
+# Excel审查报告的列及列宽
+REVIEW_EXCEL_HEADERS = ["测试活动", "问题类型", "问题等级", "问题数目", "问题名称", "问题来源", "问题描述", "测评单位意见"]
+REVIEW_EXCEL_COLUMN_WIDTHS = [15, 15, 15, 10, 25, 30, 40, 30]
+
+def iter_review_problem_rows(review_results):
+    """
+    逐行产出Excel审查报告的问题行
+    
+    参数:
+        review_results: list, 需求审查结果列表
+    
+    返回:
+        generator: 每个问题对应一行数据
+    """
+    for review in review_results:
+        name = review.get('name', '')
+        chapter = review.get('chapter', '')
+        
+        # 检查是否有问题
+        if 'review_result' not in review or 'requirements_review' not in review['review_result']:
+            continue
+        
+        # 构建问题来源 - 检查需求名称中是否已包含章节号，避免章节号重复
+        if chapter in name:
+            problem_source = f"需求规格说明 {name}"
+        else:
+            problem_source = f"需求规格说明 {chapter} {name}"
+        
+        for problem in review['review_result']['requirements_review'] or []:
+            # 构建四段式问题描述
+            problem_description = f"需求描述：{problem.get('requirement_description', 'N/A')}\n\n"
+            problem_description += f"问题描述：{problem.get('problem_description', 'N/A')}\n\n"
+            problem_description += f"问题定位：{problem.get('problem_location', 'N/A')}\n\n"
+            problem_description += f"影响分析：{problem.get('impact_analysis', 'N/A')}"
+            
+            yield [
+                "文档审查",
+                "软件需求问题",
+                "一般问题",
+                1,
+                problem.get('problem_title', 'N/A'),
+                problem_source,
+                problem_description,
+                "请开发人员对文档问题进行修改，确保文档描述的正确且测试人员能够理解测试需求"
+            ]
+
+def generate_review_doc(review_results, output_path, format_type="json"):
+    """
+    生成需求审查文档
+    
+    参数:
+        review_results: list, 需求审查结果列表
+        output_path: str, 输出文件路径
+        format_type: str, 文档格式，支持json、text和excel
+    
+    返回:
+        str: 生成的文件路径
+    """
+    logging.info(f"开始生成需求审查文档: {output_path}，格式: {format_type}")
+    
+    if format_type == "json":
+        # 保存为JSON文件
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(review_results, f, ensure_ascii=False, indent=2)
+    elif format_type == "text":
+        # 生成文本格式报告
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write("需求审查综合报告\n\n")
+            f.write("=========================\n\n")
+            
+            for i, review in enumerate(review_results):
+                f.write(f"需求{i+1}: {review.get('name', '')}\n")
+                f.write(f"章节号: {review.get('chapter', '')}\n")
+                
+                if 'review_result' in review and 'requirements_review' in review['review_result']:
+                    problems = review['review_result']['requirements_review']
+                    f.write(f"发现问题: {len(problems)} 个\n")
+                    
+                    for j, problem in enumerate(problems):
+                        f.write(f"  {j+1}. 问题类型: {problem.get('problem_description', '')}\n")
+                        f.write(f"     位置: {problem.get('problem_location', 'N/A')}\n")
+                        f.write(f"     影响分析: {problem.get('impact_analysis', 'N/A')}\n")
+                    
+                    # 添加得分和总结，如果有的话
+                    if 'score' in review['review_result']:
+                        f.write(f"评分: {review['review_result'].get('score', 0)}\n")
+                    if 'summary' in review['review_result']:
+                        f.write(f"总结: {review['review_result'].get('summary', '')}\n")
+                
+                f.write("\n-------------------------\n\n")
+    elif format_type == "excel":
+        # 生成Excel格式报告
+        try:
+            from app.documentReview.common.excel_writer import StreamingExcelWriter, HEADER_STYLE
+            
+            # 只写模式下列宽须在写入数据之前设置
+            writer = StreamingExcelWriter("需求审查报告", REVIEW_EXCEL_COLUMN_WIDTHS)
+            writer.append_title("需求审查综合报告", len(REVIEW_EXCEL_HEADERS))
+            writer.append(REVIEW_EXCEL_HEADERS, style=HEADER_STYLE)
+            writer.append_rows(iter_review_problem_rows(review_results), height=120)
+            
+            # 保存Excel文件
+            writer.save(output_path)
+            logging.info(f"Excel审查报告生成成功: {output_path}")
+            
+        except ImportError as e:
+            logging.error(f"生成Excel报告失败，缺少必要的库: {str(e)}")
+            raise
+        except Exception as e:
+            logging.error(f"生成Excel报告时出错: {str(e)}", exc_info=True)
+            raise
+    else:
+        raise ValueError(f"不支持的文档格式: {format_type}")
+    
+    logging.info(f"需求审查文档生成完成: {output_path}")
+    return output_path
+
+def get_review_report_store():
+    """
+    配置项模块的审查报告存储，Excel和文本报告由generate_review_doc生成
+    返回: ReportArtifactStore
+    """
+    return get_report_store("configuration_item", make_report_renderers(generate_review_doc))
@@ -8,6 +8,9 @@ from werkzeug.utils import secure_filename
 import logging
 import json
 
+from app.documentReview.common.blob_store import save_upload
+from app.documentReview.common.chunked_upload import create_chunked_upload_blueprint
+
 ALLOWED_EXTENSIONS = {'doc', 'docx'}
 
 upload_bp = Blueprint('upload', __name__)
@@ -15,17 +18,39 @@ upload_bp = Blueprint('upload', __name__)
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-@upload_bp.route('/upload', methods=['POST'])
-def upload_file():
-    """
-    文件上传接口
-    """
+def get_upload_folder():
+    """上传目录，未配置时为项目根目录下 uploads/configuration_item"""
     upload_folder = current_app.config.get('UPLOAD_FOLDER')
     if not upload_folder:
         # 修正为项目根目录下 uploads/configuration_item
         project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', '..'))
         upload_folder = os.path.join(project_root, 'uploads', 'configuration_item')
         os.makedirs(upload_folder, exist_ok=True)
+    return upload_folder
+
+def filename_on_disk(file_id, original_filename):
+    """保存的文件名：<file_id>_<安全文件名>，安全文件名为空或仅为扩展名时为 <file_id><扩展名>"""
+    filename = secure_filename(original_filename)
+    ext = os.path.splitext(original_filename)[-1]  # 包含点，如'.docx'
+    if not filename or filename == ext.lstrip('.') or filename == ext:
+        return f"{file_id}{ext}"
+    return f"{file_id}_{filename}"
+
+def chunked_upload_target(file_id, original_filename):
+    """分块上传完成后的文件路径，与/upload的命名方式一致"""
+    return os.path.join(get_upload_folder(), filename_on_disk(file_id, original_filename)), original_filename
+
+# 分块上传接口：/uploads
+chunked_upload_bp = create_chunked_upload_blueprint(
+    'chunked_upload', chunked_upload_target, allowed_file, source='configuration_item'
+)
+
+@upload_bp.route('/upload', methods=['POST'])
+def upload_file():
+    """
+    文件上传接口
+    """
+    upload_folder = get_upload_folder()
     
     # Use current_app's logger if available, otherwise default to root logger
     logger = current_app.logger if hasattr(current_app, 'logger') else logging.getLogger()
@@ -49,18 +74,13 @@ def upload_file():
     file_id = str(uuid.uuid4())
     original_filename = file.filename
     filename = secure_filename(original_filename)
-    ext = os.path.splitext(original_filename)[-1]  # 包含点，如'.docx'
-    # 如果secure_filename结果为空或仅为扩展名，则用file_id+原始扩展名
-    if not filename or filename == ext.lstrip('.') or filename == ext:
-        filename_on_disk = f"{file_id}{ext}"
-    else:
-        filename_on_disk = f"{file_id}_{filename}"
-    file_path = os.path.join(upload_folder, filename_on_disk)
+    saved_name = filename_on_disk(file_id, original_filename)
+    file_path = os.path.join(upload_folder, saved_name)
 
     logger.info(f"--- UPLOAD_API: Attempting to save to: {file_path} ---")
     print(f"--- UPLOAD_API: Attempting to save to: {file_path} ---", flush=True)
     try:
-        file.save(file_path)
+        stored = save_upload(file.stream, file_path, file_id, original_filename, source="configuration_item")
         logger.info(f"--- UPLOAD_API: File saved successfully to {file_path} ---")
         print(f"--- UPLOAD_API: File saved successfully to {file_path} ---", flush=True)
     except Exception as e:
@@ -72,19 +92,21 @@ def upload_file():
     logger.info(f"[UPLOAD_API_DEBUG] Original filename from werkzeug: {original_filename}")
     logger.info(f"[UPLOAD_API_DEBUG] Secured filename: {filename}")
     logger.info(f"[UPLOAD_API_DEBUG] File ID created: {file_id}")
-    logger.info(f"[UPLOAD_API_DEBUG] File actually saved as: {filename_on_disk}")
+    logger.info(f"[UPLOAD_API_DEBUG] File actually saved as: {saved_name}")
     logger.info(f"[UPLOAD_API_DEBUG] Full file path on disk: {file_path}")
     print(f"[UPLOAD_API_DEBUG] Original filename from werkzeug: {original_filename}", flush=True)
     print(f"[UPLOAD_API_DEBUG] Secured filename: {filename}", flush=True)
     print(f"[UPLOAD_API_DEBUG] File ID created: {file_id}", flush=True)
-    print(f"[UPLOAD_API_DEBUG] File actually saved as: {filename_on_disk}", flush=True)
+    print(f"[UPLOAD_API_DEBUG] File actually saved as: {saved_name}", flush=True)
     print(f"[UPLOAD_API_DEBUG] Full file path on disk: {file_path}", flush=True)
 
     response_data = {
         "message": "文件上传成功",
         "file_id": file_id,
         "file_name": original_filename,  # 返回原始名
-        "file_path": file_path
+        "file_path": file_path,
+        "content_hash": stored["content_hash"],
+        "deduplicated": stored["deduplicated"]
     }
     logger.info(f"[UPLOAD_API_DEBUG] Returning JSON: {response_data}")
     print(f"[UPLOAD_API_DEBUG] Returning JSON: {json.dumps(response_data, ensure_ascii=False)}", flush=True)
@@ -30,12 +30,10 @@ def generate_review_document(review_results, output_folder):
         # 尝试导入必要的库
         import_success = True
         try:
-            import pandas as pd
             from openpyxl import Workbook
-            from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
         except ImportError:
             import_success = False
-            logging.warning("无法导入pandas或openpyxl，将使用JSON格式")
+            logging.warning("无法导入openpyxl，将使用JSON格式")
         
         if import_success:
             # 使用Excel格式
@@ -95,26 +93,20 @@ def generate_json_document(review_results, output_folder, doc_id=None):
         "generated_time": timestamp
     }
 
-def generate_excel_document(review_results, output_path):
+# Excel审查报告的列及列宽
+REVIEW_EXCEL_HEADERS = ["需求名称", "章节", "问题标题", "需求描述", "问题描述", "问题位置", "影响分析", "分数", "总结"]
+REVIEW_EXCEL_COLUMN_WIDTHS = [20, 10, 25, 25, 35, 20, 35, 8, 30]
+
+def iter_review_rows(review_results):
     """
-    生成Excel格式的需求审查文档
+    逐行产出Excel审查报告的数据行
     
     参数:
         review_results: list, 需求审查结果列表
-        output_path: str, 输出文件路径
         
     返回:
-        dict: 包含生成文档信息的字典
+        generator: 每个问题一行，需求名称、章节、分数和总结只写在该需求的第一行；没有问题的需求输出一行"无问题"
     """
-    import pandas as pd
-    from openpyxl import load_workbook
-    from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
-    
-    # 确保输出目录存在
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    # 提取数据，创建表格数据结构
-    rows = []
     for req_review in review_results:
         req_name = req_review.get("name", "未命名需求")
         req_chapter = req_review.get("chapter", "")
@@ -125,77 +117,56 @@ def generate_excel_document(review_results, output_path):
         score = review_result.get("score", 0)
         summary = review_result.get("summary", "")
         
-        # 如果没有问题，创建一个空行
+        # 如果没有问题，输出一个空行
         if not problems:
-            rows.append({
-                "需求名称": req_name,
-                "章节": req_chapter,
-                "问题标题": "无问题",
-                "需求描述": "",
-                "问题描述": "",
-                "问题位置": "",
-                "影响分析": "",
-                "分数": score,
-                "总结": summary
-            })
-        else:
-            # 添加每个问题
-            for i, problem in enumerate(problems):
-                rows.append({
-                    "需求名称": req_name if i == 0 else "",
-                    "章节": req_chapter if i == 0 else "",
-                    "问题标题": problem.get("problem_title", ""),
-                    "需求描述": problem.get("requirement_description", ""),
-                    "问题描述": problem.get("problem_description", ""),
-                    "问题位置": problem.get("problem_location", ""),
-                    "影响分析": problem.get("impact_analysis", ""),
-                    "分数": score if i == 0 else "",
-                    "总结": summary if i == 0 else ""
-                })
-    
-    # 创建DataFrame
-    df = pd.DataFrame(rows)
-    
-    # 保存为Excel
-    df.to_excel(output_path, index=False)
-    
-    # 美化Excel
-    wb = load_workbook(output_path)
-    ws = wb.active
-    
-    # 设置列宽
-    ws.column_dimensions['A'].width = 20  # 需求名称
-    ws.column_dimensions['B'].width = 10  # 章节
-    ws.column_dimensions['C'].width = 25  # 问题标题
-    ws.column_dimensions['D'].width = 25  # 需求描述
-    ws.column_dimensions['E'].width = 35  # 问题描述
-    ws.column_dimensions['F'].width = 20  # 问题位置
-    ws.column_dimensions['G'].width = 35  # 影响分析
-    ws.column_dimensions['H'].width = 8   # 分数
-    ws.column_dimensions['I'].width = 30  # 总结
+            yield [req_name, req_chapter, "无问题", "", "", "", "", score, summary]
+            continue
+        
+        # 输出每个问题
+        for i, problem in enumerate(problems):
+            first = i == 0
+            yield [
+                req_name if first else "",
+                req_chapter if first else "",
+                problem.get("problem_title", ""),
+                problem.get("requirement_description", ""),
+                problem.get("problem_description", ""),
+                problem.get("problem_location", ""),
+                problem.get("impact_analysis", ""),
+                score if first else "",
+                summary if first else ""
+            ]
+
+def write_review_excel(review_results, output_path):
+    """
+    以只写模式逐行写出Excel审查报告
     
-    # 设置自动换行
-    for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-        for cell in row:
-            cell.alignment = Alignment(wrap_text=True, vertical='top')
+    参数:
+        review_results: list, 需求审查结果列表
+        output_path: str, 输出文件路径
+    """
+    from app.documentReview.common.excel_writer import StreamingExcelWriter, HEADER_STYLE
     
-    # 设置标题行格式
-    header_font = Font(bold=True, size=12)
-    header_fill = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")
-    thin_border = Border(
-        left=Side(style='thin'), 
-        right=Side(style='thin'), 
-        top=Side(style='thin'), 
-        bottom=Side(style='thin')
-    )
+    writer = StreamingExcelWriter("Sheet1", REVIEW_EXCEL_COLUMN_WIDTHS)
+    writer.append(REVIEW_EXCEL_HEADERS, style=HEADER_STYLE)
+    writer.append_rows(iter_review_rows(review_results))
+    writer.save(output_path)
+
+def generate_excel_document(review_results, output_path):
+    """
+    生成Excel格式的需求审查文档
     
-    for cell in ws[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = thin_border
+    参数:
+        review_results: list, 需求审查结果列表
+        output_path: str, 输出文件路径
+        
+    返回:
+        dict: 包含生成文档信息的字典
+    """
+    # 确保输出目录存在
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
-    # 保存修改后的Excel
-    wb.save(output_path)
+    write_review_excel(review_results, output_path)
     
     # 生成文档ID
     doc_id = os.path.basename(output_path).split('.')[0].replace('requirement_review_', '')
@@ -277,99 +248,13 @@ def generate_review_doc(review_results, output_path, format_type="json"):
     elif format_type == "excel":
         # 尝试生成Excel格式
         try:
-            import pandas as pd
-            from openpyxl import load_workbook
-            from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
-            
-            # 提取数据，创建表格数据结构
-            rows = []
-            for req_review in review_results:
-                req_name = req_review.get("name", "未命名需求")
-                req_chapter = req_review.get("chapter", "")
-                review_result = req_review.get("review_result", {})
-                
-                # 获取审查问题列表
-                problems = review_result.get("requirements_review", [])
-                score = review_result.get("score", 0)
-                summary = review_result.get("summary", "")
-                
-                # 如果没有问题，创建一个空行
-                if not problems:
-                    rows.append({
-                        "需求名称": req_name,
-                        "章节": req_chapter,
-                        "问题标题": "无问题",
-                        "需求描述": "",
-                        "问题描述": "",
-                        "问题位置": "",
-                        "影响分析": "",
-                        "分数": score,
-                        "总结": summary
-                    })
-                else:
-                    # 添加每个问题
-                    for i, problem in enumerate(problems):
-                        rows.append({
-                            "需求名称": req_name if i == 0 else "",
-                            "章节": req_chapter if i == 0 else "",
-                            "问题标题": problem.get("problem_title", ""),
-                            "需求描述": problem.get("requirement_description", ""),
-                            "问题描述": problem.get("problem_description", ""),
-                            "问题位置": problem.get("problem_location", ""),
-                            "影响分析": problem.get("impact_analysis", ""),
-                            "分数": score if i == 0 else "",
-                            "总结": summary if i == 0 else ""
-                        })
-            
-            # 创建DataFrame
-            df = pd.DataFrame(rows)
-            
-            # 保存为Excel
-            df.to_excel(output_path, index=False)
-            
-            # 美化Excel
-            wb = load_workbook(output_path)
-            ws = wb.active
-            
-            # 设置列宽
-            ws.column_dimensions['A'].width = 20  # 需求名称
-            ws.column_dimensions['B'].width = 10  # 章节
-            ws.column_dimensions['C'].width = 25  # 问题标题
-            ws.column_dimensions['D'].width = 25  # 需求描述
-            ws.column_dimensions['E'].width = 35  # 问题描述
-            ws.column_dimensions['F'].width = 20  # 问题位置
-            ws.column_dimensions['G'].width = 35  # 影响分析
-            ws.column_dimensions['H'].width = 8   # 分数
-            ws.column_dimensions['I'].width = 30  # 总结
-            
-            # 设置自动换行
-            for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-                for cell in row:
-                    cell.alignment = Alignment(wrap_text=True, vertical='top')
-            
-            # 设置标题行格式
-            header_font = Font(bold=True, size=12)
-            header_fill = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")
-            thin_border = Border(
-                left=Side(style='thin'), 
-                right=Side(style='thin'), 
-                top=Side(style='thin'), 
-                bottom=Side(style='thin')
-            )
-            
-            for cell in ws[1]:
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.border = thin_border
-            
-            # 保存修改后的Excel
-            wb.save(output_path)
+            write_review_excel(review_results, output_path)
             
             logging.info(f"已生成Excel格式审查文档: {output_path}")
             return output_path
         
         except ImportError:
-            logging.warning("无法导入pandas或openpyxl，将使用JSON格式")
+            logging.warning("无法导入openpyxl，将使用JSON格式")
             # 回退到JSON格式
             output_path = output_path.replace('.xlsx', '.json')
             return generate_review_doc(review_results, output_path, "json")
@@ -5,19 +5,48 @@
 import json
 import logging
 import re
+from datetime import datetime
 
 from app.documentReview.Regression.config import get_config
+from app.documentReview.common.review_executor import ReviewExecutor, get_max_in_flight
+from app.documentReview.common.review_cache import cached_review, mark_review
 from .api import call_openai_api, call_ollama_api
 
-def review_requirement(requirement):
+# 审查提示词模板版本，修改提示词后需递增，使缓存的旧结果失效
+REVIEW_PROMPT_VERSION = "regression-v1"
+
+def review_requirement(requirement, use_cache=True):
     """
-    对单个需求进行审查
+    对单个需求进行审查，名称和内容未变化的需求直接复用缓存的审查结果
     
     参数:
         requirement: str or dict, 需要审查的需求，可以是字符串或字典
+        use_cache: bool, 是否使用缓存，为False时强制重新审查
         
     返回:
-        dict: 审查结果字典
+        dict: 审查结果字典，附带reviewed_at和from_cache字段
+    """
+    config = get_config()
+    if not isinstance(requirement, dict):
+        # 字符串类型的需求没有稳定的名称，不使用缓存
+        review, _ = _review_requirement_with_model(requirement, config)
+        return mark_review(review, datetime.now().isoformat(timespec="seconds"), False)
+    return cached_review(
+        requirement, REVIEW_PROMPT_VERSION, config,
+        lambda: _review_requirement_with_model(requirement, config),
+        use_cache=use_cache
+    )
+
+def _review_requirement_with_model(requirement, config):
+    """
+    调用AI模型对单个需求进行审查
+    
+    参数:
+        requirement: str or dict, 需要审查的需求，可以是字符串或字典
+        config: dict, 模型配置
+        
+    返回:
+        tuple: (审查结果字典, 结果是否来自模型且解析成功，可写入缓存)
     """
     # 记录需求详情
     if isinstance(requirement, dict):
@@ -73,7 +102,6 @@ def review_requirement(requirement):
         else:
             logging.debug("需求内容为空或未提供")
         
-        config = get_config()
         provider = config.get("provider", "openai")
         logging.debug(f"使用提供商: {provider}")
         
@@ -139,7 +167,7 @@ def review_requirement(requirement):
                         "summary": "需求总体质量良好，但存在一些可以改进的地方"
                     }
                 }
-                return review_item
+                return review_item, False
             
             # 根据不同提供商调用API
             if provider == "openai":
@@ -223,7 +251,7 @@ def review_requirement(requirement):
                 }
                 
                 logging.info(f"需求《{requirement_dict.get('name', '未命名需求')}》审查完成，发现 {len(result_json.get('requirements_review', []))} 个问题")
-                return review_result
+                return review_result, True
                 
             except json.JSONDecodeError as e:
                 logging.error(f"解析AI返回的JSON失败: {e}")
@@ -242,7 +270,7 @@ def review_requirement(requirement):
                         "score": 0,
                         "summary": "无法完成需求审查"
                     }
-                }
+                }, False
         
         except Exception as e:
             logging.error(f"调用AI审查需求时出错: {e}")
@@ -261,7 +289,7 @@ def review_requirement(requirement):
                     "score": 0,
                     "summary": "无法完成需求审查"
                 }
-            }
+            }, False
     except Exception as e:
         logging.error(f"审查需求过程中发生未预期的错误: {str(e)}")
         return {
@@ -278,7 +306,7 @@ def review_requirement(requirement):
                 "score": 0,
                 "summary": "需求审查失败"
             }
-        }
+        }, False
 
 def review_requirements(requirements):
     """
@@ -321,19 +349,15 @@ def review_requirements(requirements):
             requirements = [requirements]
             logging.debug(f"将类型{type(requirements[0])}的单个对象包装为列表")
     
+    # 并发审查，结果保持输入顺序；单条需求失败时返回错误结构的结果
+    executor = ReviewExecutor(review_requirement, get_max_in_flight(get_config()))
     review_results = []
-    for i, requirement in enumerate(requirements):
-        logging.debug(f"开始审查第 {i+1}/{len(requirements)} 个需求")
-        req_name = requirement.get('name', '未命名') if isinstance(requirement, dict) else f'需求{i+1}'
-        logging.debug(f"审查需求: {req_name}")
-        
-        review_result = review_requirement(requirement)
-        
+    for i, review_result in executor.iter_results(requirements):
         # 记录审查结果的基本信息
         result_name = review_result.get('name', '未命名')
         review_data = review_result.get('review_result', {})
         problems_count = len(review_data.get('requirements_review', []))
-        logging.debug(f"需求《{result_name}》审查完成，发现 {problems_count} 个问题")
+        logging.debug(f"第 {i+1}/{len(requirements)} 个需求《{result_name}》审查完成，发现 {problems_count} 个问题")
         
         review_results.append(review_result)
     
@@ -15,7 +15,8 @@ from flask_cors import CORS
 
 from app.documentReview.Regression.requirement_extractor import (
     extract_requirements, 
-    generate_requirement_excel
+    generate_requirement_excel,
+    generate_requirement_csv
 )
 
 # 导入AI提取模块
@@ -31,6 +32,29 @@ from app.documentReview.Regression.document_reader import (
     extract_requirement_candidates
 )
 
+# 导入审查公共组件
+from app.documentReview.common.review_executor import ReviewExecutor, get_max_in_flight
+from app.documentReview.common.review_stream import review_stream_response, wants_sse
+from app.documentReview.common.job_queue import JobCancelled, create_jobs_blueprint, get_job_queue, job_accepted_response
+from app.documentReview.common.record_file import RecordFile, write_records
+from app.documentReview.common.session_store import get_session_data, save_session_data, update_session_data
+from app.documentReview.common.blob_store import save_upload
+from app.documentReview.common.file_registry import get_file_registry, resolve_upload
+from app.documentReview.common.chunked_upload import create_chunked_upload_blueprint
+from app.documentReview.common.storage_lifecycle import get_storage_manager, mark_used
+from app.documentReview.common.report_artifacts import (
+    get_report_store,
+    get_report_formats,
+    make_report_renderers,
+    make_artifact_id,
+    results_digest,
+    parse_artifact_id,
+    send_report_artifact
+)
+# 需求和审查问题写入项目数据库，供全文检索；后台任务的状态同步到项目文档
+from app.projectManagement.requirement_store import record_requirements, record_reviews
+from app.projectManagement.document_status import on_job_status
+
 # 创建Flask应用
 app = Flask(__name__)
 
@@ -73,6 +97,16 @@ if not os.path.exists(OUTPUT_FOLDER):
     os.makedirs(OUTPUT_FOLDER)
 app.config['OUTPUT_FOLDER'] = OUTPUT_FOLDER
 
+# Excel类型 -> (输出文件名, 下载显示名)
+EXCEL_FILE_NAMES = {
+    'requirement': ('requirement_analysis', '需求分析表'),
+    'test_case': ('test_cases', '测试用例表')
+}
+
+def session_requirements_path(session_id):
+    """会话需求记录文件路径（JSON Lines，附带偏移量索引）"""
+    return os.path.join(app.config['OUTPUT_FOLDER'], f"{secure_filename(session_id)}_requirements.jsonl")
+
 # 允许的文件扩展名
 ALLOWED_EXTENSIONS = {'doc', 'docx'}
 
@@ -80,11 +114,48 @@ def allowed_file(filename):
     """检查文件扩展名是否允许"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def chunked_upload_target(file_id, file_name):
+    """分块上传完成后的文件路径，与/api/upload的命名方式一致"""
+    filename = secure_filename(file_name)
+    return os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_{filename}"), filename
+
+# 分块上传接口：/api/uploads
+app.register_blueprint(create_chunked_upload_blueprint(
+    'chunked_upload', chunked_upload_target, allowed_file, url_prefix='/api', source='regression'
+))
+
+# 后台任务查询接口：/api/jobs
+app.register_blueprint(create_jobs_blueprint('jobs', url_prefix='/api'))
+
+# 后台任务类型
+JOB_EXTRACT = "regression_extract"
+JOB_AI_EXTRACT = "regression_ai_extract"
+JOB_REVIEW = "regression_review"
+
+# 只接受本机调用的管理接口（如立即执行存储清理）允许的客户端地址
+LOCAL_ADDRESSES = {'127.0.0.1', '::1'}
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """健康检查接口"""
     return jsonify({"status": "ok"})
 
+@app.route('/api/storage/metrics', methods=['GET'])
+def storage_metrics():
+    """存储清理指标：累计删除的文件数、回收的字节数及各目录最近一次的统计"""
+    return jsonify(get_storage_manager().metrics())
+
+@app.route('/api/storage/gc', methods=['POST'])
+def storage_gc():
+    """立即执行一次存储清理，会删除文件，只接受本机发起的请求"""
+    if request.remote_addr not in LOCAL_ADDRESSES:
+        logging.warning(f"拒绝来自 {request.remote_addr} 的存储清理请求")
+        return jsonify({"success": False, "error": "存储清理只能在服务器本机调用"}), 403
+    result = get_storage_manager().run_once()
+    if result is None:
+        return jsonify({"success": False, "error": "存储清理正在执行或无法收集文件引用"}), 409
+    return jsonify({"success": True, **result})
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     """
@@ -110,13 +181,15 @@ def upload_file():
     filename = secure_filename(file.filename)
     file_id = str(uuid.uuid4())
     file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_{filename}")
-    file.save(file_path)
+    stored = save_upload(file.stream, file_path, file_id, filename, source="regression")
     
     return jsonify({
         "message": "文件上传成功",
         "file_id": file_id,
         "file_name": filename,
-        "file_path": file_path
+        "file_path": file_path,
+        "content_hash": stored["content_hash"],
+        "deduplicated": stored["deduplicated"]
     })
 
 # ===================== 需求候选项自动发现接口 =====================
@@ -124,7 +197,7 @@ def upload_file():
 def requirement_candidates_api():
     """
     自动扫描文档生成需求名称候选列表，供前端选择。
-    POST参数：file_id, file_name, catalog_file_id, catalog_file_name（目录参数是必需的）
+    POST参数：file_id, file_name, catalog_file_id, catalog_file_name（目录参数可选，未提供时使用文档自身的目录）
     返回：{"candidates": [{name, chapter}...]}，将需求名称和章节号一起返回
     """
     import logging
@@ -147,59 +220,32 @@ def requirement_candidates_api():
         catalog_file_id = data.get('catalog_file_id')
         catalog_file_name = data.get('catalog_file_name')
         
-        if not file_id or not file_name:
+        if not file_id:
             logger.error(f"\u7f3a少文件参数: file_id={file_id}, file_name={file_name}")
             return jsonify({"error": "缺少文件参数"}), 400
             
-        if not catalog_file_id or not catalog_file_name:
-            logger.error(f"\u7f3a少目录文件参数: catalog_file_id={catalog_file_id}, catalog_file_name={catalog_file_name}")
-            return jsonify({"error": "必须提供目录文件！"}), 400
-            
-        # 首先尝试使用完整文件名
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_{file_name}")
-        # 如果不存在，再尝试只用扩展名
-        if not os.path.exists(file_path):
-            # 发现上传后的文件名是 file_id_docx 格式
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_docx")
-            
-        if not os.path.exists(file_path):
-            logger.error(f"\u6587件不存在: {file_path}")
+        # 按file_id从上传文件登记表中查找，任一应用上传的文件都可以使用
+        file_path = resolve_upload(file_id)
+        if not file_path:
+            logger.error(f"\u6587件不存在: file_id={file_id}")
             return jsonify({"error": "文件不存在 - 请确保已正确上传"}), 404
             
-        # 目录文件也用同样的逻辑
-        catalog_file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{catalog_file_id}_{catalog_file_name}")
-        # 如果找不到文件，尝试其他可能的格式
-        if not os.path.exists(catalog_file_path):
-            catalog_file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{catalog_file_id}_docx")
-            if not os.path.exists(catalog_file_path):
-                # 尝试只用catalog_file_id
-                catalog_file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{catalog_file_id}")
-                if not os.path.exists(catalog_file_path):
-                    # 尝试在uploads根目录查找
-                    root_upload_folder = os.path.dirname(app.config['UPLOAD_FOLDER'])
-                    catalog_file_path = os.path.join(root_upload_folder, f"{catalog_file_id}_{catalog_file_name}")
-                    if not os.path.exists(catalog_file_path):
-                        catalog_file_path = os.path.join(root_upload_folder, f"{catalog_file_id}_docx")
-                        if not os.path.exists(catalog_file_path):
-                            catalog_file_path = os.path.join(root_upload_folder, f"{catalog_file_id}")
-        
-        logging.warning(f"使用目录文件路径: {catalog_file_path}")
-        
-        if not os.path.exists(catalog_file_path):
-            logging.error(f"目录文件不存在: {catalog_file_path}")
-            logging.error(f"请求参数: catalog_file_id={catalog_file_id}, catalog_file_name={catalog_file_name}")
-            return jsonify({"error": "目录文件不存在 - 请确保已正确上传"}), 404
+        # 未提供目录文件时使用文档自身的目录
+        catalog_file_path = None
+        if catalog_file_id:
+            catalog_file_path = resolve_upload(catalog_file_id)
+            if not catalog_file_path:
+                logging.error(f"目录文件不存在: catalog_file_id={catalog_file_id}, catalog_file_name={catalog_file_name}")
+                return jsonify({"error": "目录文件不存在 - 请确保已正确上传"}), 404
     except Exception as e:
         logger.error(f"\u5904理请求时出错: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({"error": f"处理请求时出错: {str(e)}"}), 500
             
-    # 注意：这里使用包名的绝对导入
-    from app.documentReview.ConfigurationItem.document_reader import extract_requirement_candidates
     import uuid
     
     try:
-        # 使用目录文件提取需求候选项
+        # 使用目录文件（或文档自身的目录）提取需求候选项
         candidates = extract_requirement_candidates(file_path, catalog_file_path)
     except Exception as e:
         print(f"[ERROR] 调用extract_requirement_candidates函数时出错: {str(e)}")
@@ -208,7 +254,7 @@ def requirement_candidates_api():
         return jsonify({"error": f"提取需求候选项时出错: {str(e)}"}), 500
     
     if not candidates:
-        return jsonify({"error": "从目录文件中未能提取出任何需求条目"}), 400
+        return jsonify({"error": "从目录中未能提取出任何需求条目"}), 400
     
     # 创建会话ID
     session_id = str(uuid.uuid4())
@@ -219,63 +265,88 @@ def requirement_candidates_api():
     })
 
 # ===================== 需求提取接口 =====================
+def clean_requirement_names(requirement_names):
+    """
+    清除需求名称中的章节号前缀（如 "3.1.1 "）
+    
+    参数:
+        requirement_names: 用户确认的需求名称列表
+        
+    返回:
+        清除前缀后的需求名称列表
+    """
+    return [re.sub(r'^\d+(\.\d+)*\s+', '', name) for name in requirement_names]
+
+def requirement_placeholder(name, content):
+    """未提取到内容的需求占位项，章节号取需求名称中的第一段"""
+    return {
+        "name": name,
+        "content": content,
+        "chapter": name.split(' ')[0] if ' ' in name else ''
+    }
+
 @app.route('/api/extract', methods=['POST'])
 def extract_requirements_api():
     """
     需求提取接口（修改版，根据用户确认的需求名称列表提取）
-    接收文件ID、文件名和确认的需求名称列表，根据需求名称提取详细内容
+    接收文件ID、文件名和确认的需求名称列表，提交后台提取任务后立即返回任务ID和会话ID（202），
+    通过 /api/jobs/<job_id> 查询进度，任务结果与原同步接口的响应相同
     """
-    try:
-        data = request.json
-        file_id = data.get('file_id')
-        file_name = data.get('file_name')
-        requirement_names = data.get('requirement_names', [])  # 用户确认的需求名称列表
-        catalog_file_id = data.get('catalog_file_id')  # 目录文件ID
-        catalog_file_name = data.get('catalog_file_name')  # 目录文件名称
+    data = request.json or {}
+    file_id = data.get('file_id')
+    catalog_file_id = data.get('catalog_file_id')  # 目录文件ID
+    
+    logging.debug(f"提取需求请求参数: file_id={file_id}, catalog_file_id={catalog_file_id}")
+    
+    if not file_id:
+        return jsonify({"error": "缺少必要参数"}), 400
+
+    if not resolve_upload(file_id):
+        logging.error(f"文件不存在: file_id={file_id}")
+        return jsonify({"error": "文件不存在 - 请确保文件已正确上传"}), 404
+
+    # 会话ID在提交时生成，任务重新执行时沿用
+    session_id = str(uuid.uuid4())
+    job = get_job_queue().submit(JOB_EXTRACT, {
+        "file_id": file_id,
+        "file_name": data.get('file_name'),
+        "requirement_names": data.get('requirement_names', []),  # 用户确认的需求名称列表
+        "catalog_file_id": catalog_file_id,
+        "catalog_file_name": data.get('catalog_file_name')  # 目录文件名称
+    }, stage="extract", file_id=file_id, session_id=session_id)
+    return job_accepted_response(job, 'jobs', session_id=session_id)
+
+def run_extract_job(job):
+    """
+    后台执行需求提取任务
+    
+    参数:
+        job: 任务上下文
         
-        logging.debug(f"提取需求请求参数: file_id={file_id}, catalog_file_id={catalog_file_id}")
+    返回:
+        与原同步接口相同的响应内容
+    """
+    payload = job.payload
+    session_id = job.session_id
+    file_id = payload['file_id']
+    requirement_names = payload.get('requirement_names', [])
+    catalog_file_id = payload.get('catalog_file_id')
+    try:
         logging.debug(f"开始提取需求，共{len(requirement_names)}个需求名称")
-        
-        # 清除需求名称中的章节号前缀
-        cleaned_requirement_names = []
-        for req_name in requirement_names:
-            # 移除前面的章节号部分 (如 "3.1.1 ")
-            if re.match(r'^\d+(\.\d+)*\s+', req_name):
-                clean_name = re.sub(r'^\d+(\.\d+)*\s+', '', req_name)
-                cleaned_requirement_names.append(clean_name)
-            else:
-                cleaned_requirement_names.append(req_name)
-                
-        if not file_id or not file_name:
-            return jsonify({"error": "缺少必要参数"}), 400
-
-        # 构建file_path - 使用与候选项提取相同的逻辑
-        # 首先尝试使用完整文件名
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_{file_name}")
-        # 如果不存在，再尝试只用扩展名
-        if not os.path.exists(file_path):
-            # 发现上传后的文件名是 file_id_docx 格式
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_docx")
-        
-        if not os.path.exists(file_path):
-            logging.error(f"文件不存在: {file_path}")
-            return jsonify({"error": "文件不存在 - 请确保文件已正确上传"}), 404
-
-        # 构建catalog_file_path
-        catalog_file_path = None
-        if catalog_file_id and catalog_file_name:
-            catalog_file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{catalog_file_id}_{catalog_file_name}")
-            if not os.path.exists(catalog_file_path):
-                catalog_file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{catalog_file_id}_docx")
-            if not os.path.exists(catalog_file_path):
-                logging.warning(f"目录文件不存在: {catalog_file_path}")
-                catalog_file_path = None
+        cleaned_requirement_names = clean_requirement_names(requirement_names)
+
+        file_path = resolve_upload(file_id)
+        if not file_path:
+            raise FileNotFoundError("文件不存在 - 请确保文件已正确上传")
+
+        catalog_file_path = resolve_upload(catalog_file_id)
+        if catalog_file_id and not catalog_file_path:
+            logging.warning(f"目录文件不存在: catalog_file_id={catalog_file_id}, catalog_file_name={payload.get('catalog_file_name')}")
 
-        # 调用requirement_extractor中的extract_requirements函数
-        from app.documentReview.Regression.requirement_extractor import extract_requirements
-        
         # 提取需求内容
+        job.progress(0, len(cleaned_requirement_names), "正在提取需求内容")
         requirement_dict = extract_requirements(file_path, cleaned_requirement_names, catalog_file_path)
+        job.check_cancelled()
 
         # 处理提取结果
         processed_requirements = []
@@ -284,12 +355,7 @@ def extract_requirements_api():
             logging.warning("提取需求返回空字典，将为所有需求名创建占位符")
             # 创建占位符 - 为所有需求创建默认项
             for name in cleaned_requirement_names:
-                chapter = name.split(' ')[0] if ' ' in name else ''
-                processed_requirements.append({
-                    "name": name,
-                    "content": f"未能从文档中提取「{name}」的需求内容",
-                    "chapter": chapter
-                })
+                processed_requirements.append(requirement_placeholder(name, f"未能从文档中提取「{name}」的需求内容"))
         else:
             # 将字典转换为列表，以便于前端处理
             for name, content in requirement_dict.items():
@@ -304,155 +370,164 @@ def extract_requirements_api():
             # 确保所有需求都有内容
             for name in cleaned_requirement_names:
                 if name not in requirement_dict:
-                    chapter = name.split(' ')[0] if ' ' in name else ''
-                    processed_requirements.append({
-                        "name": name,
-                        "content": f"未能从文档中提取「{name}」的需求内容",
-                        "chapter": chapter
-                    })
+                    processed_requirements.append(requirement_placeholder(name, f"未能从文档中提取「{name}」的需求内容"))
         
         # 按章节号排序
         processed_requirements.sort(key=lambda x: x["chapter"])
         
-        # 确保即使没有提取到需求也创建会话ID
-        session_id = str(uuid.uuid4())
-        
         # 保存至会话缓存
         save_session_data(session_id, {
             "requirements": processed_requirements,
+            "file_id": file_id,
             "file_path": file_path
         })
+        record_requirements(session_id, file_id, processed_requirements)
 
-        # 写入临时文件
-        temp_file = os.path.join(app.config['OUTPUT_FOLDER'], f"{session_id}_requirements.txt")
-        with open(temp_file, 'w', encoding='utf-8') as f:
-            for req in processed_requirements:
-                # 只保存 name 和 content 字段
-                f.write(f"{req['name']}|{req['content']}\n")
+        # 写入会话需求记录文件，供生成Excel时逐条读取
+        write_records(session_requirements_path(session_id), (
+            {"name": req["name"], "chapter": req["chapter"], "content": req["content"]}
+            for req in processed_requirements
+        ))
+        job.progress(len(processed_requirements), len(processed_requirements), "需求提取完成")
 
-        return jsonify({
+        return {
             "message": "需求提取成功",
             "session_id": session_id,
             "requirements_count": len(processed_requirements),
             "requirements": processed_requirements
-        })
+        }
     
+    except JobCancelled:
+        raise
     except Exception as e:
         logging.error(f"提取需求时出现异常: {str(e)}", exc_info=True)
         
-        # 即使出现异常，也尝试返回部分结果或占位符
-        if 'requirement_names' in locals():
-            # 为所有需求创建占位符
-            processed_requirements = []
-            for name in requirement_names:
-                chapter = name.split(' ')[0] if ' ' in name else ''
-                processed_requirements.append({
-                    "name": name,
-                    "content": f"提取需求时出错: {str(e)}",
-                    "chapter": chapter
-                })
-            
-            # 创建会话ID
-            session_id = str(uuid.uuid4())
-            
-            return jsonify({
-                "message": f"需求提取过程中出现错误，但仍返回占位符结果: {str(e)}",
-                "session_id": session_id,
-                "requirements_count": len(processed_requirements),
-                "requirements": processed_requirements
-            })
-        else:
-            return jsonify({"error": f"需求提取失败: {str(e)}"}), 500
+        # 即使出现异常，也返回占位符结果
+        processed_requirements = [
+            requirement_placeholder(name, f"提取需求时出错: {str(e)}") for name in requirement_names
+        ]
+        return {
+            "message": f"需求提取过程中出现错误，但仍返回占位符结果: {str(e)}",
+            "session_id": session_id,
+            "requirements_count": len(processed_requirements),
+            "requirements": processed_requirements
+        }
 
 @app.route('/api/ai_extract', methods=['POST'])
 def ai_extract_requirements_api():
     """
     AI驱动的需求提取接口
-    使用大型语言模型分析文档并提取需求内容
+    使用大型语言模型分析文档并提取需求内容，提交后台任务后立即返回任务ID和会话ID（202）
     """
-    try:
-        data = request.json
-        file_id = data.get('file_id')
-        file_name = data.get('file_name')
-        requirement_names = data.get('requirement_names', [])  # 用户确认的需求名称列表
-        model = data.get('model', 'gpt-3.5-turbo')  # 默认使用gpt-3.5-turbo
-        
-        if not file_id or not file_name:
-            return jsonify({"error": "缺少必要参数"}), 400
+    data = request.json or {}
+    file_id = data.get('file_id')
+    
+    if not file_id:
+        return jsonify({"error": "缺少必要参数"}), 400
 
-        # 构建file_path
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_{file_name}")
-        if not os.path.exists(file_path):
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_docx")
-        
-        if not os.path.exists(file_path):
-            logging.error(f"文件不存在: {file_path}")
-            return jsonify({"error": "文件不存在 - 请确保文件已正确上传"}), 404
+    if not resolve_upload(file_id):
+        logging.error(f"文件不存在: file_id={file_id}")
+        return jsonify({"error": "文件不存在 - 请确保文件已正确上传"}), 404
 
-        # 调用AI提取模块提取需求内容
-        requirement_dict = ai_extract_named_requirements(file_path, cleaned_requirement_names, model)
+    session_id = str(uuid.uuid4())
+    job = get_job_queue().submit(JOB_AI_EXTRACT, {
+        "file_id": file_id,
+        "file_name": data.get('file_name'),
+        "requirement_names": data.get('requirement_names', []),  # 用户确认的需求名称列表
+        "model": data.get('model', 'gpt-3.5-turbo')  # 默认使用gpt-3.5-turbo
+    }, stage="extract", file_id=file_id, session_id=session_id)
+    return job_accepted_response(job, 'jobs', session_id=session_id)
 
-        # 处理提取结果
-        processed_requirements = []
-        
-        if not requirement_dict:
-            logging.warning("AI提取需求返回空字典，将为所有需求名创建占位符")
-            # 创建占位符 - 为所有需求创建默认项
-            for name in cleaned_requirement_names:
-                chapter = name.split(' ')[0] if ' ' in name else ''
-                processed_requirements.append({
-                    "name": name,
-                    "content": f"AI未能从文档中提取「{name}」的需求内容",
-                    "chapter": chapter
-                })
-        else:
-            # 将字典转换为列表，以便于前端处理
-            for name, content in requirement_dict.items():
-                # 尝试从需求名称中提取章节号
-                chapter = name.split(' ')[0] if ' ' in name else ''
-                processed_requirements.append({
-                    "name": name,
-                    "content": content,
-                    "chapter": chapter,
-                    "extraction_method": "AI"  # 标记为AI提取
-                })
-            
-            # 确保所有需求都有内容
-            for name in cleaned_requirement_names:
-                if name not in requirement_dict:
-                    chapter = name.split(' ')[0] if ' ' in name else ''
-                    processed_requirements.append({
-                        "name": name,
-                        "content": f"AI未能从文档中提取「{name}」的需求内容",
-                        "chapter": chapter
-                    })
-        
-        # 创建一个新的会话ID用于后续操作
-        session_id = str(uuid.uuid4())
-        
-        # 存储会话数据，包括提取的需求和原始文件ID
-        session_data = {
-            "requirements": processed_requirements,
-            "file_id": file_id,
-            "file_name": file_name
-        }
+def run_ai_extract_job(job):
+    """
+    后台执行AI需求提取任务，失败时任务状态为failed
+    
+    参数:
+        job: 任务上下文
         
-        # 保存会话数据
-        save_session_data(session_id, session_data)
+    返回:
+        与原同步接口相同的响应内容
+    """
+    payload = job.payload
+    session_id = job.session_id
+    file_id = payload['file_id']
+    cleaned_requirement_names = clean_requirement_names(payload.get('requirement_names', []))
+
+    file_path = resolve_upload(file_id)
+    if not file_path:
+        raise FileNotFoundError("文件不存在 - 请确保文件已正确上传")
+
+    # 调用AI提取模块提取需求内容
+    job.progress(0, len(cleaned_requirement_names), "正在使用AI提取需求内容")
+    requirement_dict = ai_extract_named_requirements(file_path, cleaned_requirement_names, payload.get('model'))
+    job.check_cancelled()
+
+    # 处理提取结果
+    processed_requirements = []
+    
+    if not requirement_dict:
+        logging.warning("AI提取需求返回空字典，将为所有需求名创建占位符")
+        # 创建占位符 - 为所有需求创建默认项
+        for name in cleaned_requirement_names:
+            processed_requirements.append(requirement_placeholder(name, f"AI未能从文档中提取「{name}」的需求内容"))
+    else:
+        # 将字典转换为列表，以便于前端处理
+        for name, content in requirement_dict.items():
+            # 尝试从需求名称中提取章节号
+            chapter = name.split(' ')[0] if ' ' in name else ''
+            processed_requirements.append({
+                "name": name,
+                "content": content,
+                "chapter": chapter,
+                "extraction_method": "AI"  # 标记为AI提取
+            })
         
+        # 确保所有需求都有内容
+        for name in cleaned_requirement_names:
+            if name not in requirement_dict:
+                processed_requirements.append(requirement_placeholder(name, f"AI未能从文档中提取「{name}」的需求内容"))
+    
+    # 存储会话数据，包括提取的需求和原始文件ID
+    session_data = {
+        "requirements": processed_requirements,
+        "file_id": file_id,
+        "file_name": payload.get('file_name')
+    }
+    
+    # 保存会话数据
+    save_session_data(session_id, session_data)
+    record_requirements(session_id, file_id, processed_requirements)
+    job.progress(len(processed_requirements), len(processed_requirements), "需求提取完成")
+    
+    return {
+        "success": True,
+        "requirements": processed_requirements,
+        "session_id": session_id,
+        "message": f"成功使用AI提取了{len(processed_requirements)}个需求"
+    }
+
+@app.route('/api/session_requirements/<session_id>', methods=['GET'])
+def session_requirements_api(session_id):
+    """
+    分页读取会话需求
+    只读取请求页对应的记录，page从1开始，page_size默认50
+    """
+    records_file = session_requirements_path(session_id)
+    if not os.path.exists(records_file):
+        return jsonify({"error": "会话已过期"}), 404
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        page_size = min(max(int(request.args.get('page_size', 50)), 1), 500)
+    except ValueError:
+        return jsonify({"error": "page和page_size必须为整数"}), 400
+    with RecordFile(records_file) as records:
         return jsonify({
-            "success": True,
-            "requirements": processed_requirements,
             "session_id": session_id,
-            "message": f"成功使用AI提取了{len(processed_requirements)}个需求"
+            "page": page,
+            "page_size": page_size,
+            "total": len(records),
+            "requirements": records.page(page, page_size)
         })
-        
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return jsonify({
-            "error": f"AI需求提取失败: {str(e)}"
-        }), 500
 
 @app.route('/api/generate_excel', methods=['POST'])
 def generate_excel_api():
@@ -464,53 +539,37 @@ def generate_excel_api():
     data = request.json
     session_id = data.get('session_id')
     excel_type = data.get('excel_type', 'requirement')  # 默认生成需求分析表
+    file_format = data.get('file_format', 'xlsx')  # xlsx或csv
     
     if not session_id:
         return jsonify({"error": "缺少必要参数"}), 400
     
-    # 读取临时文件中的需求数据
-    temp_file = os.path.join(app.config['OUTPUT_FOLDER'], f"{session_id}_requirements.txt")
+    # 会话需求记录文件
+    records_file = session_requirements_path(session_id)
     
-    if not os.path.exists(temp_file):
+    if not os.path.exists(records_file):
         return jsonify({"error": "会话已过期"}), 404
     
-    # 从临时文件恢复需求数据
-    processed_requirements = []
-    with open(temp_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            parts = line.strip().split('|')
-            if len(parts) >= 4:  # 现在只有四个字段
-                req = {
-                    "identifier": parts[0],
-                    "name": parts[1],
-                    "chapter": parts[2],
-                    "content": parts[3]
-                }
-                processed_requirements.append(req)
-    
-    # 直接打印当前配置信息
-    config = get_config()
-    # 调试模式：显示完整API密钥信息
-    safe_config = json.loads(json.dumps(config))
-    if "openai" in safe_config and "api_key" in safe_config["openai"]:
-        api_key = safe_config["openai"]["api_key"]
-        print(f"[DEBUG] 完整API密钥（调试用）: '{api_key}'")
-    
-    # 根据类型生成不同的Excel文件
-    if excel_type == 'requirement':
-        output_file = os.path.join(app.config['OUTPUT_FOLDER'], f"{session_id}_requirement_analysis.xlsx")
-        success = generate_requirement_excel(processed_requirements, output_file)
-    elif excel_type == 'test_case':
-        output_file = os.path.join(app.config['OUTPUT_FOLDER'], f"{session_id}_test_cases.xlsx")
-        success = generate_requirement_excel(processed_requirements, output_file, "test_case")
-    else:
+    if excel_type not in EXCEL_FILE_NAMES:
         return jsonify({"error": "不支持的Excel类型"}), 400
+    if file_format not in ('xlsx', 'csv'):
+        return jsonify({"error": "不支持的文件格式"}), 400
+    
+    # 根据类型生成不同的文件，需求记录逐条从记录文件中读取
+    output_file = os.path.join(app.config['OUTPUT_FOLDER'], f"{session_id}_{EXCEL_FILE_NAMES[excel_type][0]}.{file_format}")
+    with RecordFile(records_file) as records:
+        if file_format == 'csv':
+            success = generate_requirement_csv(records, output_file)
+        else:
+            success = generate_requirement_excel(records, output_file, excel_type)
     
     if not success:
         return jsonify({"error": "生成Excel文件失败"}), 500
     
     # 返回文件下载链接
     download_url = f"/api/download/{session_id}/{excel_type}"
+    if file_format != 'xlsx':
+        download_url += f"?file_format={file_format}"
     
     return jsonify({
         "message": "Excel文件生成成功",
@@ -523,25 +582,27 @@ def download_excel(session_id, excel_type):
     文件下载接口
     根据会话 ID 和 Excel 类型，返回生成的 Excel 文件
     """
-    if excel_type == 'requirement':
-        file_name = f"{session_id}_requirement_analysis.xlsx"
-        display_name = "需求分析表.xlsx"
-    elif excel_type == 'test_case':
-        file_name = f"{session_id}_test_cases.xlsx"
-        display_name = "测试用例表.xlsx"
-    else:
+    if excel_type not in EXCEL_FILE_NAMES:
         return jsonify({"error": "不支持的Excel类型"}), 400
+    file_format = request.args.get('file_format', 'xlsx')
+    if file_format not in ('xlsx', 'csv'):
+        return jsonify({"error": "不支持的文件格式"}), 400
+    
+    base_name, display_base_name = EXCEL_FILE_NAMES[excel_type]
+    file_name = f"{session_id}_{base_name}.{file_format}"
+    display_name = f"{display_base_name}.{file_format}"
     
     file_path = os.path.join(app.config['OUTPUT_FOLDER'], file_name)
     
     if not os.path.exists(file_path):
         return jsonify({"error": "文件不存在"}), 404
     
+    mark_used(file_path)
     return send_file(
         file_path,
         as_attachment=True,
         download_name=display_name,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        mimetype='text/csv' if file_format == 'csv' else 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
 
 # ===================== 模型配置API =====================
@@ -583,16 +644,44 @@ def model_config_api():
             return jsonify({'success': False, 'error': str(e)})
 
 # ===================== 需求审查API =====================
+def parse_review_request(data):
+    """
+    从审查请求中取出需求列表和会话ID
+    
+    参数:
+        data: 请求JSON
+        
+    返回:
+        (需求列表, 会话ID)
+    """
+    requirements = data.get('requirements', [])
+    session_id = data.get('session_id', 'default')
+    
+    # 处理嵌套的需求数据结构 - 检查是否有嵌套的requirements结构
+    if requirements and isinstance(requirements, list) and len(requirements) > 0:
+        if isinstance(requirements[0], dict) and 'requirements' in requirements[0]:
+            logging.info("检测到嵌套的需求数据结构，正在提取内部需求")
+            # 提取内部的requirements
+            nested_requirements = []
+            for item in requirements:
+                if isinstance(item, dict) and 'requirements' in item:
+                    nested_requirements.extend(item.get('requirements', []))
+                    # 如果内部有session_id并且外部是默认值，则使用内部的
+                    if session_id == 'default' and 'session_id' in item:
+                        session_id = item.get('session_id')
+                        
+            requirements = nested_requirements
+    return requirements, session_id
+
 @app.route('/api/review_requirements', methods=['POST', 'OPTIONS'])
 def review_requirements_api():
     """
     需求审查API端点
-    对提取的需求进行AI评估和审查
-    返回需求审查结果
+    对提取的需求进行AI评估和审查，提交后台审查任务后立即返回任务ID（202），
+    通过 /api/jobs/<job_id> 查询进度，任务结果为需求审查结果
     """
     import logging
     import traceback
-    from app.documentReview.Regression.ai_reviewer import review_requirements
     
     logger = logging.getLogger(__name__)
     
@@ -602,46 +691,12 @@ def review_requirements_api():
     
     try:
         data = request.json
-        requirements = data.get('requirements', [])
-        session_id = data.get('session_id', 'default')
-        
-        # 处理嵌套的需求数据结构 - 检查是否有嵌套的requirements结构
-        if requirements and isinstance(requirements, list) and len(requirements) > 0:
-            if isinstance(requirements[0], dict) and 'requirements' in requirements[0]:
-                logger.info("检测到嵌套的需求数据结构，正在提取内部需求")
-                # 提取内部的requirements
-                nested_requirements = []
-                for item in requirements:
-                    if isinstance(item, dict) and 'requirements' in item:
-                        nested_requirements.extend(item.get('requirements', []))
-                        # 如果内部有session_id并且外部是默认值，则使用内部的
-                        if session_id == 'default' and 'session_id' in item:
-                            session_id = item.get('session_id')
-                            
-                requirements = nested_requirements
-                
+        requirements, session_id = parse_review_request(data)
         
         if not requirements:
             logger.warning("未提供需求数据")
             return jsonify({"error": "未提供需求数据"}), 400
         
-        
-        
-        
-        # 添加更详细的调试信息
-        logger.debug("需求数据详情:")
-        for i, req in enumerate(requirements):
-            req_name = req.get('name', '未命名') if isinstance(req, dict) else '非字典类型需求'
-            req_content = req.get('content', '无内容') if isinstance(req, dict) else str(req)[:100] + '...' if len(str(req)) > 100 else str(req)
-            logger.debug(f"需求[{i}]: 名称={req_name}, 内容长度={len(req_content) if req_content else 0}字符")
-            if req_content and len(req_content) > 0:
-                logger.debug(f"需求[{i}]内容预览: {req_content[:100]}...")
-            else:
-                logger.debug(f"需求[{i}]内容为空")
-        
-        # 记录请求类型和完整数据
-        logger.debug(f"需求数据类型: {type(requirements)}, 元素类型: {type(requirements[0]) if requirements else 'N/A'}")
-        
         # 输出完整的请求数据，但不截断
         try:
             full_data_str = json.dumps(data, ensure_ascii=False)
@@ -650,66 +705,109 @@ def review_requirements_api():
             logger.warning(f"序列化请求数据失败: {e}")
             logger.debug(f"请求数据的键: {data.keys() if isinstance(data, dict) else 'Not a dict'}")
         
-        try:
-            logger.debug("开始调用review_requirements函数")
-            
-            # 修改处理方式，确保需求是一个一个处理的
-            if len(requirements) > 1:
-                
-                review_results = []
-                for idx, req in enumerate(requirements):
-                    logger.debug(f"单独处理需求[{idx+1}/{len(requirements)}]")
-                    # 将单个需求包装为列表发送给审查函数
-                    single_result = review_requirements([req])
-                    if single_result and len(single_result) > 0:
-                        review_results.append(single_result[0])
-                    else:
-                        logger.warning(f"需求[{idx+1}]审查失败，返回结果为空")
-            else:
-                # 如果只有一个需求，直接处理
-                
-                review_results = review_requirements(requirements)
-                
-            logger.debug(f"审查完成，结果长度: {len(review_results)}")
-            if len(review_results) != len(requirements):
-                logger.warning(f"警告: 结果数量({len(review_results)})与需求数量({len(requirements)})不匹配")
-            
-            # 记录审查结果的基本信息
-            for i, result in enumerate(review_results):
-                result_name = result.get('name', '未命名')
-                review_data = result.get('review_result', {})
-                problems_count = len(review_data.get('requirements_review', []))
-                logger.debug(f"审查结果[{i}]: 需求名称={result_name}, 发现问题数={problems_count}")
-                
-                # 记录问题详情
-                if problems_count > 0:
-                    for j, problem in enumerate(review_data.get('requirements_review', [])):
-                        logger.debug(f"问题[{j}]: {problem.get('problem_title', '未知问题')}")
-        except Exception as inner_e:
-            logger.error(f"审查过程中发生错误: {str(inner_e)}", exc_info=True)
-            return jsonify({"error": f"需求审查失败: {str(inner_e)}"}), 500
-        
-        # 保存审查结果到会话缓存，以便后续导出文档
-        session_data = {
-            'requirements': requirements,
-            'review_results': review_results
-        }
-        save_session_data(session_id, session_data)
-        
-        
-        response_data = {
-            "message": "需求审查完成",
-            "review_results": review_results,
-            "session_id": session_id
-        }
-        
-        return jsonify(response_data)
+        if not isinstance(requirements, list):
+            requirements = [requirements]
+        session_data = get_session_data(session_id) or {}
+        job = get_job_queue().submit(
+            JOB_REVIEW, {"requirements": requirements},
+            stage="review", file_id=session_data.get("file_id"), session_id=session_id
+        )
+        return job_accepted_response(job, 'jobs', session_id=session_id)
     
     except Exception as e:
-        logger.error(f"需求审查时出错: {str(e)}")
+        logger.error(f"提交需求审查任务时出错: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({"error": f"需求审查时出错: {str(e)}"}), 500
 
+def run_review_job(job):
+    """
+    后台执行需求审查任务，每条需求审查完成后上报进度，取消后不再审查剩余需求
+    
+    参数:
+        job: 任务上下文
+        
+    返回:
+        与原同步接口相同的响应内容
+    """
+    from app.documentReview.Regression.ai_reviewer import review_requirement
+    from app.documentReview.Regression.config import get_config
+    
+    logger = logging.getLogger(__name__)
+    requirements = job.payload['requirements']
+    session_id = job.session_id
+    
+    # 添加更详细的调试信息
+    logger.debug("需求数据详情:")
+    for i, req in enumerate(requirements):
+        req_name = req.get('name', '未命名') if isinstance(req, dict) else '非字典类型需求'
+        req_content = req.get('content', '无内容') if isinstance(req, dict) else str(req)[:100] + '...' if len(str(req)) > 100 else str(req)
+        logger.debug(f"需求[{i}]: 名称={req_name}, 内容长度={len(req_content) if req_content else 0}字符")
+    
+    # 需求在执行器中逐条并发审查，结果顺序与输入一致
+    executor = ReviewExecutor(review_requirement, get_max_in_flight(get_config()))
+    job.on_cancel(executor.cancel)
+    job.progress(0, len(requirements), "正在审查需求")
+    review_results = executor.run(requirements, on_progress=lambda completed, total: job.progress(completed, total))
+    job.check_cancelled()
+    
+    logger.debug(f"审查完成，结果长度: {len(review_results)}")
+    
+    # 记录审查结果的基本信息
+    for i, result in enumerate(review_results):
+        result_name = result.get('name', '未命名')
+        review_data = result.get('review_result', {})
+        problems_count = len(review_data.get('requirements_review', []))
+        logger.debug(f"审查结果[{i}]: 需求名称={result_name}, 发现问题数={problems_count}")
+    
+    # 保存审查结果到会话，以便后续导出文档；会话中已有的文件信息等字段保留
+    update_session_data(session_id, {
+        'requirements': requirements,
+        'review_results': review_results
+    })
+    
+    # 在后台预先生成审查报告，导出时直接下载
+    schedule_review_reports(session_id, requirements, review_results)
+    record_review_results(session_id, requirements, review_results)
+    job.progress(message="需求审查完成")
+    
+    return {
+        "message": "需求审查完成",
+        "review_results": review_results,
+        "session_id": session_id
+    }
+
+@app.route('/api/review_requirements/stream', methods=['POST', 'OPTIONS'])
+def review_requirements_stream_api():
+    """
+    流式需求审查API端点
+    每条需求审查完成后立即推送结果（默认NDJSON，Accept为text/event-stream或format=sse时使用SSE），
+    全部完成后将结果保存到会话缓存，供生成审查文档使用
+    """
+    from app.documentReview.Regression.ai_reviewer import review_requirement
+    from app.documentReview.Regression.config import get_config
+    
+    # 处理 OPTIONS 请求
+    if request.method == "OPTIONS":
+        return make_response('', 200)
+    
+    data = request.json or {}
+    requirements, session_id = parse_review_request(data)
+    if not requirements:
+        logging.warning("未提供需求数据")
+        return jsonify({"error": "未提供需求数据"}), 400
+    
+    def persist(reviewed_requirements, review_results):
+        update_session_data(session_id, {
+            'requirements': reviewed_requirements,
+            'review_results': review_results
+        })
+        schedule_review_reports(session_id, reviewed_requirements, review_results)
+        record_review_results(session_id, reviewed_requirements, review_results)
+    
+    executor = ReviewExecutor(review_requirement, get_max_in_flight(get_config()))
+    logging.info(f"开始流式审查 {len(requirements)} 个需求，会话: {session_id}")
+    return review_stream_response(executor, requirements, session_id, persist, sse=wants_sse(request))
+
 # ===================== 需求重新匹配API =====================
 @app.route('/api/rematch_requirements', methods=['POST'])
 def rematch_requirements_api():
@@ -726,16 +824,17 @@ def rematch_requirements_api():
         session_id = data.get('session_id', 'default')
         
         # 检查必要参数
-        if not file_id or not file_name:
+        if not file_id:
             return jsonify({"error": "缺少文件ID或文件名"}), 400
             
         # 检查文件存在
-        file_path = os.path.join(UPLOAD_FOLDER, file_id)
-        if not os.path.exists(file_path):
+        file_entry = get_file_registry().get(file_id)
+        file_path = resolve_upload(file_id)
+        if not file_path:
             return jsonify({"error": "文件不存在"}), 404
         
         # 检查文件格式
-        if not file_name.lower().endswith(('.doc', '.docx')):
+        if file_entry["file_type"] not in ('doc', 'docx') and not (file_name or "").lower().endswith(('.doc', '.docx')):
             return jsonify({"error": "文件格式不支持，仅支持.doc和.docx"}), 400
             
         # 获取当前会话数据中的已匹配需求
@@ -751,10 +850,7 @@ def rematch_requirements_api():
             requirements = ai_rematch_requirements(file_path, matched_requirements)
             
         # 保存提取结果到会话
-        if not session_data:
-            session_data = {}
-        session_data["requirements"] = requirements
-        save_session_data(session_id, session_data)
+        update_session_data(session_id, {"requirements": requirements})
         
         # 返回结果
         return jsonify({
@@ -770,13 +866,56 @@ def rematch_requirements_api():
         return jsonify({"error": f"需求重新匹配失败: {str(e)}"}), 500
 
 # ===================== 生成审查文档API =====================
+def get_review_report_store():
+    """
+    回归测试模块的审查报告存储
+    Excel和文本报告沿用原生成审查文档接口使用的配置项模块版式（测试活动/问题类型/.../测评单位意见）
+    
+    返回:
+        ReportArtifactStore
+    """
+    from app.documentReview.ConfigurationItem.review.review_logic import generate_review_doc
+    return get_report_store("regression", make_report_renderers(generate_review_doc))
+
+def schedule_review_reports(session_id, requirements, review_results):
+    """
+    提交后台报告渲染任务，按配置一次生成所有格式的审查报告
+    
+    参数:
+        session_id: 会话ID
+        requirements: 需求列表
+        review_results: 审查结果列表
+        
+    返回:
+        审查结果摘要，提交失败时返回None
+    """
+    from app.documentReview.Regression.config import get_config
+    
+    try:
+        return get_review_report_store().schedule(session_id, requirements, review_results, get_report_formats(get_config()))
+    except Exception as e:
+        logging.error(f"提交审查报告渲染任务失败: {str(e)}", exc_info=True)
+        return None
+
+def record_review_results(session_id, requirements, review_results):
+    """
+    将审查结果写入项目数据库的需求和审查问题表（后台批量写入）
+    
+    参数:
+        session_id: 会话ID
+        requirements: 需求列表
+        review_results: 审查结果列表
+    """
+    session_data = get_session_data(session_id) or {}
+    record_reviews(session_id, session_data.get("file_id"), requirements, review_results)
+
 @app.route('/api/generate_review_document', methods=['POST', 'OPTIONS'])
 def generate_review_document_api():
     """
     生成需求审查文档API
-    生成需求审查结果的导出文档
+    报告在审查完成时已在后台渲染，这里只在审查结果有变化时提交新的渲染任务并返回文档ID
     """
-    from app.documentReview.ConfigurationItem.requirement_reviewer import generate_review_document
+    from app.documentReview.Regression.config import get_config
     
     # 处理 OPTIONS 请求
     if request.method == "OPTIONS":
@@ -788,6 +927,7 @@ def generate_review_document_api():
         
         # 支持两种方式: 直接提供review_results或提供session_id
         review_results = data.get('review_results', [])
+        requirements = data.get('requirements', [])
         session_id = data.get('session_id')
         
         # 如果提供了session_id但没有review_results,则尝试从会话中获取
@@ -797,24 +937,27 @@ def generate_review_document_api():
             session_data = get_session_data(session_id)
             if session_data and 'review_results' in session_data:
                 review_results = session_data['review_results']
+                requirements = session_data.get('requirements', [])
                 logging.debug(f"从会话缓存中获取到 {len(review_results)} 条审查结果")
         
         if not review_results:
             logging.error(f"未提供审查结果且无法从会话中获取: {data}")
             return jsonify({"error": "未提供审查结果且无法从会话中获取"}), 400
         
-        # 调用需求审查模块生成文档
-        result = generate_review_document(review_results, app.config['OUTPUT_FOLDER'])
+        # 未提供会话的请求以审查结果摘要作为报告目录，不同请求的报告互不覆盖
+        if not session_id:
+            session_id = "r-" + results_digest(requirements, review_results)
         
-        # 修改文件ID，只保留文件名的UUID部分
-        file_name = result.get("file_name", "")
-        doc_id = file_name.replace("requirement_review_", "").replace(".txt", "")
+        # 相同会话和审查结果的报告只渲染一次
+        formats = get_report_formats(get_config())
+        digest = get_review_report_store().schedule(session_id, requirements, review_results, formats)
         
         # 构建响应数据格式，适配前端预期
         response_data = {
             "success": True,
-            "file_id": doc_id,
-            "message": result.get("message", "审查文档生成成功")
+            "file_id": make_artifact_id(session_id, digest),
+            "formats": formats,
+            "message": "审查文档生成成功"
         }
         
         logging.debug(f"生成审查文档成功: {response_data}")
@@ -826,8 +969,24 @@ def generate_review_document_api():
 
 @app.route('/api/download_review/<doc_id>', methods=['GET'])
 def download_review_document(doc_id):
-    """下载生成的审查文档"""
+    """
+    下载生成的审查文档
+    预渲染报告的文档ID为 会话ID.摘要，通过format参数选择格式（默认为配置的第一种格式），
+    支持ETag/Last-Modified条件请求和Range分段下载
+    """
+    from app.documentReview.Regression.config import get_config
+    
     try:
+        artifact_id = parse_artifact_id(doc_id)
+        if artifact_id:
+            session_id, digest = artifact_id
+            format_type = request.args.get('format') or get_report_formats(get_config())[0]
+            file_path, digest = get_review_report_store().artifact(session_id, format_type, digest)
+            if not file_path:
+                logging.error(f"审查报告不存在: {doc_id}，格式: {format_type}")
+                return jsonify({"error": "文件不存在"}), 404
+            return send_report_artifact(file_path, format_type, digest)
+        
         # 检查doc_id是否已经包含扩展名
         has_extension = doc_id.lower().endswith('.xlsx') or doc_id.lower().endswith('.txt')
         
@@ -925,32 +1084,15 @@ def validate_model_api():
         # 使用success=False和error字段
         return jsonify({'success': False, 'error': error_message})
 
-# 添加会话数据存储
-session_cache = {}
-
-def get_session_data(session_id):
-    """
-    获取会话数据
-    """
-    if not session_id:
-        return None
-    
-    
-    if session_id in session_cache:
-        return session_cache[session_id]
-    
-    
-    return None
-
-def save_session_data(session_id, data):
-    """
-    保存会话数据
-    """
-    if not session_id:
-        return
-    
-    
-    session_cache[session_id] = data
+# 登记后台任务处理函数；工作线程在提供服务的进程中启动（见run.py的start_services），上次退出时未完成的任务会重新执行
+job_queue = get_job_queue()
+job_queue.add_listener(on_job_status)
+job_queue.register(JOB_EXTRACT, run_extract_job)
+job_queue.register(JOB_AI_EXTRACT, run_ai_extract_job)
+job_queue.register(JOB_REVIEW, run_review_job)
 
 if __name__ == '__main__':
+    # debug模式下自动重载的监视进程不领取任务
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        job_queue.start()
     app.run(host='0.0.0.0', port=5001, debug=True)
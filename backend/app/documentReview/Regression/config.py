@@ -29,7 +29,12 @@ DEFAULT_CONFIG = {
     "model_params": {
         "temperature": 0.1,
         "max_tokens": 2000,
-    }
+        # 批量审查时同时在途的模型请求数量
+        "max_concurrency": 8,
+    },
+    
+    # 审查完成后在后台预先生成的报告格式，可选: "excel", "text", "json", "markdown", "html"
+    "report_formats": ["excel", "text", "json"]
 }
 
 # 配置文件路径
@@ -0,0 +1,96 @@
+"""
+文档缓存模块
+按文件内容缓存解析后的段落、Word原生目录条目及其派生结构（目录段落、倒排索引等），
+同一文档被多个接口反复读取时只解析一次
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from docx import Document
+
+from .toc_detector import scan_toc_paragraphs
+
+# 最多缓存的文档数量
+MAX_CACHED_DOCUMENTS = 16
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class ParsedDocument:
+    """
+    解析后的文档
+
+    paragraphs为去除空白后的非空段落文本，
+    native_toc_indices为按Word目录样式/域代码识别出的目录段落索引，
+    toc_entries为这些目录条目的完整文本（包含超链接中的文字），
+    derived用于按需计算并缓存基于段落的派生结构
+    """
+
+    def __init__(self, file_path, paragraphs, native_toc_indices=None, toc_entries=None):
+        self.file_path = file_path
+        self.paragraphs = paragraphs
+        self.native_toc_indices = native_toc_indices or set()
+        self.toc_entries = toc_entries or []
+        self._derived = {}
+        # 派生结构之间可能相互依赖（如目录识别依赖段落特征），使用可重入锁
+        self._lock = threading.RLock()
+
+    def derived(self, key, factory):
+        """
+        获取派生结构，首次访问时调用factory(paragraphs)计算
+
+        Args:
+            key: 派生结构名称
+            factory: 计算函数，参数为段落列表
+
+        Returns:
+            派生结构
+        """
+        with self._lock:
+            if key not in self._derived:
+                self._derived[key] = factory(self.paragraphs)
+            return self._derived[key]
+
+
+def load_document(file_path):
+    """
+    加载文档，文件未修改时直接返回缓存；
+    相同内容的上传文件是指向同一份存储的硬链接，按inode作为键时重复上传也能命中缓存
+
+    Args:
+        file_path: docx文档路径
+
+    Returns:
+        ParsedDocument实例
+    """
+    stat = os.stat(file_path)
+    key = (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+
+    doc = Document(file_path)
+    paragraphs = []
+    native_toc_indices = set()
+    toc_entries = []
+    for para, toc_text in zip(doc.paragraphs, scan_toc_paragraphs(doc.paragraphs)):
+        if toc_text:
+            toc_entries.append(toc_text)
+        text = para.text.strip()
+        if not text:
+            continue
+        if toc_text is not None:
+            native_toc_indices.add(len(paragraphs))
+        paragraphs.append(text)
+    parsed = ParsedDocument(file_path, paragraphs, native_toc_indices, toc_entries)
+
+    with _cache_lock:
+        _cache[key] = parsed
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_DOCUMENTS:
+            _cache.popitem(last=False)
+    return parsed
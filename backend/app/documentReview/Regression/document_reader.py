@@ -9,6 +9,17 @@ import glob
 import time
 import logging
 
+from .indicator_matcher import build_indicator_hits
+from .paragraph_index import ParagraphIndex
+from . import paragraph_features
+from .paragraph_features import ParagraphFeatures, classify_paragraph, nearby_toc_weight
+from .document_cache import load_document
+from .toc_detector import parse_toc_entry
+
+# 需求标题，如"3.2.3 重构激光雷达数据处理算法"
+REQUIREMENT_HEADING_PATTERN = re.compile(r"^\d+\.\d+\.\d+\s+[\u4e00-\u9fa5]+")
+CHAPTER_PREFIX_PATTERN = re.compile(r"^\d+\.\d+\.\d+\s+")
+
 # 设置日志配置
 logging.basicConfig(
     level=logging.DEBUG,
@@ -87,55 +98,57 @@ def is_table_of_contents(paragraph, nearby_paragraphs=None):
     Returns:
         是否为目录页面的布尔值
     """
+    # 附近段落只检查基本目录特征，并跳过与当前段落相同的文本，避免自引用
+    nearby_weights = [nearby_toc_weight(p) for p in nearby_paragraphs or [] if p != paragraph]
+    return _is_toc_entry(classify_paragraph(paragraph), sum(nearby_weights), len(nearby_weights))
+
+def _is_toc_entry(flags, nearby_toc_weight_sum, nearby_count):
+    """
+    根据段落特征位和附近段落的目录权重判断是否为目录条目
+    
+    Args:
+        flags: 当前段落的特征位
+        nearby_toc_weight_sum: 附近段落的目录权重之和
+        nearby_count: 参与判断的附近段落数量
+        
+    Returns:
+        是否为目录条目
+    """
     # 如果段落包含明确的需求内容标记，不应被视为目录
-    if re.search(r'(新增需求描述|修改设计描述|依据：|a\s*\)|标识号：|说明：)', paragraph):
+    if flags & paragraph_features.CONTENT_MARKER:
         return False
     
     # 目录特征1: 包含页码指示（数字+空格）在行末
-    has_page_numbers = bool(re.search(r'\s\d+\s*$', paragraph))
-    
+    has_page_numbers = bool(flags & paragraph_features.PAGE_NUMBER)
     # 目录特征2: 包含大量的点(.)或空格连接符
-    dots_count = paragraph.count('.')
-    dots_ratio = dots_count / len(paragraph) if paragraph else 0
-    has_many_dots = dots_ratio > 0.2  # 提高阈值，避免误判
-    
+    has_many_dots = bool(flags & paragraph_features.MANY_DOTS)
     # 目录特征3: 短行，且包含章节编号模式，且以页码结尾
-    is_short_line = len(paragraph) < 60  # 减小长度限制，只匹配非常短的行
-    has_section_number = bool(re.search(r'^\s*\d+\.\d+\.', paragraph))
-    ends_with_page_number = bool(re.search(r'\s\d+\s*$', paragraph))
-    
-    # 如果有附近段落用于上下文判断
-    if nearby_paragraphs:
-        # 检查附近段落是否都符合目录特征
-        nearby_features = []
-        for p in nearby_paragraphs:
-            # 递归调用但不传递上下文，避免无限递归
-            if p != paragraph:  # 避免自引用
-                # 简化判断，只检查基本目录特征
-                page_num = bool(re.search(r'\s\d+\s*$', p))
-                dots = p.count('.') / len(p) if p else 0 > 0.2
-                is_short = len(p) < 60
-                nearby_features.append(page_num and (dots or is_short))
-        
-        nearby_toc_ratio = sum(nearby_features) / len(nearby_features) if nearby_features else 0
-        
-        # 提高上下文要求：附近段落必须有更高比例是目录
-        if nearby_toc_ratio > 0.8:  # 提高阈值
-            return is_short_line and (has_page_numbers or has_many_dots)
+    is_short_line = bool(flags & paragraph_features.SHORT_LINE)
+    has_section_number = bool(flags & paragraph_features.SECTION_NUMBER)
+    
+    # 提高上下文要求：附近段落必须有更高比例是目录
+    if nearby_count and nearby_toc_weight_sum / nearby_count > 0.8:
+        return is_short_line and (has_page_numbers or has_many_dots)
     
     # 需满足更严格的组合条件才视为目录
     return is_short_line and has_page_numbers and (has_many_dots or has_section_number)
 
-def identify_toc_sections(paragraphs):
+def identify_toc_sections(paragraphs, features=None):
     """
     识别文档中的目录部分
     
     Args:
         paragraphs: 文档段落列表
+        features: 预先计算的ParagraphFeatures，为None时现场计算
         
     Returns:
         目录段落的索引集合
     """
+    if features is None:
+        features = ParagraphFeatures(paragraphs)
+    flags = features.flags
+    weights = features.nearby_weights
+    
     toc_indices = set()
     toc_section_start = -1
     in_toc_section = False
@@ -146,10 +159,16 @@ def identify_toc_sections(paragraphs):
     search_limit = min(len(paragraphs), int(len(paragraphs) * 0.3))
     
     for i in range(search_limit):
+        # 附近段落为前后各2个，直接累加预先计算的权重；与当前段落文本相同的不参与判断
         para = paragraphs[i]
-        nearby = paragraphs[max(0, i-2):i] + paragraphs[i+1:min(len(paragraphs), i+3)]
-        
-        if is_table_of_contents(para, nearby):
+        nearby_count = 0
+        nearby_weight_sum = 0
+        for j in range(max(0, i - 2), min(len(paragraphs), i + 3)):
+            if j != i and paragraphs[j] != para:
+                nearby_count += 1
+                nearby_weight_sum += weights[j]
+        
+        if _is_toc_entry(flags[i], nearby_weight_sum, nearby_count):
             consecutive_toc_count += 1
             if consecutive_toc_count > 4:  # 需要连续5个以上段落都是目录特征
                 if not in_toc_section:
@@ -175,7 +194,7 @@ def identify_toc_sections(paragraphs):
     logging.debug(f"识别到可能的目录段落: {len(toc_indices)} 个")
     return toc_indices
 
-def is_real_requirement_section(paragraphs, start_index, normalized_chapter=None):
+def is_real_requirement_section(paragraphs, start_index, normalized_chapter=None, features=None):
     """
     判断指定段落是否是真正的需求内容（而非目录或其他内容）
     通过检查结构特征（依据、说明、对关联编码的影响等）来判断
@@ -184,6 +203,7 @@ def is_real_requirement_section(paragraphs, start_index, normalized_chapter=None
         paragraphs: 文档的所有段落
         start_index: 当前段落在文档中的索引
         normalized_chapter: 标准化的章节号，用于匹配
+        features: 预先计算的ParagraphFeatures，为None时现场计算
         
     Returns:
         是否为真正需求内容的布尔值
@@ -191,36 +211,40 @@ def is_real_requirement_section(paragraphs, start_index, normalized_chapter=None
     # 如果索引超出范围，返回False
     if start_index >= len(paragraphs):
         return False
-        
-    # 获取当前段落及后续段落
-    current_para = paragraphs[start_index]
-    following_paras = paragraphs[start_index+1:min(start_index+20, len(paragraphs))]
     
-    # 拼接所有段落为一个文本，用于整体特征匹配
-    combined_text = "\n".join([current_para] + following_paras)
+    if features is None:
+        features = ParagraphFeatures(paragraphs)
+    
+    # 当前段落及后续段落构成的窗口
+    window_end = min(start_index + 20, len(paragraphs))
+    
+    def window_has(feature):
+        return features.count(feature, start_index, window_end) > 0
     
     # 特征1：包含"依据"和"说明"关键词
-    has_basis = bool(re.search(r'依据[：:]\s*', combined_text))
-    has_description = bool(re.search(r'说明[：:]\s*', combined_text))
+    has_basis = window_has(paragraph_features.BASIS)
+    has_description = window_has(paragraph_features.DESCRIPTION)
     
     # 特征2：包含"标识号"和字母数字组合的标识
-    has_identifier = bool(re.search(r'标识号[：:]\s*\w+', combined_text))
+    has_identifier = window_has(paragraph_features.IDENTIFIER)
     
     # 特征3：包含"对关联xxx的影响"结构
-    has_impact_analysis = bool(re.search(r'对关联(需求|设计|编码)的影响', combined_text))
-    
-    # 特征4：包含子章节结构（如3.1.1.1）
-    has_sub_sections = False
-    if normalized_chapter:
-        sub_chapter_pattern = f"{normalized_chapter}\\.\\d+"
-        has_sub_sections = bool(re.search(sub_chapter_pattern, combined_text))
+    has_impact_analysis = window_has(paragraph_features.IMPACT_ANALYSIS)
     
     # 特征5：包含a)、b)、c)等列表项目
-    has_list_items = bool(re.search(r'[a-e]\s*\)\s*', combined_text))
+    has_list_items = window_has(paragraph_features.LIST_ITEM)
     
     # 特征组合判断：至少满足3个特征，或者同时有依据和影响分析
-    score = sum([has_basis, has_description, has_identifier, has_impact_analysis, has_sub_sections, has_list_items])
-    return score >= 3 or (has_basis and has_impact_analysis)
+    score = sum([has_basis, has_description, has_identifier, has_impact_analysis, has_list_items])
+    if score >= 3 or (has_basis and has_impact_analysis):
+        return True
+    
+    # 特征4：包含子章节结构（如3.1.1.1），依赖章节号，只在可能改变结论时才匹配
+    if normalized_chapter and score == 2:
+        sub_chapter_pattern = f"{normalized_chapter}\\.\\d+"
+        combined_text = "\n".join(paragraphs[start_index:window_end])
+        return bool(re.search(sub_chapter_pattern, combined_text))
+    return False
 
 def read_xuqiu_wendang_document(file_path, requirement_names=None, catalog_file_path=None):
     """
@@ -237,18 +261,15 @@ def read_xuqiu_wendang_document(file_path, requirement_names=None, catalog_file_
     # 记录开始时间，用于性能统计
     start_time = time.time()
     
-    # 加载文档
-    doc = Document(file_path)
-    logging.debug(f"文档加载耗时: {time.time() - start_time:.2f}秒")
-    
-    # 提取文本内容
-    text_start_time = time.time()
-    paragraphs = [para.text.strip() for para in doc.paragraphs if para.text.strip()]
-    logging.debug(f"文档包含 {len(paragraphs)} 个段落，文本提取耗时: {time.time() - text_start_time:.2f}秒")
+    # 加载文档，同一文件未修改时复用已解析的段落及派生结构
+    document = load_document(file_path)
+    paragraphs = document.paragraphs
+    logging.debug(f"文档包含 {len(paragraphs)} 个段落，加载耗时: {time.time() - start_time:.2f}秒")
     
     # 识别目录部分，避免匹配到目录中的需求名称
     toc_detection_start = time.time()
-    toc_indices = identify_toc_sections(paragraphs)
+    features = document.derived("paragraph_features", ParagraphFeatures)
+    toc_indices = document.derived("toc_indices", lambda paras: detect_toc_indices(document))
     logging.debug(f"目录检测耗时: {time.time() - toc_detection_start:.2f}秒，识别到 {len(toc_indices)} 个目录段落")
     
     # 打印前10个段落样例，用于调试
@@ -261,6 +282,11 @@ def read_xuqiu_wendang_document(file_path, requirement_names=None, catalog_file_
     
     logging.debug(f"read_xuqiu_wendang_document - 需要提取的需求项数量: {len(requirement_names)}")
     
+    # 段落倒排索引随文档缓存，避免每个需求名称都逐段落扫描全文
+    index_start = time.time()
+    paragraph_index = document.derived("paragraph_index", ParagraphIndex)
+    logging.debug(f"段落倒排索引就绪，耗时: {time.time() - index_start:.2f}秒")
+    
     # 查找每个需求在文档中的位置
     requirement_positions = []
     for req_name in requirement_names:
@@ -279,29 +305,22 @@ def read_xuqiu_wendang_document(file_path, requirement_names=None, catalog_file_
             
         logging.debug(f"从需求「{req_name}」提取的关键词: {key_terms}")
         
-        # 匹配可能的候选段落
-        candidates = []
+        # 通过倒排索引计算匹配分数（包含多少个关键词），跳过目录部分
+        scores = paragraph_index.score_paragraphs(key_terms, toc_indices)
         
-        # 遍历所有段落寻找包含关键词的部分
-        for i, para in enumerate(paragraphs):
-            # 跳过目录部分
-            if i in toc_indices:
-                continue
-                
-            # 计算匹配分数：包含多少个关键词
-            match_score = sum(1 for term in key_terms if term in para)
+        # 匹配可能的候选段落，按段落顺序排列以保证同分时取最靠前的段落
+        candidates = []
+        for i in sorted(scores):
+            para = paragraphs[i]
+            # 检查是否包含需求特征
+            has_features = features.has(i, paragraph_features.REQUIREMENT_MARKER)
             
-            # 如果包含任何关键词，添加到候选列表
-            if match_score > 0:
-                # 检查是否包含需求特征
-                has_features = "依据" in para or "标识号" in para or "说明" in para
-                
-                candidates.append({
-                    "index": i,
-                    "score": match_score,
-                    "has_features": has_features,
-                    "text": para[:50] + "..."  # 保存前50个字符用于调试
-                })
+            candidates.append({
+                "index": i,
+                "score": scores[i],
+                "has_features": has_features,
+                "text": para[:50] + "..."  # 保存前50个字符用于调试
+            })
                 
         # 按匹配分数和需求特征排序
         candidates.sort(key=lambda x: (x["score"], 1 if x["has_features"] else 0), reverse=True)
@@ -332,9 +351,13 @@ def read_xuqiu_wendang_document(file_path, requirement_names=None, catalog_file_
     # 收集所有需求内容
     requirement_contents = {}
     
-    # 预扫描文档，提取所有可能的需求名称作为分隔标志
-    requirement_names_for_separation = extract_requirement_names(paragraphs)
-    logging.debug(f"检测到 {len(requirement_names_for_separation)} 个可能的需求名称标志")
+    # 预扫描文档，提取所有可能的需求名称作为分隔标志，并编译为自动机一次性匹配全文
+    indicator_start = time.time()
+    indicator_hits = document.derived(
+        "indicator_hits",
+        lambda paras: build_indicator_hits(paras, collect_requirement_indicators(paras))
+    )
+    logging.debug(f"{len(indicator_hits)} 个段落命中需求名称标志，耗时: {time.time() - indicator_start:.2f}秒")
     
     # 遍历所有需求位置，提取内容
     for i, (req_name, position) in enumerate(requirement_positions):
@@ -348,7 +371,7 @@ def read_xuqiu_wendang_document(file_path, requirement_names=None, catalog_file_
             end_position = min(position + 30, len(paragraphs))
         
         # 提取内容
-        content_paragraphs = extract_requirement_content(paragraphs, position, end_position, toc_indices)
+        content_paragraphs = extract_requirement_content(paragraphs, position, end_position, toc_indices, indicator_hits, features)
         
         # 如果内容段落数太少，可能是匹配到了错误的位置
         if len(content_paragraphs) < 2:
@@ -369,7 +392,27 @@ def read_xuqiu_wendang_document(file_path, requirement_names=None, catalog_file_
     
     return requirement_contents
 
-def extract_requirement_content(paragraphs, start_pos, end_pos, toc_indices):
+def collect_requirement_indicators(paragraphs):
+    """
+    提取文档中所有可能的需求名称，用于检测下一个需求的开始
+    
+    Args:
+        paragraphs: 文档段落列表
+        
+    Returns:
+        需求名称标志列表
+    """
+    indicators = []
+    for para in paragraphs:
+        # 典型需求名称标志，比如"3.2.3 重构激光雷达数据处理算法"
+        if REQUIREMENT_HEADING_PATTERN.match(para):
+            # 去掉章节号，只保留需求名称部分
+            name_part = CHAPTER_PREFIX_PATTERN.sub("", para, count=1)
+            if len(name_part) > 3:  # 排除太短的匹配
+                indicators.append(name_part)
+    return indicators
+
+def extract_requirement_content(paragraphs, start_pos, end_pos, toc_indices, indicator_hits=None, features=None):
     """
     根据起始位置和结束位置，提取需求内容段落
     
@@ -378,34 +421,25 @@ def extract_requirement_content(paragraphs, start_pos, end_pos, toc_indices):
         start_pos: 需求开始位置
         end_pos: 需求结束位置
         toc_indices: 目录段落索引集合
+        indicator_hits: 包含其他需求名称的段落 {段落索引: 需求名称}，
+            由build_indicator_hits对整篇文档预先计算；为None时现场计算
+        features: 预先计算的ParagraphFeatures，为None时只对区间内的段落现场分类
         
     Returns:
         需求内容段落列表
     """
     content_paragraphs = []
+    content_positions = []
     
-    # 首先确认起始段落是否包含需求特征
-    has_req_features = False
-    for i in range(start_pos, min(start_pos + 5, end_pos)):
-        if "依据" in paragraphs[i] or "标识号" in paragraphs[i] or "说明" in paragraphs[i]:
-            has_req_features = True
-            break
+    def flags_at(pos):
+        return features.flags[pos] if features is not None else classify_paragraph(paragraphs[pos])
     
-    # 如果起始位置附近有需求特征，则从这开始提取
-    # 否则从start_pos开始
+    # 从start_pos开始提取
     current_pos = start_pos
     
-    # 提前获取所有可能的需求名称，用于检测下一个需求的开始
-    next_requirement_indicators = []
-    for para in paragraphs:
-        # 典型需求名称标志，比如"3.2.3 重构激光雷达数据处理算法"
-        if re.match(r"^\d+\.\d+\.\d+\s+[\u4e00-\u9fa5]+", para):
-            # 去掉章节号，只保留需求名称部分
-            name_part = re.sub(r"^\d+\.\d+\.\d+\s+", "", para)
-            if len(name_part) > 3:  # 排除太短的匹配
-                next_requirement_indicators.append(name_part)
-    
-    logging.debug(f"检测到 {len(next_requirement_indicators)} 个可能的需求名称标志")
+    # 单独调用时才现场扫描全文，批量提取时由调用方对整篇文档只计算一次
+    if indicator_hits is None:
+        indicator_hits = build_indicator_hits(paragraphs, collect_requirement_indicators(paragraphs))
     
     # 收集内容直到结束位置或者找到分隔符
     while current_pos < end_pos:
@@ -420,25 +454,24 @@ def extract_requirement_content(paragraphs, start_pos, end_pos, toc_indices):
         # 检查该段落是否标志着下一个需求的开始
         is_next_requirement = False
         
+        current_flags = flags_at(current_pos)
+        
         # 检查1: 是否包含标准需求起始特征
-        if current_pos > start_pos + 3 and (("依据" in current_para or "标识号" in current_para) and len(current_para) < 100):
+        if current_pos > start_pos + 3 and (current_flags & paragraph_features.BOUNDARY_MARKER and len(current_para) < 100):
             # 这可能是下一个需求的开始
             is_next_requirement = True
             logging.debug(f"在段落 {current_pos} 检测到下一个需求的特征标志: {current_para[:30]}...")
             
         # 检查2: 是否匹配其他需求的名称
-        if not is_next_requirement and next_requirement_indicators:
-            for indicator in next_requirement_indicators:
-                if indicator in current_para and len(indicator) > 5 and current_pos > start_pos + 3:
-                    is_next_requirement = True
-                    logging.debug(f"在段落 {current_pos} 检测到匹配其他需求名称的内容: {indicator}")
-                    break
+        if not is_next_requirement and current_pos > start_pos + 3 and current_pos in indicator_hits:
+            is_next_requirement = True
+            logging.debug(f"在段落 {current_pos} 检测到匹配其他需求名称的内容: {indicator_hits[current_pos]}")
         
         # 检查3: 章节格式检查
         if not is_next_requirement and current_pos > start_pos + 3:
             # 检查是否是一个新的主章节标题 (比如 "3.2.3 重构激光雷达...") 
             # 章节标题通常较短
-            if re.match(r"^\d+\.\d+\.\d+\s+[\u4e00-\u9fa5]", current_para) and len(current_para) < 50:
+            if current_flags & paragraph_features.HEADING and len(current_para) < 50:
                 is_next_requirement = True
                 logging.debug(f"在段落 {current_pos} 检测到新的章节标题: {current_para[:30]}...")
         
@@ -449,6 +482,7 @@ def extract_requirement_content(paragraphs, start_pos, end_pos, toc_indices):
         
         # 添加当前段落
         content_paragraphs.append(current_para)
+        content_positions.append(current_pos)
         
         # 移动到下一段
         current_pos += 1
@@ -456,10 +490,9 @@ def extract_requirement_content(paragraphs, start_pos, end_pos, toc_indices):
     # 检查提取的内容是否过长，如果是则进一步分析结构截断
     if len(content_paragraphs) > 10:
         for i in range(5, len(content_paragraphs)):
-            para = content_paragraphs[i]
-            # 如果发现疑似下一个需求开始的结构标记，截断到这里
-            if re.match(r"^\d+\.\d+\.\d+\.\d+\.", para) or "修改文件" in para or "修改前" in para:
-                logging.debug(f"基于内容结构在第 {i} 段截断，内容: {para[:30]}...")
+            # 如果发现疑似下一个需求开始的结构标记（四级章节号、修改文件、修改前），截断到这里
+            if flags_at(content_positions[i]) & paragraph_features.TRUNCATE_MARKER:
+                logging.debug(f"基于内容结构在第 {i} 段截断，内容: {content_paragraphs[i][:30]}...")
                 content_paragraphs = content_paragraphs[:i]
                 break
     
@@ -497,13 +530,13 @@ def extract_requirement_names(paragraphs):
     logging.debug(f"从文档中提取到 {len(requirement_names)} 个可能的需求名称")
     return requirement_names
 
-def extract_requirement_candidates(document_file_path, catalog_file_path):
+def extract_requirement_candidates(document_file_path, catalog_file_path=None):
     """
     从目录文件提取需求名称和章节号。
     
     参数:
         document_file_path: str, 主文档文件路径
-        catalog_file_path: str, 目录文件路径
+        catalog_file_path: str, 目录文件路径，可选；未提供时直接使用主文档自身的目录
         
     目录文件格式应该类似图片中所示，包含章节号和需求名称（页码不是必需的）。
     如果章节下有子章节，则过滤掉该章节。
@@ -517,14 +550,15 @@ def extract_requirement_candidates(document_file_path, catalog_file_path):
     import os
     os.environ['CURRENT_DOC_PATH'] = document_file_path
     
+    total_start_time = time.time()
+    
     if not catalog_file_path:
-        print("[ERROR] 必须提供目录文件！")
-        return []
+        print(f"[DEBUG] 未提供目录文件，使用主文档目录提取需求点: {document_file_path}")
+        chapter_entries = extract_document_toc_entries(document_file_path)
+        return _filter_leaf_chapter_entries(chapter_entries, total_start_time)
         
     print(f"[DEBUG] 使用目录文件提取需求点: {catalog_file_path}")
     
-    total_start_time = time.time()
-    
     # 从目录文件读取内容
     try:
         doc_load_start = time.time()
@@ -574,7 +608,18 @@ def extract_requirement_candidates(document_file_path, catalog_file_path):
             })
     
     print(f"[DEBUG] 段落处理耗时: {time.time() - process_start_time:.2f}秒")
+    return _filter_leaf_chapter_entries(chapter_entries, total_start_time)
+
+def _filter_leaf_chapter_entries(chapter_entries, total_start_time):
+    """
+    过滤掉含有子章节的目录条目，只保留叶子章节作为需求点
     
+    参数:
+        chapter_entries: 目录条目列表 [{chapter, name, title, level}, ...]
+        total_start_time: 需求候选项提取的开始时间，用于统计总耗时
+        
+    返回：包含需求名称和章节号的对象列表 [{name, chapter, level}, ...]
+    """
     if not chapter_entries:
         print("[WARNING] 目录文件中未找到任何需求条目")
         return []
@@ -624,3 +669,49 @@ def extract_requirement_candidates(document_file_path, catalog_file_path):
     print(f"[DEBUG] 需求候选项提取总耗时: {total_time:.2f}秒")
     
     return filtered_entries
+
+def detect_toc_indices(document):
+    """
+    识别已加载文档中的目录段落
+    
+    优先使用Word目录样式和域代码标记的原生目录，文档中没有这些标记时
+    （例如目录是手工输入的）才退回到基于段落特征的启发式识别
+    
+    Args:
+        document: load_document返回的ParsedDocument
+        
+    Returns:
+        目录段落的索引集合
+    """
+    if document.native_toc_indices:
+        logging.debug(f"使用Word原生目录标记，识别到 {len(document.native_toc_indices)} 个目录段落")
+        return document.native_toc_indices
+    features = document.derived("paragraph_features", ParagraphFeatures)
+    return identify_toc_sections(document.paragraphs, features)
+
+def extract_document_toc_entries(document_file_path):
+    """
+    从主文档自身的目录中读取章节条目，替代单独上传的目录文件
+    
+    Args:
+        document_file_path: 主文档路径
+        
+    Returns:
+        目录条目列表 [{chapter, name, title, level}, ...]
+    """
+    document = load_document(document_file_path)
+    if document.toc_entries:
+        toc_texts = document.toc_entries
+    else:
+        # 没有原生目录标记时使用启发式识别出的目录段落
+        toc_indices = document.derived("toc_indices", lambda paras: detect_toc_indices(document))
+        toc_texts = [document.paragraphs[i] for i in sorted(toc_indices)]
+    
+    chapter_entries = []
+    for text in toc_texts:
+        entry = parse_toc_entry(text)
+        if entry:
+            entry["title"] = entry["name"]
+            chapter_entries.append(entry)
+    print(f"[DEBUG] 主文档目录包含 {len(toc_texts)} 个条目，其中 {len(chapter_entries)} 个带章节号")
+    return chapter_entries
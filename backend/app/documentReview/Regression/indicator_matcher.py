@@ -0,0 +1,132 @@
+"""
+需求边界标志匹配模块
+将文档中所有可能的需求名称编译为Aho-Corasick自动机，一次线性扫描即可找出包含任一名称的段落
+"""
+from collections import deque
+
+
+class AhoCorasickAutomaton:
+    """
+    纯Python实现的Aho-Corasick多模式匹配自动机
+
+    构建耗时与所有模式串总长度成正比，匹配耗时与文本长度成正比，
+    与模式串数量无关。
+    """
+
+    def __init__(self, patterns=None):
+        # 每个状态: 转移表、失败指针、以该状态结尾的模式（含经失败链可达的输出）
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        self._built = False
+        self.pattern_count = 0
+        for pattern in patterns or []:
+            self.add(pattern)
+        if patterns is not None:
+            self.build()
+
+    def add(self, pattern):
+        """
+        添加模式串，必须在build之前调用
+
+        Args:
+            pattern: 模式串
+        """
+        if self._built:
+            raise RuntimeError("自动机已构建，不能再添加模式串")
+        if not pattern:
+            return
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        if pattern not in self._output[state]:
+            self._output[state] = self._output[state] + (pattern,)
+            self.pattern_count += 1
+
+    def build(self):
+        """按BFS顺序计算失败指针并合并输出"""
+        queue = deque()
+        for next_state in self._goto[0].values():
+            self._fail[next_state] = 0
+            queue.append(next_state)
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail_target = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail_target if fail_target != next_state else 0
+                if self._output[self._fail[next_state]]:
+                    self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+        self._built = True
+        return self
+
+    def find_first(self, text):
+        """
+        查找文本中最早结束的模式串
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            匹配到的模式串，未匹配返回None
+        """
+        for _, pattern in self.iter_matches(text):
+            return pattern
+        return None
+
+    def iter_matches(self, text):
+        """
+        按结束位置依次产出匹配
+
+        Args:
+            text: 待匹配文本
+
+        Yields:
+            (结束位置, 模式串)
+        """
+        if not self._built:
+            self.build()
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for pattern in output[state]:
+                    yield position, pattern
+
+
+def build_indicator_hits(paragraphs, indicators, min_length=6):
+    """
+    一次扫描整篇文档，找出包含其他需求名称的段落
+
+    Args:
+        paragraphs: 文档段落列表
+        indicators: 需求名称标志列表
+        min_length: 参与匹配的最短标志长度，与原逐条比较时的 len(indicator) > 5 保持一致
+
+    Returns:
+        {段落索引: 匹配到的需求名称}
+    """
+    automaton = AhoCorasickAutomaton(indicator for indicator in indicators if len(indicator) >= min_length)
+    hits = {}
+    if not automaton.pattern_count:
+        return hits
+    for index, para in enumerate(paragraphs):
+        indicator = automaton.find_first(para)
+        if indicator is not None:
+            hits[index] = indicator
+    return hits
@@ -0,0 +1,156 @@
+"""
+段落特征分类模块
+对文档的每个段落只做一次正则/计数判断，把目录识别、需求结构识别和需求边界检测
+用到的特征压缩为一个位掩码数组，后续的窗口判断通过前缀和完成
+"""
+import re
+from array import array
+
+# 段落特征位
+CONTENT_MARKER = 1 << 0      # 明确的需求内容标记，出现时段落不可能是目录
+PAGE_NUMBER = 1 << 1         # 行末是页码
+MANY_DOTS = 1 << 2           # 点号占比超过20%
+SHORT_LINE = 1 << 3          # 长度小于60
+SECTION_NUMBER = 1 << 4      # 以 "x.y." 形式的章节号开头
+BASIS = 1 << 5               # 依据：
+DESCRIPTION = 1 << 6         # 说明：
+IDENTIFIER = 1 << 7          # 标识号：XXX
+IMPACT_ANALYSIS = 1 << 8     # 对关联需求/设计/编码的影响
+LIST_ITEM = 1 << 9           # a)、b) 等列表项
+REQUIREMENT_MARKER = 1 << 10 # 包含"依据"、"标识号"或"说明"
+BOUNDARY_MARKER = 1 << 11    # 包含"依据"或"标识号"
+HEADING = 1 << 12            # "3.2.3 重构..." 形式的需求标题
+TRUNCATE_MARKER = 1 << 13    # 四级章节号、"修改文件"、"修改前"，疑似进入下一部分
+
+# 需要做窗口统计的特征
+WINDOW_FEATURES = (BASIS, DESCRIPTION, IDENTIFIER, IMPACT_ANALYSIS, LIST_ITEM)
+
+CONTENT_MARKER_PATTERN = re.compile(r'(新增需求描述|修改设计描述|依据：|a\s*\)|标识号：|说明：)')
+PAGE_NUMBER_PATTERN = re.compile(r'\s\d+\s*$')
+SECTION_NUMBER_PATTERN = re.compile(r'^\s*\d+\.\d+\.')
+BASIS_PATTERN = re.compile(r'依据[：:]')
+DESCRIPTION_PATTERN = re.compile(r'说明[：:]')
+IDENTIFIER_PATTERN = re.compile(r'标识号[：:]\s*\w+')
+IMPACT_ANALYSIS_PATTERN = re.compile(r'对关联(需求|设计|编码)的影响')
+LIST_ITEM_PATTERN = re.compile(r'[a-e]\s*\)')
+HEADING_PATTERN = re.compile(r'^\d+\.\d+\.\d+\s+[\u4e00-\u9fa5]')
+SUB_SECTION_PATTERN = re.compile(r'^\d+\.\d+\.\d+\.\d+\.')
+
+
+def classify_paragraph(paragraph):
+    """
+    计算单个段落的特征位
+
+    Args:
+        paragraph: 段落文本
+
+    Returns:
+        特征位掩码
+    """
+    flags = 0
+    length = len(paragraph)
+    dots_count = paragraph.count('.')
+
+    if CONTENT_MARKER_PATTERN.search(paragraph):
+        flags |= CONTENT_MARKER
+    if PAGE_NUMBER_PATTERN.search(paragraph):
+        flags |= PAGE_NUMBER
+    if length and dots_count / length > 0.2:
+        flags |= MANY_DOTS
+    if length < 60:
+        flags |= SHORT_LINE
+    if SECTION_NUMBER_PATTERN.search(paragraph):
+        flags |= SECTION_NUMBER
+
+    if BASIS_PATTERN.search(paragraph):
+        flags |= BASIS
+    if DESCRIPTION_PATTERN.search(paragraph):
+        flags |= DESCRIPTION
+    if IDENTIFIER_PATTERN.search(paragraph):
+        flags |= IDENTIFIER
+    if IMPACT_ANALYSIS_PATTERN.search(paragraph):
+        flags |= IMPACT_ANALYSIS
+    if LIST_ITEM_PATTERN.search(paragraph):
+        flags |= LIST_ITEM
+
+    has_basis_word = "依据" in paragraph
+    has_identifier_word = "标识号" in paragraph
+    if has_basis_word or has_identifier_word:
+        flags |= BOUNDARY_MARKER | REQUIREMENT_MARKER
+    elif "说明" in paragraph:
+        flags |= REQUIREMENT_MARKER
+    if HEADING_PATTERN.match(paragraph):
+        flags |= HEADING
+    if SUB_SECTION_PATTERN.match(paragraph) or "修改文件" in paragraph or "修改前" in paragraph:
+        flags |= TRUNCATE_MARKER
+    return flags
+
+
+def nearby_toc_weight(paragraph):
+    """
+    段落作为目录判断的附近段落时计入的权重
+
+    与原相邻段落判断 page_num and (dots or is_short) 的求值结果保持一致：
+    行末无页码为0；含点号时为点号占比；否则短行为1、长行为0
+
+    Args:
+        paragraph: 段落文本
+
+    Returns:
+        权重
+    """
+    if not PAGE_NUMBER_PATTERN.search(paragraph):
+        return 0.0
+    dots_count = paragraph.count('.')
+    if dots_count:
+        return dots_count / len(paragraph)
+    return 1.0 if len(paragraph) < 60 else 0.0
+
+
+class ParagraphFeatures:
+    """
+    整篇文档的段落特征
+
+    flags为每个段落的特征位掩码数组，nearby_weights为各段落作为附近段落时的目录权重；
+    对WINDOW_FEATURES中的每个特征维护前缀和，任意区间内某特征出现的段落数可以O(1)得到
+    """
+
+    def __init__(self, paragraphs):
+        self.paragraphs = paragraphs
+        self.flags = array('I', (classify_paragraph(para) for para in paragraphs))
+        self.nearby_weights = array('d', (nearby_toc_weight(para) for para in paragraphs))
+        self._prefix = {}
+        for feature in WINDOW_FEATURES:
+            prefix = array('I', [0])
+            total = 0
+            for value in self.flags:
+                if value & feature:
+                    total += 1
+                prefix.append(total)
+            self._prefix[feature] = prefix
+
+    def __len__(self):
+        return len(self.flags)
+
+    def has(self, index, feature):
+        """段落是否具有指定特征"""
+        return bool(self.flags[index] & feature)
+
+    def count(self, feature, start, end):
+        """
+        统计区间[start, end)内具有指定特征的段落数
+
+        Args:
+            feature: WINDOW_FEATURES中的特征位
+            start: 起始索引
+            end: 结束索引（不含）
+
+        Returns:
+            段落数
+        """
+        start = max(0, start)
+        end = min(len(self.flags), end)
+        if start >= end:
+            return 0
+        prefix = self._prefix[feature]
+        return prefix[end] - prefix[start]
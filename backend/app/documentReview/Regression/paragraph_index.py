@@ -0,0 +1,90 @@
+"""
+段落倒排索引模块
+为文档段落建立字符二元组倒排索引，加速按需求名称定位段落
+"""
+
+
+def _bigrams(text):
+    """文本的字符二元组集合，中文没有分词边界，直接按相邻字符切分"""
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class ParagraphIndex:
+    """
+    段落倒排索引
+
+    索引项包括段落按空白切分的词和字符二元组（覆盖中文二元组）。
+    关键词恰好是段落中的完整词时直接命中；其余段落通过对关键词所有二元组的
+    倒排表求交集得到候选，再用子串判断校验，结果与逐段落执行 term in para 完全一致。
+    """
+
+    def __init__(self, paragraphs):
+        self.paragraphs = paragraphs
+        self._postings = {}
+        self._token_postings = {}
+        for index, para in enumerate(paragraphs):
+            for bigram in _bigrams(para):
+                self._postings.setdefault(bigram, []).append(index)
+            for token in set(para.split()):
+                self._token_postings.setdefault(token, []).append(index)
+        # 关键词结果缓存，同一文档上的多次查询复用
+        self._term_cache = {}
+
+    def paragraphs_containing(self, term):
+        """
+        查找包含关键词的段落
+
+        Args:
+            term: 关键词
+
+        Returns:
+            包含该关键词的段落索引集合
+        """
+        cached = self._term_cache.get(term)
+        if cached is not None:
+            return cached
+
+        if len(term) < 2:
+            # 单字关键词无法通过二元组定位，退化为全量扫描
+            result = {i for i, para in enumerate(self.paragraphs) if term in para}
+        else:
+            # 完整词命中的段落无需再做子串校验
+            result = set(self._token_postings.get(term, ()))
+            postings = []
+            for bigram in _bigrams(term):
+                posting = self._postings.get(bigram)
+                if not posting:
+                    postings = None
+                    break
+                postings.append(posting)
+            if postings:
+                postings.sort(key=len)
+                candidates = set(postings[0])
+                for posting in postings[1:]:
+                    candidates.intersection_update(posting)
+                    if not candidates:
+                        break
+                candidates -= result
+                result.update(i for i in candidates if term in self.paragraphs[i])
+
+        self._term_cache[term] = result
+        return result
+
+    def score_paragraphs(self, terms, excluded=None):
+        """
+        统计每个段落包含多少个关键词
+
+        Args:
+            terms: 关键词列表
+            excluded: 需要跳过的段落索引集合（如目录）
+
+        Returns:
+            {段落索引: 匹配的关键词数量}，只包含至少匹配一个关键词的段落
+        """
+        scores = {}
+        for term in terms:
+            for index in self.paragraphs_containing(term):
+                if excluded and index in excluded:
+                    continue
+                scores[index] = scores.get(index, 0) + 1
+        return scores
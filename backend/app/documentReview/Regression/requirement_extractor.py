@@ -2,8 +2,9 @@
 需求提取模块
 负责从需求文档中提取测试需求并进行处理
 """
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font
+import csv
+
+from app.documentReview.common.excel_writer import StreamingExcelWriter, WRAP_STYLE, REQUIREMENT_HEADER_STYLE
 
 from .document_reader import read_xuqiu_wendang_document, extract_requirement_candidates
 
@@ -13,15 +14,12 @@ def extract_requirements(file_path, requirement_names=None, catalog_file_path=No
     参数：
         file_path: Word文档路径
         requirement_names: 用户确认的需求名称列表，如果为None或空列表，则自动提取
-        catalog_file_path: 目录文件路径（当需要自动提取需求列表时必需）
+        catalog_file_path: 目录文件路径，可选；自动提取需求列表且未提供时使用文档自身的目录
     返回：
         测试需求列表（{name: content}）
     """
     # 如果未提供需求名称列表，则自动提取
     if not requirement_names:
-        if not catalog_file_path:
-            print("[ERROR] 如果未提供需求名称列表，则必须提供目录文件路径")
-            return {}
         # 这里获取的是带chapter信息的对象列表
         requirement_candidate_objs = extract_requirement_candidates(file_path, catalog_file_path)
         requirement_names = [obj["name"] for obj in requirement_candidate_objs]
@@ -40,12 +38,25 @@ def extract_requirements(file_path, requirement_names=None, catalog_file_path=No
 
 
 
+def _iter_name_content(requirements):
+    """
+    逐条产出 (需求名称, 需求内容)
+    
+    参数:
+        requirements: {name: content}字典，或包含name和content字段的需求记录的可迭代对象
+    """
+    if isinstance(requirements, dict):
+        yield from requirements.items()
+        return
+    for req in requirements:
+        yield req.get("name", ""), req.get("content", "")
+
 def generate_requirement_excel(requirements, output_path, excel_type="requirement"):
     """
     生成Excel表格 - 支持需求分析表和测试用例表
     
     参数:
-        requirements: 测试需求列表
+        requirements: 测试需求，{name: content}字典或需求记录的可迭代对象（逐条读取，不会整体加载）
         output_path: 输出文件路径
         excel_type: 表格类型，'requirement'为需求分析表，'test_case'为测试用例表
         
@@ -53,33 +64,43 @@ def generate_requirement_excel(requirements, output_path, excel_type="requiremen
         是否成功
     """
     try:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "需求分析表" if excel_type == "requirement" else "测试用例表"
+        sheet_title = "需求分析表" if excel_type == "requirement" else "测试用例表"
+        # 只写模式下列宽须在写入数据之前设置：需求名称列30，需求内容列80
+        writer = StreamingExcelWriter(sheet_title, [30, 80])
         
         # 设置表头 - 只保留两列
-        headers = ["需求名称", "需求内容"]
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
+        writer.append(["需求名称", "需求内容"], style=REQUIREMENT_HEADER_STYLE)
         
-        # 填充数据
-        for row, (name, content) in enumerate(requirements.items(), 2):
-            ws.cell(row=row, column=1, value=name)
-            ws.cell(row=row, column=2, value=content)
-        
-        # 调整列宽
-        ws.column_dimensions['A'].width = 30  # 需求名称列的宽度
-        ws.column_dimensions['B'].width = 80  # 需求内容列的宽度
-        
-        # 调整文本自动换行
-        for row in range(2, len(requirements) + 2):
-            ws.cell(row=row, column=2).alignment = Alignment(wrap_text=True, vertical='top')
+        # 逐行填充数据，需求内容列自动换行
+        for name, content in _iter_name_content(requirements):
+            writer.append([name, content], styles=(None, WRAP_STYLE))
         
         # 保存文件
-        wb.save(output_path)
+        writer.save(output_path)
         return True
     except Exception as e:
         print(f"生成Excel文件时发生错误: {e}")
         return False
+
+def generate_requirement_csv(requirements, output_path):
+    """
+    生成CSV表格，列与需求分析表一致
+    
+    参数:
+        requirements: 测试需求，{name: content}字典或需求记录的可迭代对象（逐条读取，不会整体加载）
+        output_path: 输出文件路径
+        
+    返回:
+        是否成功
+    """
+    try:
+        # utf-8-sig 使Excel打开时能正确识别中文
+        with open(output_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["需求名称", "需求内容"])
+            for name, content in _iter_name_content(requirements):
+                writer.writerow([name, content])
+        return True
+    except Exception as e:
+        print(f"生成CSV文件时发生错误: {e}")
+        return False
@@ -0,0 +1,123 @@
+"""
+Word原生目录识别模块
+根据 "TOC n" 段落样式以及 TOC/PAGEREF 域代码、_Toc书签超链接识别目录条目，
+一次遍历段落XML即可完成，不依赖正则和启发式规则
+"""
+from docx.oxml.ns import qn
+
+W_T = qn('w:t')
+W_TAB = qn('w:tab')
+W_FLD_CHAR = qn('w:fldChar')
+W_FLD_CHAR_TYPE = qn('w:fldCharType')
+W_INSTR_TEXT = qn('w:instrText')
+W_FLD_SIMPLE = qn('w:fldSimple')
+W_INSTR = qn('w:instr')
+W_HYPERLINK = qn('w:hyperlink')
+W_ANCHOR = qn('w:anchor')
+
+# 页码前的引导符
+LEADER_CHARS = " \t.·…-_"
+
+
+def is_toc_style(style):
+    """
+    判断段落样式是否为Word内置目录样式（TOC 1 ~ TOC 9、TOC Heading）
+
+    Args:
+        style: python-docx段落样式对象
+
+    Returns:
+        是否为目录样式
+    """
+    if style is None:
+        return False
+    for value in (style.name, style.style_id):
+        if value and value.lower().replace(" ", "").startswith("toc"):
+            return True
+    return False
+
+
+def _field_kind(instr):
+    """域代码类型，如 " TOC \\o "1-3" \\h " -> "TOC" """
+    parts = instr.split()
+    return parts[0].upper() if parts else ""
+
+
+def scan_toc_paragraphs(paragraphs):
+    """
+    识别目录段落并读取其完整文本
+
+    python-docx的paragraph.text不包含超链接中的文字，而目录条目通常位于超链接中，
+    因此这里直接从XML收集文本
+
+    Args:
+        paragraphs: python-docx段落对象列表（document.paragraphs）
+
+    Returns:
+        与段落一一对应的列表，目录段落为其完整文本，其余为None
+    """
+    results = []
+    # 跨段落的域嵌套栈，每项为 [域类型, 已读取的域代码]
+    field_stack = []
+    for para in paragraphs:
+        is_toc = is_toc_style(para.style)
+        text_parts = []
+        for element in para._p.iter(W_T, W_TAB, W_FLD_CHAR, W_INSTR_TEXT, W_FLD_SIMPLE, W_HYPERLINK):
+            tag = element.tag
+            if tag == W_T:
+                if element.text:
+                    text_parts.append(element.text)
+                    if any(kind in ("TOC", "PAGEREF") for kind, _ in field_stack):
+                        is_toc = True
+            elif tag == W_TAB:
+                text_parts.append("\t")
+            elif tag == W_FLD_CHAR:
+                char_type = element.get(W_FLD_CHAR_TYPE)
+                if char_type == "begin":
+                    field_stack.append(["", ""])
+                elif char_type == "end" and field_stack:
+                    field_stack.pop()
+            elif tag == W_INSTR_TEXT:
+                if field_stack and element.text:
+                    field_stack[-1][1] += element.text
+                    field_stack[-1][0] = _field_kind(field_stack[-1][1])
+            elif tag == W_FLD_SIMPLE:
+                if _field_kind(element.get(W_INSTR) or "") in ("TOC", "PAGEREF"):
+                    is_toc = True
+            elif tag == W_HYPERLINK:
+                if (element.get(W_ANCHOR) or "").startswith("_Toc"):
+                    is_toc = True
+        results.append("".join(text_parts).strip() if is_toc else None)
+    return results
+
+
+def parse_toc_entry(text):
+    """
+    解析目录条目文本
+
+    例如 "3.2.1 用户身份验证功能\\t12" -> {"chapter": "3.2.1", "name": "用户身份验证功能", "level": 3}
+
+    Args:
+        text: 目录条目文本
+
+    Returns:
+        {chapter, name, level}，没有章节号的条目（如"前言"）返回None
+    """
+    if not text:
+        return None
+    body = text.strip()
+    # 去掉末尾页码及其前面的引导符
+    stripped = body.rstrip("0123456789")
+    if stripped != body and stripped and stripped[-1] in LEADER_CHARS:
+        body = stripped
+    body = body.rstrip(LEADER_CHARS)
+
+    parts = body.split(None, 1)
+    if len(parts) < 2:
+        return None
+    chapter, name = parts[0].rstrip("."), parts[1].strip()
+    if not chapter or not chapter[0].isdigit() or not all(c.isdigit() or c == "." for c in chapter):
+        return None
+    if not name or name[0].isdigit():
+        return None
+    return {"chapter": chapter, "name": name, "level": len(chapter.split("."))}
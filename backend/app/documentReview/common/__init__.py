@@ -0,0 +1,4 @@
+"""
+文档审查公共组件
+供配置项测试(ConfigurationItem)与回归测试(Regression)共用
+"""
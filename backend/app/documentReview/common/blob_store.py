@@ -0,0 +1,208 @@
+"""
+按内容摘要去重的上传文件存储
+上传文件边写入磁盘边计算SHA-256，相同内容只保存一份，按摘要分级存放在 ab/cd/<摘要> 下；
+各上传接口原有的 <file_id>_<文件名> 路径以硬链接指向该文件，file_id与摘要的对应关系记录在上传文件登记表中，
+解析缓存、提取结果等下游缓存都可以按内容摘要命中
+"""
+import os
+import time
+import shutil
+import hashlib
+import logging
+import threading
+
+from .paths import UPLOADS_DIR
+from .file_registry import get_file_registry
+
+# 去重文件存放目录
+BLOBS_DIR = os.path.join(UPLOADS_DIR, "blobs")
+
+# 写入上传文件时每次读取的字节数
+COPY_CHUNK_SIZE = 1024 * 1024
+
+TEMP_DIR_NAME = "tmp"
+
+_store_instance = None
+_store_instance_lock = threading.Lock()
+
+
+def _link_or_copy(source, target):
+    # 同一文件系统中使用硬链接，不占用额外空间；不支持硬链接时复制
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+class BlobStore:
+    """
+    内容寻址的文件存储
+
+    save_upload()将上传流写入存储，在上传目录中创建别名路径并登记到上传文件登记表
+    """
+
+    def __init__(self, root_dir=BLOBS_DIR):
+        """
+        Args:
+            root_dir: 存放去重文件的目录
+        """
+        self.root_dir = root_dir
+        self.temp_dir = os.path.join(root_dir, TEMP_DIR_NAME)
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+    def blob_path(self, content_hash):
+        """
+        内容摘要对应的文件路径：<根目录>/ab/cd/<摘要>
+
+        Args:
+            content_hash: 十六进制SHA-256摘要
+
+        Returns:
+            文件路径
+        """
+        return os.path.join(self.root_dir, content_hash[:2], content_hash[2:4], content_hash)
+
+    def put_stream(self, stream):
+        """
+        将数据流写入存储，写入的同时计算摘要，内容已存在时不重复保存
+
+        Args:
+            stream: 可read()的二进制流
+
+        Returns:
+            (内容摘要, 字节数, 是否已存在相同内容)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        # 临时目录为空时可能已被存储清理删除
+        os.makedirs(self.temp_dir, exist_ok=True)
+        temp_path = os.path.join(self.temp_dir, f"{os.getpid()}.{threading.get_ident()}.{time.time_ns()}.tmp")
+        try:
+            with open(temp_path, 'wb') as f:
+                for chunk in iter(lambda: stream.read(COPY_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            content_hash = digest.hexdigest()
+            return content_hash, size, self._commit(temp_path, content_hash)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def put_file(self, file_path, content_hash=None):
+        """
+        将已写入磁盘的文件移入存储，文件须与存储目录在同一文件系统中，移入后原路径不再存在
+
+        Args:
+            file_path: 文件路径
+            content_hash: 已计算的内容摘要，默认读取文件计算
+
+        Returns:
+            (内容摘要, 字节数, 是否已存在相同内容)
+        """
+        if content_hash is None:
+            from .results_catalog import file_content_hash
+            content_hash = file_content_hash(file_path)
+        size = os.path.getsize(file_path)
+        existed = self._commit(file_path, content_hash)
+        if existed:
+            os.remove(file_path)
+        return content_hash, size, existed
+
+    def _commit(self, temp_path, content_hash):
+        # 内容已存在时返回True，由调用方删除临时文件；否则原子地移动到摘要对应的位置
+        path = self.blob_path(content_hash)
+        if os.path.exists(path):
+            # 刷新访问时间，存储清理时按最近使用排序
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+            return True
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        return False
+
+    def add_alias(self, file_id, content_hash, file_name, alias_path, size=None, source=None):
+        """
+        为已保存的内容创建file_id别名：在alias_path创建指向该内容的文件并登记
+
+        Args:
+            file_id: 上传文件ID
+            content_hash: 内容摘要
+            file_name: 原始文件名
+            alias_path: 上传接口使用的文件路径
+            size: 字节数，默认读取文件大小
+            source: 上传来源
+        """
+        path = self.blob_path(content_hash)
+        if size is None:
+            size = os.path.getsize(path)
+        os.makedirs(os.path.dirname(alias_path), exist_ok=True)
+        _link_or_copy(path, alias_path)
+        get_file_registry().register(file_id, alias_path, file_name, content_hash, size, source)
+
+    def save_upload(self, stream, alias_path, file_id, file_name=None, source=None):
+        """
+        保存一个上传文件
+
+        Args:
+            stream: 上传文件的二进制流
+            alias_path: 上传接口使用的文件路径
+            file_id: 上传文件ID
+            file_name: 原始文件名
+            source: 上传来源
+
+        Returns:
+            {"content_hash", "size", "deduplicated"}
+        """
+        content_hash, size, existed = self.put_stream(stream)
+        self.add_alias(file_id, content_hash, file_name, alias_path, size, source)
+        if existed:
+            logging.info(f"上传文件 {file_name} 与已有文件内容相同，复用 {content_hash}")
+        return {"content_hash": content_hash, "size": size, "deduplicated": existed}
+
+    def content_hash(self, file_id):
+        """
+        按file_id查询内容摘要
+
+        Args:
+            file_id: 上传文件ID
+
+        Returns:
+            内容摘要，未通过存储保存的文件返回None
+        """
+        entry = get_file_registry().get(file_id)
+        return entry["content_hash"] if entry else None
+
+
+def get_blob_store():
+    """获取进程内共用的上传文件存储实例"""
+    global _store_instance
+    if _store_instance is None:
+        with _store_instance_lock:
+            if _store_instance is None:
+                _store_instance = BlobStore()
+    return _store_instance
+
+
+def save_upload(stream, alias_path, file_id, file_name=None, source=None):
+    """
+    保存上传文件，见BlobStore.save_upload
+    """
+    return get_blob_store().save_upload(stream, alias_path, file_id, file_name, source)
+
+
+def upload_content_hash(file_id, file_path=None):
+    """
+    获取上传文件的内容摘要，存储中没有记录时（旧版本上传的文件）计算文件摘要
+
+    Args:
+        file_id: 上传文件ID
+        file_path: 文件路径
+
+    Returns:
+        内容摘要，无法获取时返回None
+    """
+    content_hash = get_blob_store().content_hash(file_id)
+    if content_hash is None and file_path and os.path.exists(file_path):
+        from .results_catalog import file_content_hash
+        content_hash = file_content_hash(file_path)
+    return content_hash
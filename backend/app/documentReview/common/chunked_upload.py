@@ -0,0 +1,364 @@
+"""
+可断点续传的分块上传
+客户端先创建上传任务，再按偏移量逐块PUT文件内容（附带该块的SHA-256校验值），全部写入后调用finalize；
+分块先写入磁盘上的临时文件，校验通过后才写入上传文件，内存占用与单个分块的读取缓冲区大小有关而与文件大小无关，
+中断后查询已接收的字节数即可从断点继续；finalize时将文件原子地移入去重存储并触发文档预处理
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, request, jsonify
+
+from .paths import UPLOADS_DIR
+from .blob_store import get_blob_store
+from .results_catalog import file_content_hash
+from .file_registry import get_file_registry, PARSE_PARSED, PARSE_FAILED
+
+# 上传中的文件存放目录，须与去重存储在同一文件系统中，finalize时才能直接移动
+CHUNKED_UPLOADS_DIR = os.path.join(UPLOADS_DIR, "chunked")
+
+# 单个分块的最大字节数
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+
+# 建议客户端使用的分块大小
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# 单个文件的最大字节数
+MAX_UPLOAD_SIZE = 512 * 1024 * 1024
+
+# 写入分块时每次读取的字节数
+READ_BUFFER_SIZE = 256 * 1024
+
+META_NAME = "meta.json"
+DATA_NAME = "data.part"
+
+_manager_instance = None
+_manager_instance_lock = threading.Lock()
+_preprocess_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload-preprocess")
+
+
+class UploadError(Exception):
+    """上传请求无效，status为对应的HTTP状态码"""
+
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def _preprocess_document(file_path, content_hash):
+    from app.documentReview.Regression.document_cache import load_document
+    start_time = time.time()
+    try:
+        load_document(file_path)
+        get_file_registry().set_parse_status(content_hash, PARSE_PARSED)
+        logging.info(f"已预解析上传文档: {file_path}，耗时: {time.time() - start_time:.2f}秒")
+    except Exception as e:
+        get_file_registry().set_parse_status(content_hash, PARSE_FAILED)
+        logging.warning(f"预解析上传文档 {file_path} 失败: {e}")
+
+
+def schedule_preprocess(file_path, content_hash=None):
+    """
+    在后台解析上传的docx文档，后续提取和审查请求直接命中解析缓存，解析结果记录到上传文件登记表
+
+    Args:
+        file_path: 文档路径
+        content_hash: 内容摘要
+    """
+    if file_path.lower().endswith(".docx"):
+        _preprocess_pool.submit(_preprocess_document, file_path, content_hash)
+
+
+class ChunkedUploadManager:
+    """
+    分块上传任务管理
+
+    每个任务一个目录，meta.json记录文件名、总大小和已连续接收的字节数，data.part为文件内容
+    """
+
+    def __init__(self, root_dir=CHUNKED_UPLOADS_DIR):
+        """
+        Args:
+            root_dir: 上传任务目录
+        """
+        self.root_dir = root_dir
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _upload_dir(self, upload_id):
+        # upload_id来自请求，只接受init生成的格式
+        if not upload_id or len(upload_id) != 32 or any(c not in "0123456789abcdef" for c in upload_id):
+            raise UploadError("无效的上传ID", 404)
+        return os.path.join(self.root_dir, upload_id)
+
+    def _lock(self, upload_id):
+        with self._locks_lock:
+            return self._locks.setdefault(upload_id, threading.Lock())
+
+    def _read_meta(self, upload_id):
+        try:
+            with open(os.path.join(self._upload_dir(upload_id), META_NAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise UploadError("上传任务不存在或已过期", 404)
+
+    def _write_meta(self, upload_id, meta):
+        path = os.path.join(self._upload_dir(upload_id), META_NAME)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _status(meta):
+        return {
+            "upload_id": meta["upload_id"],
+            "file_name": meta["file_name"],
+            "total_size": meta["total_size"],
+            "received": meta["received"],
+            "complete": meta["received"] >= meta["total_size"],
+            "chunk_size": DEFAULT_CHUNK_SIZE,
+            "max_chunk_size": MAX_CHUNK_SIZE
+        }
+
+    def init(self, file_name, total_size, checksum=None):
+        """
+        创建上传任务
+
+        Args:
+            file_name: 原始文件名
+            total_size: 文件总字节数
+            checksum: 可选，整个文件的SHA-256，finalize时校验
+
+        Returns:
+            任务状态字典
+        """
+        try:
+            total_size = int(total_size)
+        except (TypeError, ValueError):
+            raise UploadError("缺少文件大小")
+        if not file_name:
+            raise UploadError("缺少文件名")
+        if total_size <= 0 or total_size > MAX_UPLOAD_SIZE:
+            raise UploadError(f"文件大小须在1到{MAX_UPLOAD_SIZE}字节之间", 413)
+        upload_id = uuid.uuid4().hex
+        upload_dir = self._upload_dir(upload_id)
+        os.makedirs(upload_dir)
+        with open(os.path.join(upload_dir, DATA_NAME), 'wb'):
+            pass
+        meta = {
+            "upload_id": upload_id,
+            "file_name": file_name,
+            "total_size": total_size,
+            "received": 0,
+            "checksum": (checksum or "").lower() or None,
+            "created_at": time.time()
+        }
+        self._write_meta(upload_id, meta)
+        return self._status(meta)
+
+    def status(self, upload_id):
+        """
+        查询上传任务状态，断点续传时从返回的received处继续
+
+        Args:
+            upload_id: 上传ID
+
+        Returns:
+            任务状态字典
+        """
+        return self._status(self._read_meta(upload_id))
+
+    def write_chunk(self, upload_id, offset, stream, length, checksum=None):
+        """
+        写入一个分块，重复发送已接收过的分块不影响结果
+
+        Args:
+            upload_id: 上传ID
+            offset: 分块在文件中的起始位置，不能超过已接收的字节数
+            stream: 分块内容的二进制流
+            length: 分块字节数
+            checksum: 可选，分块内容的SHA-256
+
+        Returns:
+            任务状态字典
+        """
+        try:
+            offset = int(offset)
+            length = int(length)
+        except (TypeError, ValueError):
+            raise UploadError("缺少offset或分块长度")
+        if length <= 0 or length > MAX_CHUNK_SIZE:
+            raise UploadError(f"分块大小须在1到{MAX_CHUNK_SIZE}字节之间", 413)
+        with self._lock(upload_id):
+            meta = self._read_meta(upload_id)
+            if offset < 0 or offset > meta["received"]:
+                raise UploadError("分块偏移量与已接收的字节数不连续", 409, received=meta["received"])
+            if offset + length > meta["total_size"]:
+                raise UploadError("分块超出文件大小", 416, received=meta["received"])
+
+            upload_dir = self._upload_dir(upload_id)
+            # 分块先写入临时文件，内容完整且校验通过后才写入上传文件；
+            # 校验失败的重发分块不会覆盖已接收的内容，客户端从同一偏移量重发即可
+            with tempfile.TemporaryFile(dir=upload_dir) as chunk_file:
+                digest = hashlib.sha256()
+                written = 0
+                while written < length:
+                    data = stream.read(min(READ_BUFFER_SIZE, length - written))
+                    if not data:
+                        break
+                    digest.update(data)
+                    chunk_file.write(data)
+                    written += len(data)
+                if written != length:
+                    raise UploadError("分块内容不完整", 400, received=meta["received"])
+                if checksum and digest.hexdigest() != checksum.lower():
+                    raise UploadError("分块校验失败", 422, received=meta["received"])
+                chunk_file.seek(0)
+                with open(os.path.join(upload_dir, DATA_NAME), 'r+b') as f:
+                    f.seek(offset)
+                    shutil.copyfileobj(chunk_file, f, READ_BUFFER_SIZE)
+            if offset + length > meta["received"]:
+                meta["received"] = offset + length
+                self._write_meta(upload_id, meta)
+            return self._status(meta)
+
+    def finalize(self, upload_id, alias_path, file_id, source=None):
+        """
+        完成上传：校验文件，原子地移入去重存储并在alias_path创建上传文件，随后删除上传任务
+
+        Args:
+            upload_id: 上传ID
+            alias_path: 上传接口使用的文件路径
+            file_id: 上传文件ID
+            source: 上传来源
+
+        Returns:
+            {"content_hash", "size", "deduplicated", "file_name"}
+        """
+        with self._lock(upload_id):
+            meta = self._read_meta(upload_id)
+            if meta["received"] < meta["total_size"]:
+                raise UploadError("文件尚未上传完整", 409, received=meta["received"])
+            data_path = os.path.join(self._upload_dir(upload_id), DATA_NAME)
+            content_hash = file_content_hash(data_path)
+            if meta.get("checksum") and content_hash != meta["checksum"]:
+                self._remove(upload_id)
+                raise UploadError("文件校验失败，请重新上传", 422)
+            store = get_blob_store()
+            content_hash, size, existed = store.put_file(data_path, content_hash)
+            store.add_alias(file_id, content_hash, meta["file_name"], alias_path, size, source)
+            self._remove(upload_id)
+        with self._locks_lock:
+            self._locks.pop(upload_id, None)
+        logging.info(f"分块上传 {upload_id} 完成: {meta['file_name']}，{size}字节，内容摘要: {content_hash}")
+        return {"content_hash": content_hash, "size": size, "deduplicated": existed, "file_name": meta["file_name"]}
+
+    def _remove(self, upload_id):
+        upload_dir = self._upload_dir(upload_id)
+        for name in os.listdir(upload_dir):
+            os.remove(os.path.join(upload_dir, name))
+        os.rmdir(upload_dir)
+
+
+def get_upload_manager():
+    """获取进程内共用的分块上传管理器"""
+    global _manager_instance
+    if _manager_instance is None:
+        with _manager_instance_lock:
+            if _manager_instance is None:
+                _manager_instance = ChunkedUploadManager()
+    return _manager_instance
+
+
+def _upload_error_response(e):
+    body = {"success": False, "error": str(e)}
+    body.update(e.extra)
+    return jsonify(body), e.status
+
+
+def create_chunked_upload_blueprint(name, upload_target, allowed_file, url_prefix="", source=None):
+    """
+    创建分块上传接口的Blueprint
+
+        POST {prefix}/uploads                      创建任务，JSON: file_name, total_size, checksum(可选)
+        GET  {prefix}/uploads/<upload_id>          查询已接收的字节数
+        PUT  {prefix}/uploads/<upload_id>?offset=&checksum=   请求体为分块内容
+        POST {prefix}/uploads/<upload_id>/finalize 完成上传，返回与普通上传接口相同的file_id/file_name/file_path
+
+    Args:
+        name: Blueprint名称
+        upload_target: 参数为(file_id, 原始文件名)，返回(文件路径, 响应中的file_name)，与普通上传接口的命名方式一致
+        allowed_file: 检查文件名是否允许上传的函数
+        url_prefix: 路由前缀
+        source: 登记到上传文件登记表的上传来源
+
+    Returns:
+        Blueprint
+    """
+    bp = Blueprint(name, __name__)
+
+    @bp.route(f'{url_prefix}/uploads', methods=['POST'])
+    def init_upload():
+        data = request.get_json(silent=True) or {}
+        file_name = data.get('file_name', '')
+        if not file_name or not allowed_file(file_name):
+            return jsonify({"success": False, "error": "不支持的文件类型"}), 400
+        try:
+            return jsonify({"success": True, **get_upload_manager().init(
+                file_name, data.get('total_size'), data.get('checksum'))}), 201
+        except UploadError as e:
+            return _upload_error_response(e)
+
+    @bp.route(f'{url_prefix}/uploads/<upload_id>', methods=['GET'])
+    def upload_status(upload_id):
+        try:
+            return jsonify({"success": True, **get_upload_manager().status(upload_id)})
+        except UploadError as e:
+            return _upload_error_response(e)
+
+    @bp.route(f'{url_prefix}/uploads/<upload_id>', methods=['PUT'])
+    def upload_chunk(upload_id):
+        try:
+            status = get_upload_manager().write_chunk(
+                upload_id,
+                request.args.get('offset'),
+                request.stream,
+                request.content_length,
+                request.args.get('checksum') or request.headers.get('X-Chunk-Checksum')
+            )
+            return jsonify({"success": True, **status})
+        except UploadError as e:
+            return _upload_error_response(e)
+
+    @bp.route(f'{url_prefix}/uploads/<upload_id>/finalize', methods=['POST'])
+    def finalize_upload(upload_id):
+        manager = get_upload_manager()
+        try:
+            file_name = manager.status(upload_id)["file_name"]
+            file_id = str(uuid.uuid4())
+            file_path, file_name = upload_target(file_id, file_name)
+            stored = manager.finalize(upload_id, file_path, file_id, source)
+        except UploadError as e:
+            return _upload_error_response(e)
+        schedule_preprocess(file_path, stored["content_hash"])
+        return jsonify({
+            "success": True,
+            "message": "文件上传成功",
+            "file_id": file_id,
+            "file_name": file_name,
+            "file_path": file_path,
+            "content_hash": stored["content_hash"],
+            "deduplicated": stored["deduplicated"]
+        })
+
+    return bp
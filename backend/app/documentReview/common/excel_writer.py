@@ -0,0 +1,126 @@
+"""
+流式Excel报表写入
+基于openpyxl只写模式逐行写出单元格，样式以命名样式在工作簿上注册一次后按名称引用，
+行高在写出该行时设置，内存占用与行数无关
+"""
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+# 报表共用的命名样式
+TITLE_STYLE = "report_title"
+HEADER_STYLE = "report_header"
+REQUIREMENT_HEADER_STYLE = "report_plain_header"
+WRAP_STYLE = "report_wrap"
+
+
+def _build_named_styles():
+    thin = Side(style='thin')
+    return {
+        TITLE_STYLE: NamedStyle(
+            name=TITLE_STYLE,
+            font=Font(name='宋体', size=14, bold=True),
+            alignment=Alignment(horizontal='center', vertical='center')
+        ),
+        HEADER_STYLE: NamedStyle(
+            name=HEADER_STYLE,
+            font=Font(bold=True, size=12),
+            fill=PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid"),
+            border=Border(left=thin, right=thin, top=thin, bottom=thin),
+            alignment=Alignment(wrap_text=True, vertical='top')
+        ),
+        REQUIREMENT_HEADER_STYLE: NamedStyle(
+            name=REQUIREMENT_HEADER_STYLE,
+            font=Font(bold=True),
+            alignment=Alignment(horizontal='center')
+        ),
+        WRAP_STYLE: NamedStyle(
+            name=WRAP_STYLE,
+            alignment=Alignment(wrap_text=True, vertical='top')
+        ),
+    }
+
+
+class StreamingExcelWriter:
+    """
+    只写模式的单工作表Excel写入器
+
+    列宽须在写入第一行之前设置，因此在构造时传入；
+    append()写出一行后该行即不再保留在内存中，最后调用save()保存
+    """
+
+    def __init__(self, sheet_title, column_widths=None):
+        """
+        Args:
+            sheet_title: 工作表名称
+            column_widths: 各列宽度列表，按A、B、C...顺序
+        """
+        self.workbook = Workbook(write_only=True)
+        for style in _build_named_styles().values():
+            self.workbook.add_named_style(style)
+        self.sheet = self.workbook.create_sheet(sheet_title)
+        for index, width in enumerate(column_widths or [], 1):
+            self.sheet.column_dimensions[get_column_letter(index)].width = width
+        self.row_count = 0
+
+    def _cell(self, value, style):
+        cell = WriteOnlyCell(self.sheet, value=value)
+        if style:
+            cell.style = style
+        return cell
+
+    def append(self, values, style=None, height=None, styles=None):
+        """
+        写出一行
+
+        Args:
+            values: 单元格值列表
+            style: 整行使用的命名样式
+            height: 行高，None表示默认行高
+            styles: 逐列的命名样式列表，优先于style
+        """
+        self.row_count += 1
+        if height is not None:
+            self.sheet.row_dimensions[self.row_count].height = height
+        if styles is None:
+            cells = [self._cell(value, style) for value in values]
+        else:
+            cells = [self._cell(value, cell_style) for value, cell_style in zip(values, styles)]
+        self.sheet.append(cells)
+        if height is not None:
+            # 行已写出，行高不再需要保留
+            del self.sheet.row_dimensions[self.row_count]
+
+    def append_rows(self, rows, style=WRAP_STYLE, height=None):
+        """
+        逐行写出生成器产出的数据行
+
+        Args:
+            rows: 数据行的可迭代对象
+            style: 命名样式
+            height: 行高
+        """
+        for values in rows:
+            self.append(values, style=style, height=height)
+
+    def append_title(self, title, columns):
+        """
+        写出横跨columns列的合并标题行
+
+        Args:
+            title: 标题文本
+            columns: 合并的列数
+        """
+        self.append([title], style=TITLE_STYLE)
+        if columns > 1:
+            self.sheet.merged_cells.add(f"A{self.row_count}:{get_column_letter(columns)}{self.row_count}")
+
+    def save(self, output_path):
+        """
+        保存工作簿，只写模式下每个写入器只能保存一次
+
+        Args:
+            output_path: 输出文件路径
+        """
+        self.workbook.save(output_path)
@@ -0,0 +1,256 @@
+"""
+上传文件登记表
+所有应用（回归测试、配置项、项目管理）上传的文件都按file_id登记存放路径、内容摘要、大小、类型和解析状态，
+接口按file_id一次索引查询即可找到文件，不再按文件名规则逐个尝试路径；任一应用上传的文件其他应用都可以使用
+"""
+import os
+import time
+import logging
+import sqlite3
+import threading
+
+from .paths import UPLOADS_DIR, APP_UPLOADS_DIR, data_path
+
+# 登记表数据库文件
+FILE_REGISTRY_DB = "file_registry.db"
+
+# 解析状态
+PARSE_PENDING = "pending"
+PARSE_PARSED = "parsed"
+PARSE_FAILED = "failed"
+
+# 首次使用时登记这些目录中已有的上传文件（<file_id>_<文件名> 或 <file_id>.<扩展名>）
+LEGACY_UPLOAD_DIRS = [
+    (UPLOADS_DIR, "legacy"),
+    (os.path.join(UPLOADS_DIR, "configuration_item"), "configuration_item"),
+    (os.path.join(UPLOADS_DIR, "regression"), "regression"),
+    (os.path.join(UPLOADS_DIR, "project_documents"), "project_management"),
+    (os.path.join(APP_UPLOADS_DIR, "configuration_item"), "configuration_item"),
+]
+
+UUID_LENGTH = 36
+
+_registry_instance = None
+_registry_instance_lock = threading.Lock()
+
+
+def file_type_of(file_name):
+    """文件类型：小写的扩展名，如 "docx"，没有扩展名时为空字符串"""
+    return os.path.splitext(file_name or "")[1].lstrip(".").lower()
+
+
+def _row_to_entry(row):
+    return {
+        "file_id": row["file_id"],
+        "file_path": row["file_path"],
+        "file_name": row["file_name"],
+        "content_hash": row["content_hash"],
+        "size": row["size"],
+        "file_type": row["file_type"],
+        "parse_status": row["parse_status"],
+        "source": row["source"],
+        "created_at": row["created_at"]
+    }
+
+
+def _legacy_file_id(name):
+    # 上传文件名以UUID形式的file_id开头
+    file_id = name[:UUID_LENGTH]
+    if len(file_id) != UUID_LENGTH or file_id.count("-") != 4:
+        return None
+    if len(name) > UUID_LENGTH and name[UUID_LENGTH] not in "_.":
+        return None
+    return file_id
+
+
+class FileRegistry:
+    """
+    基于SQLite的上传文件登记表
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Args:
+            db_path: 数据库文件路径，默认存放在数据目录下
+        """
+        self.db_path = db_path or data_path(FILE_REGISTRY_DB)
+        self._legacy_checked = False
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    file_id TEXT PRIMARY KEY,
+                    file_path TEXT NOT NULL,
+                    file_name TEXT,
+                    content_hash TEXT,
+                    size INTEGER,
+                    file_type TEXT NOT NULL DEFAULT '',
+                    parse_status TEXT NOT NULL DEFAULT 'pending',
+                    source TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_files_content_hash ON files (content_hash)")
+            conn.execute("CREATE TABLE IF NOT EXISTS registry_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self):
+        # 每次操作使用独立连接，避免跨线程共享连接
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def register(self, file_id, file_path, file_name=None, content_hash=None, size=None, source=None):
+        """
+        登记一个上传文件，file_id已存在时覆盖
+
+        Args:
+            file_id: 上传文件ID
+            file_path: 文件存放路径
+            file_name: 原始文件名
+            content_hash: 内容摘要
+            size: 字节数
+            source: 上传来源，如 "regression"、"configuration_item"、"project_management"
+        """
+        now = time.time()
+        # 相同内容已解析过时沿用其解析状态
+        parse_status = PARSE_PENDING
+        with self._connect() as conn:
+            if content_hash:
+                row = conn.execute(
+                    "SELECT parse_status FROM files WHERE content_hash = ? AND parse_status != ? LIMIT 1",
+                    (content_hash, PARSE_PENDING)
+                ).fetchone()
+                if row is not None:
+                    parse_status = row["parse_status"]
+            conn.execute(
+                "INSERT OR REPLACE INTO files (file_id, file_path, file_name, content_hash, size, file_type, "
+                "parse_status, source, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_id, os.path.abspath(file_path), file_name, content_hash, size,
+                 file_type_of(file_name or file_path), parse_status, source, now, now)
+            )
+
+    def get(self, file_id):
+        """
+        按file_id查询登记信息
+
+        Args:
+            file_id: 上传文件ID
+
+        Returns:
+            登记信息字典，未登记时返回None
+        """
+        if not file_id:
+            return None
+        self.import_legacy_uploads()
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM files WHERE file_id = ?", (str(file_id),)).fetchone()
+        return _row_to_entry(row) if row else None
+
+    def resolve(self, file_id):
+        """
+        按file_id获取文件路径
+
+        Args:
+            file_id: 上传文件ID
+
+        Returns:
+            文件路径，未登记或文件已被删除时返回None
+        """
+        entry = self.get(file_id)
+        if entry is None:
+            return None
+        if os.path.exists(entry["file_path"]):
+            return entry["file_path"]
+        # 上传目录中的文件已被清理时，尝试使用去重存储中相同内容的文件
+        if entry["content_hash"]:
+            from .blob_store import get_blob_store
+            path = get_blob_store().blob_path(entry["content_hash"])
+            if os.path.exists(path):
+                return path
+        return None
+
+    def set_parse_status(self, content_hash, status):
+        """
+        更新解析状态，相同内容的文件一并更新
+
+        Args:
+            content_hash: 内容摘要
+            status: PARSE_PENDING、PARSE_PARSED或PARSE_FAILED
+        """
+        if not content_hash:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE files SET parse_status = ?, updated_at = ? WHERE content_hash = ?",
+                (status, time.time(), content_hash)
+            )
+
+    def import_legacy_uploads(self, folders=None):
+        """
+        登记旧版本上传的文件，只在第一次调用时执行
+
+        Args:
+            folders: [(目录, 来源)]，默认LEGACY_UPLOAD_DIRS
+
+        Returns:
+            登记的文件数量
+        """
+        if self._legacy_checked:
+            return 0
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM registry_meta WHERE key = 'legacy_imported'").fetchone()
+        if row is not None:
+            self._legacy_checked = True
+            return 0
+        rows = []
+        now = time.time()
+        for folder, source in (folders or LEGACY_UPLOAD_DIRS):
+            if not os.path.isdir(folder):
+                continue
+            for entry in os.scandir(folder):
+                file_id = _legacy_file_id(entry.name) if entry.is_file() else None
+                if file_id is None:
+                    continue
+                file_name = entry.name[UUID_LENGTH + 1:] if entry.name[UUID_LENGTH:UUID_LENGTH + 1] == "_" else entry.name
+                rows.append((file_id, os.path.abspath(entry.path), file_name, None, entry.stat().st_size,
+                             file_type_of(entry.name), PARSE_PENDING, source, now, now))
+        with self._connect() as conn:
+            # 不覆盖已登记的文件
+            imported = conn.executemany(
+                "INSERT OR IGNORE INTO files (file_id, file_path, file_name, content_hash, size, file_type, "
+                "parse_status, source, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            ).rowcount
+            conn.execute(
+                "INSERT OR REPLACE INTO registry_meta (key, value) VALUES ('legacy_imported', ?)", (str(imported),)
+            )
+        self._legacy_checked = True
+        if imported:
+            logging.info(f"已登记 {imported} 个旧版本上传文件")
+        return imported
+
+
+def get_file_registry():
+    """获取进程内共用的上传文件登记表实例"""
+    global _registry_instance
+    if _registry_instance is None:
+        with _registry_instance_lock:
+            if _registry_instance is None:
+                _registry_instance = FileRegistry()
+    return _registry_instance
+
+
+def resolve_upload(file_id):
+    """
+    按file_id获取上传文件路径
+
+    Args:
+        file_id: 上传文件ID
+
+    Returns:
+        文件路径，找不到时返回None
+    """
+    if not file_id:
+        return None
+    return get_file_registry().resolve(file_id)
@@ -0,0 +1,656 @@
+"""
+后台任务队列
+需求提取、审查等耗时任务提交后写入SQLite任务表并立即返回任务ID，由工作线程池领取执行；
+进度、结果和取消请求都记录在任务表中，客户端可以轮询、流式获取进度或取消任务，
+客户端断开不影响任务执行，进程重启后未完成的任务重新排队
+"""
+import os
+import json
+import time
+import uuid
+import zlib
+import socket
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context, url_for
+
+from .paths import data_path
+from .review_stream import NDJSON_MIMETYPE, SSE_MIMETYPE, format_event, wants_sse
+
+# 任务数据库文件
+JOBS_DB = "jobs.db"
+
+# 默认工作线程数，可通过环境变量DOCUMENT_REVIEW_JOB_WORKERS覆盖
+DEFAULT_WORKERS = 2
+
+# 空闲工作线程检查新任务的间隔（秒），其他进程提交的任务也由此被领取
+POLL_INTERVAL = 1.0
+
+# 运行中任务的心跳间隔（秒），同时检查其他进程发出的取消请求
+HEARTBEAT_INTERVAL = 15
+
+# 运行中的任务超过该时间（秒）没有心跳，视为所在进程已退出，重新排队
+STALE_AFTER = 3 * HEARTBEAT_INTERVAL
+
+# 任务最多执行的次数（含进程退出后的重新执行）
+MAX_ATTEMPTS = 3
+
+# 已结束的任务保留时间（秒）
+JOB_RETENTION = 7 * 24 * 3600
+
+# 流式进度接口检查任务状态的间隔（秒）
+EVENT_POLL_INTERVAL = 0.5
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+_queue_instance = None
+_queue_instance_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    """任务已被取消，处理函数抛出后任务状态记为cancelled"""
+
+
+def _default_workers():
+    try:
+        return max(1, int(os.environ.get("DOCUMENT_REVIEW_JOB_WORKERS", DEFAULT_WORKERS)))
+    except ValueError:
+        return DEFAULT_WORKERS
+
+
+def _isoformat(timestamp):
+    return datetime.fromtimestamp(timestamp).isoformat(timespec="seconds") if timestamp else None
+
+
+def _row_to_job(row, with_result=False):
+    job = {
+        "job_id": row["id"],
+        "kind": row["kind"],
+        "stage": row["stage"],
+        "status": row["status"],
+        "file_id": row["file_id"],
+        "session_id": row["session_id"],
+        "progress": {"completed": row["progress_completed"], "total": row["progress_total"]},
+        "message": row["message"],
+        "error": row["error"],
+        "attempts": row["attempts"],
+        "cancel_requested": bool(row["cancel_requested"]),
+        "created_at": _isoformat(row["created_at"]),
+        "started_at": _isoformat(row["started_at"]),
+        "finished_at": _isoformat(row["finished_at"])
+    }
+    if with_result and row["result"] is not None:
+        job["result"] = json.loads(zlib.decompress(row["result"]).decode("utf-8"))
+    return job
+
+
+class JobContext:
+    """
+    传给任务处理函数的上下文：任务参数、进度上报和取消检查
+    """
+
+    def __init__(self, job_queue, row):
+        self.queue = job_queue
+        self.id = row["id"]
+        self.kind = row["kind"]
+        self.stage = row["stage"]
+        self.file_id = row["file_id"]
+        self.session_id = row["session_id"]
+        self.payload = json.loads(row["payload"])
+        self._cancelled = threading.Event()
+        self._cancel_callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check_cancelled(self):
+        """任务已被取消时抛出JobCancelled"""
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def on_cancel(self, callback):
+        """
+        登记取消时调用的函数（如ReviewExecutor.cancel），已取消时立即调用
+
+        Args:
+            callback: 无参数的函数
+        """
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._cancel_callbacks.append(callback)
+                return
+        callback()
+
+    def progress(self, completed=None, total=None, message=None):
+        """
+        上报进度，写入任务表
+
+        Args:
+            completed: 已完成数量
+            total: 总数量
+            message: 当前阶段说明
+        """
+        self.queue._update_progress(self, completed, total, message)
+
+    def _cancel(self):
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self._cancelled.set()
+            callbacks, self._cancel_callbacks = self._cancel_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"取消任务 {self.id} 时出错: {e}", exc_info=True)
+
+
+class JobQueue:
+    """
+    基于SQLite的任务队列和工作线程池
+
+    register()登记任务类型的处理函数 handler(context) -> 结果（可JSON序列化），start()启动工作线程；
+    只领取本进程登记过处理函数的任务类型。多个进程可以共用同一个任务数据库，
+    只提交任务的进程（如开发服务器的自动重载监视进程）不调用start()，不会领取任务
+    """
+
+    def __init__(self, db_path=None, workers=None):
+        """
+        Args:
+            db_path: 任务数据库路径，默认在内部数据目录下
+            workers: 工作线程数，默认DEFAULT_WORKERS
+        """
+        self.db_path = db_path or data_path(JOBS_DB)
+        self.workers = workers or _default_workers()
+        # 领取任务的进程标识，心跳和结束任务时只更新自己领取的任务
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers = {}
+        self._listeners = []
+        self._running = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._threads = []
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    stage TEXT,
+                    status TEXT NOT NULL,
+                    file_id TEXT,
+                    session_id TEXT,
+                    payload TEXT NOT NULL,
+                    result BLOB,
+                    error TEXT,
+                    message TEXT,
+                    progress_completed INTEGER NOT NULL DEFAULT 0,
+                    progress_total INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    owner TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    heartbeat_at REAL,
+                    finished_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_file_id ON jobs (file_id, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_finished_at ON jobs (finished_at)")
+
+    def _connect(self):
+        # 每次操作使用独立连接，避免跨线程共享连接
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def register(self, kind, handler):
+        """
+        登记任务类型的处理函数，工作线程由start()启动
+
+        Args:
+            kind: 任务类型
+            handler: 处理函数 handler(JobContext) -> 结果，抛出JobCancelled表示已取消
+        """
+        with self._lock:
+            self._handlers[kind] = handler
+
+    def add_listener(self, listener):
+        """
+        登记任务状态变化的回调 listener(job, status)，在任务开始执行和结束时调用
+
+        Args:
+            listener: 回调函数，job为不含结果的任务字典
+        """
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def start(self):
+        """启动工作线程和心跳线程，重复调用无影响"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                self._threads.append(threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True))
+            self._threads.append(threading.Thread(target=self._maintain, name="job-heartbeat", daemon=True))
+            for thread in self._threads:
+                thread.start()
+        logging.info(f"任务队列已启动，工作线程数: {self.workers}")
+
+    def submit(self, kind, payload, stage=None, file_id=None, session_id=None):
+        """
+        提交任务
+
+        Args:
+            kind: 任务类型
+            payload: 任务参数（可JSON序列化）
+            stage: 任务所处的文档处理阶段（extract/review），用于更新项目文档状态
+            file_id: 任务处理的上传文件ID
+            session_id: 任务对应的会话ID
+
+        Returns:
+            任务字典
+        """
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, stage, status, file_id, session_id, payload, message, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, stage, JOB_QUEUED, file_id, session_id,
+                 json.dumps(payload, ensure_ascii=False), "排队中", time.time())
+            )
+        with self._wakeup:
+            self._wakeup.notify()
+        logging.info(f"已提交任务 {job_id}，类型: {kind}，文件: {file_id}")
+        return self.get(job_id)
+
+    def get(self, job_id, with_result=True):
+        """
+        获取任务
+
+        Args:
+            job_id: 任务ID
+            with_result: 是否包含结果
+
+        Returns:
+            任务字典，不存在时返回None
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row, with_result) if row else None
+
+    def list_jobs(self, status=None, kind=None, file_id=None, limit=50):
+        """
+        按提交时间倒序列出任务（不含结果）
+
+        Args:
+            status: 只列出该状态的任务
+            kind: 只列出该类型的任务
+            file_id: 只列出该文件的任务
+            limit: 返回数量
+
+        Returns:
+            任务字典列表
+        """
+        conditions, params = [], []
+        for column, value in (("status", status), ("kind", kind), ("file_id", file_id)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        sql = "SELECT * FROM jobs"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def cancel(self, job_id):
+        """
+        取消任务：排队中的任务直接取消；运行中的任务标记取消请求，由处理函数在下一个检查点停止
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            任务字典，不存在时返回None
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cancelled = conn.execute(
+                "UPDATE jobs SET status = ?, cancel_requested = 1, message = ?, finished_at = ? "
+                "WHERE id = ? AND status = ?",
+                (JOB_CANCELLED, "已取消", now, job_id, JOB_QUEUED)
+            ).rowcount
+            if not cancelled:
+                conn.execute(
+                    "UPDATE jobs SET cancel_requested = 1, message = ? WHERE id = ? AND status = ?",
+                    ("正在取消", job_id, JOB_RUNNING)
+                )
+        job = self.get(job_id, with_result=False)
+        if cancelled:
+            self._notify(job, JOB_CANCELLED)
+        with self._lock:
+            context = self._running.get(job_id)
+        if context is not None:
+            context._cancel()
+        return job
+
+    def iter_events(self, job_id, poll_interval=EVENT_POLL_INTERVAL, heartbeat_interval=HEARTBEAT_INTERVAL):
+        """
+        任务状态或进度变化时逐个产出事件，任务结束后结束
+
+        事件类型：
+            progress: 任务字典（不含结果），空闲心跳时带heartbeat
+            done: {job}，含结果的任务字典
+            error: {message}
+
+        Args:
+            job_id: 任务ID
+            poll_interval: 检查任务状态的间隔（秒）
+            heartbeat_interval: 心跳间隔（秒）
+
+        Yields:
+            事件字典
+        """
+        last_state = None
+        last_sent = time.time()
+        while True:
+            job = self.get(job_id, with_result=False)
+            if job is None:
+                yield {"type": "error", "message": "任务不存在"}
+                return
+            state = (job["status"], job["progress"]["completed"], job["progress"]["total"], job["message"])
+            if job["status"] in FINISHED_STATUSES:
+                yield {"type": "done", "job": self.get(job_id)}
+                return
+            if state != last_state or time.time() - last_sent >= heartbeat_interval:
+                yield dict(job, type="progress", heartbeat=state == last_state)
+                last_state, last_sent = state, time.time()
+            time.sleep(poll_interval)
+
+    def _notify(self, job, status):
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(job, status)
+            except Exception as e:
+                logging.error(f"任务状态回调出错: {e}", exc_info=True)
+
+    def _claim(self):
+        with self._lock:
+            kinds = list(self._handlers)
+        if not kinds:
+            return None
+        now = time.time()
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            # 立即获取写锁，多个进程同时领取时不会领到同一个任务
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                f"SELECT id FROM jobs WHERE status = ? AND kind IN ({', '.join('?' * len(kinds))}) "
+                "ORDER BY created_at LIMIT 1",
+                (JOB_QUEUED, *kinds)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, owner = ?, attempts = attempts + 1, message = ?, "
+                    "started_at = COALESCE(started_at, ?), heartbeat_at = ? WHERE id = ?",
+                    (JOB_RUNNING, self.owner, "开始执行", now, now, row["id"])
+                )
+                row = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            conn.execute("COMMIT")
+            return row
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _work(self):
+        while True:
+            try:
+                row = self._claim()
+            except Exception as e:
+                logging.error(f"领取任务失败: {e}", exc_info=True)
+                row = None
+            if row is None:
+                with self._wakeup:
+                    self._wakeup.wait(POLL_INTERVAL)
+                continue
+            self._execute(row)
+
+    def _execute(self, row):
+        context = JobContext(self, row)
+        with self._lock:
+            self._running[context.id] = context
+            handler = self._handlers[context.kind]
+        if row["cancel_requested"]:
+            context._cancel()
+        self._notify(_row_to_job(row), JOB_RUNNING)
+        logging.info(f"开始执行任务 {context.id}，类型: {context.kind}，第 {row['attempts']} 次")
+        try:
+            result = handler(context)
+            self._finish(context, JOB_SUCCEEDED, "已完成", result=result)
+        except JobCancelled:
+            self._finish(context, JOB_CANCELLED, "已取消")
+        except Exception as e:
+            logging.error(f"任务 {context.id} 执行失败: {e}", exc_info=True)
+            self._finish(context, JOB_FAILED, "执行失败", error=str(e))
+        finally:
+            with self._lock:
+                self._running.pop(context.id, None)
+
+    def _finish(self, context, status, message, result=None, error=None):
+        payload = None
+        if result is not None:
+            payload = zlib.compress(json.dumps(result, ensure_ascii=False, default=str).encode("utf-8"), 6)
+        with self._connect() as conn:
+            # 心跳超时后任务可能已被重新排队，由其他工作线程执行，此时不再覆盖
+            updated = conn.execute(
+                "UPDATE jobs SET status = ?, message = ?, result = ?, error = ?, finished_at = ?, owner = NULL "
+                "WHERE id = ? AND owner = ? AND status = ?",
+                (status, message, payload, error, time.time(), context.id, self.owner, JOB_RUNNING)
+            ).rowcount
+        if not updated:
+            logging.warning(f"任务 {context.id} 已不属于本进程，忽略本次执行结果")
+            return
+        logging.info(f"任务 {context.id} 结束，状态: {status}")
+        # 只有确实结束了任务才执行回调（如更新项目文档状态），已被重新排队的任务不影响文档状态
+        self._notify(self.get(context.id, with_result=False), status)
+
+    def _update_progress(self, context, completed, total, message):
+        assignments, params = ["heartbeat_at = ?"], [time.time()]
+        for column, value in (("progress_completed", completed), ("progress_total", total), ("message", message)):
+            if value is not None:
+                assignments.append(f"{column} = ?")
+                params.append(value)
+        with self._connect() as conn:
+            row = conn.execute(
+                f"UPDATE jobs SET {', '.join(assignments)} WHERE id = ? AND owner = ? RETURNING cancel_requested",
+                (*params, context.id, self.owner)
+            ).fetchone()
+        if row is not None and row["cancel_requested"]:
+            context._cancel()
+
+    def _maintain(self):
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            try:
+                self._heartbeat()
+                self._requeue_stale()
+                self._prune()
+            except Exception as e:
+                logging.error(f"任务队列维护失败: {e}", exc_info=True)
+
+    def _heartbeat(self):
+        with self._lock:
+            running = dict(self._running)
+        if not running:
+            return
+        placeholders = ", ".join("?" * len(running))
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND id IN ({placeholders})",
+                (time.time(), self.owner, *running)
+            )
+            # 其他进程中的取消请求只写入了任务表
+            rows = conn.execute(
+                f"SELECT id FROM jobs WHERE cancel_requested = 1 AND id IN ({placeholders})", tuple(running)
+            ).fetchall()
+        for row in rows:
+            running[row["id"]]._cancel()
+
+    def _requeue_stale(self):
+        now = time.time()
+        with self._connect() as conn:
+            stale = conn.execute(
+                "SELECT id, attempts, cancel_requested FROM jobs WHERE status = ? AND heartbeat_at < ?",
+                (JOB_RUNNING, now - STALE_AFTER)
+            ).fetchall()
+            finished = []
+            for row in stale:
+                if row["cancel_requested"]:
+                    status, message = JOB_CANCELLED, "已取消"
+                elif row["attempts"] >= MAX_ATTEMPTS:
+                    status, message = JOB_FAILED, "执行进程多次退出，任务失败"
+                else:
+                    status, message = JOB_QUEUED, "执行进程已退出，重新排队"
+                updated = conn.execute(
+                    "UPDATE jobs SET status = ?, message = ?, owner = NULL, finished_at = ? "
+                    "WHERE id = ? AND status = ? AND heartbeat_at < ?",
+                    (status, message, now if status != JOB_QUEUED else None, row["id"], JOB_RUNNING, now - STALE_AFTER)
+                ).rowcount
+                if updated:
+                    logging.warning(f"任务 {row['id']} 心跳超时，{message}")
+                    if status != JOB_QUEUED:
+                        finished.append((row["id"], status))
+        for job_id, status in finished:
+            self._notify(self.get(job_id, with_result=False), status)
+        if len(finished) < len(stale):
+            with self._wakeup:
+                self._wakeup.notify_all()
+
+    def _prune(self):
+        with self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM jobs WHERE finished_at < ?", (time.time() - JOB_RETENTION,)
+            ).rowcount
+        if deleted:
+            logging.info(f"已清理 {deleted} 个已结束的任务")
+
+
+def get_job_queue():
+    """获取进程内共用的任务队列实例"""
+    global _queue_instance
+    if _queue_instance is None:
+        with _queue_instance_lock:
+            if _queue_instance is None:
+                _queue_instance = JobQueue()
+    return _queue_instance
+
+
+def job_accepted_response(job, jobs_blueprint, **extra):
+    """
+    任务已提交的响应：202，Location为任务状态地址
+
+    Args:
+        job: submit()返回的任务字典
+        jobs_blueprint: create_jobs_blueprint创建的Blueprint名称
+        extra: 响应中的其他字段
+
+    Returns:
+        Flask响应元组
+    """
+    job_id = job["job_id"]
+    status_url = url_for(f"{jobs_blueprint}.get_job", job_id=job_id)
+    body = dict(
+        extra,
+        success=True,
+        job_id=job_id,
+        status=job["status"],
+        status_url=status_url,
+        events_url=url_for(f"{jobs_blueprint}.job_events", job_id=job_id),
+        cancel_url=url_for(f"{jobs_blueprint}.cancel_job", job_id=job_id)
+    )
+    return jsonify(body), 202, {"Location": status_url}
+
+
+def create_jobs_blueprint(name, url_prefix=""):
+    """
+    创建任务查询接口的Blueprint
+
+        GET  {prefix}/jobs                       列出任务，参数: status, kind, file_id, limit
+        GET  {prefix}/jobs/<job_id>              查询任务状态和进度，结束后包含结果
+        GET  {prefix}/jobs/<job_id>/events       流式推送进度（默认NDJSON，Accept为text/event-stream或format=sse时使用SSE）
+        POST {prefix}/jobs/<job_id>/cancel       取消任务
+
+    Args:
+        name: Blueprint名称
+        url_prefix: 路由前缀
+
+    Returns:
+        Blueprint
+    """
+    bp = Blueprint(name, __name__)
+
+    @bp.route(f'{url_prefix}/jobs', methods=['GET'])
+    def list_jobs():
+        try:
+            limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        except ValueError:
+            return jsonify({"success": False, "error": "limit必须为整数"}), 400
+        jobs = get_job_queue().list_jobs(
+            request.args.get('status'), request.args.get('kind'), request.args.get('file_id'), limit
+        )
+        return jsonify({"success": True, "jobs": jobs})
+
+    @bp.route(f'{url_prefix}/jobs/<job_id>', methods=['GET'])
+    def get_job(job_id):
+        job = get_job_queue().get(job_id)
+        if not job:
+            return jsonify({"success": False, "error": "任务不存在"}), 404
+        return jsonify(dict(job, success=True))
+
+    @bp.route(f'{url_prefix}/jobs/<job_id>/events', methods=['GET'])
+    def job_events(job_id):
+        job_queue = get_job_queue()
+        if not job_queue.get(job_id, with_result=False):
+            return jsonify({"success": False, "error": "任务不存在"}), 404
+        sse = wants_sse(request)
+
+        def generate():
+            for event in job_queue.iter_events(job_id):
+                yield format_event(event, sse)
+
+        response = Response(stream_with_context(generate()), mimetype=SSE_MIMETYPE if sse else NDJSON_MIMETYPE)
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
+    @bp.route(f'{url_prefix}/jobs/<job_id>/cancel', methods=['POST'])
+    def cancel_job(job_id):
+        job = get_job_queue().cancel(job_id)
+        if not job:
+            return jsonify({"success": False, "error": "任务不存在"}), 404
+        if job["status"] in (JOB_SUCCEEDED, JOB_FAILED):
+            return jsonify(dict(job, success=False, error="任务已结束，无法取消")), 409
+        return jsonify(dict(job, success=True))
+
+    return bp
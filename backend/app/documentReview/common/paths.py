@@ -0,0 +1,33 @@
+"""
+公共存储路径
+"""
+import os
+
+# backend目录
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+
+# 上传文件目录（回归测试、配置项上传和项目文档）
+UPLOADS_DIR = os.path.join(BACKEND_DIR, 'uploads')
+
+# AI提取使用的上传目录（旧版本的提取结果JSON也在其results子目录下）
+APP_UPLOADS_DIR = os.path.join(BACKEND_DIR, 'app', 'uploads')
+
+# 生成的Excel、需求记录文件和预渲染报告的输出目录
+OUTPUTS_DIR = os.path.join(BACKEND_DIR, 'outputs')
+
+# 审查缓存、会话等内部数据的存放目录，可通过环境变量DOCUMENT_REVIEW_DATA_DIR覆盖
+DATA_DIR = os.environ.get("DOCUMENT_REVIEW_DATA_DIR", os.path.join(BACKEND_DIR, 'data'))
+
+
+def data_path(filename):
+    """
+    获取内部数据文件路径，并确保所在目录存在
+
+    Args:
+        filename: 文件名
+
+    Returns:
+        文件绝对路径
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
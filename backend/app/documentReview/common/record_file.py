@@ -0,0 +1,194 @@
+"""
+会话记录文件
+记录按JSON Lines格式逐行写入数据文件，数据文件末尾是一个固定长度的尾部（本次写入的随机标识）；
+另有一个偏移量索引文件（文件头记录记录部分的大小和同一个随机标识，之后每条记录8字节的起始偏移）。
+读取时对两个文件做内存映射，可以按序号随机访问或分页读取，不需要把全部记录加载到内存；
+打开时只比对索引文件头和数据文件尾部，不读取记录内容
+"""
+import os
+import json
+import mmap
+import uuid
+import struct
+import logging
+
+INDEX_SUFFIX = ".idx"
+OFFSET_FORMAT = "<Q"
+OFFSET_SIZE = struct.calcsize(OFFSET_FORMAT)
+
+# 索引文件头：标识、记录部分的字节数、写入标识，读取时与数据文件尾部比对，不一致时不使用索引
+INDEX_HEADER_FORMAT = "<4sQ16s"
+INDEX_HEADER_SIZE = struct.calcsize(INDEX_HEADER_FORMAT)
+INDEX_MAGIC = b"RIX2"
+
+# 数据文件尾部：写入标识和结尾标记。记录总以换行结尾，结尾标记不以换行结尾，有无尾部不会混淆
+DATA_TRAILER_FORMAT = "<16s4s"
+DATA_TRAILER_SIZE = struct.calcsize(DATA_TRAILER_FORMAT)
+DATA_TRAILER_MAGIC = b"RTR1"
+
+
+def write_records(path, records):
+    """
+    写入记录文件及其偏移量索引，先写临时文件再替换，读取方不会看到写了一半的文件；
+    数据文件和索引文件分别替换，读取方在两次替换之间（或并发写入交错时）打开时两者的写入标识不一致，
+    会改为扫描数据文件
+
+    Args:
+        path: 数据文件路径
+        records: 可JSON序列化的记录的可迭代对象
+
+    Returns:
+        写入的记录数
+    """
+    # 临时文件名各不相同，并发写入同一会话时互不覆盖
+    token = uuid.uuid4()
+    temp_path = f"{path}.{token.hex}.tmp"
+    temp_index_path = f"{path}{INDEX_SUFFIX}.{token.hex}.tmp"
+    count = 0
+    offset = 0
+    try:
+        with open(temp_path, 'wb') as data_file, open(temp_index_path, 'wb') as index_file:
+            index_file.write(b"\0" * INDEX_HEADER_SIZE)
+            for record in records:
+                # ensure_ascii=False时字符串中的换行仍会被转义，每条记录恰好占一行
+                line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n"
+                index_file.write(struct.pack(OFFSET_FORMAT, offset))
+                data_file.write(line)
+                offset += len(line)
+                count += 1
+            data_file.write(struct.pack(DATA_TRAILER_FORMAT, token.bytes, DATA_TRAILER_MAGIC))
+            index_file.seek(0)
+            index_file.write(struct.pack(INDEX_HEADER_FORMAT, INDEX_MAGIC, offset, token.bytes))
+        os.replace(temp_path, path)
+        os.replace(temp_index_path, path + INDEX_SUFFIX)
+    finally:
+        for leftover in (temp_path, temp_index_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    return count
+
+
+class RecordFile:
+    """
+    只读的记录文件
+
+    用法:
+        with RecordFile(path) as records:
+            total = len(records)
+            first = records[0]
+            for record in records.iter(100, 200):
+                ...
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: write_records写入的数据文件路径
+        """
+        self.path = path
+        self._data_file = open(path, 'rb')
+        self._data = None
+        self._index = None
+        self._offsets = None
+        file_size = os.fstat(self._data_file.fileno()).st_size
+        if file_size:
+            self._data = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        # 记录部分的字节数（不含尾部）和本次写入的标识，没有尾部的文件标识为None
+        self._size = file_size
+        self._token = None
+        if file_size >= DATA_TRAILER_SIZE:
+            token, magic = struct.unpack_from(DATA_TRAILER_FORMAT, self._data, file_size - DATA_TRAILER_SIZE)
+            if magic == DATA_TRAILER_MAGIC:
+                self._size = file_size - DATA_TRAILER_SIZE
+                self._token = token
+        self._load_index()
+
+    def _index_matches(self, header):
+        # 只比对文件头与数据文件尾部，打开时不读取记录内容
+        magic, size, token = struct.unpack(INDEX_HEADER_FORMAT, header)
+        return magic == INDEX_MAGIC and size == self._size and self._token is not None and token == self._token
+
+    def _load_index(self):
+        index_path = self.path + INDEX_SUFFIX
+        try:
+            with open(index_path, 'rb') as index_file:
+                index_size = os.fstat(index_file.fileno()).st_size
+                if index_size >= INDEX_HEADER_SIZE and (index_size - INDEX_HEADER_SIZE) % OFFSET_SIZE == 0 \
+                        and self._index_matches(index_file.read(INDEX_HEADER_SIZE)):
+                    self._count = (index_size - INDEX_HEADER_SIZE) // OFFSET_SIZE
+                    if self._count:
+                        self._index = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+                    return
+        except OSError:
+            pass
+        # 索引缺失、损坏或与数据文件不匹配（如写入方正在替换两个文件）时扫描换行符重建（只保存在内存中）
+        logging.warning(f"记录文件索引不可用，重新扫描: {self.path}")
+        offsets = []
+        position = 0
+        while self._data is not None and position < self._size:
+            offsets.append(position)
+            end = self._data.find(b"\n", position)
+            position = self._size if end == -1 else end + 1
+        self._offsets = offsets
+        self._count = len(offsets)
+
+    def __len__(self):
+        return self._count
+
+    def _offset(self, index):
+        if self._offsets is not None:
+            return self._offsets[index]
+        return struct.unpack_from(OFFSET_FORMAT, self._index, INDEX_HEADER_SIZE + index * OFFSET_SIZE)[0]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("记录序号超出范围")
+        start = self._offset(index)
+        end = self._offset(index + 1) if index + 1 < self._count else self._size
+        return json.loads(self._data[start:end])
+
+    def iter(self, start=0, stop=None):
+        """
+        按顺序逐条读取记录
+
+        Args:
+            start: 起始序号
+            stop: 结束序号（不含），默认到末尾
+
+        Yields:
+            记录
+        """
+        stop = self._count if stop is None else min(stop, self._count)
+        for index in range(max(0, start), stop):
+            yield self[index]
+
+    def __iter__(self):
+        return self.iter()
+
+    def page(self, page, page_size):
+        """
+        读取一页记录
+
+        Args:
+            page: 页码，从1开始
+            page_size: 每页记录数
+
+        Returns:
+            记录列表
+        """
+        start = (max(1, page) - 1) * page_size
+        return list(self.iter(start, start + page_size))
+
+    def close(self):
+        for handle in (self._index, self._data, self._data_file):
+            if handle is not None:
+                handle.close()
+        self._index = self._data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
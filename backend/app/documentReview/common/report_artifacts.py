@@ -0,0 +1,371 @@
+"""
+审查报告预渲染缓存
+审查会话完成后在后台线程中一次性渲染所有配置的报告格式，
+以 会话ID + 审查结果摘要 为键缓存在输出目录中，下载时直接返回已生成的文件；
+每个模块使用各自的报告存储和渲染函数，保持各自的报告版式
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+from flask import send_file
+
+from .report_renderer import iter_report, write_report
+from .storage_lifecycle import mark_used
+
+# 输出目录（与各模块的outputs目录一致）下存放预渲染报告的子目录
+REPORTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'outputs', 'reports'))
+
+# 未配置时生成的报告格式
+DEFAULT_REPORT_FORMATS = ["excel", "text", "json"]
+
+# 下载时等待正在进行的后台渲染的最长时间（秒），超时后在当前请求中直接渲染
+DEFAULT_WAIT_TIMEOUT = 30
+
+# 审查结果摘要长度（十六进制字符数）
+DIGEST_LENGTH = 24
+
+MANIFEST_NAME = "latest.json"
+
+_store_instances = {}
+_store_instances_lock = threading.Lock()
+
+
+def _render_json(requirements, review_results, output_path):
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(review_results, f, ensure_ascii=False, indent=2)
+
+
+def _render_markdown(requirements, review_results, output_path):
+    write_report(iter_report(requirements, review_results, 'markdown'), output_path)
+
+
+def _render_html(requirements, review_results, output_path):
+    write_report(iter_report(requirements, review_results, 'html'), output_path)
+
+
+# 格式 -> (扩展名, MIME类型)
+REPORT_FILE_TYPES = {
+    "excel": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "text": (".txt", "text/plain; charset=utf-8"),
+    "json": (".json", "application/json"),
+    "markdown": (".md", "text/markdown; charset=utf-8"),
+    "html": (".html", "text/html; charset=utf-8"),
+}
+
+
+def make_report_renderers(generate_review_doc):
+    """
+    构造各格式的渲染函数
+
+    Args:
+        generate_review_doc: 模块的 generate_review_doc(review_results, output_path, format_type)，
+            excel和text格式由它生成，保持模块原有的报告版式
+
+    Returns:
+        格式 -> 渲染函数 render(requirements, review_results, output_path)
+    """
+    return {
+        "excel": lambda requirements, review_results, output_path: generate_review_doc(
+            review_results, output_path, "excel"),
+        "text": lambda requirements, review_results, output_path: generate_review_doc(
+            review_results, output_path, "text"),
+        "json": _render_json,
+        "markdown": _render_markdown,
+        "html": _render_html,
+    }
+
+
+def get_report_formats(config):
+    """
+    从配置中读取需要预渲染的报告格式
+
+    Args:
+        config: get_config()返回的配置字典
+
+    Returns:
+        格式列表，忽略不支持的格式
+    """
+    formats = (config or {}).get("report_formats") or DEFAULT_REPORT_FORMATS
+    supported = [fmt for fmt in formats if fmt in REPORT_FILE_TYPES]
+    return supported or list(DEFAULT_REPORT_FORMATS)
+
+
+def results_digest(requirements, review_results):
+    """
+    计算需求和审查结果的摘要，内容不变时摘要不变
+
+    Args:
+        requirements: 需求列表
+        review_results: 审查结果列表
+
+    Returns:
+        十六进制摘要
+    """
+    payload = json.dumps(
+        {"requirements": requirements or [], "review_results": review_results or []},
+        ensure_ascii=False, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:DIGEST_LENGTH]
+
+
+def make_artifact_id(session_id, digest):
+    """生成下载用的文档ID：会话ID.摘要"""
+    return f"{session_id}.{digest}"
+
+
+def parse_artifact_id(doc_id):
+    """
+    解析make_artifact_id生成的文档ID
+
+    Args:
+        doc_id: 文档ID
+
+    Returns:
+        (会话ID, 摘要)，不是预渲染报告的ID时返回None
+    """
+    session_id, _, digest = (doc_id or "").rpartition(".")
+    if not session_id or len(digest) != DIGEST_LENGTH:
+        return None
+    if any(c not in "0123456789abcdef" for c in digest):
+        return None
+    return session_id, digest
+
+
+def _session_dir_name(session_id):
+    # 会话ID来自请求，不能直接作为路径使用
+    name = str(session_id)
+    if name and len(name) <= 64 and all(c.isalnum() or c in "-_" for c in name):
+        return name
+    return "s-" + hashlib.sha256(name.encode("utf-8")).hexdigest()[:32]
+
+
+class ReportArtifactStore:
+    """
+    预渲染报告存储
+
+    schedule()提交后台渲染任务，相同会话和摘要的任务只渲染一次；
+    artifact()返回已渲染的文件路径，渲染任务仍在排队时直接在当前线程渲染
+    """
+
+    def __init__(self, renderers, root_dir=REPORTS_DIR, max_workers=2):
+        """
+        Args:
+            renderers: make_report_renderers()返回的各格式渲染函数
+            root_dir: 报告存放目录
+            max_workers: 后台渲染线程数
+        """
+        self.renderers = renderers
+        self.root_dir = root_dir
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report")
+        # (会话目录名, 摘要) -> (Future, 需求列表, 审查结果列表, 格式列表)
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def _session_dir(self, session_id):
+        return os.path.join(self.root_dir, _session_dir_name(session_id))
+
+    def artifact_path(self, session_id, digest, format_type):
+        """
+        报告文件路径
+
+        Args:
+            session_id: 会话ID
+            digest: 审查结果摘要
+            format_type: 报告格式
+
+        Returns:
+            文件路径
+        """
+        extension = REPORT_FILE_TYPES[format_type][0]
+        return os.path.join(self._session_dir(session_id), digest + extension)
+
+    def schedule(self, session_id, requirements, review_results, formats=None):
+        """
+        提交后台渲染任务
+
+        Args:
+            session_id: 会话ID
+            requirements: 需求列表
+            review_results: 审查结果列表
+            formats: 需要渲染的格式，默认DEFAULT_REPORT_FORMATS
+
+        Returns:
+            审查结果摘要
+        """
+        formats = [fmt for fmt in (formats or DEFAULT_REPORT_FORMATS) if fmt in self.renderers]
+        digest = results_digest(requirements, review_results)
+        key = (_session_dir_name(session_id), digest)
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is not None and not task[0].done():
+                return digest
+            for done_key in [k for k, t in self._tasks.items() if t[0].done()]:
+                del self._tasks[done_key]
+            future = self._pool.submit(self._render_all, session_id, digest, requirements, review_results, formats)
+            self._tasks[key] = (future, requirements, review_results, formats)
+        logging.info(f"已提交会话 {session_id} 的报告渲染任务，摘要: {digest}，格式: {formats}")
+        return digest
+
+    def _render(self, session_id, digest, format_type, requirements, review_results):
+        path = self.artifact_path(session_id, digest, format_type)
+        if os.path.exists(path):
+            return True
+        os.makedirs(self._session_dir(session_id), exist_ok=True)
+        # 先写临时文件再原子替换，下载时不会读到写了一半的文件
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        start_time = time.time()
+        try:
+            self.renderers[format_type](requirements, review_results, temp_path)
+            os.replace(temp_path, path)
+            logging.info(f"已渲染{format_type}格式报告: {path}，耗时: {time.time() - start_time:.2f}秒")
+            return True
+        except Exception as e:
+            logging.error(f"渲染{format_type}格式报告失败: {e}", exc_info=True)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+
+    def _render_all(self, session_id, digest, requirements, review_results, formats):
+        rendered = [
+            format_type for format_type in formats
+            if self._render(session_id, digest, format_type, requirements, review_results)
+        ]
+        session_dir = self._session_dir(session_id)
+        os.makedirs(session_dir, exist_ok=True)
+        manifest = {
+            "digest": digest,
+            "formats": rendered,
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        manifest_path = os.path.join(session_dir, MANIFEST_NAME)
+        temp_manifest_path = f"{manifest_path}.{threading.get_ident()}.tmp"
+        with open(temp_manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(temp_manifest_path, manifest_path)
+        self._remove_stale(session_id, digest)
+        return rendered
+
+    def _remove_stale(self, session_id, digest):
+        # 同一会话只保留最新审查结果的报告，仍在渲染中的其他结果不删除
+        session_name = _session_dir_name(session_id)
+        with self._lock:
+            keep = {key[1] for key, task in self._tasks.items() if key[0] == session_name and not task[0].done()}
+        keep.add(digest)
+        session_dir = self._session_dir(session_id)
+        for name in os.listdir(session_dir):
+            if name == MANIFEST_NAME or name.endswith(".tmp") or name.split(".", 1)[0] in keep:
+                continue
+            try:
+                os.remove(os.path.join(session_dir, name))
+            except OSError:
+                pass
+
+    def latest_digest(self, session_id):
+        """
+        会话最近一次渲染完成的审查结果摘要
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            摘要，没有报告时返回None
+        """
+        manifest_path = os.path.join(self._session_dir(session_id), MANIFEST_NAME)
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("digest")
+        except (OSError, ValueError):
+            return None
+
+    def artifact(self, session_id, format_type, digest=None, timeout=DEFAULT_WAIT_TIMEOUT):
+        """
+        获取报告文件
+
+        渲染任务仍在排队时取消该任务，在当前线程渲染请求的格式后重新提交其余格式；
+        任务正在渲染时最多等待timeout秒，超时后同样在当前线程渲染
+
+        Args:
+            session_id: 会话ID
+            format_type: 报告格式
+            digest: 审查结果摘要，默认为最近一次渲染的结果
+            timeout: 等待正在进行的渲染的最长时间（秒）
+
+        Returns:
+            (文件路径, 摘要)，没有对应报告时返回(None, digest)
+        """
+        if format_type not in self.renderers:
+            return None, digest
+        if digest is None:
+            digest = self.latest_digest(session_id)
+            if digest is None:
+                return None, None
+        key = (_session_dir_name(session_id), digest)
+        with self._lock:
+            task = self._tasks.get(key)
+        if task is not None:
+            future, requirements, review_results, formats = task
+            if future.cancel():
+                self._render(session_id, digest, format_type, requirements, review_results)
+                self.schedule(session_id, requirements, review_results, formats)
+            else:
+                try:
+                    future.result(timeout=timeout)
+                except FuturesTimeoutError:
+                    logging.warning(f"会话 {session_id} 的报告渲染超过 {timeout} 秒未完成，直接渲染{format_type}格式")
+                    self._render(session_id, digest, format_type, requirements, review_results)
+                except Exception as e:
+                    logging.error(f"等待会话 {session_id} 的报告渲染失败: {e}")
+        path = self.artifact_path(session_id, digest, format_type)
+        return (path if os.path.exists(path) else None), digest
+
+
+def get_report_store(name, renderers):
+    """
+    获取进程内共用的报告存储实例，每个模块一个，报告存放在REPORTS_DIR下以模块名命名的子目录
+
+    Args:
+        name: 模块名，如 "regression"
+        renderers: make_report_renderers()返回的渲染函数，只在首次创建实例时使用
+
+    Returns:
+        ReportArtifactStore
+    """
+    store = _store_instances.get(name)
+    if store is None:
+        with _store_instances_lock:
+            store = _store_instances.get(name)
+            if store is None:
+                store = ReportArtifactStore(renderers, os.path.join(REPORTS_DIR, name))
+                _store_instances[name] = store
+    return store
+
+
+def send_report_artifact(path, format_type, digest, download_name="需求审查报告"):
+    """
+    返回预渲染的报告文件，支持ETag/Last-Modified条件请求和Range分段下载
+
+    Args:
+        path: 文件路径
+        format_type: 报告格式
+        digest: 审查结果摘要，用作ETag
+        download_name: 下载文件名（不含扩展名）
+
+    Returns:
+        Flask Response
+    """
+    extension, mimetype = REPORT_FILE_TYPES[format_type]
+    mark_used(path)
+    return send_file(
+        path,
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=download_name + extension,
+        conditional=True,
+        etag=f"{digest}-{format_type}",
+        max_age=0
+    )
@@ -0,0 +1,250 @@
+"""
+需求审查报告渲染
+按需求名称建立一次索引后，以生成器逐段产出Markdown/HTML报告片段，
+可直接写入文件或作为流式HTTP响应返回，耗时与报告大小成正比且不在内存中拼接整篇报告
+"""
+from html import escape
+from urllib.parse import quote
+
+from flask import Response, stream_with_context
+
+REPORT_FORMATS = ('markdown', 'html')
+REPORT_MIMETYPES = {
+    'markdown': 'text/markdown; charset=utf-8',
+    'html': 'text/html; charset=utf-8'
+}
+REPORT_EXTENSIONS = {
+    'markdown': '.md',
+    'html': '.html'
+}
+
+# 写文件时攒够该字符数再写出，减少小片段的写调用
+WRITE_BUFFER_CHARS = 64 * 1024
+
+HTML_HEAD = '''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <title>需求审查报告</title>
+    <style>
+        body { font-family: 'Arial', sans-serif; line-height: 1.6; margin: 0 auto; max-width: 900px; padding: 20px; color: #333; }
+        h1 { color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; text-align: center; }
+        .requirement-section { margin-bottom: 30px; padding: 20px; border: 1px solid #ddd; border-radius: 8px; background-color: #f9f9f9; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
+        h2 { color: #2980b9; margin-top: 0; border-bottom: 1px solid #eee; padding-bottom: 5px;}
+        h3 { color: #16a085; margin-top: 15px; }
+        .issue { background-color: #fff; border: 1px solid #e8e8e8; padding: 15px; border-radius: 5px; margin: 10px 0; }
+        .issue p { margin: 5px 0; }
+        .issue strong { color: #555; }
+        .score { font-size: 1.2em; font-weight: bold; color: #e74c3c; margin-top: 10px; }
+        .summary { font-style: italic; margin: 15px 0; background-color: #eaf2f8; padding: 10px; border-left: 3px solid #3498db; }
+        .no-issues { color: #27ae60; font-weight: bold; }
+        hr { border: 0; height: 1px; background-color: #ddd; margin-top: 20px; }
+    </style>
+</head>
+<body>
+    <h1>需求审查报告</h1>'''
+
+HTML_TAIL = '''
+</body>
+</html>'''
+
+
+def index_requirements(requirements):
+    """
+    按需求名称建立索引，名称重复时保留第一个
+
+    Args:
+        requirements: 原始需求列表
+
+    Returns:
+        {需求名称: 需求字典}
+    """
+    index = {}
+    for requirement in requirements or []:
+        if isinstance(requirement, dict):
+            index.setdefault(requirement.get('name'), requirement)
+    return index
+
+
+def _is_failed_review(issues):
+    """审查结果是否只有一条解析失败/系统错误的问题"""
+    if len(issues) != 1:
+        return False
+    title = issues[0].get("problem_title", "")
+    return title.endswith("解析失败") or title.endswith("审查系统错误")
+
+
+def _has_error_issue(issues):
+    title = issues[0].get("problem_title", "") if issues else ""
+    return "解析失败" in title or "审查系统错误" in title
+
+
+def _join_lines(parts):
+    """与 "\\n".join(parts) 产生相同的文本，但逐段产出"""
+    first = True
+    for part in parts:
+        if first:
+            first = False
+            yield part
+        else:
+            yield "\n" + part
+
+
+def _iter_markdown_parts(requirement_index, review_results):
+    yield "# 需求审查报告\n"
+
+    for i, req_data in enumerate(review_results, 1):
+        req_name = req_data.get('name', f'未命名需求 {i}')
+        req_content = requirement_index.get(req_name, {}).get('content', '无内容')
+
+        yield f"## {i}. {req_name}\n"
+        yield f"**需求内容**: {req_content}\n"
+
+        review = req_data.get('review_result', {})
+        if not review or 'requirements_review' not in review:
+            yield "*未进行审查或审查失败*\n"
+            yield "\n---\n"
+            continue
+
+        issues = review.get('requirements_review', [])
+        score = review.get('score', '未评分')
+        summary = review.get('summary', '无总结')
+
+        if not issues or _is_failed_review(issues):
+            yield "✅ 未发现明显问题或审查处理异常\n"
+            if _has_error_issue(issues):
+                yield f"- **问题描述**: {issues[0].get('problem_description', '')}\n"
+        else:
+            yield f"**问题数量**: {len(issues)} 个\n"
+            for j, issue in enumerate(issues, 1):
+                yield f"### 问题 {j}: {issue.get('problem_title', '无标题')}\n"
+                yield f"- **需求描述**: {issue.get('requirement_description', 'N/A')}\n"
+                yield f"- **问题描述**: {issue.get('problem_description', 'N/A')}\n"
+                yield f"- **问题位置**: {issue.get('problem_location', 'N/A')}\n"
+                yield f"- **影响分析**: {issue.get('impact_analysis', 'N/A')}\n"
+
+        yield f"\n**总结**: {summary}\n"
+        yield f"**评分**: {score}/100\n"
+        yield "\n---\n"
+
+
+def _text(value):
+    """转义写入HTML的文本"""
+    return escape(str(value))
+
+
+def _iter_html_parts(requirement_index, review_results):
+    yield HTML_HEAD
+
+    for i, req_data in enumerate(review_results, 1):
+        req_name = req_data.get('name', f'未命名需求 {i}')
+        req_content = requirement_index.get(req_name, {}).get('content', '无内容')
+
+        yield '<div class="requirement-section">'
+        yield f'<h2>{i}. {_text(req_name)}</h2>'
+        yield f'<p><strong>需求内容</strong>: {_text(req_content)}</p>'
+
+        review = req_data.get('review_result', {})
+        if not review or 'requirements_review' not in review:
+            yield '<p><em>未进行审查或审查失败</em></p>'
+            yield '</div>'
+            continue
+
+        issues = review.get('requirements_review', [])
+        score = review.get('score', '未评分')
+        summary = review.get('summary', '无总结')
+
+        if not issues or _is_failed_review(issues):
+            yield '<p class="no-issues">✅ 未发现明显问题或审查处理异常</p>'
+            if _has_error_issue(issues):
+                yield f'''
+                <div class="issue">
+                    <p><strong>问题描述</strong>: {_text(issues[0].get('problem_description', ''))}</p>
+                </div>'''
+        else:
+            yield f'<p><strong>问题数量</strong>: {len(issues)} 个</p>'
+            for j, issue in enumerate(issues, 1):
+                yield f'''
+                <div class="issue">
+                    <h3>问题 {j}: {_text(issue.get('problem_title', '无标题'))}</h3>
+                    <p><strong>需求描述</strong>: {_text(issue.get('requirement_description', 'N/A'))}</p>
+                    <p><strong>问题描述</strong>: {_text(issue.get('problem_description', 'N/A'))}</p>
+                    <p><strong>问题位置</strong>: {_text(issue.get('problem_location', 'N/A'))}</p>
+                    <p><strong>影响分析</strong>: {_text(issue.get('impact_analysis', 'N/A'))}</p>
+                </div>'''
+
+        yield f'<div class="summary"><strong>总结</strong>: {_text(summary)}</div>'
+        yield f'<div class="score">评分: {_text(score)}/100</div>'
+        yield '</div>'
+
+    yield HTML_TAIL
+
+
+def iter_report(requirements, review_results, format_type='markdown'):
+    """
+    逐段产出审查报告
+
+    Args:
+        requirements: 原始需求列表，用于查找需求内容
+        review_results: 审查结果列表
+        format_type: 'markdown'或'html'
+
+    Yields:
+        报告文本片段，按顺序拼接即为完整报告
+    """
+    if format_type not in REPORT_FORMATS:
+        raise ValueError("不支持的文档格式，请选择'markdown'或'html'")
+    requirement_index = index_requirements(requirements)
+    if format_type == 'markdown':
+        parts = _iter_markdown_parts(requirement_index, review_results)
+    else:
+        parts = _iter_html_parts(requirement_index, review_results)
+    return _join_lines(parts)
+
+
+def write_report(fragments, output_path):
+    """
+    将报告片段写入文件
+
+    Args:
+        fragments: iter_report返回的片段生成器
+        output_path: 输出文件路径
+
+    Returns:
+        输出文件路径
+    """
+    buffer = []
+    buffered = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for fragment in fragments:
+            buffer.append(fragment)
+            buffered += len(fragment)
+            if buffered >= WRITE_BUFFER_CHARS:
+                f.write("".join(buffer))
+                buffer.clear()
+                buffered = 0
+        if buffer:
+            f.write("".join(buffer))
+    return output_path
+
+
+def report_response(fragments, format_type='markdown', download_name=None):
+    """
+    以流式HTTP响应返回报告
+
+    Args:
+        fragments: iter_report返回的片段生成器
+        format_type: 'markdown'或'html'
+        download_name: 下载文件名，为None时浏览器直接显示
+
+    Returns:
+        Flask Response
+    """
+    def generate():
+        for fragment in fragments:
+            yield fragment.encode('utf-8')
+
+    response = Response(stream_with_context(generate()), content_type=REPORT_MIMETYPES[format_type])
+    if download_name:
+        response.headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(download_name)}"
+    return response
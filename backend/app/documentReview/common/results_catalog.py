@@ -0,0 +1,282 @@
+"""
+需求提取结果目录
+每次AI提取的结果以压缩JSON存入SQLite，并按文件ID、文档内容摘要、时间、模型和需求数量建立索引，
+可以查询某个文档最近一次的提取结果，内容未变的文档可直接复用最近的结果
+"""
+import os
+import json
+import time
+import zlib
+import hashlib
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+from .paths import data_path
+
+# 结果目录数据库文件
+RESULTS_CATALOG_DB = "results_catalog.db"
+
+# 内容摘要相同的结果在该时间（秒）内可直接复用
+DEFAULT_REUSE_MAX_AGE = 7 * 24 * 3600
+
+# 计算文件摘要时每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_catalog_instance = None
+_catalog_instance_lock = threading.Lock()
+
+
+def file_content_hash(file_path):
+    """
+    计算文件内容的SHA-256摘要
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        十六进制摘要
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _row_to_entry(row, with_requirements=False):
+    entry = {
+        "session_id": row["session_id"],
+        "file_id": row["file_id"],
+        "file_name": row["file_name"],
+        "content_hash": row["content_hash"],
+        "model": row["model"],
+        "params_hash": row["params_hash"],
+        "requirement_count": row["requirement_count"],
+        "timestamp": datetime.fromtimestamp(row["created_at"]).isoformat()
+    }
+    if with_requirements:
+        entry["requirements"] = json.loads(zlib.decompress(row["payload"]).decode("utf-8"))
+    return entry
+
+
+class ResultsCatalog:
+    """
+    基于SQLite的提取结果目录
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or data_path(RESULTS_CATALOG_DB)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS extraction_results (
+                    session_id TEXT PRIMARY KEY,
+                    file_id TEXT,
+                    file_name TEXT,
+                    content_hash TEXT,
+                    model TEXT NOT NULL DEFAULT '',
+                    params_hash TEXT NOT NULL DEFAULT '',
+                    requirement_count INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    payload BLOB NOT NULL
+                )
+            """)
+            # 早期版本的表没有params_hash列
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(extraction_results)")}
+            if "params_hash" not in columns:
+                conn.execute("ALTER TABLE extraction_results ADD COLUMN params_hash TEXT NOT NULL DEFAULT ''")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_results_file_id ON extraction_results (file_id, created_at)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_results_content_hash ON extraction_results (content_hash, model, created_at)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS catalog_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self):
+        # 每次操作使用独立连接，避免跨线程共享连接
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def record(self, session_id, file_id, file_name, content_hash, model, requirements, created_at=None,
+               params_hash=""):
+        """
+        记录一次提取结果
+
+        Args:
+            session_id: 会话ID
+            file_id: 上传文件ID
+            file_name: 原始文件名
+            content_hash: 文档内容摘要
+            model: 使用的模型标识，未知时为空字符串
+            requirements: 提取到的需求列表
+            created_at: 提取时间戳，默认为当前时间
+            params_hash: 影响提取结果的参数摘要，未知时为空字符串
+        """
+        payload = zlib.compress(json.dumps(requirements, ensure_ascii=False).encode("utf-8"), 6)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extraction_results "
+                "(session_id, file_id, file_name, content_hash, model, params_hash, requirement_count, created_at, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (session_id, file_id, file_name, content_hash, model or "", params_hash or "", len(requirements),
+                 created_at or time.time(), payload)
+            )
+
+    def get(self, session_id):
+        """
+        按会话ID获取提取结果
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            包含requirements的结果字典，不存在时返回None
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM extraction_results WHERE session_id = ?", (session_id,)).fetchone()
+        return _row_to_entry(row, with_requirements=True) if row else None
+
+    def latest_for_file(self, file_id):
+        """
+        获取某个上传文件最近一次的提取结果
+
+        Args:
+            file_id: 上传文件ID
+
+        Returns:
+            包含requirements的结果字典，不存在时返回None
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM extraction_results WHERE file_id = ? ORDER BY created_at DESC LIMIT 1",
+                (file_id,)
+            ).fetchone()
+        return _row_to_entry(row, with_requirements=True) if row else None
+
+    def find_reusable(self, content_hash, model="", params_hash="", max_age=DEFAULT_REUSE_MAX_AGE):
+        """
+        查找内容相同的文档在有效期内使用同一模型和同一提取参数的最近提取结果
+
+        Args:
+            content_hash: 文档内容摘要
+            model: 模型标识
+            params_hash: 提取参数摘要
+            max_age: 可复用结果的最长时间（秒）
+
+        Returns:
+            包含requirements的结果字典，不存在时返回None
+        """
+        if not content_hash:
+            return None
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM extraction_results WHERE content_hash = ? AND model = ? AND params_hash = ? "
+                "AND created_at >= ? AND requirement_count > 0 ORDER BY created_at DESC LIMIT 1",
+                (content_hash, model or "", params_hash or "", time.time() - max_age)
+            ).fetchone()
+        return _row_to_entry(row, with_requirements=True) if row else None
+
+    def list_results(self, file_id=None, limit=50, offset=0):
+        """
+        按时间倒序列出提取结果（不含需求内容）
+
+        Args:
+            file_id: 只列出该文件的结果，None表示全部
+            limit: 返回数量
+            offset: 跳过数量
+
+        Returns:
+            结果字典列表
+        """
+        sql = ("SELECT session_id, file_id, file_name, content_hash, model, requirement_count, created_at "
+               "FROM extraction_results")
+        params = []
+        if file_id:
+            sql += " WHERE file_id = ?"
+            params.append(file_id)
+        sql += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def prune(self, max_age=None, keep_per_file=None):
+        """
+        清理旧的提取结果
+
+        Args:
+            max_age: 删除早于该时间（秒）的结果
+            keep_per_file: 每个文件只保留最近的若干条结果
+
+        Returns:
+            删除的结果数量
+        """
+        deleted = 0
+        with self._connect() as conn:
+            if max_age is not None:
+                deleted += conn.execute(
+                    "DELETE FROM extraction_results WHERE created_at < ?", (time.time() - max_age,)
+                ).rowcount
+            if keep_per_file is not None:
+                deleted += conn.execute("""
+                    DELETE FROM extraction_results WHERE session_id IN (
+                        SELECT session_id FROM (
+                            SELECT session_id, ROW_NUMBER() OVER (
+                                PARTITION BY file_id ORDER BY created_at DESC
+                            ) AS rank FROM extraction_results
+                        ) WHERE rank > ?
+                    )
+                """, (keep_per_file,)).rowcount
+        if deleted:
+            logging.info(f"已清理 {deleted} 条提取结果")
+        return deleted
+
+    def import_json_results(self, folder):
+        """
+        导入旧版本写在results目录中的JSON结果文件，只在第一次调用时执行
+
+        Args:
+            folder: results目录
+
+        Returns:
+            导入的结果数量
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM catalog_meta WHERE key = 'json_imported'").fetchone()
+        if row is not None or not os.path.isdir(folder):
+            return 0
+        imported = 0
+        for name in os.listdir(folder):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(folder, name)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                timestamp = data.get("timestamp")
+                created_at = datetime.fromisoformat(timestamp).timestamp() if timestamp else os.path.getmtime(path)
+                self.record(
+                    data.get("session_id") or name[:-5], data.get("file_id"), data.get("file_name"),
+                    None, "", data.get("requirements", []), created_at
+                )
+                imported += 1
+            except (OSError, ValueError, AttributeError) as e:
+                logging.warning(f"导入提取结果文件 {path} 失败: {e}")
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES ('json_imported', ?)", (str(imported),))
+        logging.info(f"已从 {folder} 导入 {imported} 条提取结果")
+        return imported
+
+
+def get_results_catalog():
+    """获取进程内共用的提取结果目录实例"""
+    global _catalog_instance
+    if _catalog_instance is None:
+        with _catalog_instance_lock:
+            if _catalog_instance is None:
+                _catalog_instance = ResultsCatalog()
+    return _catalog_instance
@@ -0,0 +1,274 @@
+"""
+需求审查结果缓存
+以标准化后的(需求名称, 需求内容)、提示词版本和模型标识作为键持久化审查结果，
+重新审查时未修改的需求直接复用已有结果，不再调用模型
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime
+
+from .paths import data_path
+
+# 缓存数据库文件
+REVIEW_CACHE_DB = "review_cache.db"
+
+# 缓存结果的保留时间（秒），最后一次命中后超过该时间的结果被清理
+DEFAULT_CACHE_TTL = int(os.environ.get("DOCUMENT_REVIEW_CACHE_TTL", 30 * 24 * 3600))
+
+# 缓存结果数量上限，超出时从最久未命中的结果开始淘汰
+DEFAULT_MAX_ENTRIES = int(os.environ.get("DOCUMENT_REVIEW_CACHE_MAX_ENTRIES", 50000))
+
+# 每写入多少次清理一次缓存
+PRUNE_INTERVAL_WRITES = 200
+
+_cache_instance = None
+_cache_instance_lock = threading.Lock()
+
+
+def normalize_text(text):
+    """
+    标准化文本：全角转半角、合并连续空白
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        标准化后的文本
+    """
+    if not text:
+        return ""
+    return " ".join(unicodedata.normalize("NFKC", str(text)).split())
+
+
+def model_id_from_config(config):
+    """
+    根据模型配置生成模型标识，如 "openai:THUDM/GLM-4-9B-0414"
+
+    Args:
+        config: get_config()返回的配置字典
+
+    Returns:
+        模型标识
+    """
+    provider = config.get("provider", "openai")
+    model_name = config.get(provider, {}).get("model_name", "")
+    return f"{provider}:{model_name}"
+
+
+def make_cache_key(name, content, prompt_version, model_id):
+    """
+    计算缓存键
+
+    Args:
+        name: 需求名称
+        content: 需求内容
+        prompt_version: 提示词模板版本
+        model_id: 模型标识
+
+    Returns:
+        SHA-256十六进制摘要
+    """
+    payload = json.dumps(
+        [normalize_text(name), normalize_text(content), prompt_version, model_id],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def mark_review(review, reviewed_at, from_cache):
+    """
+    为审查结果添加审查时间和是否来自缓存的标记
+
+    Args:
+        review: 审查结果字典 {name, chapter, review_result}
+        reviewed_at: 审查时间（ISO格式字符串）
+        from_cache: 是否来自缓存
+
+    Returns:
+        添加标记后的审查结果
+    """
+    review["reviewed_at"] = reviewed_at
+    review["from_cache"] = from_cache
+    return review
+
+
+class ReviewCache:
+    """
+    基于SQLite的审查结果缓存，可在多线程并发审查时共用
+    """
+
+    def __init__(self, db_path=None, ttl=DEFAULT_CACHE_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path or data_path(REVIEW_CACHE_DB)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS review_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    prompt_version TEXT NOT NULL,
+                    model_id TEXT NOT NULL,
+                    review_result TEXT NOT NULL,
+                    reviewed_at TEXT NOT NULL,
+                    hit_count INTEGER NOT NULL DEFAULT 0,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_review_cache_last_used ON review_cache (last_used)")
+
+    def _connect(self):
+        # 每次操作使用独立连接，避免跨线程共享连接
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, cache_key):
+        """
+        查询缓存
+
+        Args:
+            cache_key: make_cache_key生成的键
+
+        Returns:
+            (review_result, reviewed_at)，未命中返回None
+        """
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT review_result, reviewed_at FROM review_cache WHERE cache_key = ?",
+                    (cache_key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    "UPDATE review_cache SET hit_count = hit_count + 1, last_used = ? WHERE cache_key = ?",
+                    (time.time(), cache_key)
+                )
+            return json.loads(row[0]), row[1]
+        except (sqlite3.Error, ValueError) as e:
+            logging.warning(f"读取审查缓存失败: {e}")
+            return None
+
+    def put(self, cache_key, review_result, prompt_version, model_id, reviewed_at):
+        """
+        写入缓存
+
+        Args:
+            cache_key: make_cache_key生成的键
+            review_result: 模型返回并解析后的审查结果（review_result字段）
+            prompt_version: 提示词模板版本
+            model_id: 模型标识
+            reviewed_at: 审查时间
+        """
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO review_cache "
+                    "(cache_key, prompt_version, model_id, review_result, reviewed_at, hit_count, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, 0, ?)",
+                    (cache_key, prompt_version, model_id,
+                     json.dumps(review_result, ensure_ascii=False), reviewed_at, time.time())
+                )
+        except sqlite3.Error as e:
+            logging.warning(f"写入审查缓存失败: {e}")
+            return
+        self._after_write()
+
+    def prune(self, ttl=None, max_entries=None):
+        """
+        清理过期和超出数量上限的缓存结果
+
+        Args:
+            ttl: 删除最后一次命中早于该时间（秒）的结果，默认使用实例配置
+            max_entries: 只保留最近命中的若干条结果，默认使用实例配置
+
+        Returns:
+            删除的结果数量
+        """
+        ttl = self.ttl if ttl is None else ttl
+        max_entries = self.max_entries if max_entries is None else max_entries
+        deleted = 0
+        with self._connect() as conn:
+            if ttl is not None:
+                deleted += conn.execute(
+                    "DELETE FROM review_cache WHERE last_used < ?", (time.time() - ttl,)
+                ).rowcount
+            if max_entries is not None:
+                deleted += conn.execute("""
+                    DELETE FROM review_cache WHERE last_used < (
+                        SELECT last_used FROM review_cache ORDER BY last_used DESC LIMIT 1 OFFSET ?
+                    )
+                """, (max_entries - 1,)).rowcount
+        if deleted:
+            logging.info(f"已清理 {deleted} 条审查缓存")
+        return deleted
+
+    def _after_write(self):
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % PRUNE_INTERVAL_WRITES == 0
+        if due:
+            try:
+                self.prune()
+            except sqlite3.Error as e:
+                logging.warning(f"清理审查缓存失败: {e}")
+
+    def clear(self):
+        """清空缓存"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM review_cache")
+
+
+def get_review_cache():
+    """获取进程内共用的审查缓存实例"""
+    global _cache_instance
+    if _cache_instance is None:
+        with _cache_instance_lock:
+            if _cache_instance is None:
+                _cache_instance = ReviewCache()
+    return _cache_instance
+
+
+def cached_review(requirement, prompt_version, config, review_func, use_cache=True):
+    """
+    优先从缓存获取审查结果，未命中时调用review_func并缓存成功的结果
+
+    review_func返回 (审查结果字典, 是否可缓存)：只有模型成功返回并解析的结果才应缓存，
+    模拟审查、解析失败和调用出错的结果不缓存，下次会重新审查
+
+    Args:
+        requirement: 需求字典，至少包含name和content
+        prompt_version: 提示词模板版本，修改提示词时应同步修改
+        config: 模型配置
+        review_func: 实际审查函数 review_func() -> (dict, bool)
+        use_cache: 是否使用缓存，为False时强制重新审查但仍会更新缓存
+
+    Returns:
+        带有reviewed_at和from_cache标记的审查结果
+    """
+    model_id = model_id_from_config(config)
+    cache_key = make_cache_key(requirement.get("name", ""), requirement.get("content", ""), prompt_version, model_id)
+    cache = get_review_cache()
+
+    if use_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            review_result, reviewed_at = cached
+            logging.info(f"需求《{requirement.get('name', '')}》命中审查缓存，审查时间: {reviewed_at}")
+            return mark_review({
+                "name": requirement.get("name", "未命名需求"),
+                "chapter": requirement.get("chapter", ""),
+                "review_result": review_result
+            }, reviewed_at, True)
+
+    review, cacheable = review_func()
+    reviewed_at = datetime.now().isoformat(timespec="seconds")
+    if cacheable:
+        cache.put(cache_key, review.get("review_result", {}), prompt_version, model_id, reviewed_at)
+    return mark_review(review, reviewed_at, False)
@@ -0,0 +1,198 @@
+"""
+并发审查执行器
+以有限并发调用大模型审查需求，结果按输入顺序返回，单条失败不影响其他需求
+"""
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+# 默认同时在途的审查请求数量
+DEFAULT_MAX_IN_FLIGHT = 8
+
+
+def get_max_in_flight(config):
+    """
+    从模型配置中读取审查并发数
+
+    Args:
+        config: get_config()返回的配置字典
+
+    Returns:
+        并发数，至少为1
+    """
+    value = (config or {}).get("model_params", {}).get("max_concurrency", DEFAULT_MAX_IN_FLIGHT)
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return DEFAULT_MAX_IN_FLIGHT
+
+
+def build_error_review(requirement, message, summary="审查失败，发生内部错误"):
+    """
+    生成与正常审查结果结构一致的错误结果
+
+    Args:
+        requirement: 需求字典或字符串
+        message: 错误详情
+        summary: 审查总结
+
+    Returns:
+        审查结果字典
+    """
+    if isinstance(requirement, dict):
+        name = requirement.get("name") or "未命名需求"
+        chapter = requirement.get("chapter", "")
+    else:
+        name, chapter = "未命名需求", ""
+    return {
+        "name": name,
+        "chapter": chapter,
+        "review_result": {
+            "requirements_review": [{
+                "problem_title": f"{name} 审查失败",
+                "requirement_description": "需求审查过程中发生内部错误",
+                "problem_description": f"错误详情: {message}",
+                "problem_location": "系统内部",
+                "impact_analysis": "无法完成对此需求的审查"
+            }],
+            "score": 0,
+            "summary": summary
+        },
+        "reviewed_at": datetime.now().isoformat(timespec="seconds"),
+        "from_cache": False
+    }
+
+
+class ReviewExecutor:
+    """
+    有序并发审查执行器
+
+    review_func对单条需求执行审查；同一时刻最多max_in_flight条需求在审查中。
+    iter_results按输入顺序逐条产出结果，前面的需求完成后立即可用，iter_completed按完成先后产出；
+    cancel()之后尚未开始的需求不再调用模型，直接得到"已取消"的错误结果。
+    """
+
+    def __init__(self, review_func, max_in_flight=DEFAULT_MAX_IN_FLIGHT, error_result=None):
+        """
+        Args:
+            review_func: 单条需求审查函数 review_func(requirement) -> dict
+            max_in_flight: 最大并发数
+            error_result: 生成错误结果的函数 error_result(requirement, message) -> dict，
+                默认使用build_error_review
+        """
+        self.review_func = review_func
+        self.max_in_flight = max(1, int(max_in_flight or 1))
+        self.error_result = error_result or build_error_review
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """取消尚未开始的审查，已在进行中的模型调用会正常结束"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _review_one(self, requirement):
+        if self._cancelled.is_set():
+            return self.error_result(requirement, "审查已取消")
+        try:
+            return self.review_func(requirement)
+        except Exception as e:
+            name = requirement.get("name", "未知需求") if isinstance(requirement, dict) else "未知需求"
+            logging.error(f"审查单个需求 '{name}' 时发生错误: {e}")
+            return self.error_result(requirement, str(e))
+
+    def iter_results(self, requirements):
+        """
+        按输入顺序逐条产出审查结果
+
+        Args:
+            requirements: 需求列表
+
+        Yields:
+            (需求序号, 审查结果)
+        """
+        requirements = list(requirements)
+        if not requirements:
+            return
+        workers = min(self.max_in_flight, len(requirements))
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="review") as pool:
+            try:
+                for index, requirement in enumerate(requirements):
+                    # 只预先提交有限数量的任务，避免取消后仍有大量任务排队
+                    while len(pending) >= workers * 2:
+                        yield self._pop_result(pending)
+                    pending.append((index, requirement, pool.submit(self._review_one, requirement)))
+                while pending:
+                    yield self._pop_result(pending)
+            finally:
+                # 调用方提前停止迭代时，取消排队中的任务
+                for _, _, future in pending:
+                    future.cancel()
+
+    def iter_completed(self, requirements):
+        """
+        按完成先后逐条产出审查结果，用于流式返回
+
+        Args:
+            requirements: 需求列表
+
+        Yields:
+            (需求序号, 审查结果)
+        """
+        requirements = list(requirements)
+        if not requirements:
+            return
+        workers = min(self.max_in_flight, len(requirements))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="review") as pool:
+            futures = {
+                pool.submit(self._review_one, requirement): (index, requirement)
+                for index, requirement in enumerate(requirements)
+            }
+            remaining = len(futures)
+            try:
+                for future in as_completed(futures):
+                    index, requirement = futures[future]
+                    remaining -= 1
+                    try:
+                        yield index, future.result()
+                    except Exception as e:
+                        yield index, self.error_result(requirement, str(e))
+            finally:
+                # 调用方提前停止迭代（如客户端断开连接）时，不再启动剩余的审查
+                if remaining:
+                    self.cancel()
+                    for future in futures:
+                        future.cancel()
+
+    def _pop_result(self, pending):
+        index, requirement, future = pending.popleft()
+        try:
+            return index, future.result()
+        except Exception as e:
+            return index, self.error_result(requirement, str(e))
+
+    def run(self, requirements, on_progress=None):
+        """
+        审查全部需求
+
+        Args:
+            requirements: 需求列表
+            on_progress: 每条结果之后调用 on_progress(已完成数量, 总数量)，如后台任务上报进度
+
+        Returns:
+            与输入顺序一致的审查结果列表
+        """
+        requirements = list(requirements)
+        logging.info(f"开始并发审查 {len(requirements)} 个需求，最大并发数: {self.max_in_flight}")
+        results = []
+        for _, result in self.iter_results(requirements):
+            results.append(result)
+            if on_progress:
+                on_progress(len(results), len(requirements))
+        logging.info(f"完成并发审查，共审查 {len(results)} 个需求")
+        return results
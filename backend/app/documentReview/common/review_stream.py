@@ -0,0 +1,148 @@
+"""
+流式需求审查
+每条需求审查完成后立即以NDJSON或SSE事件推送给前端，并定期发送进度心跳，
+全部完成后再把完整结果保存到会话中
+"""
+import json
+import queue
+import logging
+import threading
+
+from flask import Response, stream_with_context
+
+# 没有新结果时发送心跳的间隔（秒），避免代理因连接空闲而断开
+HEARTBEAT_INTERVAL = 10
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+SSE_MIMETYPE = "text/event-stream"
+
+_DONE = object()
+
+
+def wants_sse(flask_request):
+    """
+    根据请求判断使用SSE还是NDJSON格式
+
+    Args:
+        flask_request: Flask请求对象
+
+    Returns:
+        是否使用SSE
+    """
+    if flask_request.args.get("format") == "sse":
+        return True
+    return SSE_MIMETYPE in (flask_request.headers.get("Accept") or "")
+
+
+def format_event(event, sse=False):
+    """
+    序列化单个事件
+
+    Args:
+        event: 事件字典，type字段为事件类型
+        sse: 是否使用SSE格式
+
+    Returns:
+        事件文本
+    """
+    data = json.dumps(event, ensure_ascii=False)
+    if sse:
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+def iter_review_events(executor, requirements, session_id, persist, heartbeat_interval=HEARTBEAT_INTERVAL):
+    """
+    执行审查并逐个产出事件
+
+    事件类型：
+        start: {total, session_id}
+        result: {index, name, chapter, review_result, reviewed_at, from_cache}
+        progress: {completed, total}，每条结果之后以及空闲心跳时发送
+        done: {completed, total, session_id}
+        error: {message}
+
+    Args:
+        executor: ReviewExecutor实例
+        requirements: 需求列表
+        session_id: 会话ID
+        persist: 保存完整结果的函数 persist(requirements, review_results)
+        heartbeat_interval: 心跳间隔（秒）
+
+    Yields:
+        事件字典
+    """
+    total = len(requirements)
+    results = [None] * total
+    completed = 0
+    events = queue.Queue()
+
+    def produce():
+        # 审查在后台线程中进行，主生成器在等待结果期间可以发送心跳
+        try:
+            for index, review in executor.iter_completed(requirements):
+                events.put((index, review))
+        except Exception as e:
+            logging.error(f"流式审查过程中发生错误: {e}", exc_info=True)
+            events.put(e)
+        finally:
+            events.put(_DONE)
+
+    yield {"type": "start", "total": total, "session_id": session_id}
+
+    producer = threading.Thread(target=produce, name="review-stream", daemon=True)
+    producer.start()
+    try:
+        while True:
+            try:
+                item = events.get(timeout=heartbeat_interval)
+            except queue.Empty:
+                yield {"type": "progress", "completed": completed, "total": total, "heartbeat": True}
+                continue
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                yield {"type": "error", "message": f"需求审查时出错: {str(item)}"}
+                continue
+            index, review = item
+            results[index] = review
+            completed += 1
+            yield dict(review, type="result", index=index)
+            yield {"type": "progress", "completed": completed, "total": total}
+    finally:
+        # 客户端断开连接时生成器被关闭，取消尚未开始的审查
+        if completed < total:
+            executor.cancel()
+
+    review_results = [review for review in results if review is not None]
+    try:
+        persist(requirements, review_results)
+    except Exception as e:
+        logging.error(f"保存审查结果到会话时出错: {e}", exc_info=True)
+        yield {"type": "error", "message": f"保存审查结果时出错: {str(e)}"}
+    yield {"type": "done", "completed": completed, "total": total, "session_id": session_id}
+
+
+def review_stream_response(executor, requirements, session_id, persist, sse=False):
+    """
+    创建流式审查响应
+
+    Args:
+        executor: ReviewExecutor实例
+        requirements: 需求列表
+        session_id: 会话ID
+        persist: 保存完整结果的函数 persist(requirements, review_results)
+        sse: 是否使用SSE格式，否则为NDJSON
+
+    Returns:
+        Flask Response
+    """
+    def generate():
+        for event in iter_review_events(executor, requirements, session_id, persist):
+            yield format_event(event, sse)
+
+    response = Response(stream_with_context(generate()), mimetype=SSE_MIMETYPE if sse else NDJSON_MIMETYPE)
+    response.headers["Cache-Control"] = "no-cache"
+    # 关闭Nginx等反向代理的响应缓冲，保证事件及时送达
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
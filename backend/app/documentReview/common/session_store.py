@@ -0,0 +1,383 @@
+"""
+会话数据存储
+会话数据以压缩后的JSON保存在SQLite（WAL模式）中，多个工作进程共享且重启后不丢失；
+进程内另有容量受限的LRU缓存，保存未压缩的JSON文本，命中时比对版本号后直接反序列化，无需解压；
+每次读取都返回新的对象，调用方修改读到的数据而不保存时不会影响缓存和其他请求
+"""
+import os
+import json
+import time
+import zlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from .paths import data_path
+
+# 会话数据库文件
+SESSION_DB = "sessions.db"
+
+# 会话有效期（秒），最后一次写入后超过该时间的会话视为过期
+DEFAULT_SESSION_TTL = int(os.environ.get("DOCUMENT_REVIEW_SESSION_TTL", 7 * 24 * 3600))
+
+# 进程内缓存的会话数量
+DEFAULT_MEMORY_SESSIONS = 128
+
+# 每写入多少次清理一次过期会话
+PURGE_INTERVAL_WRITES = 200
+
+# 会话存储后端，可选: "sqlite"、"memory"（仅单进程调试使用）
+SESSION_BACKEND = os.environ.get("DOCUMENT_REVIEW_SESSION_BACKEND", "sqlite")
+
+_store_instance = None
+_store_instance_lock = threading.Lock()
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _compress(text):
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def _decompress(blob):
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def _decode(blob):
+    return json.loads(_decompress(blob))
+
+
+class MemorySessionStore:
+    """
+    仅保存在进程内存中的会话存储，接口与SQLiteSessionStore一致
+    会话保存为JSON文本，与SQLiteSessionStore一样每次读取返回新的对象
+    """
+
+    def __init__(self, ttl=DEFAULT_SESSION_TTL, max_sessions=None):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            text, expires_at = entry
+            if expires_at < time.time():
+                del self._sessions[session_id]
+                return None
+            self._sessions.move_to_end(session_id)
+        return json.loads(text)
+
+    def save(self, session_id, data):
+        text = _dumps(data)
+        with self._lock:
+            self._sessions[session_id] = (text, time.time() + self.ttl)
+            self._sessions.move_to_end(session_id)
+            if self.max_sessions:
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+
+    def update(self, session_id, fields):
+        with self._lock:
+            data = self.get(session_id) or {}
+            data.update(fields)
+            self.save(session_id, data)
+            return data
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def iter_active(self):
+        now = time.time()
+        with self._lock:
+            items = [(key, text) for key, (text, expires_at) in self._sessions.items() if expires_at >= now]
+        return ((key, json.loads(text)) for key, text in items)
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._sessions.items() if expires_at < now]
+            for key in expired:
+                del self._sessions[key]
+            return len(expired)
+
+
+class SQLiteSessionStore:
+    """
+    基于SQLite的会话存储
+
+    每个会话一行，data为zlib压缩的JSON，version在每次写入时递增；
+    内存LRU缓存保存 (version, 未压缩的JSON文本)，读取时先查询版本号，与缓存一致则从缓存的文本反序列化，
+    因此其他进程写入后本进程读到的总是最新数据；缓存中不保存可变对象，调用方修改读到的数据不会影响缓存
+    """
+
+    def __init__(self, db_path=None, ttl=DEFAULT_SESSION_TTL, memory_sessions=DEFAULT_MEMORY_SESSIONS):
+        """
+        Args:
+            db_path: 数据库文件路径，默认存放在数据目录下
+            ttl: 会话有效期（秒）
+            memory_sessions: 进程内缓存的会话数量
+        """
+        self.db_path = db_path or data_path(SESSION_DB)
+        self.ttl = ttl
+        self.memory_sessions = memory_sessions
+        self._memory = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 1,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)")
+
+    def _connect(self):
+        # 每次操作使用独立连接，避免跨线程共享连接
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _remember(self, session_id, version, text):
+        with self._memory_lock:
+            self._memory[session_id] = (version, text)
+            self._memory.move_to_end(session_id)
+            while len(self._memory) > self.memory_sessions:
+                self._memory.popitem(last=False)
+
+    def _forget(self, session_id):
+        with self._memory_lock:
+            self._memory.pop(session_id, None)
+
+    def get(self, session_id):
+        """
+        读取会话数据
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            会话数据字典，不存在或已过期时返回None
+        """
+        with self._memory_lock:
+            cached = self._memory.get(session_id)
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT version, expires_at FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                if row is None or row[1] < time.time():
+                    self._forget(session_id)
+                    return None
+                version = row[0]
+                if cached is not None and cached[0] == version:
+                    with self._memory_lock:
+                        if session_id in self._memory:
+                            self._memory.move_to_end(session_id)
+                    return json.loads(cached[1])
+                row = conn.execute(
+                    "SELECT version, data FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+            if row is None:
+                return None
+            text = _decompress(row[1])
+            data = json.loads(text)
+            self._remember(session_id, row[0], text)
+            return data
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            logging.error(f"读取会话 {session_id} 失败: {e}")
+            return None
+
+    def _write(self, conn, session_id, text):
+        now = time.time()
+        conn.execute(
+            "INSERT INTO sessions (session_id, data, version, created_at, updated_at, expires_at) "
+            "VALUES (?, ?, 1, ?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, version = version + 1, "
+            "updated_at = excluded.updated_at, expires_at = excluded.expires_at",
+            (session_id, _compress(text), now, now, now + self.ttl)
+        )
+        return conn.execute("SELECT version FROM sessions WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+    def save(self, session_id, data):
+        """
+        保存会话数据，覆盖原有数据并重新计算有效期
+
+        Args:
+            session_id: 会话ID
+            data: 可JSON序列化的会话数据字典
+        """
+        text = _dumps(data)
+        with self._connect() as conn:
+            version = self._write(conn, session_id, text)
+        self._remember(session_id, version, text)
+        self._after_write()
+
+    def update(self, session_id, fields):
+        """
+        原子地合并更新会话数据的部分字段，并发写入同一会话时不会丢失其他字段
+
+        Args:
+            session_id: 会话ID
+            fields: 需要更新的字段字典
+
+        Returns:
+            更新后的会话数据
+        """
+        conn = self._connect()
+        try:
+            # 立即获取写锁，读取与写入之间不会有其他进程修改该会话
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT data, expires_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            data = _decode(row[0]) if row is not None and row[1] >= time.time() else {}
+            data.update(fields)
+            text = _dumps(data)
+            version = self._write(conn, session_id, text)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        self._remember(session_id, version, text)
+        self._after_write()
+        return data
+
+    def delete(self, session_id):
+        """
+        删除会话
+
+        Args:
+            session_id: 会话ID
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        self._forget(session_id)
+
+    def iter_active(self):
+        """
+        逐个读取未过期的会话
+
+        Yields:
+            (会话ID, 会话数据)
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "SELECT session_id, data FROM sessions WHERE expires_at >= ?", (time.time(),)
+            )
+            for session_id, blob in cursor:
+                try:
+                    yield session_id, _decode(blob)
+                except (zlib.error, ValueError) as e:
+                    logging.warning(f"读取会话 {session_id} 失败: {e}")
+        finally:
+            conn.close()
+
+    def purge_expired(self):
+        """
+        删除已过期的会话
+
+        Returns:
+            删除的会话数量
+        """
+        with self._connect() as conn:
+            count = conn.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),)).rowcount
+        if count:
+            logging.info(f"已清理 {count} 个过期会话")
+        return count
+
+    def _after_write(self):
+        self._writes += 1
+        if self._writes % PURGE_INTERVAL_WRITES == 0:
+            try:
+                self.purge_expired()
+            except sqlite3.Error as e:
+                logging.warning(f"清理过期会话失败: {e}")
+
+
+def create_session_store(backend=SESSION_BACKEND, **kwargs):
+    """
+    创建会话存储
+
+    Args:
+        backend: "sqlite"或"memory"
+        **kwargs: 传给存储类的参数
+
+    Returns:
+        会话存储实例
+    """
+    if backend == "memory":
+        return MemorySessionStore(**kwargs)
+    if backend != "sqlite":
+        logging.warning(f"未知的会话存储后端 {backend}，使用sqlite")
+    return SQLiteSessionStore(**kwargs)
+
+
+def get_session_store():
+    """获取进程内共用的会话存储实例"""
+    global _store_instance
+    if _store_instance is None:
+        with _store_instance_lock:
+            if _store_instance is None:
+                _store_instance = create_session_store()
+    return _store_instance
+
+
+def get_session_data(session_id):
+    """
+    获取会话数据
+
+    Args:
+        session_id: 会话ID
+
+    Returns:
+        会话数据字典，不存在时返回None
+    """
+    if not session_id:
+        return None
+    return get_session_store().get(session_id)
+
+
+def save_session_data(session_id, data):
+    """
+    保存会话数据
+
+    Args:
+        session_id: 会话ID
+        data: 会话数据字典
+    """
+    if not session_id:
+        return
+    get_session_store().save(session_id, data)
+
+
+def update_session_data(session_id, fields):
+    """
+    合并更新会话数据的部分字段
+
+    Args:
+        session_id: 会话ID
+        fields: 需要更新的字段字典
+
+    Returns:
+        更新后的会话数据
+    """
+    if not session_id:
+        return None
+    return get_session_store().update(session_id, fields)
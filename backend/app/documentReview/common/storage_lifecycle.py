@@ -0,0 +1,395 @@
+"""
+存储生命周期管理
+后台线程定期扫描上传目录和输出目录，按目录配置的有效期删除长期未使用的文件，
+目录超出容量配额时按最近使用时间从旧到新淘汰；
+仍被项目管理文档记录或未过期会话引用的文件不会被删除
+"""
+import os
+import time
+import logging
+import threading
+
+from .paths import UPLOADS_DIR, APP_UPLOADS_DIR, OUTPUTS_DIR, data_path
+from .blob_store import BLOBS_DIR
+from .chunked_upload import CHUNKED_UPLOADS_DIR
+
+DAY = 24 * 3600
+GB = 1024 * 1024 * 1024
+MB = 1024 * 1024
+
+# 是否启用后台清理，设置为0关闭
+STORAGE_GC_ENABLED = os.environ.get("DOCUMENT_REVIEW_STORAGE_GC", "1") != "0"
+
+# 两次清理之间的间隔（秒）
+DEFAULT_GC_INTERVAL = int(os.environ.get("DOCUMENT_REVIEW_STORAGE_GC_INTERVAL", 3600))
+
+# 最近修改时间在该时间（秒）内的文件视为正在写入，不参与清理
+MIN_FILE_AGE = 10 * 60
+
+# 超出配额时淘汰到配额的该比例以下，避免每次清理只删除一两个文件
+QUOTA_LOW_WATERMARK = 0.9
+
+# 记录最近一次清理时间的文件，多个工作进程共用，间隔内只有一个进程执行清理
+LAST_RUN_FILE = "storage_gc.last"
+
+
+def _import_legacy_results(folder):
+    # 旧版本的提取结果JSON删除前先导入结果目录
+    from .results_catalog import get_results_catalog
+    get_results_catalog().import_json_results(folder)
+
+
+# 目录清理策略
+#   name: 指标中使用的名称
+#   path: 目录
+#   ttl: 最近一次使用后保留的时间（秒），None表示不按时间清理
+#   quota: 目录容量上限（字节），None表示不限制
+#   recursive: 是否清理子目录中的文件（有单独策略的子目录不要重复包含）
+#   prepare: 可选，扫描前调用的函数，参数为目录
+#   keep_linked: 为True时不删除仍有其他硬链接的文件（去重存储中仍被上传文件引用的内容）
+DEFAULT_STORAGE_POLICIES = [
+    {"name": "uploads", "path": UPLOADS_DIR, "ttl": 7 * DAY, "quota": 1 * GB, "recursive": False},
+    {"name": "uploads/configuration_item", "path": os.path.join(UPLOADS_DIR, "configuration_item"),
+     "ttl": 7 * DAY, "quota": 2 * GB, "recursive": False},
+    {"name": "uploads/regression", "path": os.path.join(UPLOADS_DIR, "regression"),
+     "ttl": 7 * DAY, "quota": 2 * GB, "recursive": False},
+    # 上传文件的别名都已删除后，去重存储中的内容再保留一段时间供重复上传复用
+    # 未完成的分块上传，最后一个分块写入后超过该时间不再续传
+    {"name": "uploads/chunked", "path": CHUNKED_UPLOADS_DIR, "ttl": 1 * DAY, "quota": None, "recursive": True},
+    {"name": "uploads/blobs", "path": BLOBS_DIR, "ttl": 3 * DAY, "quota": None,
+     "recursive": True, "keep_linked": True},
+    # 项目文档由文档记录引用，这里只清理没有对应记录的孤立文件
+    {"name": "uploads/project_documents", "path": os.path.join(UPLOADS_DIR, "project_documents"),
+     "ttl": 1 * DAY, "quota": None, "recursive": True},
+    {"name": "app/uploads/configuration_item", "path": os.path.join(APP_UPLOADS_DIR, "configuration_item"),
+     "ttl": 7 * DAY, "quota": 2 * GB, "recursive": False},
+    {"name": "app/uploads/results", "path": os.path.join(APP_UPLOADS_DIR, "results"),
+     "ttl": 30 * DAY, "quota": 256 * MB, "recursive": False, "prepare": _import_legacy_results},
+    {"name": "outputs", "path": OUTPUTS_DIR, "ttl": 7 * DAY, "quota": 2 * GB, "recursive": True},
+]
+
+_manager_instance = None
+_manager_instance_lock = threading.Lock()
+
+
+def mark_used(path):
+    """
+    记录文件被读取，只更新访问时间，不影响修改时间和基于修改时间的缓存校验
+
+    Args:
+        path: 文件路径
+    """
+    try:
+        os.utime(path, (time.time(), os.stat(path).st_mtime))
+    except OSError:
+        pass
+
+
+def _reference_key(name):
+    """文件名中的ID部分：上传文件为 <file_id>_<文件名>，输出文件为 <session_id>_... 或 <session_id>.<扩展名>"""
+    for separator in ("_", "."):
+        index = name.find(separator)
+        if index > 0:
+            name = name[:index]
+    return name
+
+
+def _session_references(data):
+    # 会话数据中引用文件的字段
+    keys = set()
+    paths = set()
+    for field in ("file_id", "catalog_file_id"):
+        if data.get(field):
+            keys.add(str(data[field]))
+    for field in ("file_path", "catalog_file_path"):
+        if data.get(field):
+            paths.add(os.path.realpath(data[field]))
+    return keys, paths
+
+
+def collect_references():
+    """
+    收集仍在使用的文件引用
+
+    Returns:
+        (ID集合, 文件路径集合)，文件名或所在目录名的ID部分在ID集合中、或路径在路径集合中的文件受保护
+
+    Raises:
+        读取文档记录或会话失败时抛出异常，调用方应放弃本次清理
+    """
+    from app.database import SessionLocal
+    from app.projectManagement.models import Document
+    from .session_store import get_session_store
+    from .report_artifacts import _session_dir_name
+
+    keys = set()
+    paths = set()
+
+    db = SessionLocal()
+    try:
+        for file_id, file_path in db.query(Document.file_id, Document.file_path):
+            if file_id:
+                keys.add(str(file_id))
+            if file_path:
+                paths.add(os.path.realpath(file_path))
+    finally:
+        db.close()
+
+    for session_id, data in get_session_store().iter_active():
+        keys.add(session_id)
+        keys.add(_session_dir_name(session_id))
+        if isinstance(data, dict):
+            session_keys, session_paths = _session_references(data)
+            keys.update(session_keys)
+            paths.update(session_paths)
+    return keys, paths
+
+
+def _scan(root, recursive):
+    """
+    列出目录下的文件
+
+    Returns:
+        [(路径, 相对目录各级名称, 大小, 最近使用时间, 修改时间, 硬链接数)], [子目录路径]
+    """
+    files = []
+    directories = []
+    stack = [(root, ())]
+    while stack:
+        directory, parents = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                directories.append(entry.path)
+                                stack.append((entry.path, parents + (entry.name,)))
+                            continue
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    # 挂载为noatime时访问时间不更新，取访问时间和修改时间中较晚的一个
+                    last_used = max(st.st_atime, st.st_mtime)
+                    files.append((entry.path, parents, st.st_size, last_used, st.st_mtime, st.st_nlink))
+        except OSError as e:
+            logging.warning(f"扫描目录 {directory} 失败: {e}")
+    return files, directories
+
+
+class StorageLifecycleManager:
+    """
+    存储生命周期管理器
+
+    run_once()执行一次清理并返回本次的统计；start()启动后台线程按间隔清理；
+    metrics()返回最近一次清理的各目录统计和累计回收的空间
+    """
+
+    def __init__(self, policies=None, interval=DEFAULT_GC_INTERVAL, reference_collector=collect_references):
+        """
+        Args:
+            policies: 目录清理策略列表，默认DEFAULT_STORAGE_POLICIES
+            interval: 后台清理间隔（秒）
+            reference_collector: 返回 (ID集合, 路径集合) 的函数
+        """
+        self.policies = policies if policies is not None else DEFAULT_STORAGE_POLICIES
+        self.interval = interval
+        self.reference_collector = reference_collector
+        self._run_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._metrics = {
+            "runs": 0,
+            "deleted_files": 0,
+            "reclaimed_bytes": 0,
+            "last_run_at": None,
+            "last_duration": None,
+            "last_error": None,
+            "directories": {}
+        }
+
+    def _apply_policy(self, policy, keys, paths, now):
+        root = policy["path"]
+        stats = {
+            "files": 0, "bytes": 0, "protected_files": 0,
+            "deleted_files": 0, "reclaimed_bytes": 0, "scan_seconds": 0.0
+        }
+        if not os.path.isdir(root):
+            return stats
+        if policy.get("prepare"):
+            policy["prepare"](root)
+        start_time = time.time()
+        files, directories = _scan(root, policy.get("recursive", False))
+        stats["scan_seconds"] = round(time.time() - start_time, 3)
+        stats["files"] = len(files)
+        stats["bytes"] = sum(item[2] for item in files)
+
+        candidates = []
+        keep_linked = policy.get("keep_linked", False)
+        for item in files:
+            path, parents, _, _, mtime, nlink = item
+            if now - mtime < MIN_FILE_AGE:
+                continue
+            if keep_linked and nlink > 1:
+                stats["protected_files"] += 1
+                continue
+            if _reference_key(os.path.basename(path)) in keys or any(name in keys for name in parents) \
+                    or os.path.realpath(path) in paths:
+                stats["protected_files"] += 1
+                continue
+            candidates.append(item)
+
+        # 先删除超过有效期的文件，仍超出配额时从最久未使用的文件开始淘汰
+        candidates.sort(key=lambda item: item[3])
+        ttl = policy.get("ttl")
+        quota = policy.get("quota")
+        usage = stats["bytes"]
+        target = quota * QUOTA_LOW_WATERMARK if quota is not None and usage > quota else None
+        for path, _, size, last_used, _, _ in candidates:
+            expired = ttl is not None and now - last_used > ttl
+            over_quota = target is not None and usage > target
+            if not expired and not over_quota:
+                # 候选文件按最近使用时间排序，后面的文件既未过期也无需淘汰
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"删除文件 {path} 失败: {e}")
+                continue
+            usage -= size
+            stats["deleted_files"] += 1
+            stats["reclaimed_bytes"] += size
+        if quota is not None and usage > quota:
+            logging.warning(f"目录 {root} 占用 {usage} 字节，受保护的文件已超出配额 {quota} 字节")
+
+        # 删除空的子目录（如已清空的会话报告目录），保持目录列表规模不随时间增长
+        for directory in sorted(directories, key=len, reverse=True):
+            try:
+                if now - os.stat(directory).st_mtime >= MIN_FILE_AGE:
+                    os.rmdir(directory)
+            except OSError:
+                pass
+        return stats
+
+    def run_once(self):
+        """
+        执行一次清理
+
+        Returns:
+            本次清理的统计字典，已有清理在执行时返回None
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return None
+        try:
+            start_time = time.time()
+            try:
+                keys, paths = self.reference_collector()
+            except Exception as e:
+                # 无法确认哪些文件仍被引用时不删除任何文件
+                logging.error(f"收集文件引用失败，跳过本次存储清理: {e}", exc_info=True)
+                with self._metrics_lock:
+                    self._metrics["last_error"] = str(e)
+                return None
+
+            directories = {}
+            for policy in self.policies:
+                try:
+                    directories[policy["name"]] = self._apply_policy(policy, keys, paths, start_time)
+                except Exception as e:
+                    logging.error(f"清理目录 {policy['path']} 失败: {e}", exc_info=True)
+
+            result = {
+                "deleted_files": sum(stats["deleted_files"] for stats in directories.values()),
+                "reclaimed_bytes": sum(stats["reclaimed_bytes"] for stats in directories.values()),
+                "duration": round(time.time() - start_time, 3),
+                "directories": directories
+            }
+            with self._metrics_lock:
+                self._metrics["runs"] += 1
+                self._metrics["deleted_files"] += result["deleted_files"]
+                self._metrics["reclaimed_bytes"] += result["reclaimed_bytes"]
+                self._metrics["last_run_at"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start_time))
+                self._metrics["last_duration"] = result["duration"]
+                self._metrics["last_error"] = None
+                self._metrics["directories"] = directories
+            logging.info(
+                f"存储清理完成，删除 {result['deleted_files']} 个文件，"
+                f"回收 {result['reclaimed_bytes']} 字节，耗时: {result['duration']:.2f}秒"
+            )
+            return result
+        finally:
+            self._run_lock.release()
+
+    def metrics(self):
+        """
+        清理指标
+
+        Returns:
+            累计删除的文件数和回收的字节数，以及最近一次清理各目录的统计
+        """
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+            metrics["directories"] = {name: dict(stats) for name, stats in self._metrics["directories"].items()}
+        metrics["interval"] = self.interval
+        metrics["running"] = self._thread is not None and self._thread.is_alive()
+        return metrics
+
+    def _claim_run(self):
+        # 其他工作进程在本间隔内已经清理过时跳过
+        marker = data_path(LAST_RUN_FILE)
+        now = time.time()
+        try:
+            if now - os.path.getmtime(marker) < self.interval * 0.5:
+                return False
+        except OSError:
+            pass
+        with open(marker, 'w') as f:
+            f.write(str(now))
+        return True
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                if self._claim_run():
+                    self.run_once()
+            except Exception as e:
+                logging.error(f"后台存储清理失败: {e}", exc_info=True)
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        """启动后台清理线程，重复调用时不会启动多个线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="storage-gc", daemon=True)
+        self._thread.start()
+        logging.info(f"存储清理线程已启动，间隔: {self.interval}秒")
+
+    def stop(self):
+        """停止后台清理线程"""
+        self._stop_event.set()
+
+
+def get_storage_manager():
+    """获取进程内共用的存储生命周期管理器"""
+    global _manager_instance
+    if _manager_instance is None:
+        with _manager_instance_lock:
+            if _manager_instance is None:
+                _manager_instance = StorageLifecycleManager()
+    return _manager_instance
+
+
+def start_storage_manager():
+    """启用后台清理时启动存储生命周期管理器"""
+    if not STORAGE_GC_ENABLED:
+        logging.info("存储清理已通过DOCUMENT_REVIEW_STORAGE_GC关闭")
+        return None
+    manager = get_storage_manager()
+    manager.start()
+    return manager
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from . import projects, documents # Assuming you will create documents.py for document APIs
+from . import projects, documents, search # Assuming you will create documents.py for document APIs
 
 router = APIRouter()
 
@@ -7,5 +7,7 @@ router = APIRouter()
 router.include_router(projects.router, tags=["Projects"])
 # Include document-related routes (if they are separate)
 router.include_router(documents.router, tags=["Documents"])
+# Full-text search over extracted requirements and review findings
+router.include_router(search.router, tags=["Search"])
 
 __all__ = ["router"]
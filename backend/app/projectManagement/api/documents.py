@@ -1,18 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-import shutil # For file operations
+import asyncio
+import glob
+import io
 import os
 import uuid # For generating unique file IDs
 
 from .. import crud, schemas, models # Adjusted imports for current structure
-from ...database import get_db # Adjusted import for get_db from app/database.py
+from ...database import get_async_db
+from .pagination import set_page_headers
+from ...documentReview.common.blob_store import save_upload
+from ...documentReview.common.file_registry import get_file_registry
+from ...documentReview.common.chunked_upload import (
+    MAX_CHUNK_SIZE, UploadError, get_upload_manager, schedule_preprocess
+)
 
 # Define a base path for uploads, ideally from config
 # Ensure this directory exists or is created by your app startup logic
 UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))), "uploads", "project_documents")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Bulk import: at most this many files per request, stored this many at a time
+MAX_BULK_FILES = 1000
+BULK_IMPORT_CONCURRENCY = 8
+
+# Server-side folders that directory imports may read from (separated by os.pathsep);
+# directory import is disabled when PM_IMPORT_ROOTS is not set
+IMPORT_ROOTS = [os.path.realpath(p) for p in os.environ.get("PM_IMPORT_ROOTS", "").split(os.pathsep) if p]
+
+def _in_import_roots(path: str) -> bool:
+    # path must already be resolved with os.path.realpath
+    return any(os.path.commonpath([root, path]) == root for root in IMPORT_ROOTS)
+
+def _is_plain_pattern(pattern: str) -> bool:
+    # A pattern only names files inside the chosen folder: no absolute paths, separators or '..'
+    separators = [sep for sep in (os.sep, os.altsep, "/") if sep]
+    return bool(pattern) and not os.path.isabs(pattern) and ".." not in pattern \
+        and not any(sep in pattern for sep in separators)
+
 router = APIRouter(
     prefix="/documents",
     # tags=["Documents"] # Tags are often better defined when including the router
@@ -24,14 +51,14 @@ async def upload_and_create_document_for_project(
     file_type: Optional[str] = None, # Query parameters for metadata
     review_type: Optional[str] = None,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Upload a document file and associate it with a project.
     Generates a unique file_id (UUID) and saves the file to a designated UPLOAD_DIR.
     """
     # Check if project exists
-    db_project = crud.get_project(db, project_id=project_id)
+    db_project = await crud.get_project(db, project_id=project_id)
     if not db_project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
 
@@ -43,15 +70,17 @@ async def upload_and_create_document_for_project(
     saved_file_name = f"{unique_file_id}{file_extension}"
     file_path_on_server = os.path.join(UPLOAD_DIR, saved_file_name)
 
-    # Save the uploaded file
+    # Save the uploaded file in a worker thread so the event loop is not blocked by disk I/O
     try:
-        with open(file_path_on_server, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Stored once per content hash; file_path_on_server is a link to the shared copy
+        await run_in_threadpool(
+            save_upload, file.file, file_path_on_server, unique_file_id, file.filename, "project_management"
+        )
     except Exception as e:
         # Log the exception e
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not save file")
     finally:
-        file.file.close()
+        await file.close()
 
     document_data = schemas.DocumentCreate(
         project_id=project_id,
@@ -63,63 +92,309 @@ async def upload_and_create_document_for_project(
         status="uploaded" # Initial status
     )
     
-    return crud.create_document(db=db, document=document_data)
+    return await crud.create_document(db=db, document=document_data)
 
-@router.get("/projects/{project_id}/documents/", response_model=List[schemas.Document])
-def read_documents_for_project(
-    project_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+def _upload_http_error(e: UploadError) -> HTTPException:
+    detail = {"error": str(e)}
+    detail.update(e.extra)
+    return HTTPException(status_code=e.status, detail=detail)
+
+@router.post("/uploads", status_code=status.HTTP_201_CREATED)
+async def init_chunked_upload(upload: schemas.ChunkedUploadInit):
+    """
+    Start a resumable upload. Send the file with PUT /uploads/{upload_id}?offset=&checksum=
+    and then attach it to a project with the finalize endpoint below.
+    """
+    try:
+        return await run_in_threadpool(get_upload_manager().init, upload.file_name, upload.total_size, upload.checksum)
+    except UploadError as e:
+        raise _upload_http_error(e)
+
+@router.get("/uploads/{upload_id}")
+async def get_chunked_upload_status(upload_id: str):
+    """
+    Return how many bytes have been received; an interrupted upload resumes from `received`.
+    """
+    try:
+        return await run_in_threadpool(get_upload_manager().status, upload_id)
+    except UploadError as e:
+        raise _upload_http_error(e)
+
+@router.put("/uploads/{upload_id}")
+async def put_upload_chunk(upload_id: str, offset: int, request: Request, checksum: Optional[str] = None):
+    """
+    Write one chunk (raw request body) at `offset`. `checksum` is the SHA-256 of the chunk.
+    """
+    length = int(request.headers.get("content-length") or 0)
+    if length <= 0 or length > MAX_CHUNK_SIZE:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail={"error": f"Chunk size must be between 1 and {MAX_CHUNK_SIZE} bytes"})
+    # At most one chunk is held in memory; the disk write happens in a worker thread
+    body = await request.body()
+    try:
+        return await run_in_threadpool(
+            get_upload_manager().write_chunk, upload_id, offset, io.BytesIO(body), len(body), checksum
+        )
+    except UploadError as e:
+        raise _upload_http_error(e)
+
+@router.post("/projects/{project_id}/documents/uploads/{upload_id}/finalize", response_model=schemas.Document, status_code=status.HTTP_201_CREATED)
+async def finalize_chunked_upload_for_project(
+    project_id: int,
+    upload_id: str,
+    file_type: Optional[str] = None,
+    review_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Retrieve documents for a specific project.
+    Complete a resumable upload and associate the file with a project.
     """
-    db_project = crud.get_project(db, project_id=project_id)
+    db_project = await crud.get_project(db, project_id=project_id)
     if not db_project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+
+    manager = get_upload_manager()
+    unique_file_id = str(uuid.uuid4())
+    try:
+        upload_status = await run_in_threadpool(manager.status, upload_id)
+        file_extension = os.path.splitext(upload_status["file_name"])[1]
+        file_path_on_server = os.path.join(UPLOAD_DIR, f"{unique_file_id}{file_extension}")
+        stored = await run_in_threadpool(
+            manager.finalize, upload_id, file_path_on_server, unique_file_id, "project_management"
+        )
+    except UploadError as e:
+        raise _upload_http_error(e)
+    schedule_preprocess(file_path_on_server, stored["content_hash"])
+
+    document_data = schemas.DocumentCreate(
+        project_id=project_id,
+        original_filename=upload_status["file_name"],
+        file_id=unique_file_id,
+        file_path=file_path_on_server,
+        file_type=file_type,
+        review_type=review_type,
+        status="uploaded"
+    )
+    return await crud.create_document(db=db, document=document_data)
+
+@router.post("/projects/{project_id}/documents/files/{file_id}", response_model=schemas.Document, status_code=status.HTTP_201_CREATED)
+async def create_document_from_registered_file(
+    project_id: int,
+    file_id: str,
+    file_type: Optional[str] = None,
+    review_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Associate a file that was already uploaded (by any app) with a project, without uploading it again.
+    The document keeps the upload's file_id and path; the file stays owned by the app that stored it
+    and is not deleted with the document.
+    """
+    db_project = await crud.get_project(db, project_id=project_id)
+    if not db_project:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    # The file registry is a blocking sqlite3 database
+    registry = get_file_registry()
+    entry = await run_in_threadpool(registry.get, file_id)
+    file_path = await run_in_threadpool(registry.resolve, file_id)
+    if entry is None or file_path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    if await crud.get_document_by_file_id(db, file_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="File is already attached to a document")
+
+    document_data = schemas.DocumentCreate(
+        project_id=project_id,
+        original_filename=entry["file_name"] or os.path.basename(file_path),
+        file_id=file_id,
+        file_path=file_path,
+        file_type=file_type,
+        review_type=review_type,
+        status="uploaded"
+    )
+    return await crud.create_document(db=db, document=document_data)
+
+def _store_project_file(file_name: str, open_stream) -> dict:
+    # Runs in a worker thread: stores one file like the single upload endpoint does
+    file_id = str(uuid.uuid4())
+    file_path = os.path.join(UPLOAD_DIR, f"{file_id}{os.path.splitext(file_name)[1]}")
+    with open_stream() as stream:
+        save_upload(stream, file_path, file_id, file_name, "project_management")
+    return {"file_id": file_id, "file_path": file_path}
+
+async def _bulk_import(
+    db: AsyncSession, project_id: int, sources: list, file_type: Optional[str], review_type: Optional[str]
+) -> schemas.BulkImportResult:
+    """
+    Store (file_name, open_stream) sources concurrently, then insert all their documents in one transaction.
+    A file that cannot be stored is reported as failed without affecting the others.
+    """
+    semaphore = asyncio.Semaphore(BULK_IMPORT_CONCURRENCY)
+
+    async def store(file_name, open_stream):
+        async with semaphore:
+            try:
+                return await run_in_threadpool(_store_project_file, file_name, open_stream)
+            except Exception as e:
+                return e
+
+    stored = await asyncio.gather(*(store(file_name, open_stream) for file_name, open_stream in sources))
+    documents = [
+        schemas.DocumentCreate(
+            project_id=project_id,
+            original_filename=file_name,
+            file_id=result["file_id"],
+            file_path=result["file_path"],
+            file_type=file_type,
+            review_type=review_type,
+            status="uploaded"
+        )
+        for (file_name, _), result in zip(sources, stored) if not isinstance(result, Exception)
+    ]
+    created = iter(await crud.create_documents(db, documents))
+
+    items = []
+    for (file_name, _), result in zip(sources, stored):
+        if isinstance(result, Exception):
+            items.append(schemas.BulkImportItem(file_name=file_name, status="failed", error=str(result)))
+        else:
+            document = schemas.Document.model_validate(next(created))
+            items.append(schemas.BulkImportItem(file_name=file_name, status="imported", document=document))
+    return schemas.BulkImportResult(
+        project_id=project_id, imported=len(documents), failed=len(items) - len(documents), items=items
+    )
+
+@router.post("/projects/{project_id}/documents/bulk", response_model=schemas.BulkImportResult, status_code=status.HTTP_201_CREATED)
+async def bulk_upload_documents_for_project(
+    project_id: int,
+    file_type: Optional[str] = None,
+    review_type: Optional[str] = None,
+    files: List[UploadFile] = File(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Upload many files in one request and create a document for each.
+    Files are stored concurrently and all documents are inserted in a single transaction;
+    the response has a per-file status.
+    """
+    if await crud.get_project(db, project_id=project_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    if len(files) > MAX_BULK_FILES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"At most {MAX_BULK_FILES} files per request")
+    try:
+        sources = [(file.filename, lambda file=file: file.file) for file in files]
+        return await _bulk_import(db, project_id, sources, file_type, review_type)
+    finally:
+        for file in files:
+            await file.close()
+
+@router.post("/projects/{project_id}/documents/import", response_model=schemas.BulkImportResult, status_code=status.HTTP_201_CREATED)
+async def import_documents_from_directory(
+    project_id: int,
+    source: schemas.DocumentImportDirectory,
+    file_type: Optional[str] = None,
+    review_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Import the files of a server-side folder that match `pattern` (for example '*需求规格说明*.docx').
+    The folder must be inside one of the PM_IMPORT_ROOTS folders, and the pattern may only name files
+    inside it (no path separators or '..'); matches that resolve outside the roots are skipped.
+    """
+    if await crud.get_project(db, project_id=project_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    if not _is_plain_pattern(source.pattern):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Pattern must be a file name pattern without path separators or '..'")
+    directory = os.path.realpath(source.directory)
+    if not _in_import_roots(directory):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Directory is not an allowed import location")
+    if not os.path.isdir(directory):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Directory not found")
+
+    pattern = os.path.join(directory, "**", source.pattern) if source.recursive else os.path.join(directory, source.pattern)
+    # A symlink inside the folder can still point anywhere: check where each match really is
+    paths = sorted(
+        (p, os.path.realpath(p)) for p in await run_in_threadpool(glob.glob, pattern, recursive=source.recursive)
+        if os.path.isfile(p)
+    )
+    paths = [(path, real_path) for path, real_path in paths if _in_import_roots(real_path)]
+    if len(paths) > MAX_BULK_FILES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"{len(paths)} files match; at most {MAX_BULK_FILES} per import")
+    sources = [(os.path.basename(path), lambda real_path=real_path: open(real_path, 'rb')) for path, real_path in paths]
+    return await _bulk_import(db, project_id, sources, file_type, review_type)
+
+@router.get("/projects/{project_id}/documents/", response_model=List[schemas.Document])
+async def read_documents_for_project(
+    project_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Retrieve documents for a specific project, newest first.
+    Pass the X-Next-After-Id header of the previous page as `after_id` to get the next page.
+    """
+    if await crud.get_project(db, project_id=project_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     
-    documents = crud.get_documents_by_project(db, project_id=project_id, skip=skip, limit=limit)
+    documents = await crud.get_documents_by_project(db, project_id=project_id, skip=skip, limit=limit, after_id=after_id)
+    total = await crud.count_documents_by_project(db, project_id) if include_total else None
+    set_page_headers(response, documents, limit, total)
     return documents
 
 @router.get("/{document_id}", response_model=schemas.Document)
-def read_single_document(document_id: int, db: Session = Depends(get_db)):
+async def read_single_document(document_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieve a single document by its ID.
     """
-    db_document = crud.get_document(db, document_id=document_id)
+    db_document = await crud.get_document(db, document_id=document_id)
     if db_document is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
     return db_document
 
 @router.put("/{document_id}", response_model=schemas.Document)
-def update_existing_document(
-    document_id: int, document_update: schemas.DocumentUpdate, db: Session = Depends(get_db)
+async def update_existing_document(
+    document_id: int, document_update: schemas.DocumentUpdate, db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update an existing document's metadata (not the file itself via this endpoint).
     """
-    updated_document = crud.update_document(db=db, document_id=document_id, document_update=document_update)
+    updated_document = await crud.update_document(db=db, document_id=document_id, document_update=document_update)
     if updated_document is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
     return updated_document
 
+def _owns_file(file_path: str) -> bool:
+    # Only files stored by this API (under UPLOAD_DIR) belong to their document. Documents attached from
+    # another app's upload point at that app's file or at the shared content-store blob, which other
+    # file_ids may resolve to.
+    upload_dir = os.path.realpath(UPLOAD_DIR)
+    return os.path.commonpath([upload_dir, os.path.realpath(file_path)]) == upload_dir
+
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_existing_document(document_id: int, db: Session = Depends(get_db)):
+async def delete_existing_document(document_id: int, db: AsyncSession = Depends(get_async_db)):
     """
-    Delete an existing document (metadata and the physical file).
+    Delete an existing document (metadata and, if the document owns it, the physical file).
     """
-    db_document = crud.get_document(db, document_id=document_id)
+    db_document = await crud.get_document(db, document_id=document_id)
     if not db_document:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
 
     # Attempt to delete the physical file
     try:
-        if os.path.exists(db_document.file_path):
-            os.remove(db_document.file_path)
+        if db_document.file_path and _owns_file(db_document.file_path) and os.path.exists(db_document.file_path):
+            await run_in_threadpool(os.remove, db_document.file_path)
     except Exception as e:
         # Log this error, but proceed to delete DB record if file deletion fails
         # Or, handle more gracefully (e.g., mark as 'file_missing' in DB)
         print(f"Error deleting file {db_document.file_path}: {e}") # Basic logging
 
-    success = crud.delete_document(db=db, document_id=document_id)
+    success = await crud.delete_document(db=db, document_id=document_id)
     if not success: # Should not happen if db_document was found, but good practice
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not delete document record")
     
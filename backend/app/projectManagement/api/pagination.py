@@ -0,0 +1,17 @@
+from fastapi import Response
+from typing import Optional, Sequence
+
+# Response headers of the list endpoints
+TOTAL_COUNT_HEADER = "X-Total-Count"
+NEXT_CURSOR_HEADER = "X-Next-After-Id"
+
+def set_page_headers(response: Response, rows: Sequence, limit: int, total: Optional[int] = None) -> None:
+    """
+    Add pagination headers to a list response.
+    X-Next-After-Id is the after_id for the next page and is only set when this page is full;
+    X-Total-Count is only set when the caller asked for it (include_total=true).
+    """
+    if rows and len(rows) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(rows[-1]["id"])
+    if total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
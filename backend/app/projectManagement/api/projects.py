@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
 from .. import crud, schemas, models # Adjusted imports for current structure
-from ...database import get_db # Adjusted import for get_db from app/database.py
+from ...database import get_async_db
+from .pagination import set_page_headers
 
 router = APIRouter(
     prefix="/projects",
@@ -11,7 +12,7 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=schemas.Project, status_code=status.HTTP_201_CREATED)
-def create_new_project(project: schemas.ProjectCreate, db: Session = Depends(get_db)):
+async def create_new_project(project: schemas.ProjectCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new project.
     """
@@ -24,7 +25,7 @@ def create_new_project(project: schemas.ProjectCreate, db: Session = Depends(get
     
     try:
         logger.info(f"Attempting to create project with name: {project.name}")
-        db_project_by_name = crud.get_project_by_name(db, name=project.name)
+        db_project_by_name = await crud.get_project_by_name(db, name=project.name)
         
         if db_project_by_name:
             logger.warning(f"Project with name '{project.name}' already exists")
@@ -34,7 +35,7 @@ def create_new_project(project: schemas.ProjectCreate, db: Session = Depends(get
             )
             
         logger.info("Creating new project in database")
-        return crud.create_project(db=db, project=project)
+        return await crud.create_project(db=db, project=project)
     except Exception as e:
         logger.error(f"Error creating project: {str(e)}")
         logger.error(traceback.format_exc())
@@ -44,54 +45,82 @@ def create_new_project(project: schemas.ProjectCreate, db: Session = Depends(get
         )
 
 @router.get("/", response_model=List[schemas.Project])
-def read_all_projects(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+async def read_all_projects(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Retrieve all projects with pagination.
+    Retrieve all projects, newest first.
+    Pass the X-Next-After-Id header of the previous page as `after_id` to get the next page;
+    `skip` (offset) is still accepted but gets slower the deeper the page.
     """
-    projects = crud.get_projects(db, skip=skip, limit=limit)
+    projects = await crud.get_projects(db, skip=skip, limit=limit, after_id=after_id)
+    set_page_headers(response, projects, limit, await crud.count_projects(db) if include_total else None)
     return projects
 
-@router.get("/{project_id}", response_model=schemas.ProjectWithDocuments) # Return project with its documents
-def read_single_project(project_id: int, db: Session = Depends(get_db)):
+@router.get("/{project_id}", response_model=schemas.ProjectWithDocuments) # Return project with a page of its documents
+async def read_single_project(
+    project_id: int,
+    documents_limit: int = Query(50, ge=0, le=500),
+    documents_after_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Retrieve a single project by its ID, including its documents.
+    Retrieve a single project by its ID, with at most `documents_limit` of its documents
+    and the number of documents per status. Use next_documents_after_id (or the document list endpoint)
+    to page through the rest.
     """
-    db_project = crud.get_project(db, project_id=project_id)
+    db_project = await crud.get_project(db, project_id=project_id)
     if db_project is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    return db_project
+
+    # The documents relationship is never loaded: a keyset page and a single GROUP BY replace it
+    documents = await crud.get_documents_by_project(
+        db, project_id=project_id, limit=documents_limit, after_id=documents_after_id
+    ) if documents_limit else []
+    status_counts = await crud.count_documents_by_status(db, project_id=project_id)
+    next_after_id = documents[-1]["id"] if documents and len(documents) >= documents_limit else None
+    return schemas.ProjectWithDocuments(
+        **schemas.Project.model_validate(db_project).model_dump(),
+        documents=documents,
+        document_count=sum(status_counts.values()),
+        document_status_counts=status_counts,
+        next_documents_after_id=next_after_id
+    )
 
 @router.put("/{project_id}", response_model=schemas.Project)
-def update_existing_project(
-    project_id: int, project_update: schemas.ProjectUpdate, db: Session = Depends(get_db)
+async def update_existing_project(
+    project_id: int, project_update: schemas.ProjectUpdate, db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update an existing project.
     """
-    db_project = crud.get_project(db, project_id=project_id)
+    db_project = await crud.get_project(db, project_id=project_id)
     if not db_project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     
     # Check if new name conflicts with another project
     if project_update.name and project_update.name != db_project.name:
-        conflicting_project = crud.get_project_by_name(db, name=project_update.name)
+        conflicting_project = await crud.get_project_by_name(db, name=project_update.name)
         if conflicting_project and conflicting_project.id != project_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Another project with name '{project_update.name}' already exists."
             )
             
-    updated_project = crud.update_project(db=db, project_id=project_id, project_update=project_update)
+    updated_project = await crud.update_project(db=db, project_id=project_id, project_update=project_update)
     return updated_project
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_existing_project(project_id: int, db: Session = Depends(get_db)):
+async def delete_existing_project(project_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Delete an existing project.
     """
-    success = crud.delete_project(db=db, project_id=project_id)
+    success = await crud.delete_project(db=db, project_id=project_id)
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     return # No content to return for 204
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from .. import crud, schemas
+from ...database import get_async_db
+
+router = APIRouter(
+    prefix="/search",
+)
+
+def _search_query(q: str) -> str:
+    # min_length=1 still lets a whitespace-only query through, which has no terms to match
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="Search query has no terms")
+    return q
+
+@router.get("/requirements", response_model=List[schemas.RequirementSearchHit])
+async def search_requirements(
+    q: str = Query(..., min_length=1, max_length=200, description="Space-separated terms, all must match"),
+    project_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Full-text search over the names and content of extracted requirements, best matches first.
+    """
+    return await crud.search_requirements(db, _search_query(q), project_id=project_id, limit=limit)
+
+@router.get("/findings", response_model=List[schemas.FindingSearchHit])
+async def search_review_findings(
+    q: str = Query(..., min_length=1, max_length=200, description="Space-separated terms, all must match"),
+    project_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Full-text search over review findings (problem titles and descriptions), best matches first.
+    """
+    return await crud.search_review_findings(db, _search_query(q), project_id=project_id, limit=limit)
@@ -1,97 +1,214 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
 from . import models, schemas
-from typing import List, Optional
+from typing import Dict, List, Optional
+
+# All operations are async and run on an AsyncSession (see database.get_async_db).
+# Relationships cannot be lazy-loaded through an AsyncSession, so anything a response needs is loaded explicitly.
+
+# List endpoints select only the columns of their response schema instead of loading ORM objects
+PROJECT_LIST_COLUMNS = [models.Project.__table__.c[name] for name in schemas.Project.model_fields]
+DOCUMENT_LIST_COLUMNS = [models.Document.__table__.c[name] for name in schemas.Document.model_fields]
+
+def _paginate(stmt, id_column, skip: int, limit: int, after_id: Optional[int]):
+    # Lists are ordered newest first. after_id is a keyset cursor (the last id of the previous page):
+    # it seeks straight to the next page through the index, whereas offset scans and discards `skip` rows.
+    stmt = stmt.order_by(id_column.desc()).limit(limit)
+    if after_id is not None:
+        return stmt.where(id_column < after_id)
+    return stmt.offset(skip) if skip else stmt
+
+async def _list_count(db: AsyncSession, scope: str, scope_id: int = 0) -> int:
+    # Counters are maintained by triggers (see models.list_counts)
+    counts = models.list_counts.c
+    count = await db.scalar(
+        select(counts.count).where(counts.scope == scope, counts.scope_id == scope_id)
+    )
+    return count or 0
 
 # --- Project CRUD Operations ---
-def get_project(db: Session, project_id: int) -> Optional[models.Project]:
-    return db.query(models.Project).filter(models.Project.id == project_id).first()
+async def get_project(db: AsyncSession, project_id: int) -> Optional[models.Project]:
+    return await db.get(models.Project, project_id)
+
+async def get_project_by_name(db: AsyncSession, name: str) -> Optional[models.Project]:
+    return await db.scalar(select(models.Project).where(models.Project.name == name).limit(1))
 
-def get_project_by_name(db: Session, name: str) -> Optional[models.Project]:
-    return db.query(models.Project).filter(models.Project.name == name).first()
+async def get_projects(
+    db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+) -> List[RowMapping]:
+    stmt = _paginate(select(*PROJECT_LIST_COLUMNS), models.Project.id, skip, limit, after_id)
+    return (await db.execute(stmt)).mappings().all()
 
-def get_projects(
-    db: Session, skip: int = 0, limit: int = 100
-) -> List[models.Project]:
-    return db.query(models.Project).order_by(models.Project.id.desc()).offset(skip).limit(limit).all()
+async def count_projects(db: AsyncSession) -> int:
+    return await _list_count(db, "projects")
 
-def create_project(db: Session, project: schemas.ProjectCreate) -> models.Project:
+async def create_project(db: AsyncSession, project: schemas.ProjectCreate) -> models.Project:
     db_project = models.Project(
         name=project.name
     )
     db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
+    await db.refresh(db_project)
     return db_project
 
-def update_project(
-    db: Session, project_id: int, project_update: schemas.ProjectUpdate
+async def update_project(
+    db: AsyncSession, project_id: int, project_update: schemas.ProjectUpdate
 ) -> Optional[models.Project]:
-    db_project = get_project(db, project_id)
+    db_project = await get_project(db, project_id)
     if not db_project:
         return None
-    
+
     update_data = project_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_project, field, value)
-    
-    db.commit()
-    db.refresh(db_project)
+
+    await db.commit()
+    await db.refresh(db_project)
     return db_project
 
-def delete_project(db: Session, project_id: int) -> bool:
-    db_project = get_project(db, project_id)
+async def delete_project(db: AsyncSession, project_id: int) -> bool:
+    db_project = await get_project(db, project_id)
     if not db_project:
         return False
-    
-    db.delete(db_project)
-    db.commit()
+
+    # The delete-orphan cascade loads and deletes the project's documents
+    await db.delete(db_project)
+    await db.commit()
     return True
 
 # --- Document CRUD Operations ---
-def get_document(db: Session, document_id: int) -> Optional[models.Document]:
-    return db.query(models.Document).filter(models.Document.id == document_id).first()
+async def get_document(db: AsyncSession, document_id: int) -> Optional[models.Document]:
+    return await db.get(models.Document, document_id)
 
-def get_documents_by_project(
-    db: Session, project_id: int, skip: int = 0, limit: int = 100
-) -> List[models.Document]:
-    return (
-        db.query(models.Document)
-        .filter(models.Document.project_id == project_id)
-        .order_by(models.Document.id.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+async def get_document_by_file_id(db: AsyncSession, file_id: str) -> Optional[models.Document]:
+    return await db.scalar(select(models.Document).where(models.Document.file_id == file_id).limit(1))
+
+async def get_documents_by_project(
+    db: AsyncSession, project_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+) -> List[RowMapping]:
+    stmt = select(*DOCUMENT_LIST_COLUMNS).where(models.Document.project_id == project_id)
+    stmt = _paginate(stmt, models.Document.id, skip, limit, after_id)
+    return (await db.execute(stmt)).mappings().all()
+
+async def count_documents_by_project(db: AsyncSession, project_id: int) -> int:
+    return await _list_count(db, "documents", project_id)
+
+async def count_documents_by_status(db: AsyncSession, project_id: int) -> Dict[str, int]:
+    rows = await db.execute(
+        select(models.Document.status, func.count())
+        .where(models.Document.project_id == project_id)
+        .group_by(models.Document.status)
     )
+    return {status: count for status, count in rows}
 
-def create_document(
-    db: Session, document: schemas.DocumentCreate
+async def create_document(
+    db: AsyncSession, document: schemas.DocumentCreate
 ) -> models.Document:
     db_document = models.Document(**document.model_dump())
     db.add(db_document)
-    db.commit()
-    db.refresh(db_document)
+    await db.commit()
+    await db.refresh(db_document)
     return db_document
 
-def update_document(
-    db: Session, document_id: int, document_update: schemas.DocumentUpdate
+async def create_documents(
+    db: AsyncSession, documents: List[schemas.DocumentCreate]
+) -> List[models.Document]:
+    # One multi-row INSERT ... RETURNING in a single transaction instead of a commit and refresh per document
+    if not documents:
+        return []
+    result = await db.scalars(
+        insert(models.Document).returning(models.Document, sort_by_parameter_order=True),
+        [document.model_dump() for document in documents]
+    )
+    db_documents = result.all()
+    await db.commit()
+    return db_documents
+
+async def update_document(
+    db: AsyncSession, document_id: int, document_update: schemas.DocumentUpdate
 ) -> Optional[models.Document]:
-    db_document = get_document(db, document_id)
+    db_document = await get_document(db, document_id)
     if not db_document:
         return None
-    
+
     update_data = document_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_document, field, value)
-        
-    db.commit()
-    db.refresh(db_document)
+
+    await db.commit()
+    await db.refresh(db_document)
     return db_document
 
-def delete_document(db: Session, document_id: int) -> bool:
-    db_document = get_document(db, document_id)
+async def delete_document(db: AsyncSession, document_id: int) -> bool:
+    db_document = await get_document(db, document_id)
     if not db_document:
         return False
-    
-    db.delete(db_document)
-    db.commit()
+
+    await db.delete(db_document)
+    await db.commit()
     return True
+
+# --- Requirement / Review Finding Search ---
+# The trigram tokenizer matches terms of 3+ characters through the index; shorter terms (most two-character
+# Chinese words) fall back to LIKE, which scans the indexed text instead.
+FTS_MIN_TERM_LENGTH = 3
+
+def _search_condition(fts_table: str, columns: List[str], query: str, params: dict) -> str:
+    terms = query.split()
+    if not terms:
+        # MATCH '' is an FTS5 syntax error and an empty LIKE list would match everything
+        raise ValueError("Search query has no terms")
+    if all(len(term) >= FTS_MIN_TERM_LENGTH for term in terms):
+        # Every term as a quoted phrase, all required
+        params["match"] = " AND ".join('"' + term.replace('"', '""') + '"' for term in terms)
+        return f"{fts_table} MATCH :match"
+    conditions = []
+    for i, term in enumerate(terms):
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params[f"like{i}"] = f"%{escaped}%"
+        conditions.append("(" + " OR ".join(f"f.{column} LIKE :like{i} ESCAPE '\\'" for column in columns) + ")")
+    return " AND ".join(conditions)
+
+async def _search(db: AsyncSession, select_sql: str, fts_table: str, columns: List[str], snippet_column: str,
+                  query: str, project_id: Optional[int], limit: int) -> List[RowMapping]:
+    params = {"limit": limit}
+    condition = _search_condition(fts_table, columns, query, params)
+    if project_id is not None:
+        condition += " AND d.project_id = :project_id"
+        params["project_id"] = project_id
+    if "match" in params:
+        snippet, order = f"snippet({fts_table}, -1, '[', ']', '…', 24)", "rank"
+    else:
+        # snippet() needs a MATCH; show the text around the first term instead
+        params["term"] = query.split()[0]
+        snippet = (f"substr(f.{snippet_column}, max(instr(f.{snippet_column}, :term) - 20, 1), 60)")
+        order = "f.rowid DESC"
+    stmt = text(f"{select_sql.format(snippet=snippet)} WHERE {condition} ORDER BY {order} LIMIT :limit")
+    return (await db.execute(stmt, params)).mappings().all()
+
+async def search_requirements(
+    db: AsyncSession, query: str, project_id: Optional[int] = None, limit: int = 20
+) -> List[RowMapping]:
+    return await _search(db, """
+        SELECT r.id, r.name, r.chapter, r.review_score, r.file_id, r.document_id,
+               d.project_id, d.original_filename,
+               {snippet} AS snippet
+        FROM requirements_fts f
+        JOIN requirements r ON r.id = f.rowid
+        LEFT JOIN documents d ON d.id = r.document_id
+    """, "requirements_fts", ["name", "content"], "content", query, project_id, limit)
+
+async def search_review_findings(
+    db: AsyncSession, query: str, project_id: Optional[int] = None, limit: int = 20
+) -> List[RowMapping]:
+    return await _search(db, """
+        SELECT rf.id, rf.requirement_id, r.name AS requirement_name, rf.problem_title,
+               r.file_id, r.document_id, d.project_id, d.original_filename,
+               {snippet} AS snippet
+        FROM review_findings_fts f
+        JOIN review_findings rf ON rf.id = f.rowid
+        JOIN requirements r ON r.id = rf.requirement_id
+        LEFT JOIN documents d ON d.id = r.document_id
+    """, "review_findings_fts", ["problem_title", "problem_description", "requirement_description"],
+        "problem_description", query, project_id, limit)
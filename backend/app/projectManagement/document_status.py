@@ -0,0 +1,47 @@
+"""
+Keeps Document.status in step with the extraction/review jobs run on the document's upload.
+
+The document review apps register on_job_status() as a job queue listener
+(see app.documentReview.common.job_queue); jobs carry the upload's file_id and their stage.
+"""
+import logging
+
+from sqlalchemy import update
+
+from ..database import engine
+from . import models
+
+# Document status for each job stage and job status. A cancelled job sets the status the stage starts from,
+# and only while the document is still in that stage's running status: cancelling a job that never ran
+# (or whose document moved on since) leaves the document alone.
+JOB_DOCUMENT_STATUSES = {
+    "extract": {"running": "extracting", "succeeded": "extracted", "failed": "extract_failed", "cancelled": "uploaded"},
+    "review": {"running": "reviewing", "succeeded": "reviewed", "failed": "review_failed", "cancelled": "extracted"},
+}
+
+
+def update_document_status(file_id, status, db_engine=engine, current_status=None):
+    """
+    Set the status of the project document(s) created from an upload; returns the number of documents updated.
+    With current_status, only documents that have that status are updated.
+    """
+    if not file_id:
+        return 0
+    stmt = update(models.Document).where(models.Document.file_id == file_id)
+    if current_status is not None:
+        stmt = stmt.where(models.Document.status == current_status)
+    with db_engine.begin() as conn:
+        return conn.execute(stmt.values(status=status)).rowcount
+
+
+def on_job_status(job, status):
+    """Job queue listener: mirror a job's status onto the document it processes. Never raises."""
+    stage_statuses = JOB_DOCUMENT_STATUSES.get(job.get("stage") or "", {})
+    document_status = stage_statuses.get(status)
+    if not document_status or not job.get("file_id"):
+        return
+    current_status = stage_statuses["running"] if status == "cancelled" else None
+    try:
+        update_document_status(job["file_id"], document_status, current_status=current_status)
+    except Exception as e:
+        logging.error(f"Updating document status for job {job.get('job_id')} failed: {e}", exc_info=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, Table, DDL, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base # Adjusted import path for database.py in app/
@@ -29,3 +29,134 @@ class Document(Base):
     
     # Relationship to project
     project = relationship("Project", back_populates="documents")
+
+# Listing a project's documents (newest first) and the cascade delete both filter on project_id;
+# existing databases get this index from the migration in init_db.py
+Index("ix_documents_project_id_id", Document.project_id, Document.id.desc())
+# Covers the per-status document counts of the project detail (GROUP BY status)
+Index("ix_documents_project_id_status", Document.project_id, Document.status)
+
+class Requirement(Base):
+    """A requirement extracted from an uploaded file by the document review apps."""
+    __tablename__ = "requirements"
+
+    id = Column(Integer, primary_key=True)
+    # Set when the uploaded file is (or later becomes) a project document, see REQUIREMENT_SEARCH_DDL
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=True, index=True)
+    file_id = Column(String(100), nullable=True, index=True)
+    session_id = Column(String(100), nullable=True, index=True) # Extraction session that produced it
+    name = Column(String(500), nullable=False)
+    chapter = Column(String(100), nullable=True)
+    content = Column(Text, nullable=True)
+    review_score = Column(Integer, nullable=True)
+    review_summary = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    document = relationship("Document")
+    findings = relationship("ReviewFinding", back_populates="requirement", passive_deletes=True)
+
+class ReviewFinding(Base):
+    """One problem reported by the AI review of a requirement."""
+    __tablename__ = "review_findings"
+
+    id = Column(Integer, primary_key=True)
+    requirement_id = Column(Integer, ForeignKey("requirements.id", ondelete="CASCADE"), nullable=False, index=True)
+    problem_title = Column(String(255), nullable=True)
+    requirement_description = Column(Text, nullable=True)
+    problem_description = Column(Text, nullable=True)
+    problem_location = Column(Text, nullable=True)
+    impact_analysis = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    requirement = relationship("Requirement", back_populates="findings")
+
+# Row counters for the list endpoints' total-count header, so a count never scans the documents table.
+# scope "projects" (scope_id 0) counts all projects; scope "documents" counts the documents of project scope_id.
+# The triggers below keep them current for every write path (ORM, bulk inserts, cascades).
+list_counts = Table(
+    "list_counts",
+    Base.metadata,
+    Column("scope", String(20), primary_key=True),
+    Column("scope_id", Integer, primary_key=True),
+    Column("count", Integer, nullable=False, default=0),
+)
+
+LIST_COUNT_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS trg_projects_count_insert AFTER INSERT ON projects BEGIN
+        INSERT INTO list_counts (scope, scope_id, count) VALUES ('projects', 0, 1)
+        ON CONFLICT (scope, scope_id) DO UPDATE SET count = count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_projects_count_delete AFTER DELETE ON projects BEGIN
+        UPDATE list_counts SET count = count - 1 WHERE scope = 'projects' AND scope_id = 0;
+        DELETE FROM list_counts WHERE scope = 'documents' AND scope_id = OLD.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_documents_count_insert AFTER INSERT ON documents BEGIN
+        INSERT INTO list_counts (scope, scope_id, count) VALUES ('documents', NEW.project_id, 1)
+        ON CONFLICT (scope, scope_id) DO UPDATE SET count = count + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_documents_count_delete AFTER DELETE ON documents BEGIN
+        UPDATE list_counts SET count = count - 1 WHERE scope = 'documents' AND scope_id = OLD.project_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_documents_count_move AFTER UPDATE OF project_id ON documents
+    WHEN NEW.project_id != OLD.project_id BEGIN
+        UPDATE list_counts SET count = count - 1 WHERE scope = 'documents' AND scope_id = OLD.project_id;
+        INSERT INTO list_counts (scope, scope_id, count) VALUES ('documents', NEW.project_id, 1)
+        ON CONFLICT (scope, scope_id) DO UPDATE SET count = count + 1;
+    END""",
+]
+
+# Recomputes every counter from the tables; used when the counters are first added to an existing database
+LIST_COUNT_REBUILD = [
+    "DELETE FROM list_counts",
+    "INSERT INTO list_counts (scope, scope_id, count) SELECT 'projects', 0, COUNT(*) FROM projects",
+    "INSERT INTO list_counts (scope, scope_id, count) "
+    "SELECT 'documents', project_id, COUNT(*) FROM documents GROUP BY project_id",
+]
+
+# Triggers span several tables, so they are created once the whole schema exists
+for _trigger in LIST_COUNT_TRIGGERS:
+    event.listen(Base.metadata, "after_create", DDL(_trigger).execute_if(dialect="sqlite"))
+
+# Full-text search over requirements and review findings.
+# The FTS5 tables index the rows of requirements / review_findings (external content) with the trigram tokenizer,
+# which needs no word segmentation and therefore works for Chinese text; triggers keep them in sync.
+# SQLite does not enforce foreign keys here, so triggers also do the cascades
+# and link requirements to a document that is created for their file later on.
+REQUIREMENT_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS requirements_fts USING fts5(
+        name, content, content='requirements', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS review_findings_fts USING fts5(
+        problem_title, problem_description, requirement_description,
+        content='review_findings', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS trg_requirements_fts_insert AFTER INSERT ON requirements BEGIN
+        INSERT INTO requirements_fts (rowid, name, content) VALUES (NEW.id, NEW.name, NEW.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_requirements_fts_update AFTER UPDATE OF name, content ON requirements BEGIN
+        INSERT INTO requirements_fts (requirements_fts, rowid, name, content) VALUES ('delete', OLD.id, OLD.name, OLD.content);
+        INSERT INTO requirements_fts (rowid, name, content) VALUES (NEW.id, NEW.name, NEW.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_requirements_delete AFTER DELETE ON requirements BEGIN
+        INSERT INTO requirements_fts (requirements_fts, rowid, name, content) VALUES ('delete', OLD.id, OLD.name, OLD.content);
+        DELETE FROM review_findings WHERE requirement_id = OLD.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_review_findings_fts_insert AFTER INSERT ON review_findings BEGIN
+        INSERT INTO review_findings_fts (rowid, problem_title, problem_description, requirement_description)
+        VALUES (NEW.id, NEW.problem_title, NEW.problem_description, NEW.requirement_description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_review_findings_fts_delete AFTER DELETE ON review_findings BEGIN
+        INSERT INTO review_findings_fts (review_findings_fts, rowid, problem_title, problem_description, requirement_description)
+        VALUES ('delete', OLD.id, OLD.problem_title, OLD.problem_description, OLD.requirement_description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_documents_link_requirements AFTER INSERT ON documents BEGIN
+        UPDATE requirements SET document_id = NEW.id WHERE file_id = NEW.file_id AND document_id IS NULL;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_documents_delete_requirements AFTER DELETE ON documents BEGIN
+        DELETE FROM requirements WHERE document_id = OLD.id;
+    END""",
+]
+
+for _statement in REQUIREMENT_SEARCH_DDL:
+    event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
@@ -0,0 +1,238 @@
+"""
+Writes extracted requirements and review findings into the project database.
+
+The document review apps call record_requirements() / record_reviews() when an extraction or review finishes.
+Those calls only enqueue; a background thread writes everything queued so far in one transaction
+(each result in its own savepoint, so one bad result does not drop the others),
+so request threads never wait on the database and bursts of results become a few batched writes.
+"""
+import atexit
+import logging
+import queue
+import threading
+
+from sqlalchemy import bindparam, delete, insert, select, update
+
+from ..database import engine
+from . import models
+
+# Seconds the writer waits for more results before writing a batch
+FLUSH_INTERVAL = 1.0
+
+# Most queued results written in one transaction
+MAX_BATCH = 200
+
+# Rows per multi-row INSERT statement
+INSERT_CHUNK = 500
+
+_store_instance = None
+_store_instance_lock = threading.Lock()
+
+
+def _text(value):
+    return value if isinstance(value, str) else ("" if value is None else str(value))
+
+
+def _name(value):
+    # Requirement name as stored (and matched) in the requirements table
+    return _text(value)[:500] or "未命名需求"
+
+
+def _requirement_row(requirement, session_id, file_id, document_id):
+    return {
+        "session_id": session_id or None,
+        "file_id": file_id,
+        "document_id": document_id,
+        "name": _name(requirement.get("name")),
+        "chapter": _text(requirement.get("chapter"))[:100],
+        "content": _text(requirement.get("content")),
+    }
+
+
+def _insert(conn, model, rows):
+    # One multi-row INSERT per chunk rather than executemany: FTS5 flushes its pending index data at the
+    # end of every statement that fires the sync triggers, so row-by-row inserts write a segment per row
+    for start in range(0, len(rows), INSERT_CHUNK):
+        conn.execute(insert(model).values(rows[start:start + INSERT_CHUNK]))
+
+
+class RequirementStore:
+    """
+    Batched writer for the requirements / review_findings tables
+    """
+
+    def __init__(self, db_engine=engine, flush_interval=FLUSH_INTERVAL):
+        self.engine = db_engine
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="requirement-store", daemon=True)
+        self._thread.start()
+        # Results still queued when the process exits are written before it does
+        atexit.register(self.flush)
+
+    def record_requirements(self, session_id, file_id, requirements):
+        """
+        Queue the requirements extracted in a session; they replace earlier requirements of the same session.
+
+        Args:
+            session_id: extraction session ID
+            file_id: upload the requirements were extracted from
+            requirements: list of {"name", "chapter", "content"}
+        """
+        if requirements:
+            self._queue.put(("requirements", session_id, file_id, list(requirements), None))
+
+    def record_reviews(self, session_id, file_id, requirements, review_results):
+        """
+        Queue the review results of a session. Each result is attached to the session's requirement
+        with the same name (created if missing) and replaces that requirement's earlier findings.
+
+        Args:
+            session_id: session ID
+            file_id: upload the requirements came from, if known
+            requirements: the reviewed requirements
+            review_results: results in the same order, {"name", "review_result": {"requirements_review", "score", "summary"}}
+        """
+        if review_results:
+            self._queue.put(("reviews", session_id, file_id, list(requirements or []), list(review_results)))
+
+    def flush(self):
+        """Write everything queued so far (used at shutdown and by tests/benchmarks)."""
+        while self._write_batch(block=False):
+            pass
+
+    def _run(self):
+        while True:
+            try:
+                self._write_batch(block=True)
+            except Exception as e:
+                logging.error(f"Writing requirements to the database failed: {e}", exc_info=True)
+
+    def _write_batch(self, block):
+        try:
+            items = [self._queue.get(timeout=self.flush_interval) if block else self._queue.get_nowait()]
+        except queue.Empty:
+            return False
+        while len(items) < MAX_BATCH:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        with self._write_lock, self.engine.begin() as conn:
+            for kind, session_id, file_id, requirements, review_results in items:
+                # One SAVEPOINT per item: a bad item is rolled back and dropped without losing the rest of the batch
+                try:
+                    with conn.begin_nested():
+                        if kind == "requirements":
+                            self._write_requirements(conn, session_id, file_id, requirements)
+                        else:
+                            self._write_reviews(conn, session_id, file_id, requirements, review_results)
+                except Exception as e:
+                    logging.error(f"Writing {kind} of session {session_id} to the database failed: {e}", exc_info=True)
+        return True
+
+    def _document_id(self, conn, file_id):
+        if not file_id:
+            return None
+        return conn.scalar(select(models.Document.id).where(models.Document.file_id == file_id))
+
+    def _write_requirements(self, conn, session_id, file_id, requirements):
+        if session_id:
+            # Re-extraction in the same session replaces its requirements (findings go with them, see triggers)
+            conn.execute(delete(models.Requirement).where(models.Requirement.session_id == session_id))
+        document_id = self._document_id(conn, file_id)
+        rows = [_requirement_row(r, session_id, file_id, document_id) for r in requirements if isinstance(r, dict)]
+        if rows:
+            _insert(conn, models.Requirement, rows)
+
+    def _write_reviews(self, conn, session_id, file_id, requirements, review_results):
+        existing = {}
+        if session_id:
+            rows = conn.execute(
+                select(models.Requirement.id, models.Requirement.name, models.Requirement.file_id)
+                .where(models.Requirement.session_id == session_id)
+            )
+            for requirement_id, name, stored_file_id in rows:
+                existing.setdefault(name, requirement_id)
+                file_id = file_id or stored_file_id
+
+        # Reviewed requirements that were never recorded (e.g. entered by hand) are created now
+        by_name = {_name(r.get("name")): r for r in requirements if isinstance(r, dict)}
+        missing = [
+            by_name.get(_name(result.get("name")), {"name": result.get("name"), "chapter": result.get("chapter")})
+            for result in review_results
+            if isinstance(result, dict) and _name(result.get("name")) not in existing
+        ]
+        if missing:
+            document_id = self._document_id(conn, file_id)
+            created = conn.execute(
+                insert(models.Requirement).returning(models.Requirement.id, models.Requirement.name,
+                                                     sort_by_parameter_order=True),
+                [_requirement_row(r, session_id, file_id, document_id) for r in missing]
+            )
+            for requirement_id, name in created:
+                existing.setdefault(name, requirement_id)
+
+        findings = []
+        scores = []
+        for result in review_results:
+            if not isinstance(result, dict):
+                continue
+            requirement_id = existing.get(_name(result.get("name")))
+            if requirement_id is None:
+                continue
+            review = result.get("review_result") or {}
+            score = review.get("score")
+            scores.append({
+                "requirement_id": requirement_id,
+                "score": score if isinstance(score, int) else None,
+                "summary": _text(review.get("summary")),
+            })
+            for problem in review.get("requirements_review") or []:
+                if isinstance(problem, dict):
+                    findings.append({
+                        "requirement_id": requirement_id,
+                        "problem_title": _text(problem.get("problem_title"))[:255],
+                        "requirement_description": _text(problem.get("requirement_description")),
+                        "problem_description": _text(problem.get("problem_description")),
+                        "problem_location": _text(problem.get("problem_location")),
+                        "impact_analysis": _text(problem.get("impact_analysis")),
+                    })
+        if scores:
+            conn.execute(
+                update(models.Requirement).where(models.Requirement.id == bindparam("requirement_id"))
+                .values(review_score=bindparam("score"), review_summary=bindparam("summary")),
+                scores
+            )
+            # A new review replaces the previous findings of the same requirements
+            reviewed_ids = [row["requirement_id"] for row in scores]
+            conn.execute(delete(models.ReviewFinding).where(models.ReviewFinding.requirement_id.in_(reviewed_ids)))
+        if findings:
+            _insert(conn, models.ReviewFinding, findings)
+
+
+def get_requirement_store():
+    """Return the process-wide requirement store, starting its writer thread on first use."""
+    global _store_instance
+    if _store_instance is None:
+        with _store_instance_lock:
+            if _store_instance is None:
+                _store_instance = RequirementStore()
+    return _store_instance
+
+
+def record_requirements(session_id, file_id, requirements):
+    """Queue extracted requirements, see RequirementStore.record_requirements. Never raises."""
+    try:
+        get_requirement_store().record_requirements(session_id, file_id, requirements)
+    except Exception as e:
+        logging.error(f"Queueing requirements failed: {e}", exc_info=True)
+
+
+def record_reviews(session_id, file_id, requirements, review_results):
+    """Queue review results, see RequirementStore.record_reviews. Never raises."""
+    try:
+        get_requirement_store().record_reviews(session_id, file_id, requirements, review_results)
+    except Exception as e:
+        logging.error(f"Queueing review results failed: {e}", exc_info=True)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 # --- Project Schemas ---
 class ProjectBase(BaseModel):
@@ -36,6 +36,16 @@ class DocumentBase(BaseModel):
 class DocumentCreate(DocumentBase):
     project_id: int
 
+class ChunkedUploadInit(BaseModel):
+    file_name: str = Field(..., max_length=255)
+    total_size: int = Field(..., gt=0, description="Size of the whole file in bytes")
+    checksum: Optional[str] = Field(None, max_length=64, description="Optional SHA-256 of the whole file, verified on finalize")
+
+class DocumentImportDirectory(BaseModel):
+    directory: str = Field(..., description="Server-side folder; must be inside one of the PM_IMPORT_ROOTS folders")
+    pattern: str = Field("*.docx", max_length=255, description="Glob pattern of the files to import, e.g. '*需求规格说明*.docx'")
+    recursive: bool = Field(False, description="Also match files in subfolders")
+
 class DocumentUpdate(BaseModel):
     original_filename: Optional[str] = Field(None, max_length=255)
     file_type: Optional[str] = Field(None, max_length=50)
@@ -54,6 +64,45 @@ class DocumentInDBBase(DocumentBase):
 class Document(DocumentInDBBase):
     pass
 
-# For Project response model to include its documents
+# Project detail: one page of its documents (newest first) plus counts over all of them
 class ProjectWithDocuments(Project):
     documents: List[Document] = []
+    document_count: int = 0
+    document_status_counts: Dict[str, int] = Field(default_factory=dict, description="Number of documents per status")
+    next_documents_after_id: Optional[int] = Field(None, description="Pass as documents_after_id to get the next page of documents")
+
+# Result of a bulk import: one item per file, in request order
+class BulkImportItem(BaseModel):
+    file_name: str
+    status: str = Field(..., description="'imported' or 'failed'")
+    document: Optional[Document] = None
+    error: Optional[str] = None
+
+class BulkImportResult(BaseModel):
+    project_id: int
+    imported: int
+    failed: int
+    items: List[BulkImportItem]
+
+# --- Search Schemas ---
+class RequirementSearchHit(BaseModel):
+    id: int
+    name: str
+    chapter: Optional[str] = None
+    snippet: str = Field(..., description="Matching text with the match wrapped in [ ]")
+    review_score: Optional[int] = None
+    file_id: Optional[str] = None
+    document_id: Optional[int] = None
+    project_id: Optional[int] = None
+    original_filename: Optional[str] = None
+
+class FindingSearchHit(BaseModel):
+    id: int
+    requirement_id: int
+    requirement_name: str
+    problem_title: Optional[str] = None
+    snippet: str = Field(..., description="Matching text with the match wrapped in [ ]")
+    file_id: Optional[str] = None
+    document_id: Optional[int] = None
+    project_id: Optional[int] = None
+    original_filename: Optional[str] = None
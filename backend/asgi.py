@@ -0,0 +1,43 @@
+"""
+后端ASGI入口
+项目管理API（FastAPI）直接运行在ASGI服务器的事件循环中，配置项和回归测试的Flask应用通过a2wsgi在线程池中运行，
+挂载路径和跨域设置与run.py的开发服务器相同
+
+用法: uvicorn asgi:application --host 0.0.0.0 --port 5002
+"""
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware as ASGICORSMiddleware
+from starlette.routing import Mount
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+
+from run import root_app, WSGI_MOUNTS, CORSMiddleware, RequestDebugMiddleware, start_services
+from app.projectManagement import pm_app
+
+# 与run.py中CORSMiddleware相同的跨域设置
+pm_application = ASGICORSMiddleware(
+    pm_app,
+    allow_origins=['*'],
+    allow_methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
+    allow_headers=['Content-Type', 'Authorization', 'X-Requested-With', 'Accept'],
+    allow_credentials=True,
+    expose_headers=['X-Total-Count', 'X-Next-After-Id'],
+    max_age=3600,
+)
+
+wsgi_application = RequestDebugMiddleware(CORSMiddleware(DispatcherMiddleware(root_app, WSGI_MOUNTS)))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # 服务启动时初始化数据库并启动后台服务
+    start_services()
+    yield
+
+
+application = Starlette(routes=[
+    Mount('/pm_api', app=pm_application),
+    Mount('/', app=WSGIMiddleware(wsgi_application)),
+], lifespan=lifespan)
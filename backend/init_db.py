@@ -8,15 +8,60 @@ BACKEND_DIR = SCRIPT_DIR # Assuming init_db.py is in the backend root
 sys.path.append(os.path.dirname(BACKEND_DIR)) # Add parent of backend to path if needed for 'app'
 sys.path.append(BACKEND_DIR) # Add backend to path
 
+from sqlalchemy import text
+
 from app.database import Base, engine # Corrected import path
 from app.projectManagement.models import Project, Document # Ensure models are imported
+from app.projectManagement.models import LIST_COUNT_TRIGGERS, LIST_COUNT_REBUILD, REQUIREMENT_SEARCH_DDL
+
+# Schema migrations for databases created by earlier versions, applied in order.
+# The last applied version is stored in SQLite's user_version pragma; every statement is idempotent.
+MIGRATIONS = [
+    (1, [
+        # Composite index for per-project document listing and cascade deletes
+        "CREATE INDEX IF NOT EXISTS ix_documents_project_id_id ON documents (project_id, id DESC)",
+        "ANALYZE",
+    ]),
+    (2, [
+        # Maintained row counters for the list endpoints' total-count header
+        "CREATE TABLE IF NOT EXISTS list_counts (scope VARCHAR(20) NOT NULL, scope_id INTEGER NOT NULL, "
+        "count INTEGER NOT NULL, PRIMARY KEY (scope, scope_id))",
+        *LIST_COUNT_TRIGGERS,
+        *LIST_COUNT_REBUILD,
+    ]),
+    (3, [
+        # Covering index for the per-status document counts of the project detail
+        "CREATE INDEX IF NOT EXISTS ix_documents_project_id_status ON documents (project_id, status)",
+        "ANALYZE",
+    ]),
+    (4, [
+        # requirements / review_findings are created by create_all; add their full-text indexes and triggers
+        *REQUIREMENT_SEARCH_DDL,
+    ]),
+]
+
+def migrate(bind=engine):
+    """Apply pending migrations and return the resulting schema version."""
+    with bind.begin() as conn:
+        version = conn.execute(text("PRAGMA user_version")).scalar()
+        for target, statements in MIGRATIONS:
+            if target <= version:
+                continue
+            print(f"Applying migration {target}...")
+            for statement in statements:
+                conn.execute(text(statement))
+            conn.execute(text(f"PRAGMA user_version = {int(target)}"))
+            version = target
+    return version
 
-def init_db():
+def init_db(bind=engine):
     print("Initializing database...")
     # Create all tables
     # This will create tables based on all imported models that inherit from Base
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=bind)
     print("Database tables created successfully (if they didn't exist)!")
+    version = migrate(bind)
+    print(f"Database schema is at version {version}")
 
 if __name__ == "__main__":
     # This allows running the script directly, e.g., python init_db.py
@@ -1,6 +1,7 @@
 """
 后端应用入口文件
 """
+import os
 import logging
 import json
 from flask import Flask, Response, jsonify
@@ -10,6 +11,9 @@ from werkzeug.wrappers import Request
 from app.documentReview.ConfigurationItem.configurationItem import app as config_app
 from app.documentReview.Regression.api import app as regression_app
 from app.projectManagement import pm_app
+from app.documentReview.common.storage_lifecycle import start_storage_manager
+from app.documentReview.common.job_queue import get_job_queue
+from init_db import init_db
 from a2wsgi import ASGIMiddleware
 
 # 配置日志
@@ -34,6 +38,7 @@ class CORSMiddleware:
                 ('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Requested-With, Accept'),
                 ('Access-Control-Allow-Credentials', 'true'),  # 允许携带凭证
                 ('Access-Control-Max-Age', '3600'),  # 预检请求的缓存时间
+                ('Access-Control-Expose-Headers', 'X-Total-Count, X-Next-After-Id'),  # 列表接口的分页头
             ]
             
             # 删除可能存在的CORS头以避免重复
@@ -77,9 +82,15 @@ def welcome():
         }
     })
 
-base_application = DispatcherMiddleware(root_app, {
+# Flask应用的挂载路径，asgi.py中同样使用
+WSGI_MOUNTS = {
     '/api': config_app,  # 将config_app映射到/api前缀
     '/regression': regression_app,
+}
+
+# 开发服务器中项目管理API（ASGI）通过a2wsgi转换后挂载；生产环境使用asgi.py直接运行在ASGI服务器上
+base_application = DispatcherMiddleware(root_app, {
+    **WSGI_MOUNTS,
     '/pm_api': ASGIMiddleware(pm_app)
 })
 
@@ -121,6 +132,15 @@ app_with_cors = CORSMiddleware(base_application)
 # 添加调试中间件
 application = RequestDebugMiddleware(app_with_cors)
 
+def start_services():
+    """
+    创建项目管理数据表并应用数据库迁移，启动后台任务的工作线程和上传、输出目录的后台清理
+    只在提供服务的进程中调用（开发服务器见下方__main__，ASGI服务器见asgi.py的lifespan），导入本模块没有副作用
+    """
+    init_db()
+    get_job_queue().start()
+    start_storage_manager()
+
 # 打印所有注册的路由
 def print_routes():
     import logging
@@ -145,5 +165,8 @@ def print_routes():
 
 if __name__ == '__main__':
     print_routes()
+    # 开启自动重载时父进程只监视文件变化并重启子进程（子进程中WERKZEUG_RUN_MAIN为true），后台服务只在子进程中启动
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_services()
     # 启动服务
     run_simple('0.0.0.0', 5002, application, use_reloader=True, use_debugger=True)
@@ -0,0 +1,161 @@
+"""
+回归测试需求文档读取性能基准
+生成一个包含N个需求的回归测试需求规格说明，统计需求内容提取耗时
+
+用法: python tests/bench_document_reader.py [需求数量]
+"""
+import os
+import re
+import sys
+import time
+import logging
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+
+from app.documentReview.Regression import document_reader
+from app.documentReview.Regression.document_reader import (
+    collect_requirement_indicators,
+    extract_requirement_content,
+    identify_toc_sections,
+    read_xuqiu_wendang_document,
+)
+from app.documentReview.Regression.indicator_matcher import build_indicator_hits
+from app.documentReview.Regression.paragraph_index import ParagraphIndex
+from app.documentReview.Regression.paragraph_features import ParagraphFeatures
+
+
+def requirement_title(index):
+    """生成互不重复的需求名称"""
+    return f"重构第{index}号子系统的数据处理算法"
+
+
+def build_regression_spec(path, requirement_count=500):
+    """
+    生成回归测试需求规格说明样例文档
+
+    Args:
+        path: 输出docx路径
+        requirement_count: 需求数量
+
+    Returns:
+        需求名称列表
+    """
+    doc = Document()
+    doc.add_paragraph("软件需求规格说明")
+    doc.add_paragraph("目录")
+    names = []
+    for i in range(1, requirement_count + 1):
+        names.append(requirement_title(i))
+        doc.add_paragraph(f"3.{(i - 1) // 50 + 1}.{(i - 1) % 50 + 1} {requirement_title(i)} ........ {i + 10}")
+    for i in range(1, requirement_count + 1):
+        doc.add_paragraph(f"3.{(i - 1) // 50 + 1}.{(i - 1) % 50 + 1} {requirement_title(i)}")
+        doc.add_paragraph(f"依据：变更申请单 CR-{i:04d}")
+        doc.add_paragraph(f"标识号：REQ-{i}")
+        doc.add_paragraph(f"说明：修改第{i}号子系统的数据处理流程，提升处理效率，保证与上游接口兼容。")
+        doc.add_paragraph("a) 输入：上游子系统发送的原始数据帧")
+        doc.add_paragraph("b) 输出：经过滤波和校验后的结果数据")
+        doc.add_paragraph("c) 处理：按照新的滤波算法逐帧处理")
+        doc.add_paragraph("对关联需求的影响：无")
+        doc.add_paragraph("对关联设计的影响：修改数据处理模块详细设计")
+    doc.save(path)
+    return names
+
+
+def _legacy_extract_indicator_hits(paragraphs, start_pos, end_pos):
+    """改造前的实现：每次调用都重新正则扫描全文并逐条比较需求名称"""
+    indicators = []
+    for para in paragraphs:
+        if re.match(r"^\d+\.\d+\.\d+\s+[\u4e00-\u9fa5]+", para):
+            name_part = re.sub(r"^\d+\.\d+\.\d+\s+", "", para)
+            if len(name_part) > 3:
+                indicators.append(name_part)
+    hits = 0
+    for pos in range(start_pos, end_pos):
+        for indicator in indicators:
+            if indicator in paragraphs[pos] and len(indicator) > 5:
+                hits += 1
+                break
+    return hits
+
+
+def _legacy_locate(paragraphs, toc_indices, names):
+    """改造前的实现：每个需求名称都逐段落执行子串判断"""
+    positions = []
+    for name in names:
+        terms = [term for term in name.split() if len(term) > 1] or [name]
+        best = None
+        for i, para in enumerate(paragraphs):
+            if i in toc_indices:
+                continue
+            score = sum(1 for term in terms if term in para)
+            if score and (best is None or score > best[0]):
+                best = (score, i)
+        positions.append(best[1] if best else None)
+    return positions
+
+
+def _indexed_locate(paragraphs, toc_indices, names):
+    """倒排索引实现"""
+    index = ParagraphIndex(paragraphs)
+    positions = []
+    for name in names:
+        terms = [term for term in name.split() if len(term) > 1] or [name]
+        scores = index.score_paragraphs(terms, toc_indices)
+        best = None
+        for i in sorted(scores):
+            if best is None or scores[i] > best[0]:
+                best = (scores[i], i)
+        positions.append(best[1] if best else None)
+    return positions
+
+
+def _timed(label, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"{label}: {time.perf_counter() - start:.3f}秒")
+    return result
+
+
+def main():
+    requirement_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    # 基准测试时关闭DEBUG日志，避免日志输出主导耗时
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "回归测试需求规格说明.docx")
+        names = _timed(f"生成{requirement_count}个需求的文档", build_regression_spec, path, requirement_count)
+        paragraphs = [p.text.strip() for p in Document(path).paragraphs if p.text.strip()]
+        features = _timed("段落特征分类(单次扫描)", ParagraphFeatures, paragraphs)
+        toc_indices = _timed("目录识别(基于特征数组)", identify_toc_sections, paragraphs, features)
+        print(f"段落数: {len(paragraphs)}，目录段落: {len(toc_indices)}")
+
+        # 每个需求取约10个段落作为提取区间
+        starts = [i for i, p in enumerate(paragraphs) if i not in toc_indices and document_reader.REQUIREMENT_HEADING_PATTERN.match(p)]
+        ranges = [(start, min(start + 10, len(paragraphs))) for start in starts]
+
+        def legacy_boundaries():
+            for start, end in ranges:
+                _legacy_extract_indicator_hits(paragraphs, start, end)
+
+        def automaton_boundaries():
+            hits = build_indicator_hits(paragraphs, collect_requirement_indicators(paragraphs))
+            for start, end in ranges:
+                extract_requirement_content(paragraphs, start, end, toc_indices, hits, features)
+
+        _timed("需求边界检测(改造前，逐需求重建标志并逐条比较)", legacy_boundaries)
+        _timed("需求边界检测(自动机，整篇文档只构建一次)", automaton_boundaries)
+
+        legacy_positions = _timed("需求名称定位(改造前，逐段落子串匹配)", _legacy_locate, paragraphs, toc_indices, names)
+        indexed_positions = _timed("需求名称定位(倒排索引)", _indexed_locate, paragraphs, toc_indices, names)
+        print(f"定位结果一致: {legacy_positions == indexed_positions}")
+
+        contents = _timed("read_xuqiu_wendang_document 全流程", read_xuqiu_wendang_document, path, names)
+        print(f"提取到 {len(contents)}/{len(names)} 个需求")
+        _timed("read_xuqiu_wendang_document 再次读取(命中文档缓存)", read_xuqiu_wendang_document, path, names)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Excel审查报告生成基准
+比较普通工作簿逐单元格设置样式的原写法与只写模式流式写入的耗时和峰值内存
+
+用法: python tests/bench_excel_writer.py [问题行数]
+"""
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+from app.documentReview.Regression.ai_reviewer.document import (
+    REVIEW_EXCEL_COLUMN_WIDTHS, REVIEW_EXCEL_HEADERS, iter_review_rows, write_review_excel
+)
+
+
+def make_review_results(problem_rows, problems_per_requirement=5):
+    results = []
+    for i in range(0, problem_rows, problems_per_requirement):
+        results.append({
+            "name": f"需求{i // problems_per_requirement}",
+            "chapter": f"3.{i // 100}.{i % 100}",
+            "review_result": {
+                "requirements_review": [
+                    {
+                        "problem_title": f"问题{i + j}",
+                        "requirement_description": "系统应支持用户登录功能，" * 4,
+                        "problem_description": "需求描述中未说明登录失败后的处理方式，" * 3,
+                        "problem_location": "第2段",
+                        "impact_analysis": "测试人员无法据此设计异常场景的测试用例，" * 3
+                    }
+                    for j in range(min(problems_per_requirement, problem_rows - i))
+                ],
+                "score": 80,
+                "summary": "需求描述基本完整，部分异常处理缺失"
+            }
+        })
+    return results
+
+
+def legacy_write(review_results, output_path):
+    """原写法：普通工作簿，逐单元格创建样式对象并二次遍历设置样式"""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(REVIEW_EXCEL_HEADERS)
+    for row in iter_review_rows(review_results):
+        ws.append(row)
+    for index, width in enumerate(REVIEW_EXCEL_COLUMN_WIDTHS):
+        ws.column_dimensions[chr(65 + index)].width = width
+    for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
+        for cell in row:
+            cell.alignment = Alignment(wrap_text=True, vertical='top')
+    thin = Side(style='thin')
+    for cell in ws[1]:
+        cell.font = Font(bold=True, size=12)
+        cell.fill = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")
+        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    wb.save(output_path)
+
+
+def measure(label, func, review_results, output_path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(review_results, output_path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label}: {elapsed:.2f}秒, 峰值内存 {peak / 1024 / 1024:.1f}MB, 文件 {os.path.getsize(output_path) / 1024:.0f}KB")
+
+
+def main():
+    problem_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    review_results = make_review_results(problem_rows)
+    print(f"{len(review_results)} 个需求, {problem_rows} 个问题行")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.xlsx")
+        streaming_path = os.path.join(tmp, "streaming.xlsx")
+        measure("普通工作簿", legacy_write, review_results, legacy_path)
+        measure("只写模式", write_review_excel, review_results, streaming_path)
+
+        legacy_rows = list(load_workbook(legacy_path, read_only=True).active.values)
+        streaming_rows = list(load_workbook(streaming_path, read_only=True).active.values)
+        print(f"内容一致: {legacy_rows == streaming_rows}")
+
+
+if __name__ == "__main__":
+    main()
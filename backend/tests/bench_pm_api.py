@@ -0,0 +1,135 @@
+"""
+项目管理接口并发吞吐量基准
+在子进程中启动项目管理API（临时数据库），用并发客户端混合发送文档列表和上传请求，
+比较开发服务器方式（Werkzeug + a2wsgi，与run.py相同）和直接运行在ASGI服务器（uvicorn，与asgi.py相同）的吞吐量
+
+用法: python tests/bench_pm_api.py [请求数量] [并发数]
+"""
+import os
+import sys
+import time
+import socket
+import logging
+import asyncio
+import tempfile
+import multiprocessing
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+# 预先写入的文档数量
+SEED_DOCUMENTS = 5000
+
+# 每10个请求中的上传请求数
+UPLOADS_PER_10 = 2
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(mode, db_path, upload_dir, port):
+    # 子进程：项目管理API改用临时数据库和上传目录
+    os.environ["DOCUMENT_REVIEW_DATA_DIR"] = upload_dir
+    from sqlalchemy import insert
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from app.database import create_db_engine, create_async_db_engine, get_async_db
+    from app.projectManagement import pm_app, models
+    from app.projectManagement.api import documents
+    from app.documentReview.common import blob_store
+    from init_db import init_db
+
+    db_engine = create_db_engine(f"sqlite:///{db_path}")
+    init_db(db_engine)
+    with db_engine.begin() as conn:
+        conn.execute(insert(models.Project), [{"name": "基准项目"}])
+        conn.execute(insert(models.Document), [
+            {"project_id": 1, "file_id": f"seed-{i}", "original_filename": f"文档{i}.docx",
+             "file_path": f"/uploads/project_documents/seed-{i}.docx", "status": "uploaded"}
+            for i in range(SEED_DOCUMENTS)
+        ])
+    db_engine.dispose()
+
+    session_factory = async_sessionmaker(create_async_db_engine(f"sqlite+aiosqlite:///{db_path}"),
+                                         autoflush=False, expire_on_commit=False)
+
+    async def get_bench_db():
+        async with session_factory() as db:
+            yield db
+
+    pm_app.dependency_overrides[get_async_db] = get_bench_db
+    documents.UPLOAD_DIR = upload_dir
+    blob_store._store_instance = blob_store.BlobStore(os.path.join(upload_dir, "blobs"))
+
+    if mode == "wsgi":
+        from a2wsgi import ASGIMiddleware
+        from werkzeug.serving import make_server
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        make_server("127.0.0.1", port, ASGIMiddleware(pm_app), threaded=True).serve_forever()
+    else:
+        import uvicorn
+        uvicorn.run(pm_app, host="127.0.0.1", port=port, log_level="warning")
+
+
+async def load(base_url, count, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    payload = b"x" * 64 * 1024
+    failures = 0
+
+    async def one(client, i):
+        nonlocal failures
+        async with semaphore:
+            try:
+                if i % 10 < UPLOADS_PER_10:
+                    response = await client.post(f"{base_url}/documents/projects/1/documents/",
+                                                 files={"file": (f"上传{i}.docx", payload + str(i).encode())})
+                else:
+                    response = await client.get(f"{base_url}/documents/projects/1/documents/",
+                                                params={"limit": 20, "after_id": SEED_DOCUMENTS - i % 1000})
+                if response.status_code >= 400:
+                    failures += 1
+            except httpx.TransportError:
+                # 服务器来不及处理时连接被重置
+                failures += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(count)))
+        return count / (time.perf_counter() - start), failures
+
+
+def run(label, mode, count, concurrency):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        port = _free_port()
+        server = multiprocessing.Process(
+            target=serve, args=(mode, os.path.join(temp_dir, "pm.db"), temp_dir, port), daemon=True
+        )
+        server.start()
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            for _ in range(300):
+                try:
+                    httpx.get(f"{base_url}/projects/", timeout=1)
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            throughput, failures = asyncio.run(load(base_url, count, concurrency))
+            print(f"[{label}] {count} 个请求（并发 {concurrency}）: {throughput:.0f} 次/秒，失败 {failures}")
+        finally:
+            server.terminate()
+            server.join()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    run("Werkzeug + a2wsgi", "wsgi", count, concurrency)
+    run("uvicorn", "asgi", count, concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+项目管理数据库基准
+在临时数据库中写入大量文档记录，比较默认SQLite引擎（回滚日志、无project_id索引）
+与调优后的引擎（WAL等连接参数 + init_db迁移中的复合索引）的逐条插入和按项目分页列表的吞吐量，
+以及最后一页按偏移量（skip）和按游标（after_id）分页的耗时；项目数量为1时即为单个项目下的深分页
+
+用法: python tests/bench_project_db.py [文档数量] [项目数量]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import Base, create_db_engine, create_async_db_engine
+from app.projectManagement import crud, models, schemas
+from init_db import migrate
+
+# 逐条插入（每条一个事务，与上传接口相同）的记录数
+SINGLE_INSERTS = 2000
+
+# 列表查询次数
+LIST_QUERIES = 2000
+
+# 并发读取的协程数
+READER_TASKS = 4
+
+# 深分页查询次数
+DEEP_PAGE_QUERIES = 50
+
+
+def seed(db_engine, documents, projects):
+    Base.metadata.create_all(bind=db_engine)
+    with db_engine.begin() as conn:
+        conn.execute(insert(models.Project), [{"name": f"项目{i}"} for i in range(projects)])
+        batch = []
+        for i in range(documents):
+            batch.append({
+                "project_id": i % projects + 1,
+                "file_id": f"seed-{i}",
+                "original_filename": f"文档{i}.docx",
+                "file_path": f"/uploads/project_documents/seed-{i}.docx",
+                "file_type": "requirement_spec",
+                "review_type": "regression",
+                "status": "uploaded"
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(models.Document), batch)
+                batch.clear()
+        if batch:
+            conn.execute(insert(models.Document), batch)
+
+
+async def bench_inserts(session_factory, projects):
+    start = time.perf_counter()
+    for i in range(SINGLE_INSERTS):
+        async with session_factory() as db:
+            await crud.create_document(db, schemas.DocumentCreate(
+                project_id=i % projects + 1,
+                original_filename=f"新文档{i}.docx",
+                file_id=f"bench-{i}",
+                file_path=f"/uploads/project_documents/bench-{i}.docx",
+                status="uploaded"
+            ))
+    return SINGLE_INSERTS / (time.perf_counter() - start)
+
+
+async def bench_lists(session_factory, projects, tasks=1):
+    random.seed(0)
+    project_ids = [random.randint(1, projects) for _ in range(LIST_QUERIES)]
+    per_task = LIST_QUERIES // tasks
+
+    async def worker(ids):
+        async with session_factory() as db:
+            for project_id in ids:
+                await crud.get_documents_by_project(db, project_id, skip=0, limit=20)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(project_ids[i * per_task:(i + 1) * per_task]) for i in range(tasks)))
+    return per_task * tasks / (time.perf_counter() - start)
+
+
+async def bench_deep_page(session_factory, documents, projects):
+    # 项目1的最后一页：分别按偏移量和按上一页最后一条记录的id查询
+    per_project = (documents + projects - 1) // projects
+    skip = max(per_project - 20, 0)
+    async with session_factory() as db:
+        rows = await crud.get_documents_by_project(db, 1, skip=skip - 1, limit=1) if skip else []
+        after_id = rows[0]["id"] if rows else None
+        timings = []
+        for kwargs in ({"skip": skip}, {"after_id": after_id}):
+            start = time.perf_counter()
+            for _ in range(DEEP_PAGE_QUERIES):
+                await crud.get_documents_by_project(db, 1, limit=20, **kwargs)
+            timings.append((time.perf_counter() - start) / DEEP_PAGE_QUERIES * 1000)
+    return skip, timings
+
+
+async def bench_queries(label, async_engine, documents, projects):
+    session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    print(f"[{label}] 按项目列表: {await bench_lists(session_factory, projects):.0f} 次/秒")
+    print(f"[{label}] 按项目列表（{READER_TASKS}个并发协程）: {await bench_lists(session_factory, projects, READER_TASKS):.0f} 次/秒")
+    skip, (offset_ms, keyset_ms) = await bench_deep_page(session_factory, documents, projects)
+    print(f"[{label}] 第 {skip} 条之后的一页: 偏移量 {offset_ms:.2f}毫秒, 游标 {keyset_ms:.2f}毫秒")
+    print(f"[{label}] 逐条插入: {await bench_inserts(session_factory, projects):.0f} 条/秒")
+    await async_engine.dispose()
+
+
+def run(label, db_engine, async_engine, documents, projects, tuned):
+    # 同步引擎写入数据和迁移，异步引擎（与接口相同的crud）执行查询和插入
+    start = time.perf_counter()
+    seed(db_engine, documents, projects)
+    if tuned:
+        migrate(db_engine)
+    else:
+        # 模型中已声明复合索引，基线去掉该索引以对应旧版本的数据库
+        with db_engine.begin() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS ix_documents_project_id_id"))
+    print(f"[{label}] 写入 {documents} 条文档: {time.perf_counter() - start:.2f}秒")
+    db_engine.dispose()
+    asyncio.run(bench_queries(label, async_engine, documents, projects))
+
+
+def main():
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    projects = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    with tempfile.TemporaryDirectory() as temp_dir:
+        default_path = os.path.join(temp_dir, 'default.db')
+        tuned_path = os.path.join(temp_dir, 'tuned.db')
+        run("默认引擎", create_engine(f"sqlite:///{default_path}", connect_args={"check_same_thread": False}),
+            create_async_engine(f"sqlite+aiosqlite:///{default_path}"), documents, projects, False)
+        run("调优引擎", create_db_engine(f"sqlite:///{tuned_path}"),
+            create_async_db_engine(f"sqlite+aiosqlite:///{tuned_path}"), documents, projects, True)
+
+
+if __name__ == "__main__":
+    main()
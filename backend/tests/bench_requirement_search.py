@@ -0,0 +1,135 @@
+"""
+需求全文检索基准
+在临时数据库中写入大量需求和审查问题（批量写入时暂停FTS5同步触发器，写完后重建索引），
+比较FTS5三元组索引检索（3个字符以上的词）、短词LIKE回退检索和直接LIKE扫描需求表的耗时，
+以及索引建好后经同步触发器逐批写入（与后台写入线程相同）的速度
+
+用法: python tests/bench_requirement_search.py [需求数量]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.database import create_db_engine, create_async_db_engine
+from app.projectManagement import crud, models
+from app.projectManagement.requirement_store import RequirementStore
+from init_db import init_db
+
+# 每个查询执行的次数
+SEARCH_QUERIES = 50
+
+# 每个需求的审查问题数量
+FINDINGS_PER_REQUIREMENT = 1
+
+# 批量写入后经触发器写入的需求数量
+STORE_REQUIREMENTS = 5000
+
+CHARACTERS = "用户登录密码权限角色报表导出数据接口日志审计备份恢复加密传输存储配置告警监控性能响应时间界面查询系统模块功能状态"
+
+# 由上面的字随机组成的词表
+WORDS = sorted({"".join(random.Random(i).sample(CHARACTERS, 2)) for i in range(600)})
+
+# 罕见的长词、常见的长词（约10%的需求包含）、短词和多个短词
+QUERIES = ["多因素身份验证", "数据加密传输", WORDS[0], f"{WORDS[1]} {WORDS[2]}"]
+
+
+def sentence(rng, words=12):
+    return "".join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(db_engine, requirements):
+    rng = random.Random(0)
+    init_db(db_engine)
+    with db_engine.begin() as conn:
+        # 逐行维护三元组索引很慢，批量写入时先去掉同步触发器，写完后一次重建索引并恢复触发器
+        for trigger in ("trg_requirements_fts_insert", "trg_review_findings_fts_insert"):
+            conn.execute(text(f"DROP TRIGGER {trigger}"))
+        conn.execute(insert(models.Project), [{"name": "基准项目"}])
+        conn.execute(insert(models.Document), [{"project_id": 1, "file_id": "seed", "original_filename": "规格.docx",
+                                                "file_path": "/uploads/project_documents/seed.docx"}])
+        for start in range(0, requirements, 10000):
+            count = min(10000, requirements - start)
+            rows = []
+            for i in range(start, start + count):
+                content = sentence(rng, 30)
+                if i % 1000 == 0:
+                    content += "系统应支持多因素身份验证"
+                if i % 10 == 0:
+                    content += "，数据加密传输"
+                rows.append({"document_id": 1, "file_id": "seed", "session_id": f"s{i // 100}",
+                             "name": f"{sentence(rng, 3)}需求{i}", "chapter": f"{i // 100}.{i % 100}", "content": content})
+            conn.execute(insert(models.Requirement), rows)
+            conn.execute(insert(models.ReviewFinding), [
+                {"requirement_id": i + 1, "problem_title": sentence(rng, 3),
+                 "problem_description": sentence(rng, 20) + ("，未说明加密传输方式" if i % 100 == 0 else ""),
+                 "requirement_description": sentence(rng, 10)}
+                for i in range(start, start + count) for _ in range(FINDINGS_PER_REQUIREMENT)
+            ])
+        for table in ("requirements_fts", "review_findings_fts"):
+            conn.execute(text(f"INSERT INTO {table}({table}) VALUES ('rebuild')"))
+        for statement in models.REQUIREMENT_SEARCH_DDL:
+            conn.execute(text(statement))
+
+
+def bench_store(db_engine):
+    rng = random.Random(1)
+    store = RequirementStore(db_engine)
+    start = time.perf_counter()
+    for session in range(STORE_REQUIREMENTS // 100):
+        store.record_requirements(f"store-{session}", "seed", [
+            {"name": f"新需求{session}-{i}", "chapter": str(i), "content": sentence(rng, 30)} for i in range(100)
+        ])
+    store.flush()
+    return STORE_REQUIREMENTS / (time.perf_counter() - start)
+
+
+async def timed(coro_factory):
+    start = time.perf_counter()
+    for _ in range(SEARCH_QUERIES):
+        rows = await coro_factory()
+    return (time.perf_counter() - start) / SEARCH_QUERIES * 1000, len(rows)
+
+
+async def bench(db_path):
+    async_engine = create_async_db_engine(f"sqlite+aiosqlite:///{db_path}")
+    session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    async with session_factory() as db:
+        for query in QUERIES:
+            ms, hits = await timed(lambda: crud.search_requirements(db, query, limit=20))
+            print(f"[需求检索] {query!r}: {ms:.2f}毫秒（{hits} 条）")
+        ms, hits = await timed(lambda: crud.search_review_findings(db, "加密传输", limit=20))
+        print(f"[审查问题检索] '加密传输': {ms:.2f}毫秒（{hits} 条）")
+        # 基线：不经过索引，直接在需求表上LIKE扫描
+        ms, hits = await timed(lambda: scan_requirements(db, "多因素身份验证"))
+        print(f"[直接扫描] '多因素身份验证': {ms:.2f}毫秒（{hits} 条）")
+    await async_engine.dispose()
+
+
+async def scan_requirements(db, query):
+    stmt = text("SELECT id FROM requirements WHERE name LIKE :q OR content LIKE :q ORDER BY id DESC LIMIT 20")
+    return (await db.execute(stmt, {"q": f"%{query}%"})).all()
+
+
+def main():
+    requirements = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "search.db")
+        db_engine = create_db_engine(f"sqlite:///{db_path}")
+        start = time.perf_counter()
+        seed(db_engine, requirements)
+        print(f"写入 {requirements} 条需求并建立索引: {time.perf_counter() - start:.2f}秒")
+        print(f"[后台写入] 经同步触发器写入需求: {bench_store(db_engine):.0f} 条/秒")
+        db_engine.dispose()
+        asyncio.run(bench(db_path))
+
+
+if __name__ == "__main__":
+    main()
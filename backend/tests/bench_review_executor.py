@@ -0,0 +1,49 @@
+"""
+并发审查执行器基准
+用固定延迟的模拟审查函数代替模型调用，比较逐条审查与并发审查的耗时
+
+用法: python tests/bench_review_executor.py [需求数量] [单条耗时秒数] [并发数]
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.documentReview.common.review_executor import ReviewExecutor
+
+
+def fake_review(requirement):
+    """模拟一次模型调用，少量需求调用失败"""
+    time.sleep(requirement["latency"])
+    if requirement["fail"]:
+        raise RuntimeError("模拟的模型调用失败")
+    return {"name": requirement["name"], "chapter": "", "review_result": {"requirements_review": [], "score": 90, "summary": "ok"}}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    max_in_flight = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    random.seed(0)
+    requirements = [
+        {"name": f"需求{i}", "content": "...", "latency": latency * random.uniform(0.5, 1.5), "fail": i % 25 == 7}
+        for i in range(count)
+    ]
+
+    start = time.perf_counter()
+    sequential = ReviewExecutor(fake_review, max_in_flight=1).run(requirements)
+    print(f"逐条审查 {count} 个需求: {time.perf_counter() - start:.2f}秒")
+
+    start = time.perf_counter()
+    concurrent = ReviewExecutor(fake_review, max_in_flight=max_in_flight).run(requirements)
+    print(f"并发审查 {count} 个需求(并发数 {max_in_flight}): {time.perf_counter() - start:.2f}秒")
+
+    assert [r["name"] for r in concurrent] == [r["name"] for r in requirements]
+    print(f"结果顺序与输入一致，失败结果数: {sum(1 for r in concurrent if r['review_result']['score'] == 0)}")
+    assert [(r["name"], r["review_result"]["score"]) for r in sequential] == [(r["name"], r["review_result"]["score"]) for r in concurrent]
+
+
+if __name__ == "__main__":
+    main()
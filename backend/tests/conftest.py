@@ -0,0 +1,60 @@
+"""
+pytest公共配置
+测试使用临时数据目录和临时数据库，不会读写backend下的数据库、uploads和outputs
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 必须在导入app之前设置：数据目录在导入时确定
+os.environ.setdefault("DOCUMENT_REVIEW_DATA_DIR", tempfile.mkdtemp(prefix="document_review_test_"))
+os.environ.setdefault("DOCUMENT_REVIEW_STORAGE_GC", "0")
+
+# 会访问外部AI接口的手动测试脚本
+collect_ignore = ["test_openai_lib.py"]
+
+
+@pytest.fixture
+def pm_db_path(tmp_path):
+    """已初始化的临时项目管理数据库"""
+    from app.database import create_db_engine
+    from init_db import init_db
+
+    db_path = str(tmp_path / "pm.db")
+    engine = create_db_engine(f"sqlite:///{db_path}")
+    init_db(engine)
+    engine.dispose()
+    return db_path
+
+
+@pytest.fixture
+def pm_client(pm_db_path, tmp_path, monkeypatch):
+    """使用临时数据库、上传目录和内容存储的项目管理API客户端"""
+    from fastapi.testclient import TestClient
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from app.database import create_async_db_engine, get_async_db
+    from app.projectManagement import pm_app
+    from app.projectManagement.api import documents
+    from app.documentReview.common import blob_store
+
+    engine = create_async_db_engine(f"sqlite+aiosqlite:///{pm_db_path}")
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def get_test_db():
+        async with session_factory() as db:
+            yield db
+
+    upload_dir = tmp_path / "project_documents"
+    upload_dir.mkdir()
+    monkeypatch.setattr(documents, "UPLOAD_DIR", str(upload_dir))
+    monkeypatch.setattr(blob_store, "_store_instance", blob_store.BlobStore(str(tmp_path / "blobs")))
+    pm_app.dependency_overrides[get_async_db] = get_test_db
+    try:
+        with TestClient(pm_app) as client:
+            yield client
+    finally:
+        pm_app.dependency_overrides.pop(get_async_db, None)
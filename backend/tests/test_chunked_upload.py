@@ -0,0 +1,138 @@
+"""
+分块上传协议测试：偏移量、分块校验、断点续传和finalize
+"""
+import hashlib
+import io
+
+import pytest
+
+from app.documentReview.common import blob_store, chunked_upload
+from app.documentReview.common.chunked_upload import ChunkedUploadManager, UploadError
+from app.projectManagement.api import documents
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "_store_instance", blob_store.BlobStore(str(tmp_path / "blobs")))
+    return ChunkedUploadManager(str(tmp_path / "chunked"))
+
+
+def _write(manager, upload_id, offset, data, checksum=None):
+    return manager.write_chunk(upload_id, offset, io.BytesIO(data), len(data), checksum)
+
+
+def test_upload_in_chunks_and_finalize(manager, tmp_path):
+    content = b"0123456789" * 10
+    upload = manager.init("需求.docx", len(content), _sha256(content))
+    assert upload["received"] == 0
+    for offset in range(0, len(content), 30):
+        chunk = content[offset:offset + 30]
+        status = _write(manager, upload["upload_id"], offset, chunk, _sha256(chunk))
+    assert status["received"] == len(content) and status["complete"]
+
+    alias_path = str(tmp_path / "uploads" / "f1_需求.docx")
+    (tmp_path / "uploads").mkdir()
+    result = manager.finalize(upload["upload_id"], alias_path, "f1", "test")
+    assert result["size"] == len(content)
+    with open(alias_path, "rb") as f:
+        assert f.read() == content
+    with pytest.raises(UploadError) as e:
+        manager.status(upload["upload_id"])
+    assert e.value.status == 404
+
+
+def test_offset_must_be_contiguous(manager):
+    upload = manager.init("a.docx", 100)
+    _write(manager, upload["upload_id"], 0, b"a" * 10)
+    with pytest.raises(UploadError) as e:
+        _write(manager, upload["upload_id"], 20, b"b" * 10)
+    assert e.value.status == 409
+    assert e.value.extra["received"] == 10
+
+
+def test_chunk_beyond_total_size_is_rejected(manager):
+    upload = manager.init("a.docx", 10)
+    with pytest.raises(UploadError) as e:
+        _write(manager, upload["upload_id"], 0, b"a" * 11)
+    assert e.value.status == 416
+
+
+def test_bad_checksum_keeps_accepted_bytes(manager, tmp_path):
+    upload = manager.init("a.docx", 100)
+    _write(manager, upload["upload_id"], 0, b"A" * 100, _sha256(b"A" * 100))
+    # 重发同一偏移量但内容与校验值不符：返回422，已接收的内容不变
+    with pytest.raises(UploadError) as e:
+        _write(manager, upload["upload_id"], 0, b"B" * 100, _sha256(b"A" * 100))
+    assert e.value.status == 422
+    (tmp_path / "uploads").mkdir()
+    alias_path = str(tmp_path / "uploads" / "a.docx")
+    manager.finalize(upload["upload_id"], alias_path, "f2")
+    with open(alias_path, "rb") as f:
+        assert f.read() == b"A" * 100
+
+
+def test_short_chunk_is_rejected(manager):
+    upload = manager.init("a.docx", 100)
+    with pytest.raises(UploadError) as e:
+        manager.write_chunk(upload["upload_id"], 0, io.BytesIO(b"a" * 5), 10)
+    assert e.value.status == 400
+    assert manager.status(upload["upload_id"])["received"] == 0
+
+
+def test_resume_after_interruption(manager):
+    content = b"x" * 40 + b"y" * 60
+    upload = manager.init("a.docx", len(content))
+    _write(manager, upload["upload_id"], 0, content[:40])
+    # 客户端中断后查询断点，从received处继续；重发已接收的分块不影响结果
+    received = manager.status(upload["upload_id"])["received"]
+    assert received == 40
+    _write(manager, upload["upload_id"], 20, content[20:40])
+    status = _write(manager, upload["upload_id"], received, content[received:])
+    assert status["complete"]
+
+
+def test_finalize_incomplete_upload(manager, tmp_path):
+    upload = manager.init("a.docx", 100)
+    _write(manager, upload["upload_id"], 0, b"a" * 50)
+    with pytest.raises(UploadError) as e:
+        manager.finalize(upload["upload_id"], str(tmp_path / "a.docx"), "f3")
+    assert e.value.status == 409
+
+
+def test_finalize_checks_whole_file_checksum(manager, tmp_path):
+    upload = manager.init("a.docx", 10, _sha256(b"b" * 10))
+    _write(manager, upload["upload_id"], 0, b"a" * 10)
+    with pytest.raises(UploadError) as e:
+        manager.finalize(upload["upload_id"], str(tmp_path / "a.docx"), "f4")
+    assert e.value.status == 422
+    # 校验失败的上传任务被删除，需要重新上传
+    with pytest.raises(UploadError):
+        manager.status(upload["upload_id"])
+
+
+def test_project_upload_endpoints(pm_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(chunked_upload, "_manager_instance", ChunkedUploadManager(str(tmp_path / "chunked")))
+    monkeypatch.setattr(documents, "schedule_preprocess", lambda *args, **kwargs: None)
+    project_id = pm_client.post("/projects/", json={"name": "分块上传项目"}).json()["id"]
+    content = b"z" * 1000
+
+    upload = pm_client.post("/documents/uploads", json={"file_name": "b.docx", "total_size": len(content)}).json()
+    upload_id = upload["upload_id"]
+    response = pm_client.put(f"/documents/uploads/{upload_id}", params={"offset": 0, "checksum": _sha256(content[:600])},
+                             content=content[:600])
+    assert response.json()["received"] == 600
+    response = pm_client.put(f"/documents/uploads/{upload_id}", params={"offset": 600, "checksum": "0" * 64},
+                             content=content[600:])
+    assert response.status_code == 422
+    assert response.json()["detail"]["received"] == 600
+    pm_client.put(f"/documents/uploads/{upload_id}", params={"offset": 600}, content=content[600:])
+    assert pm_client.get(f"/documents/uploads/{upload_id}").json()["complete"]
+
+    response = pm_client.post(f"/documents/projects/{project_id}/documents/uploads/{upload_id}/finalize")
+    assert response.status_code == 201
+    with open(response.json()["file_path"], "rb") as f:
+        assert f.read() == content
@@ -0,0 +1,67 @@
+"""
+需求去重测试：合并近似重复的需求，章节号不同的需求不合并
+"""
+from app.documentReview.ConfigurationItem.ai_extraction.dedup import consolidate_requirements, normalize_title
+
+LONG_CONTENT = "系统应支持管理员按照时间范围、部门和状态筛选操作日志，并将筛选结果导出为Excel文件，导出文件包含操作人、时间和操作内容"
+
+
+def _requirement(name, chapter="", content=""):
+    return {"name": name, "chapter": chapter, "identifier": "", "content": content}
+
+
+def test_chapterless_requirement_does_not_bridge_chapters():
+    result = consolidate_requirements([
+        _requirement("数据导出", "", "x"),
+        _requirement("数据导出", "3.3", "a"),
+        _requirement("数据导出", "3.4", "b"),
+    ])
+    assert sorted(r["chapter"] for r in result) == ["3.3", "3.4"]
+    assert [r["content"] for r in result if r["chapter"] == "3.4"] == ["b"]
+
+
+def test_chapterless_requirement_does_not_bridge_chapters_in_any_order():
+    result = consolidate_requirements([
+        _requirement("数据导出", "3.3", "a"),
+        _requirement("数据导出", "3.4", "b"),
+        _requirement("数据导出", "", "x"),
+    ])
+    assert len(result) == 2
+    assert result[0]["chapter"] == "3.3" and result[1]["chapter"] == "3.4"
+
+
+def test_chapter_prefix_in_title_is_ignored():
+    assert normalize_title("3.2.1 用户身份验证功能") == ("用户身份验证功能", "3.2.1")
+    result = consolidate_requirements([
+        _requirement("3.2.1 用户身份验证功能", content="用户登录时校验口令"),
+        _requirement("用户身份验证功能", content="口令连续错误5次锁定账户"),
+    ])
+    assert len(result) == 1
+    assert result[0]["name"] == "3.2.1 用户身份验证功能"
+    assert "用户登录时校验口令" in result[0]["content"] and "口令连续错误5次锁定账户" in result[0]["content"]
+
+
+def test_similar_content_is_merged():
+    result = consolidate_requirements([
+        _requirement("日志导出", "5.1", LONG_CONTENT),
+        _requirement("日志导出功能", "", LONG_CONTENT + "。"),
+    ])
+    assert len(result) == 1
+    assert result[0]["chapter"] == "5.1"
+
+
+def test_similar_content_with_different_chapters_stays_separate():
+    result = consolidate_requirements([
+        _requirement("日志导出", "5.1", LONG_CONTENT),
+        _requirement("日志导出", "5.2", LONG_CONTENT + "。"),
+    ])
+    assert [r["chapter"] for r in result] == ["5.1", "5.2"]
+
+
+def test_content_similarity_does_not_bridge_chapters():
+    result = consolidate_requirements([
+        _requirement("日志导出", "5.1", LONG_CONTENT),
+        _requirement("日志导出功能", "", LONG_CONTENT),
+        _requirement("日志导出", "5.2", LONG_CONTENT),
+    ])
+    assert sorted(r["chapter"] for r in result) == ["5.1", "5.2"]
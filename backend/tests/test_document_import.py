@@ -0,0 +1,67 @@
+"""
+目录导入接口测试：只能导入PM_IMPORT_ROOTS内的文件
+"""
+import os
+
+import pytest
+
+from app.projectManagement.api import documents
+
+
+@pytest.fixture
+def import_root(tmp_path, monkeypatch):
+    """允许导入的目录，以及目录外的一个文件"""
+    root = tmp_path / "import_root"
+    (root / "specs").mkdir(parents=True)
+    (root / "specs" / "需求规格说明.docx").write_bytes(b"inside")
+    (tmp_path / "secret.docx").write_bytes(b"outside")
+    monkeypatch.setattr(documents, "IMPORT_ROOTS", [os.path.realpath(str(root))])
+    return root
+
+
+@pytest.fixture
+def project_id(pm_client):
+    return pm_client.post("/projects/", json={"name": "导入项目"}).json()["id"]
+
+
+def _import(client, project_id, directory, pattern, recursive=False):
+    return client.post(f"/documents/projects/{project_id}/documents/import",
+                       json={"directory": str(directory), "pattern": pattern, "recursive": recursive})
+
+
+def test_import_matching_files(pm_client, project_id, import_root):
+    response = _import(pm_client, project_id, import_root / "specs", "*.docx")
+    assert response.status_code == 201
+    result = response.json()
+    assert result["imported"] == 1
+    with open(result["items"][0]["document"]["file_path"], "rb") as f:
+        assert f.read() == b"inside"
+
+
+@pytest.mark.parametrize("pattern", [
+    "../secret.docx",
+    "../../*.docx",
+    "specs/../../secret.docx",
+    "sub/*.docx",
+])
+def test_pattern_cannot_leave_directory(pm_client, project_id, import_root, pattern):
+    response = _import(pm_client, project_id, import_root, pattern)
+    assert response.status_code == 400
+
+
+def test_absolute_pattern_is_rejected(pm_client, project_id, import_root, tmp_path):
+    response = _import(pm_client, project_id, import_root, str(tmp_path / "secret*"))
+    assert response.status_code == 400
+
+
+def test_directory_outside_roots_is_rejected(pm_client, project_id, import_root, tmp_path):
+    response = _import(pm_client, project_id, tmp_path, "*.docx")
+    assert response.status_code == 403
+
+
+def test_symlink_out_of_root_is_skipped(pm_client, project_id, import_root, tmp_path):
+    os.symlink(tmp_path / "secret.docx", import_root / "specs" / "link.docx")
+    response = _import(pm_client, project_id, import_root, "*.docx", recursive=True)
+    assert response.status_code == 201
+    result = response.json()
+    assert [item["file_name"] for item in result["items"]] == ["需求规格说明.docx"]
@@ -0,0 +1,176 @@
+"""
+后台任务队列测试：领取、取消、心跳超时后重新排队，以及任务状态回调
+"""
+import functools
+import threading
+import time
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.database import create_db_engine
+from app.documentReview.common import job_queue as job_queue_module
+from app.documentReview.common.job_queue import (
+    JOB_CANCELLED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JobCancelled, JobContext, JobQueue
+)
+from app.projectManagement import document_status, models
+
+
+@pytest.fixture
+def jobs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue_module, "POLL_INTERVAL", 0.05)
+    return str(tmp_path / "jobs.db")
+
+
+def _wait_for(job_queue, job_id, statuses, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = job_queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"任务 {job_id} 未在{timeout}秒内进入状态 {statuses}")
+
+
+def _make_stale(job_queue, job_id):
+    with job_queue._connect() as conn:
+        conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?",
+                     (time.time() - job_queue_module.STALE_AFTER - 1, job_id))
+
+
+def test_register_does_not_start_workers(jobs_db):
+    job_queue = JobQueue(jobs_db, workers=1)
+    job_queue.register("echo", lambda context: context.payload)
+    job = job_queue.submit("echo", {"value": 1})
+    time.sleep(0.2)
+    assert job_queue._threads == []
+    assert job_queue.get(job["job_id"])["status"] == JOB_QUEUED
+
+
+def test_claim_and_run(jobs_db):
+    job_queue = JobQueue(jobs_db, workers=1)
+    job_queue.register("echo", lambda context: dict(context.payload, file_id=context.file_id))
+    job_queue.start()
+    job = job_queue.submit("echo", {"value": 1}, file_id="f1")
+    job = _wait_for(job_queue, job["job_id"], (JOB_SUCCEEDED,))
+    assert job["result"] == {"value": 1, "file_id": "f1"}
+    assert job["attempts"] == 1
+
+
+def test_only_registered_kinds_are_claimed(jobs_db):
+    job_queue = JobQueue(jobs_db, workers=1)
+    job_queue.register("echo", lambda context: None)
+    job_queue.submit("other", {})
+    assert job_queue._claim() is None
+
+
+def test_cancel_queued_job(jobs_db):
+    job_queue = JobQueue(jobs_db, workers=1)
+    events = []
+    job_queue.add_listener(lambda job, status: events.append((job["job_id"], status)))
+    job = job_queue.submit("echo", {})
+    assert job_queue.cancel(job["job_id"])["status"] == JOB_CANCELLED
+    assert events == [(job["job_id"], JOB_CANCELLED)]
+    job_queue.register("echo", lambda context: None)
+    assert job_queue._claim() is None
+
+
+def test_cancel_running_job(jobs_db):
+    job_queue = JobQueue(jobs_db, workers=1)
+    started = threading.Event()
+
+    def wait_for_cancel(context):
+        started.set()
+        while True:
+            context.check_cancelled()
+            time.sleep(0.01)
+
+    job_queue.register("wait", wait_for_cancel)
+    job_queue.start()
+    job = job_queue.submit("wait", {})
+    assert started.wait(10)
+    job_queue.cancel(job["job_id"])
+    assert _wait_for(job_queue, job["job_id"], (JOB_CANCELLED,))["message"] == "已取消"
+
+
+def test_stale_job_is_requeued(jobs_db):
+    job_queue = JobQueue(jobs_db, workers=1)
+    job_queue.register("echo", lambda context: None)
+    job = job_queue.submit("echo", {})
+    assert job_queue._claim()["id"] == job["job_id"]
+    _make_stale(job_queue, job["job_id"])
+    job_queue._requeue_stale()
+    job = job_queue.get(job["job_id"])
+    assert job["status"] == JOB_QUEUED
+    assert job["attempts"] == 1
+    # 重新排队后可以再次领取
+    assert job_queue._claim()["attempts"] == 2
+
+
+def test_finish_after_requeue_is_ignored(jobs_db):
+    first = JobQueue(jobs_db, workers=1)
+    second = JobQueue(jobs_db, workers=1)
+    events = []
+    first.add_listener(lambda job, status: events.append(status))
+    first.register("echo", lambda context: None)
+    job = first.submit("echo", {})
+    context = JobContext(first, first._claim())
+
+    # 第一个进程心跳超时，任务被另一个进程重新排队并领取
+    _make_stale(second, job["job_id"])
+    second._requeue_stale()
+    second.register("echo", lambda context: None)
+    assert second._claim()["id"] == job["job_id"]
+    first._finish(context, JOB_SUCCEEDED, "已完成", result={"stale": True})
+
+    job = first.get(job["job_id"])
+    assert job["status"] == JOB_RUNNING
+    assert "result" not in job
+    assert events == []
+
+
+def test_finish_notifies_after_update(jobs_db):
+    job_queue = JobQueue(jobs_db, workers=1)
+    seen = []
+    # 回调执行时任务表中的状态已经是结束状态
+    job_queue.add_listener(lambda job, status: seen.append((status, job_queue.get(job["job_id"])["status"])))
+    job_queue.register("fail", lambda context: (_ for _ in ()).throw(JobCancelled()))
+    job = job_queue.submit("fail", {})
+    job_queue._execute(job_queue._claim())
+    assert seen == [(JOB_RUNNING, JOB_RUNNING), (JOB_CANCELLED, JOB_CANCELLED)]
+
+
+@pytest.fixture
+def pm_engine(pm_db_path, monkeypatch):
+    engine = create_db_engine(f"sqlite:///{pm_db_path}")
+    with engine.begin() as conn:
+        conn.execute(insert(models.Project), [{"name": "任务项目"}])
+    monkeypatch.setattr(document_status, "update_document_status",
+                        functools.partial(document_status.update_document_status, db_engine=engine))
+    yield engine
+    engine.dispose()
+
+
+def _document_status(engine, file_id, status=None):
+    with engine.begin() as conn:
+        if status is not None:
+            conn.execute(insert(models.Document), [{
+                "project_id": 1, "file_id": file_id, "original_filename": "a.docx",
+                "file_path": f"/uploads/{file_id}.docx", "status": status
+            }])
+        return conn.scalar(select(models.Document.status).where(models.Document.file_id == file_id))
+
+
+def test_cancelled_stage_restores_entry_status(pm_engine):
+    _document_status(pm_engine, "f1", "uploaded")
+    job = {"job_id": "j1", "stage": "extract", "file_id": "f1"}
+    document_status.on_job_status(job, "running")
+    assert _document_status(pm_engine, "f1") == "extracting"
+    document_status.on_job_status(job, "cancelled")
+    assert _document_status(pm_engine, "f1") == "uploaded"
+
+
+def test_cancelled_queued_job_keeps_document_status(pm_engine):
+    _document_status(pm_engine, "f2", "reviewed")
+    document_status.on_job_status({"job_id": "j2", "stage": "extract", "file_id": "f2"}, "cancelled")
+    assert _document_status(pm_engine, "f2") == "reviewed"
@@ -0,0 +1,81 @@
+"""
+项目和文档列表的键集分页测试
+"""
+import pytest
+from sqlalchemy import insert
+
+from app.database import create_db_engine
+from app.projectManagement import models
+
+DOCUMENT_COUNT = 7
+
+
+@pytest.fixture
+def seeded(pm_db_path):
+    engine = create_db_engine(f"sqlite:///{pm_db_path}")
+    with engine.begin() as conn:
+        conn.execute(insert(models.Project), [{"name": f"项目{i}"} for i in range(5)])
+        conn.execute(insert(models.Document), [
+            {"project_id": 1, "file_id": f"doc-{i}", "original_filename": f"文档{i}.docx",
+             "file_path": f"/uploads/doc-{i}.docx", "status": "reviewed" if i % 2 else "uploaded"}
+            for i in range(DOCUMENT_COUNT)
+        ] + [{"project_id": 2, "file_id": "other", "original_filename": "other.docx",
+              "file_path": "/uploads/other.docx", "status": "uploaded"}])
+    engine.dispose()
+
+
+def _pages(client, url, limit, **params):
+    pages, after_id = [], None
+    while True:
+        query = dict(params, limit=limit)
+        if after_id is not None:
+            query["after_id"] = after_id
+        response = client.get(url, params=query)
+        assert response.status_code == 200
+        pages.append([row["id"] for row in response.json()])
+        after_id = response.headers.get("X-Next-After-Id")
+        if after_id is None:
+            return pages
+
+
+def test_document_pages_cover_all_newest_first(pm_client, seeded):
+    pages = _pages(pm_client, "/documents/projects/1/documents/", 3)
+    ids = [document_id for page in pages for document_id in page]
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == DOCUMENT_COUNT
+
+
+def test_full_last_page_ends_with_empty_page(pm_client, seeded):
+    pages = _pages(pm_client, "/documents/projects/1/documents/", DOCUMENT_COUNT)
+    assert [len(page) for page in pages] == [DOCUMENT_COUNT, 0]
+
+
+def test_total_count_only_on_request(pm_client, seeded):
+    url = "/documents/projects/1/documents/"
+    assert "X-Total-Count" not in pm_client.get(url, params={"limit": 2}).headers
+    response = pm_client.get(url, params={"limit": 2, "include_total": True})
+    assert response.headers["X-Total-Count"] == str(DOCUMENT_COUNT)
+
+
+def test_project_pages(pm_client, seeded):
+    pages = _pages(pm_client, "/projects/", 2)
+    assert [project_id for page in pages for project_id in page] == [5, 4, 3, 2, 1]
+
+
+def test_offset_pagination_still_works(pm_client, seeded):
+    response = pm_client.get("/documents/projects/1/documents/", params={"skip": 5, "limit": 5})
+    assert len(response.json()) == DOCUMENT_COUNT - 5
+
+
+def test_project_detail_pages_documents(pm_client, seeded):
+    project = pm_client.get("/projects/1", params={"documents_limit": 4}).json()
+    assert len(project["documents"]) == 4
+    assert project["document_count"] == DOCUMENT_COUNT
+    assert project["document_status_counts"] == {"uploaded": 4, "reviewed": 3}
+    # 其余文档从next_documents_after_id开始用文档列表接口获取
+    rest = pm_client.get("/documents/projects/1/documents/",
+                         params={"after_id": project["next_documents_after_id"], "limit": 50}).json()
+    ids = [document["id"] for document in project["documents"] + rest]
+    assert len(set(ids)) == DOCUMENT_COUNT
+    assert pm_client.get("/projects/1", params={"documents_limit": 50}).json()["next_documents_after_id"] is None
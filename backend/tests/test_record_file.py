@@ -0,0 +1,109 @@
+"""
+会话记录文件测试：写入、随机访问、分页，以及索引与数据文件不匹配时的回退
+"""
+import os
+import shutil
+
+import pytest
+
+from app.documentReview.common import record_file
+from app.documentReview.common.record_file import INDEX_SUFFIX, RecordFile, write_records
+
+RECORDS = [
+    {"name": "需求|1", "content": "第一行\n第二行"},
+    {"name": "需求2", "content": "a|b|c\r\n"},
+    {"name": "需求3", "content": ""},
+    {"name": "需求4", "content": "末尾"},
+    {"name": "需求5", "content": "含\"引号\"和\\反斜杠"},
+]
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "requirements.jsonl")
+    assert write_records(path, iter(RECORDS)) == len(RECORDS)
+    return path
+
+
+def test_round_trip(path):
+    with RecordFile(path) as records:
+        assert records._offsets is None  # 使用索引，没有重新扫描
+        assert len(records) == len(RECORDS)
+        assert list(records) == RECORDS
+        assert records[1] == RECORDS[1]
+
+
+def test_negative_index(path):
+    with RecordFile(path) as records:
+        assert records[-1] == RECORDS[-1]
+        assert records[-len(RECORDS)] == RECORDS[0]
+        with pytest.raises(IndexError):
+            records[-len(RECORDS) - 1]
+        with pytest.raises(IndexError):
+            records[len(RECORDS)]
+
+
+def test_page(path):
+    with RecordFile(path) as records:
+        assert records.page(1, 2) == RECORDS[:2]
+        assert records.page(3, 2) == RECORDS[4:]
+        assert records.page(4, 2) == []
+        assert records.page(0, 2) == RECORDS[:2]
+        assert list(records.iter(3)) == RECORDS[3:]
+
+
+def test_empty_file(tmp_path):
+    path = str(tmp_path / "empty.jsonl")
+    assert write_records(path, []) == 0
+    with RecordFile(path) as records:
+        assert len(records) == 0
+        assert records.page(1, 10) == []
+
+
+def test_open_does_not_read_records(path, monkeypatch):
+    # 打开时只比对索引文件头和数据文件尾部
+    monkeypatch.setattr(record_file.json, "loads", lambda *args: pytest.fail("打开时读取了记录"))
+    with RecordFile(path) as records:
+        assert len(records) == len(RECORDS)
+
+
+def test_stale_index_after_data_replaced(path, tmp_path):
+    # 模拟另一个写入方替换了数据文件，但还没有替换索引
+    stale_index = str(tmp_path / "stale.idx")
+    shutil.copy(path + INDEX_SUFFIX, stale_index)
+    new_records = [{"name": "新需求", "content": "x" * len(record["content"])} for record in RECORDS]
+    write_records(path, new_records)
+    os.replace(stale_index, path + INDEX_SUFFIX)
+    with RecordFile(path) as records:
+        assert records._offsets is not None
+        assert list(records) == new_records
+        assert records[-1] == new_records[-1]
+
+
+def test_same_size_data_with_other_index_is_detected(tmp_path):
+    first, second = str(tmp_path / "a.jsonl"), str(tmp_path / "b.jsonl")
+    write_records(first, [{"value": "aaaa"}, {"value": "b"}])
+    write_records(second, [{"value": "a"}, {"value": "bbbb"}])
+    assert os.path.getsize(first) == os.path.getsize(second)
+    os.replace(second + INDEX_SUFFIX, first + INDEX_SUFFIX)
+    with RecordFile(first) as records:
+        assert list(records) == [{"value": "aaaa"}, {"value": "b"}]
+
+
+def test_missing_index(path):
+    os.remove(path + INDEX_SUFFIX)
+    with RecordFile(path) as records:
+        assert records.page(2, 2) == RECORDS[2:4]
+
+
+def test_file_without_trailer(tmp_path):
+    # 没有尾部的旧格式文件按换行符扫描
+    path = str(tmp_path / "plain.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"a": 1}\n{"a": 2}\n')
+    with RecordFile(path) as records:
+        assert list(records) == [{"a": 1}, {"a": 2}]
+
+
+def test_no_temp_files_left(path, tmp_path):
+    assert sorted(os.listdir(tmp_path)) == ["requirements.jsonl", "requirements.jsonl" + INDEX_SUFFIX]
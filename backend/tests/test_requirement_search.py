@@ -0,0 +1,58 @@
+"""
+需求写入和全文搜索测试
+"""
+import pytest
+
+from app.database import create_db_engine
+from app.projectManagement.requirement_store import RequirementStore
+
+
+@pytest.fixture
+def store(pm_db_path):
+    engine = create_db_engine(f"sqlite:///{pm_db_path}")
+    yield RequirementStore(engine, flush_interval=0.05)
+    engine.dispose()
+
+
+def _requirements(prefix):
+    return [{"name": f"{prefix}登录功能", "chapter": "3.1", "content": f"{prefix} system shall support password login"}]
+
+
+def test_failed_item_does_not_drop_batch(store, monkeypatch, pm_client):
+    write_requirements = RequirementStore._write_requirements
+
+    def failing_write(self, conn, session_id, file_id, requirements):
+        # 先写入部分数据再失败：这些数据必须随保存点一起回滚
+        write_requirements(self, conn, session_id, file_id, requirements)
+        if session_id == "bad":
+            raise RuntimeError("bad item")
+
+    monkeypatch.setattr(RequirementStore, "_write_requirements", failing_write)
+    # 在写入线程取走之前全部入队，保证它们在同一批中写入
+    with store._write_lock:
+        store.record_requirements("first", None, _requirements("alpha"))
+        store.record_requirements("bad", None, _requirements("broken"))
+        store.record_requirements("last", None, _requirements("omega"))
+    store.flush()
+
+    def hits(q):
+        response = pm_client.get("/search/requirements", params={"q": q})
+        assert response.status_code == 200
+        return [hit["name"] for hit in response.json()]
+
+    assert hits("alpha") == ["alpha登录功能"]
+    assert hits("omega") == ["omega登录功能"]
+    assert hits("broken") == []
+
+
+@pytest.mark.parametrize("path", ["/search/requirements", "/search/findings"])
+@pytest.mark.parametrize("q", [" ", "   \t "])
+def test_blank_query_is_rejected(pm_client, path, q):
+    assert pm_client.get(path, params={"q": q}).status_code == 422
+
+
+def test_query_is_stripped(store, pm_client):
+    store.record_requirements("s1", None, _requirements("gamma"))
+    store.flush()
+    response = pm_client.get("/search/requirements", params={"q": "  gamma  "})
+    assert [hit["name"] for hit in response.json()] == ["gamma登录功能"]
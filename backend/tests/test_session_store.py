@@ -0,0 +1,46 @@
+"""
+会话存储测试：读取返回的数据是独立的副本，修改后不保存不会影响后续读取
+"""
+import pytest
+
+from app.documentReview.common.session_store import MemorySessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore()
+    return SQLiteSessionStore(str(tmp_path / "sessions.db"))
+
+
+def test_modifying_read_data_does_not_change_store(store):
+    store.save("s1", {"requirements": [{"name": "需求1"}]})
+    data = store.get("s1")
+    data["requirements"].append({"name": "未保存"})
+    data["file_id"] = "f1"
+    # 第二次读取命中缓存
+    assert store.get("s1") == {"requirements": [{"name": "需求1"}]}
+
+
+def test_modifying_saved_data_after_save(store):
+    data = {"requirements": []}
+    store.save("s1", data)
+    data["requirements"].append({"name": "未保存"})
+    assert store.get("s1") == {"requirements": []}
+
+
+def test_modifying_update_result(store):
+    store.save("s1", {"a": [1]})
+    data = store.update("s1", {"b": 2})
+    data["a"].append(3)
+    assert store.get("s1") == {"a": [1], "b": 2}
+
+
+def test_other_process_sees_saved_data(tmp_path):
+    first = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    second = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    first.save("s1", {"value": 1})
+    assert second.get("s1") == {"value": 1}
+    second.update("s1", {"value": 2})
+    assert first.get("s1") == {"value": 2}
+    assert dict(first.iter_active()) == {"s1": {"value": 2}}
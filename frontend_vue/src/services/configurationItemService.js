@@ -1,5 +1,6 @@
 // 配置项测试服务
 import axios from 'axios';
+import { waitForJob } from './jobService';
 
 const API_BASE_URL = 'http://localhost:5002/api';
 
@@ -87,7 +88,8 @@ export const configurationItemService = {
         session_id: data.session_id
       });
       
-      return response.data;
+      // 提交后台任务后等待完成
+      return await waitForJob(response.data, API_BASE_URL);
     } catch (error) {
       console.error('审查需求错误:', error);
       throw error;
@@ -173,7 +175,8 @@ export const configurationItemService = {
         requirement_names: requirementNames || [],
         model: model
       });
-      return response.data;
+      // 提交后台任务后等待完成
+      return await waitForJob(response.data, API_BASE_URL);
     } catch (error) {
       console.error('AI提取需求详情错误:', error);
       throw error;
@@ -224,7 +227,8 @@ export const configurationItemService = {
         requirement_level: params.requirement_level || 3,
         model: params.model || null
       });
-      return response.data;
+      // 提交后台任务后等待完成
+      return await waitForJob(response.data, API_BASE_URL);
     } catch (error) {
       console.error('直接AI提取需求错误:', error);
       throw error;
@@ -0,0 +1,44 @@
+// 后台任务服务
+import axios from 'axios';
+
+// 查询任务状态的间隔（毫秒）
+const POLL_INTERVAL = 1000;
+
+const FINISHED_STATUSES = ['succeeded', 'failed', 'cancelled'];
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// 等待提取、审查等接口提交的后台任务完成，返回任务结果（与原同步接口的响应相同）
+// submitted: 提交接口的响应数据；不含job_id时（如直接复用的提取结果）原样返回
+// baseUrl: 提交接口所在的API地址，用于拼出任务状态地址
+// onProgress: 可选，每次查询后调用 onProgress(job)
+export const waitForJob = async (submitted, baseUrl, onProgress = null) => {
+  if (!submitted || !submitted.job_id) {
+    return submitted;
+  }
+  const statusUrl = new URL(submitted.status_url, baseUrl).href;
+  for (;;) {
+    const { data: job } = await axios.get(statusUrl);
+    if (onProgress) {
+      onProgress(job);
+    }
+    if (FINISHED_STATUSES.includes(job.status)) {
+      if (job.status === 'succeeded') {
+        return job.result;
+      }
+      // 与axios请求失败时的错误结构一致，调用方可以从error.response.data.error读取错误信息
+      const error = new Error(job.error || (job.status === 'cancelled' ? '任务已取消' : '任务执行失败'));
+      error.response = { status: 500, data: { success: false, error: error.message, job } };
+      throw error;
+    }
+    await sleep(POLL_INTERVAL);
+  }
+};
+
+// 取消后台任务
+export const cancelJob = async (submitted, baseUrl) => {
+  const response = await axios.post(new URL(submitted.cancel_url, baseUrl).href);
+  return response.data;
+};
+
+export default { waitForJob, cancelJob };
@@ -1,5 +1,6 @@
 // 回归测试服务
 import axios from 'axios';
+import { waitForJob } from './jobService';
 
 // 定义API基础URL - 回归测试专用
 const API_BASE_URL = 'http://localhost:5002/regression/api';
@@ -55,7 +56,8 @@ export const regressionService = {
         catalog_file_id: catalogFileId,
         catalog_file_name: catalogFileName
       });
-      return response.data;
+      // 提交后台任务后等待完成
+      return await waitForJob(response.data, API_BASE_URL);
     } catch (error) {
       console.error('提取需求详情错误:', error);
       throw error;
@@ -72,7 +74,8 @@ export const regressionService = {
         requirement_names: requirementNames,
         model: model
       });
-      return response.data;
+      // 提交后台任务后等待完成
+      return await waitForJob(response.data, API_BASE_URL);
     } catch (error) {
       console.error('AI提取需求详情错误:', error);
       throw error;
@@ -90,7 +93,8 @@ export const regressionService = {
         requirements: requirementsArray,
         session_id: sessionId || 'default'
       });
-      return response.data;
+      // 提交后台任务后等待完成
+      return await waitForJob(response.data, API_BASE_URL);
     } catch (error) {
       console.error('审查需求错误:', error);
       throw error;